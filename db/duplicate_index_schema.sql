@@ -0,0 +1,49 @@
+-- 近似重複検知（MinHash/LSH）のスキーマ
+
+-- ナレッジごとのMinHash署名（タイトル+内容のシングル集合から計算）
+CREATE TABLE IF NOT EXISTS knowledge_minhash (
+    knowledge_id INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL, -- 64bit符号なし整数 × num_perm（リトルエンディアン）
+    num_perm INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (knowledge_id) REFERENCES knowledge_entries(id) ON DELETE CASCADE
+);
+
+-- 再投稿検知用フィンガープリント（完全一致ハッシュ + 64bit SimHash）
+CREATE TABLE IF NOT EXISTS knowledge_fingerprints (
+    knowledge_id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL, -- 正規化済みタイトル・内容のSHA-256
+    simhash INTEGER NOT NULL, -- 符号付き64bitとして保存
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (knowledge_id) REFERENCES knowledge_entries(id) ON DELETE CASCADE
+);
+
+-- SimHashのブロック（ハミング距離の近い候補を索引で引くため）
+CREATE TABLE IF NOT EXISTS knowledge_simhash_blocks (
+    block INTEGER NOT NULL, -- ブロック番号
+    value INTEGER NOT NULL, -- ブロックの値
+    knowledge_id INTEGER NOT NULL,
+    PRIMARY KEY (block, value, knowledge_id),
+    FOREIGN KEY (knowledge_id) REFERENCES knowledge_entries(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_fingerprint_content_hash ON knowledge_fingerprints(content_hash);
+CREATE INDEX IF NOT EXISTS idx_simhash_blocks_knowledge ON knowledge_simhash_blocks(knowledge_id);
+
+-- タイトル・内容が更新されたら署名・フィンガープリントを破棄（次回同期時に再計算）
+CREATE TRIGGER IF NOT EXISTS knowledge_minhash_invalidate
+AFTER UPDATE OF title, content ON knowledge_entries
+BEGIN
+    DELETE FROM knowledge_minhash WHERE knowledge_id = old.id;
+    DELETE FROM knowledge_fingerprints WHERE knowledge_id = old.id;
+    DELETE FROM knowledge_simhash_blocks WHERE knowledge_id = old.id;
+END;
+
+-- 外部キー制約が無効な接続でも削除に追従させる
+CREATE TRIGGER IF NOT EXISTS knowledge_minhash_delete
+AFTER DELETE ON knowledge_entries
+BEGIN
+    DELETE FROM knowledge_minhash WHERE knowledge_id = old.id;
+    DELETE FROM knowledge_fingerprints WHERE knowledge_id = old.id;
+    DELETE FROM knowledge_simhash_blocks WHERE knowledge_id = old.id;
+END;
@@ -0,0 +1,70 @@
+-- FAQ機能のスキーマ
+
+-- FAQテーブル
+CREATE TABLE IF NOT EXISTS faq_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    category TEXT,
+    tags TEXT, -- JSON形式で保存
+    knowledge_id INTEGER, -- 元ナレッジ（任意）
+    view_count INTEGER DEFAULT 0,
+    helpful_count INTEGER DEFAULT 0,
+    not_helpful_count INTEGER DEFAULT 0,
+    status TEXT DEFAULT 'active' CHECK(status IN ('active', 'archived', 'draft')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_by TEXT,
+    -- 検索用の正規化テキスト（FAQClientが書き込み時に設定）
+    question_norm TEXT,
+    answer_norm TEXT
+);
+
+-- FAQフィードバックテーブル
+CREATE TABLE IF NOT EXISTS faq_feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    faq_id INTEGER NOT NULL,
+    is_helpful BOOLEAN NOT NULL,
+    comment TEXT,
+    user_id TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (faq_id) REFERENCES faq_entries(id) ON DELETE CASCADE
+);
+
+-- インデックス作成
+CREATE INDEX IF NOT EXISTS idx_faq_status_helpful ON faq_entries(status, helpful_count DESC, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_faq_category ON faq_entries(category);
+CREATE INDEX IF NOT EXISTS idx_faq_feedback_faq ON faq_feedback(faq_id);
+
+-- 全文検索用の仮想テーブル（FTS5）
+-- trigram トークナイザで日本語の部分一致（3文字以上）をインデックス検索する
+-- 入力どおりの列と正規化した列の両方を索引し、クエリは両方の表記で照合する
+CREATE VIRTUAL TABLE IF NOT EXISTS faq_fts USING fts5(
+    question,
+    answer,
+    question_norm,
+    answer_norm,
+    content='faq_entries',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+-- FTS同期トリガー
+CREATE TRIGGER IF NOT EXISTS faq_fts_insert AFTER INSERT ON faq_entries BEGIN
+    INSERT INTO faq_fts(rowid, question, answer, question_norm, answer_norm)
+    VALUES (new.id, new.question, new.answer, new.question_norm, new.answer_norm);
+END;
+
+CREATE TRIGGER IF NOT EXISTS faq_fts_delete AFTER DELETE ON faq_entries BEGIN
+    INSERT INTO faq_fts(faq_fts, rowid, question, answer, question_norm, answer_norm)
+    VALUES ('delete', old.id, old.question, old.answer, old.question_norm, old.answer_norm);
+END;
+
+-- 閲覧数・評価カウントの更新では再インデックスしない
+CREATE TRIGGER IF NOT EXISTS faq_fts_update
+    AFTER UPDATE OF question, answer, question_norm, answer_norm ON faq_entries BEGIN
+    INSERT INTO faq_fts(faq_fts, rowid, question, answer, question_norm, answer_norm)
+    VALUES ('delete', old.id, old.question, old.answer, old.question_norm, old.answer_norm);
+    INSERT INTO faq_fts(rowid, question, answer, question_norm, answer_norm)
+    VALUES (new.id, new.question, new.answer, new.question_norm, new.answer_norm);
+END;
@@ -0,0 +1,25 @@
+-- バックグラウンドジョブキューのスキーマ
+
+-- ジョブ（時刻はUNIX時刻・秒）
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, -- UUID（状態確認APIで使うため推測されにくい値）
+    job_type TEXT NOT NULL,
+    payload TEXT NOT NULL, -- JSON形式
+    idempotency_key TEXT UNIQUE, -- 同じキーの再投入は既存ジョブを返す
+    status TEXT NOT NULL DEFAULT 'queued'
+        CHECK(status IN ('queued', 'running', 'completed', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    progress TEXT, -- JSON形式（最新フェーズと、再試行時に引き継ぐ情報）
+    result TEXT, -- JSON形式
+    error TEXT,
+    locked_by TEXT, -- 実行中のワーカー
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL, -- 再試行の待機中はこの時刻まで取得しない
+    started_at REAL, -- 初回の実行開始
+    heartbeat_at REAL, -- 実行中の生存確認（途絶えたジョブは再投入）
+    finished_at REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_status_available ON jobs(status, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
@@ -17,7 +17,8 @@ CREATE TABLE IF NOT EXISTS knowledge_entries (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     created_by TEXT,
-    updated_by TEXT
+    updated_by TEXT,
+    search_text TEXT -- 検索用の正規化テキスト（タイトル＋本文、SQLiteClientが書き込み時に設定）
 );
 
 -- ナレッジ間の関係テーブル
@@ -76,7 +77,7 @@ CREATE TABLE IF NOT EXISTS subagent_logs (
     input_data TEXT, -- JSON形式
     output_data TEXT, -- JSON形式
     execution_time_ms INTEGER,
-    status TEXT CHECK(status IN ('success', 'failed', 'warning')),
+    status TEXT CHECK(status IN ('success', 'failed', 'warning', 'timeout')),
     message TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (workflow_execution_id) REFERENCES workflow_executions(id) ON DELETE CASCADE
@@ -173,6 +174,7 @@ CREATE INDEX IF NOT EXISTS idx_subagent_workflow ON subagent_logs(workflow_execu
 CREATE INDEX IF NOT EXISTS idx_hook_workflow ON hook_logs(workflow_execution_id);
 CREATE INDEX IF NOT EXISTS idx_duplicate_knowledge ON duplicate_checks(knowledge_id);
 CREATE INDEX IF NOT EXISTS idx_duplicate_score ON duplicate_checks(similarity_score DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_duplicate_pair ON duplicate_checks(knowledge_id, potential_duplicate_id);
 CREATE INDEX IF NOT EXISTS idx_deviation_knowledge ON deviation_checks(knowledge_id);
 CREATE INDEX IF NOT EXISTS idx_deviation_status ON deviation_checks(status);
 CREATE INDEX IF NOT EXISTS idx_search_created ON search_history(created_at DESC);
@@ -190,17 +192,23 @@ CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_fts USING fts5(
 );
 
 -- FTS5同期用トリガー
+-- 外部コンテンツテーブルの索引は 'delete' コマンドに更新前の値を渡して削除する
+-- （DELETE FROM は更新後の行から索引を削除しようとして索引が壊れる）
+-- 更新は索引対象の列に限る（updated_at の自動更新で更新後の値を old として再実行させない）
 CREATE TRIGGER IF NOT EXISTS knowledge_fts_insert AFTER INSERT ON knowledge_entries BEGIN
     INSERT INTO knowledge_fts(rowid, title, summary_technical, summary_non_technical, content)
     VALUES (new.id, new.title, new.summary_technical, new.summary_non_technical, new.content);
 END;
 
 CREATE TRIGGER IF NOT EXISTS knowledge_fts_delete AFTER DELETE ON knowledge_entries BEGIN
-    DELETE FROM knowledge_fts WHERE rowid = old.id;
+    INSERT INTO knowledge_fts(knowledge_fts, rowid, title, summary_technical, summary_non_technical, content)
+    VALUES ('delete', old.id, old.title, old.summary_technical, old.summary_non_technical, old.content);
 END;
 
-CREATE TRIGGER IF NOT EXISTS knowledge_fts_update AFTER UPDATE ON knowledge_entries BEGIN
-    DELETE FROM knowledge_fts WHERE rowid = old.id;
+CREATE TRIGGER IF NOT EXISTS knowledge_fts_update
+    AFTER UPDATE OF title, summary_technical, summary_non_technical, content ON knowledge_entries BEGIN
+    INSERT INTO knowledge_fts(knowledge_fts, rowid, title, summary_technical, summary_non_technical, content)
+    VALUES ('delete', old.id, old.title, old.summary_technical, old.summary_non_technical, old.content);
     INSERT INTO knowledge_fts(rowid, title, summary_technical, summary_non_technical, content)
     VALUES (new.id, new.title, new.summary_technical, new.summary_non_technical, new.content);
 END;
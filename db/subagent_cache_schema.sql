@@ -0,0 +1,12 @@
+-- サブエージェント結果キャッシュのスキーマ（永続化する場合のみ使用）
+
+-- 入力のハッシュごとの結果（時刻はUNIX時刻・秒）
+CREATE TABLE IF NOT EXISTS subagent_result_cache (
+    cache_key TEXT PRIMARY KEY, -- SHA-256(クラスパス, バージョン, 参照する入力)
+    subagent_name TEXT NOT NULL,
+    result TEXT NOT NULL, -- JSON形式（SubAgentResult.to_dict()）
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_subagent_result_cache_used ON subagent_result_cache(last_used_at);
@@ -0,0 +1,19 @@
+-- ワークフローのトレース（処理区間）のスキーマ
+
+-- スパン（時刻はUNIX時刻・秒）
+CREATE TABLE IF NOT EXISTS workflow_spans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    workflow_execution_id INTEGER NOT NULL,
+    trace_id TEXT NOT NULL,
+    span_id TEXT NOT NULL,
+    parent_span_id TEXT, -- ルートスパンは NULL
+    name TEXT NOT NULL,
+    start_time REAL NOT NULL,
+    duration_ms REAL NOT NULL,
+    cpu_ms REAL, -- 開始したスレッドのCPU時間（別のスレッドで終了したスパンは NULL）
+    status TEXT NOT NULL DEFAULT 'ok', -- ok / error / timeout
+    thread_name TEXT,
+    attributes TEXT -- JSON形式
+);
+
+CREATE INDEX IF NOT EXISTS idx_workflow_spans_execution ON workflow_spans(workflow_execution_id, start_time);
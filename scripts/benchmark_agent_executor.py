@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+SubAgentExecutor 呼び出しオーバーヘッド マイクロベンチマーク
+
+execute() のたびにエージェントを動的インポート・生成する従来方式と、
+class_name ごとに生成済みのインスタンスを使い回す方式を比較する。
+エージェントごとの生成コスト（従来方式で毎回かかっていた分）も計測する。
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# モジュールパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.agents.executor import SubAgentExecutor
+
+INPUT_DATA = {
+    "title": "本番Webサーバー障害（DBコネクション枯渇）",
+    "content": (
+        "本番環境のnginxで upstream timed out が多発した。"
+        "原因はMySQLのコネクションプール枯渇。アプリサーバーを再起動して復旧した。"
+    ),
+    "itsm_type": "Incident",
+}
+
+
+def measure(fn, iterations: int, before=None) -> dict:
+    """実行時間を計測（ミリ秒）"""
+    samples = []
+    for _ in range(iterations):
+        if before:
+            before()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+    }
+
+
+def main():
+    """メイン実行"""
+    parser = argparse.ArgumentParser(description="SubAgentExecutorの呼び出しオーバーヘッドのベンチマーク")
+    parser.add_argument("--iterations", type=int, default=50, help="計測回数")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    # エージェントの実行ログで計測結果が埋もれないようにする
+    logging.disable(logging.INFO)
+
+    executor = SubAgentExecutor()
+    agents = [
+        (agent_id, agent)
+        for agent_id, agent in executor.loader.get_all_agents().items()
+        if agent.enabled and agent.class_name
+    ]
+
+    results = []
+    for agent_id, agent in agents:
+        run = lambda: executor.execute(agent_id, INPUT_DATA)  # noqa: E731
+        # 従来方式: 毎回キャッシュを破棄し、実行のたびにインスタンスを生成する
+        legacy = measure(run, args.iterations, before=executor.clear_instance_cache)
+        executor._get_agent_instance(agent)
+        cached = measure(run, args.iterations)
+        instantiate = measure(lambda: executor._load_agent_instance(agent), args.iterations)
+        results.append(
+            {
+                "agent": agent_id,
+                "legacy": legacy,
+                "cached": cached,
+                "instantiate": instantiate,
+                "overhead_saved_ms": round(legacy["median_ms"] - cached["median_ms"], 3),
+                "speedup": round(legacy["median_ms"] / cached["median_ms"], 2),
+            }
+        )
+    executor.shutdown()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print("=" * 80)
+    print("SubAgentExecutor ベンチマーク（execute() 1回あたり、中央値）")
+    print("=" * 80)
+    print(f"{'エージェント':<20} {'従来方式(ms)':>12} {'キャッシュ(ms)':>14} {'生成(ms)':>9} {'高速化':>7}")
+    for r in results:
+        print(
+            f"{r['agent']:<24} {r['legacy']['median_ms']:>14.3f} "
+            f"{r['cached']['median_ms']:>16.3f} {r['instantiate']['median_ms']:>11.3f} "
+            f"{r['speedup']:>8.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
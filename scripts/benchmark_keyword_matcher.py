@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+キーワードマッチャー マイクロベンチマーク
+
+長文インシデントレポートに対して、各コンポーネントが個別に
+any(kw in text for kw in keywords) を繰り返す従来方式と、
+共有Aho-Corasickオートマトンで1回だけ走査する方式を比較する。
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# モジュールパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.itsm_classifier import ITSMClassifier
+from src.subagents.coordinator import CoordinatorSubAgent
+from src.subagents.devops import DevOpsSubAgent
+from src.subagents.knowledge_curator import KnowledgeCuratorSubAgent
+from src.utils.keyword_matcher import get_keyword_registry
+
+REPORT_PARAGRAPHS = [
+    "2024年10月15日 09:12 に本番環境のWebサーバー群で障害が発生しました。",
+    "監視システムからアラートが通知され、nginx の upstream timed out エラーが多数記録されていました。",
+    "調査の結果、データベースのコネクションプールが枯渇しており、MySQL のスロークエリが原因と特定しました。",
+    "The on-call engineer restarted the application servers and drained the load balancer pool.",
+    "Customers reported intermittent 503 responses from the API gateway during the incident window.",
+    "暫定対策としてコネクション数の上限を引き上げ、影響範囲は社内ポータルと顧客向けAPIでした。",
+    "担当者: 運用チーム 山田。復旧時刻 10:47。恒久対策として該当クエリのインデックスを追加予定です。",
+    "Root cause analysis is ongoing; a change request for the index migration will be scheduled.",
+]
+
+
+def build_report(target_chars: int) -> str:
+    """指定文字数程度の長文インシデントレポートを生成"""
+    lines = []
+    length = 0
+    i = 0
+    while length < target_chars:
+        line = f"[{i:04d}] " + REPORT_PARAGRAPHS[i % len(REPORT_PARAGRAPHS)]
+        lines.append(line)
+        length += len(line) + 1
+        i += 1
+    return "\n".join(lines)
+
+
+def legacy_scan(title: str, content: str, classifier, curator, devops, coordinator):
+    """従来方式: コンポーネントごとに部分文字列検索を繰り返す"""
+    text = (title + " " + content).lower()
+    for rules in classifier.classification_rules.values():
+        sum(1 for kw in rules["primary_keywords"] if kw in text)
+        sum(1 for kw in rules["secondary_keywords"] if kw in text)
+
+    for keywords in curator.TECH_TAGS.values():
+        any(kw in text for kw in keywords)
+    for _, keywords in curator.ITSM_TYPE_TAGS["Incident"]:
+        any(kw in text for kw in keywords)
+
+    content_lower = content.lower()
+    for pattern in devops.RISK_PATTERNS:
+        any(kw in content_lower for kw in pattern["keywords"])
+
+    for keywords in coordinator._required_context_checks().values():
+        any(kw in content for kw in keywords)
+
+
+def shared_scan(title: str, content: str, classifier, curator, devops, coordinator):
+    """共有オートマトン方式: 実際のコンポーネントを呼び出す"""
+    classifier.classify(title, content)
+    curator._extract_tags(title, content, "Incident")
+    devops._analyze_technical_risks(content)
+    coordinator._find_missing_items(content, coordinator._required_context_checks())
+
+
+def measure(fn, iterations: int, before=None) -> dict:
+    """実行時間を計測（ミリ秒）"""
+    samples = []
+    for _ in range(iterations):
+        if before:
+            before()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+    }
+
+
+def main():
+    """メイン実行"""
+    parser = argparse.ArgumentParser(description="キーワードマッチャーのベンチマーク")
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000,50000,200000",
+        help="レポートの文字数（カンマ区切り）",
+    )
+    parser.add_argument("--iterations", type=int, default=30, help="計測回数")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    classifier = ITSMClassifier()
+    curator = KnowledgeCuratorSubAgent()
+    devops = DevOpsSubAgent()
+    coordinator = CoordinatorSubAgent()
+    registry = get_keyword_registry()
+    title = "本番Webサーバー障害（DBコネクション枯渇）"
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        content = build_report(size)
+        components = (classifier, curator, devops, coordinator)
+
+        legacy = measure(lambda: legacy_scan(title, content, *components), args.iterations)
+        # 毎回キャッシュをクリアし、初めて見る文書を処理する状況で計測
+        shared = measure(
+            lambda: shared_scan(title, content, *components),
+            args.iterations,
+            before=registry.clear_cache,
+        )
+        results.append(
+            {
+                "chars": len(content),
+                "legacy": legacy,
+                "shared": shared,
+                "speedup": round(legacy["median_ms"] / shared["median_ms"], 2),
+            }
+        )
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print("=" * 80)
+    print("キーワードマッチャー ベンチマーク（ITSM分類 + タグ抽出 + リスク分析 + 抜け漏れ確認）")
+    print("=" * 80)
+    print(f"{'文字数':>8} {'従来方式(ms)':>12} {'共有走査(ms)':>12} {'高速化':>7}")
+    for r in results:
+        print(
+            f"{r['chars']:>10} {r['legacy']['median_ms']:>14.3f} "
+            f"{r['shared']['median_ms']:>14.3f} {r['speedup']:>8.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
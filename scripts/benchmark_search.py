@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+検索 関連性・レイテンシ ベンチマーク
+
+ラベル付きクエリセット（日本語/英語のIT問い合わせ → 期待ナレッジ）を
+シード固定で生成したコーパスに対して実行し、検索モードごとに
+nDCG@10・Recall@10・レイテンシ（p50/p95/p99）・ピークメモリを計測する。
+
+検索モード:
+    like        SQLiteClient.search_knowledge（LIKE検索）
+    fts         knowledge_fts（FTS5 + bm25 順）
+    intelligent IntelligentSearchAssistant.search（AIなし・MCPはデモモード）
+
+コーパス・クエリ・シードが同じであれば関連性の数値は完全に再現されるため、
+--baseline に以前の結果JSONを渡すとレビュー時に回帰を検出できる。
+
+使い方:
+    python scripts/benchmark_search.py --output search_benchmark.json
+    python scripts/benchmark_search.py --sizes 100,1000 --baseline search_benchmark.json
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# モジュールパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.mcp.claude_mem_client import ClaudeMemClient
+from src.mcp.context7_client import Context7Client
+from src.mcp.sqlite_client import SQLiteClient
+from src.workflows.intelligent_search import IntelligentSearchAssistant
+
+DATASET_PATH = project_root / "scripts" / "search_benchmark_dataset.json"
+SCHEMA_PATH = project_root / "db" / "schema.sql"
+
+DEFAULT_SIZES = [100, 1000, 5000]
+DEFAULT_SEED = 42
+DEFAULT_REPEATS = 5
+TOP_K = 10
+MODES = ["like", "fts", "intelligent"]
+
+# 回帰判定のしきい値
+NDCG_REGRESSION_THRESHOLD = 0.01  # nDCG@10 の低下幅
+RECALL_REGRESSION_THRESHOLD = 0.01  # Recall@10 の低下幅
+LATENCY_REGRESSION_RATIO = 1.5  # p95 の悪化倍率
+LATENCY_NOISE_FLOOR_MS = 1.0  # これ未満の p95 はノイズとして比較しない
+
+# コーパスの作成日時の基準（再現性のため固定）
+BASE_CREATED_AT = datetime(2024, 1, 1, 9, 0, 0)
+
+
+# ========== データセット ==========
+
+
+def load_dataset(path: Path = DATASET_PATH) -> Dict[str, Any]:
+    """ラベル付きデータセットを読み込む"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_corpus(dataset: Dict[str, Any], size: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    ラベル付き文書とフィラー文書を混ぜたコーパスを生成
+
+    フィラーはITと無関係な社内文書で、シード付き乱数で決定的に生成する。
+    ラベル付き文書の位置もシードで決まるため、同じ引数なら同じコーパスになる。
+
+    Returns:
+        文書リスト（ラベル付き文書は 'key' を持つ）
+    """
+    documents = [dict(doc) for doc in dataset["documents"]]
+    filler = dataset["filler"]
+    rng = random.Random(seed)
+
+    for i in range(max(0, size - len(documents))):
+        dept = rng.choice(filler["departments"])
+        title = rng.choice(filler["titles"]).format(dept=dept)
+        sentences = rng.sample(filler["sentences"], k=3)
+        documents.append(
+            {
+                "key": None,
+                "title": f"{title} #{i:05d}",
+                "itsm_type": "Other",
+                "tags": [dept],
+                "summary_non_technical": sentences[0],
+                "content": " ".join(sentences),
+            }
+        )
+
+    rng.shuffle(documents)
+    return documents
+
+
+def seed_database(db_path: Path, documents: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    スキーマを適用したスクラッチDBにコーパスを一括投入
+
+    Returns:
+        ラベル付き文書のキー → ナレッジID
+    """
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        schema = f.read()
+
+    key_to_id: Dict[str, int] = {}
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.executescript(schema)
+        for index, doc in enumerate(documents):
+            created_at = (BASE_CREATED_AT + timedelta(minutes=index)).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            cursor = conn.execute(
+                """
+                INSERT INTO knowledge_entries (
+                    title, itsm_type, summary_technical, summary_non_technical,
+                    content, tags, status, created_at, updated_at, created_by
+                ) VALUES (?, ?, ?, ?, ?, ?, 'active', ?, ?, 'benchmark')
+                """,
+                (
+                    doc["title"],
+                    doc["itsm_type"],
+                    doc.get("summary_technical", ""),
+                    doc.get("summary_non_technical", ""),
+                    doc["content"],
+                    json.dumps(doc.get("tags", []), ensure_ascii=False),
+                    created_at,
+                    created_at,
+                ),
+            )
+            if doc.get("key"):
+                key_to_id[doc["key"]] = cursor.lastrowid
+        conn.commit()
+    finally:
+        conn.close()
+    return key_to_id
+
+
+# ========== 評価指標 ==========
+
+
+def dcg_at_k(gains: List[float], k: int = TOP_K) -> float:
+    """DCG@k（log2 割引）"""
+    return sum(gain / math.log2(rank + 2) for rank, gain in enumerate(gains[:k]))
+
+
+def ndcg_at_k(ranked_ids: List[int], relevance: Dict[int, int], k: int = TOP_K) -> float:
+    """
+    段階的関連度による nDCG@k
+
+    Args:
+        ranked_ids: 検索結果のID（順位順）
+        relevance: ID → 関連度（2=主回答, 1=関連）
+    """
+    ideal = dcg_at_k(sorted(relevance.values(), reverse=True), k)
+    if ideal == 0:
+        return 0.0
+    gains = [relevance.get(doc_id, 0) for doc_id in ranked_ids]
+    return dcg_at_k(gains, k) / ideal
+
+
+def recall_at_k(ranked_ids: List[int], relevance: Dict[int, int], k: int = TOP_K) -> float:
+    """Recall@k（関連度1以上をすべて正解とみなす）"""
+    relevant = {doc_id for doc_id, grade in relevance.items() if grade > 0}
+    if not relevant:
+        return 0.0
+    return len(relevant & set(ranked_ids[:k])) / len(relevant)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """最近傍順位法によるパーセンタイル（補間しないため再現性が高い）"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# ========== 検索モード ==========
+
+
+def build_search_modes(db: SQLiteClient) -> Dict[str, Callable[[str], List[int]]]:
+    """検索モード名 → クエリを受け取り上位IDを返す関数"""
+    assistant = IntelligentSearchAssistant(
+        db_client=db,
+        context7=Context7Client(auto_enable=False),
+        claude_mem=ClaudeMemClient(auto_enable=False),
+        use_ai=False,
+    )
+
+    def like_search(query: str) -> List[int]:
+        return [r["id"] for r in db.search_knowledge(query=query, limit=TOP_K)]
+
+    def fts_search(query: str) -> List[int]:
+        match = db._build_fts_match(query)
+        if not match:
+            return []
+        try:
+            with db.get_connection() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT rowid FROM knowledge_fts
+                    WHERE knowledge_fts MATCH ?
+                    ORDER BY bm25(knowledge_fts) LIMIT ?
+                    """,
+                    (match, TOP_K),
+                ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [row[0] for row in rows]
+
+    def intelligent_search(query: str) -> List[int]:
+        return [r["id"] for r in assistant.search(query)["knowledge"]]
+
+    return {"like": like_search, "fts": fts_search, "intelligent": intelligent_search}
+
+
+def evaluate_mode(
+    search_fn: Callable[[str], List[int]],
+    queries: List[Dict[str, Any]],
+    key_to_id: Dict[str, int],
+    repeats: int,
+) -> Dict[str, Any]:
+    """1つの検索モードについて関連性・レイテンシ・メモリを計測"""
+    ndcg_by_lang: Dict[str, List[float]] = {}
+    recall_by_lang: Dict[str, List[float]] = {}
+    per_query = []
+
+    # 関連性（結果は決定的なので1回だけ評価）+ ウォームアップ
+    for q in queries:
+        relevance = {key_to_id[key]: grade for key, grade in q["relevant"].items()}
+        ranked = search_fn(q["query"])
+        ndcg = ndcg_at_k(ranked, relevance)
+        recall = recall_at_k(ranked, relevance)
+        ndcg_by_lang.setdefault(q["lang"], []).append(ndcg)
+        recall_by_lang.setdefault(q["lang"], []).append(recall)
+        per_query.append(
+            {"query": q["query"], "ndcg_at_10": round(ndcg, 4), "recall_at_10": round(recall, 4)}
+        )
+
+    # レイテンシ（tracemalloc のオーバーヘッドを含めないよう別パスで計測）
+    samples = []
+    for _ in range(repeats):
+        for q in queries:
+            start = time.perf_counter()
+            search_fn(q["query"])
+            samples.append((time.perf_counter() - start) * 1000)
+
+    # ピークメモリ（Pythonヒープのみ。SQLite内部の確保は含まない）
+    tracemalloc.start()
+    try:
+        for q in queries:
+            search_fn(q["query"])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    all_ndcg = [v for values in ndcg_by_lang.values() for v in values]
+    all_recall = [v for values in recall_by_lang.values() for v in values]
+    return {
+        "ndcg_at_10": round(statistics.mean(all_ndcg), 4),
+        "recall_at_10": round(statistics.mean(all_recall), 4),
+        "by_lang": {
+            lang: {
+                "queries": len(ndcg_by_lang[lang]),
+                "ndcg_at_10": round(statistics.mean(ndcg_by_lang[lang]), 4),
+                "recall_at_10": round(statistics.mean(recall_by_lang[lang]), 4),
+            }
+            for lang in sorted(ndcg_by_lang)
+        },
+        "latency_ms": {
+            "p50": round(percentile(samples, 50), 3),
+            "p95": round(percentile(samples, 95), 3),
+            "p99": round(percentile(samples, 99), 3),
+            "mean": round(statistics.mean(samples), 3),
+            "samples": len(samples),
+        },
+        "peak_memory_kb": round(peak / 1024, 1),
+        "per_query": per_query,
+    }
+
+
+def run_benchmark(
+    sizes: List[int],
+    seed: int = DEFAULT_SEED,
+    repeats: int = DEFAULT_REPEATS,
+    modes: Optional[List[str]] = None,
+    dataset: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    全コーパスサイズ × 検索モードでベンチマークを実行
+
+    Returns:
+        {'meta': {...}, 'results': {size: {mode: metrics}}}
+    """
+    dataset = dataset or load_dataset()
+    modes = modes or MODES
+    results: Dict[str, Dict[str, Any]] = {}
+
+    for size in sizes:
+        documents = build_corpus(dataset, size, seed)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = Path(tmp_dir) / "benchmark.db"
+            key_to_id = seed_database(db_path, documents)
+            db = SQLiteClient(db_path=str(db_path))
+            search_modes = build_search_modes(db)
+            results[str(size)] = {
+                mode: evaluate_mode(search_modes[mode], dataset["queries"], key_to_id, repeats)
+                for mode in modes
+            }
+
+    return {
+        "meta": {
+            "dataset_version": dataset.get("version"),
+            "queries": len(dataset["queries"]),
+            "labeled_documents": len(dataset["documents"]),
+            "sizes": sizes,
+            "modes": modes,
+            "seed": seed,
+            "repeats": repeats,
+            "top_k": TOP_K,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+# ========== 回帰比較 ==========
+
+
+def compare_with_baseline(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    ベースライン結果と比較し、指標ごとの差分を返す
+
+    Returns:
+        差分リスト（regression=True のものが回帰）
+    """
+    deltas = []
+    for size, modes in current["results"].items():
+        for mode, metrics in modes.items():
+            base = baseline.get("results", {}).get(size, {}).get(mode)
+            if not base:
+                continue
+
+            for metric, threshold in (
+                ("ndcg_at_10", NDCG_REGRESSION_THRESHOLD),
+                ("recall_at_10", RECALL_REGRESSION_THRESHOLD),
+            ):
+                delta = metrics[metric] - base[metric]
+                deltas.append(
+                    {
+                        "size": size,
+                        "mode": mode,
+                        "metric": metric,
+                        "baseline": base[metric],
+                        "current": metrics[metric],
+                        "delta": round(delta, 4),
+                        "regression": delta < -threshold,
+                    }
+                )
+
+            base_p95 = base["latency_ms"]["p95"]
+            cur_p95 = metrics["latency_ms"]["p95"]
+            ratio = cur_p95 / base_p95 if base_p95 > 0 else 1.0
+            deltas.append(
+                {
+                    "size": size,
+                    "mode": mode,
+                    "metric": "latency_p95_ms",
+                    "baseline": base_p95,
+                    "current": cur_p95,
+                    "delta": round(ratio, 2),
+                    "regression": (
+                        cur_p95 >= LATENCY_NOISE_FLOOR_MS and ratio > LATENCY_REGRESSION_RATIO
+                    ),
+                }
+            )
+    return deltas
+
+
+# ========== レポート出力 ==========
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """結果を表形式で表示"""
+    meta = report["meta"]
+    print("=" * 80)
+    print(
+        f"🔍 検索ベンチマーク（クエリ {meta['queries']}件, seed={meta['seed']}, "
+        f"repeats={meta['repeats']}）"
+    )
+    print("=" * 80)
+    print(
+        f"{'件数':>6} {'モード':<12} {'nDCG@10':>8} {'Recall':>7} "
+        f"{'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'peak(KB)':>9}"
+    )
+    for size, modes in report["results"].items():
+        for mode, m in modes.items():
+            lat = m["latency_ms"]
+            print(
+                f"{size:>8} {mode:<14} {m['ndcg_at_10']:>8.4f} {m['recall_at_10']:>7.4f} "
+                f"{lat['p50']:>9.3f} {lat['p95']:>9.3f} {lat['p99']:>9.3f} "
+                f"{m['peak_memory_kb']:>9.1f}"
+            )
+
+
+def print_comparison(deltas: List[Dict[str, Any]]) -> None:
+    """ベースラインとの差分を表示"""
+    print()
+    print("📊 ベースラインとの比較")
+    for d in deltas:
+        mark = "❌" if d["regression"] else "✅"
+        if d["metric"] == "latency_p95_ms":
+            change = f"x{d['delta']:.2f}"
+        else:
+            change = f"{d['delta']:+.4f}"
+        print(
+            f"{mark} {d['size']:>6} {d['mode']:<12} {d['metric']:<15} "
+            f"{d['baseline']} → {d['current']} ({change})"
+        )
+
+
+def main():
+    """メイン実行"""
+    parser = argparse.ArgumentParser(description="検索の関連性・レイテンシベンチマーク")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="コーパスの文書数（カンマ区切り）",
+    )
+    parser.add_argument("--modes", default=",".join(MODES), help="検索モード（カンマ区切り）")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="レイテンシ計測の繰り返し回数")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="コーパス生成の乱数シード")
+    parser.add_argument("--output", help="結果JSONの出力先")
+    parser.add_argument("--baseline", help="比較するベースライン結果JSON")
+    args = parser.parse_args()
+
+    modes = [m for m in args.modes.split(",") if m]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"未知の検索モード: {', '.join(sorted(unknown))}")
+
+    report = run_benchmark(
+        sizes=[int(s) for s in args.sizes.split(",")],
+        seed=args.seed,
+        repeats=args.repeats,
+        modes=modes,
+    )
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 結果を保存しました: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        deltas = compare_with_baseline(report, baseline)
+        print_comparison(deltas)
+        if any(d["regression"] for d in deltas):
+            print("\n❌ 回帰を検出しました")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+コーパス全体の重複検出・クラスタリング バッチ
+
+既存データ（一括インポートした過去チケットなど）を対象に、近似重複を検出して
+duplicate_checks に status='pending' で記録する。記録した行は通常の
+重複検知結果と同じく、レビュー（confirmed/dismissed）の対象になる。
+
+処理の流れ:
+    1. signatures  署名・フィンガープリントをプロセスプールで計算し、
+                   knowledge_minhash / knowledge_fingerprints に保存
+                   （オンラインの近似重複インデックスと同じテーブル）
+    2. clustering  LSHバンドで候補を絞り込み、推定Jaccard係数が閾値以上の組を
+                   Union-Findでクラスタにまとめる
+    3. writing     クラスタ内で閾値を超えた組（新しいナレッジ → 古いナレッジ）を
+                   duplicate_checks に一括記録（check_type='content'）
+
+進捗はチェックポイントファイルに保存し、中断後は続きから再開する。
+署名は計算済みのものを再利用するため、再実行時は新規・更新分のみ計算する。
+
+使い方:
+    python scripts/dedup_corpus.py --db db/knowledge.db --workers 8
+    python scripts/dedup_corpus.py --db db/knowledge.db --threshold 0.85 --dry-run
+    python scripts/dedup_corpus.py --db db/knowledge.db --reset
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# モジュールパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.duplicate_index import NearDuplicateIndex, compute_entry
+from src.mcp.sqlite_client import SQLiteClient
+from src.utils.minhash import DEFAULT_BANDS, DEFAULT_NUM_PERM, MinHasher
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_CHUNK_SIZE = 1000
+# duplicate_checks の一括書き込み件数
+WRITE_BATCH_SIZE = 5000
+CHECK_TYPE = "content"
+# バケット内で総当たり比較する件数の上限（超えるバケットは直前の同数件とだけ比較する）
+MAX_BUCKET_PAIRWISE = 100
+
+
+# ========== チェックポイント ==========
+
+
+def default_checkpoint_path(db_path: str) -> str:
+    return f"{db_path}.dedup_checkpoint.json"
+
+
+def new_checkpoint(threshold: float) -> Dict[str, Any]:
+    return {
+        "phase": "signatures",
+        "last_id": 0,
+        "signatures_computed": 0,
+        "clusters_written": 0,
+        "rows_written": 0,
+        "threshold": threshold,
+        "num_perm": DEFAULT_NUM_PERM,
+        "started_at": datetime.now().isoformat(),
+        "updated_at": None,
+    }
+
+
+def load_checkpoint(path: str, threshold: float) -> Dict[str, Any]:
+    """
+    チェックポイントを読み込む
+
+    前回の実行が完了している場合は新しい実行として始める（計算済みの署名と
+    記録済みの組み合わせは再利用・スキップされるため、増分だけが処理される）。
+    閾値が変わった場合は署名を再利用し、クラスタリングからやり直す。
+    """
+    if not Path(path).exists():
+        return new_checkpoint(threshold)
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("num_perm") != DEFAULT_NUM_PERM or checkpoint.get("phase") == "done":
+        return new_checkpoint(threshold)
+    if checkpoint.get("threshold") != threshold and checkpoint["phase"] != "signatures":
+        print(
+            "⚠️  閾値が変更されたため、クラスタリングからやり直します "
+            f"({checkpoint.get('threshold')} → {threshold})"
+        )
+        checkpoint.update(
+            phase="clustering", clusters_written=0, rows_written=0, threshold=threshold
+        )
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    """チェックポイントを保存（書き込み途中で中断しても壊れないよう置き換える）"""
+    checkpoint["updated_at"] = datetime.now().isoformat()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ========== 1. 署名計算 ==========
+
+
+def compute_chunk(
+    rows: List[Tuple[int, str, str]], num_perm: int = DEFAULT_NUM_PERM
+) -> List[Tuple[int, Tuple[int, ...], Dict[str, Any]]]:
+    """ワーカープロセス: ナレッジのチャンクの署名・フィンガープリントを計算"""
+    hasher = MinHasher(num_perm)
+    return [compute_entry(hasher, *row) for row in rows]
+
+
+def iter_pending_chunks(
+    db: SQLiteClient, since_id: int, chunk_size: int, recompute: bool
+) -> Iterator[List[Tuple[int, str, str]]]:
+    """署名が未計算のナレッジをID順にチャンクで返す"""
+    sql = """
+        SELECT k.id, k.title, k.content
+        FROM knowledge_entries k
+        LEFT JOIN knowledge_minhash m
+            ON m.knowledge_id = k.id AND m.num_perm = ?
+        LEFT JOIN knowledge_fingerprints f ON f.knowledge_id = k.id
+        WHERE k.id > ?
+    """
+    if not recompute:
+        sql += " AND (m.knowledge_id IS NULL OR f.knowledge_id IS NULL)"
+    sql += " ORDER BY k.id"
+
+    conn = db.get_connection()
+    try:
+        cursor = conn.execute(sql, (DEFAULT_NUM_PERM, since_id))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [(row[0], row[1] or "", row[2] or "") for row in rows]
+    finally:
+        conn.close()
+
+
+def compute_signatures(
+    db: SQLiteClient,
+    index: NearDuplicateIndex,
+    checkpoint: Dict[str, Any],
+    checkpoint_path: str,
+    workers: int,
+    chunk_size: int,
+    recompute: bool,
+) -> Dict[str, Any]:
+    """
+    署名をプロセスプールで計算して保存
+
+    チャンクは投入順に保存し、保存のたびに最終IDをチェックポイントに記録する。
+    """
+    started = time.perf_counter()
+    computed = 0
+    chunks = iter_pending_chunks(db, checkpoint["last_id"], chunk_size, recompute)
+
+    def store(entries):
+        nonlocal computed
+        index.store_entries(entries)
+        computed += len(entries)
+        checkpoint["last_id"] = entries[-1][0]
+        checkpoint["signatures_computed"] += len(entries)
+        save_checkpoint(checkpoint_path, checkpoint)
+        elapsed = time.perf_counter() - started
+        print(
+            f"  … {checkpoint['signatures_computed']}件 "
+            f"(ID≦{checkpoint['last_id']}, {computed / elapsed:.0f}件/秒)",
+            flush=True,
+        )
+
+    if workers <= 1:
+        for chunk in chunks:
+            store(compute_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 投入中のチャンク数を抑えてメモリを一定に保つ
+            pending: List[Any] = []
+            for chunk in chunks:
+                pending.append(executor.submit(compute_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    store(pending.pop(0).result())
+            for future in pending:
+                store(future.result())
+
+    elapsed = time.perf_counter() - started
+    return {
+        "computed": computed,
+        "seconds": round(elapsed, 2),
+        "docs_per_second": round(computed / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+# ========== 2. クラスタリング ==========
+
+
+class UnionFind:
+    """Union-Find（代表は集合内の最小ID）"""
+
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+
+    def find(self, x: int) -> int:
+        root = self.parent.setdefault(x, x)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # 経路圧縮
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            low, high = sorted((root_a, root_b))
+            self.parent[high] = low
+
+    def groups(self) -> List[List[int]]:
+        """要素数2以上の集合（代表ID順、各集合はID順）"""
+        members: Dict[int, List[int]] = defaultdict(list)
+        for x in self.parent:
+            members[self.find(x)].append(x)
+        return [sorted(m) for _, m in sorted(members.items()) if len(m) > 1]
+
+
+def estimate_similarity(sig1: bytes, sig2: bytes) -> float:
+    """保存形式の署名同士の推定Jaccard係数"""
+    a = memoryview(sig1).cast("Q")
+    b = memoryview(sig2).cast("Q")
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a) if len(a) else 0.0
+
+
+def load_signatures(db: SQLiteClient) -> Dict[int, bytes]:
+    """有効なナレッジの署名を読み込む（保存形式のまま保持）"""
+    with db.get_connection() as conn:
+        cursor = conn.execute(
+            """
+            SELECT m.knowledge_id, m.signature
+            FROM knowledge_minhash m
+            JOIN knowledge_entries k ON k.id = m.knowledge_id
+            WHERE m.num_perm = ? AND k.status = 'active'
+            ORDER BY m.knowledge_id
+            """,
+            (DEFAULT_NUM_PERM,),
+        )
+        return {row[0]: bytes(row[1]) for row in cursor}
+
+
+def cluster_signatures(
+    signatures: Dict[int, bytes],
+    threshold: float = DEFAULT_THRESHOLD,
+    bands: int = DEFAULT_BANDS,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    LSH + Union-Find で近似重複をクラスタリング
+
+    バンドごとに同じバケットに入ったナレッジ同士を比較し、閾値以上なら結合する。
+    バケット内は総当たりで比較するため、代表と似ていない組（{A, B, C} で
+    B〜C のみ類似）も直接の組として記録される。MAX_BUCKET_PAIRWISE 件を
+    超えるバケットは、ID順に直前の MAX_BUCKET_PAIRWISE 件とだけ比較する
+    （比較回数は件数に線形、離れたIDの組は他のバンドで一致すれば拾われる）。
+    同じ組み合わせは1度だけ比較する。
+
+    Returns:
+        (クラスタのリスト, 統計)
+        クラスタは {'members': [ID...], 'pairs': [(新しいID, 古いID, 推定Jaccard係数)...]}
+        で、代表（最小ID）の順に並ぶ
+    """
+    stats = {"candidate_pairs": 0, "matched_pairs": 0, "oversized_buckets": 0}
+    if not signatures:
+        return [], stats
+
+    band_bytes = len(next(iter(signatures.values()))) // bands
+    uf = UnionFind()
+    compared = set()
+    matched: List[Tuple[int, int, float]] = []
+
+    for band in range(bands):
+        start = band * band_bytes
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        for knowledge_id, signature in signatures.items():
+            buckets[signature[start : start + band_bytes]].append(knowledge_id)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) > MAX_BUCKET_PAIRWISE:
+                stats["oversized_buckets"] += 1
+            for i, member in enumerate(members):
+                for other in members[max(0, i - MAX_BUCKET_PAIRWISE) : i]:
+                    pair = (min(member, other), max(member, other))
+                    if pair in compared:
+                        continue
+                    compared.add(pair)
+                    stats["candidate_pairs"] += 1
+                    score = estimate_similarity(signatures[member], signatures[other])
+                    if score >= threshold:
+                        matched.append((pair[1], pair[0], round(score, 3)))
+                        uf.union(member, other)
+    stats["matched_pairs"] = len(matched)
+
+    pairs_by_root: Dict[int, List[Tuple[int, int, float]]] = defaultdict(list)
+    for pair in matched:
+        pairs_by_root[uf.find(pair[1])].append(pair)
+    clusters = [
+        {"members": members, "pairs": sorted(pairs_by_root[members[0]])}
+        for members in uf.groups()
+    ]
+    return clusters, stats
+
+
+# ========== 3. 書き込み ==========
+
+
+def write_duplicate_checks(
+    db: SQLiteClient,
+    clusters: List[Dict[str, Any]],
+    checkpoint: Dict[str, Any],
+    checkpoint_path: str,
+    dry_run: bool = False,
+) -> int:
+    """
+    クラスタ内で閾値を超えた組を duplicate_checks に一括記録
+
+    新しいナレッジを knowledge_id、古いナレッジを potential_duplicate_id とする。
+    推移的に結合されただけの組（直接は類似していない組）は記録しない。
+    """
+    written = 0
+    buffer: List[Tuple[int, int, float]] = []
+
+    def flush(clusters_done: int):
+        nonlocal written
+        if not dry_run:
+            inserted = db.record_duplicate_checks(buffer, check_type=CHECK_TYPE)
+            written += inserted
+            checkpoint["clusters_written"] = clusters_done
+            checkpoint["rows_written"] += inserted
+            save_checkpoint(checkpoint_path, checkpoint)
+        buffer.clear()
+
+    start = checkpoint["clusters_written"]
+    for i, cluster in enumerate(clusters[start:], start=start + 1):
+        buffer.extend(cluster["pairs"])
+        if len(buffer) >= WRITE_BATCH_SIZE:
+            flush(i)
+    flush(len(clusters))
+    return written
+
+
+# ========== 実行 ==========
+
+
+def run_dedup(
+    db_path: str,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    threshold: float = DEFAULT_THRESHOLD,
+    checkpoint_path: Optional[str] = None,
+    reset: bool = False,
+    recompute: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    重複検出バッチを実行（チェックポイントから再開）
+
+    Args:
+        db_path: データベースファイルパス
+        workers: 署名計算のプロセス数（1でプロセスプールを使わない）
+        chunk_size: 1タスクあたりのナレッジ件数
+        threshold: 重複とみなす推定Jaccard係数の下限
+        checkpoint_path: チェックポイントファイル（未指定時はDBファイル名から決定）
+        reset: チェックポイントを破棄して最初から実行
+        recompute: 計算済みの署名も再計算
+        dry_run: duplicate_checks に書き込まない
+
+    Returns:
+        実行レポート
+    """
+    checkpoint_path = checkpoint_path or default_checkpoint_path(db_path)
+    if reset and Path(checkpoint_path).exists():
+        os.remove(checkpoint_path)
+    checkpoint = load_checkpoint(checkpoint_path, threshold)
+
+    db = SQLiteClient(db_path)
+    index = NearDuplicateIndex(db)
+    started = time.perf_counter()
+    report: Dict[str, Any] = {
+        "db_path": db_path,
+        "workers": workers,
+        "threshold": threshold,
+        "resumed_from": checkpoint["phase"],
+        "dry_run": dry_run,
+    }
+
+    if checkpoint["phase"] == "signatures":
+        print(f"🔢 署名を計算中（{workers}プロセス）...")
+        report["signatures"] = compute_signatures(
+            db, index, checkpoint, checkpoint_path, workers, chunk_size, recompute
+        )
+        checkpoint["phase"] = "clustering"
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    print("🧩 クラスタリング中...")
+    cluster_started = time.perf_counter()
+    signatures = load_signatures(db)
+    clusters, stats = cluster_signatures(signatures, threshold=threshold)
+    cluster_seconds = time.perf_counter() - cluster_started
+    report["clustering"] = {
+        "entries": len(signatures),
+        "clusters": len(clusters),
+        "duplicates": sum(len(c["members"]) - 1 for c in clusters),
+        "largest_cluster": max((len(c["members"]) for c in clusters), default=0),
+        "seconds": round(cluster_seconds, 2),
+        "entries_per_second": (
+            round(len(signatures) / cluster_seconds, 1) if cluster_seconds > 0 else 0.0
+        ),
+        **stats,
+    }
+
+    checkpoint["phase"] = "writing"
+    print("💾 重複候補を記録中...")
+    write_started = time.perf_counter()
+    rows = write_duplicate_checks(db, clusters, checkpoint, checkpoint_path, dry_run)
+    report["writing"] = {
+        "rows_written": rows,
+        "seconds": round(time.perf_counter() - write_started, 2),
+    }
+    if not dry_run:
+        checkpoint["phase"] = "done"
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    report["total_seconds"] = round(time.perf_counter() - started, 2)
+    report["checkpoint"] = checkpoint_path
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """実行レポートを表示"""
+    print("\n" + "=" * 60)
+    print("📊 重複検出バッチ 結果")
+    print("=" * 60)
+    signatures = report.get("signatures")
+    if signatures:
+        print(
+            f"署名計算:     {signatures['computed']}件 / {signatures['seconds']}秒 "
+            f"({signatures['docs_per_second']}件/秒)"
+        )
+    clustering = report["clustering"]
+    print(
+        f"クラスタリング: {clustering['entries']}件 / {clustering['seconds']}秒 "
+        f"({clustering['entries_per_second']}件/秒, 候補ペア {clustering['candidate_pairs']})"
+    )
+    print(
+        f"クラスタ:     {clustering['clusters']}個 "
+        f"(重複 {clustering['duplicates']}件, 最大 {clustering['largest_cluster']}件)"
+    )
+    suffix = "（ドライラン）" if report["dry_run"] else ""
+    print(f"記録:         {report['writing']['rows_written']}件{suffix}")
+    print(f"合計:         {report['total_seconds']}秒")
+
+
+def main():
+    """メイン実行"""
+    parser = argparse.ArgumentParser(description="コーパス全体の重複検出・クラスタリング")
+    parser.add_argument("--db", default="db/knowledge.db", help="データベースファイルパス")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="署名計算のプロセス数")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="1タスクあたりの件数")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="重複とみなす推定Jaccard係数")
+    parser.add_argument("--checkpoint", help="チェックポイントファイル（既定: <DB>.dedup_checkpoint.json）")
+    parser.add_argument("--reset", action="store_true", help="チェックポイントを破棄して最初から実行")
+    parser.add_argument("--recompute", action="store_true", help="計算済みの署名も再計算")
+    parser.add_argument("--dry-run", action="store_true", help="duplicate_checks に書き込まない")
+    parser.add_argument("--output", help="結果JSONの出力先")
+    args = parser.parse_args()
+
+    if not 0.0 < args.threshold <= 1.0:
+        parser.error("--threshold は 0〜1 で指定してください")
+
+    report = run_dedup(
+        db_path=args.db,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        threshold=args.threshold,
+        checkpoint_path=args.checkpoint,
+        reset=args.reset,
+        recompute=args.recompute,
+        dry_run=args.dry_run,
+    )
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 結果を保存しました: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
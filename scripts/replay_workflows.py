@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+ワークフローの記録・再生ベンチマーク
+
+記録したナレッジ生成の入力（JSONLコーパス）を一時DBに対して再生し、
+スループット・レイテンシ・DB書き込みの停滞・フェーズごとのCPU時間を計測する。
+MCPは応答を固定したスタブ（--mcp-latency の遅延）に置き換える。
+
+コーパスの作成:
+    - 本番: WORKFLOW_RECORD_PATH を設定すると process_knowledge の入力を記録する
+    - 既存DBから: python scripts/replay_workflows.py capture --out corpus.jsonl
+
+使い方:
+    python scripts/replay_workflows.py capture [--db db/knowledge.db] [--limit 500] --out corpus.jsonl
+    python scripts/replay_workflows.py replay corpus.jsonl [--concurrency 4] [--rate 2.0]
+        [--mcp-latency 0.2] [--repeat 1] [--workers 8] [--backend thread] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# モジュールパスを追加（スキーマは db/schema.sql を相対パスで参照するためルートで実行）
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+
+from src.core.workflow_replay import (
+    ReplayHarness,
+    capture_from_database,
+    load_corpus,
+    write_corpus,
+)
+from src.mcp.sqlite_client import SQLiteClient
+
+
+def capture(args):
+    """既存DBのナレッジからコーパスを作成（匿名化して書き出す）"""
+    entries = capture_from_database(SQLiteClient(args.db), limit=args.limit)
+    count = write_corpus(args.out, entries)
+    print(f"✅ {count}件の入力を {args.out} に書き出しました")
+
+
+def replay(args):
+    """コーパスを再生してレポートを表示"""
+    corpus = load_corpus(args.corpus)
+    harness = ReplayHarness(
+        corpus,
+        concurrency=args.concurrency,
+        arrival_rate=args.rate,
+        mcp_latency=args.mcp_latency,
+        repeat=args.repeat,
+        stall_threshold_ms=args.stall_ms,
+        seed=args.seed,
+        engine_options={"max_workers": args.workers, "backend": args.backend},
+    )
+
+    print("=" * 80)
+    print(
+        f"ワークフロー再生: {len(corpus)}件 x {args.repeat} / 同時実行 {args.concurrency} / "
+        f"到着レート {args.rate or '上限なし'}/s / MCP遅延 {args.mcp_latency}s"
+    )
+    print("=" * 80)
+
+    report = harness.run()
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 レポートを {args.json} に保存しました")
+
+
+def print_report(report):
+    """レポートの要約を表示"""
+    latency = report["latency_ms"]
+    print(f"\n📊 結果 ({report['elapsed_seconds']}秒)")
+    print(
+        f"  - 件数: {report['requests']} (成功 {report['succeeded']} / 失敗 {report['failed']})"
+    )
+    print(f"  - スループット: {report['throughput_per_second']}件/秒")
+    print(
+        f"  - レイテンシ: p50={latency['p50']:.0f}ms, p95={latency['p95']:.0f}ms, "
+        f"p99={latency['p99']:.0f}ms, max={latency['max']:.0f}ms"
+    )
+    print(f"  - 待ち時間 p95: {report['queue_ms']['p95']:.0f}ms")
+    print(
+        f"  - CPU: {report['process_cpu_seconds']}秒 (使用率 {report['cpu_utilization']})"
+    )
+
+    db_writes = report["db_writes"]
+    print(
+        f"\n💾 DB書き込み: {db_writes['count']}回, p95={db_writes['p95_ms']:.1f}ms, "
+        f"max={db_writes['max_ms']:.1f}ms, 停滞(≥{db_writes['stall_threshold_ms']:.0f}ms)="
+        f"{db_writes['stalls']}回"
+    )
+
+    print("\n⏱️  フェーズ別 (wall p95 / CPU合計):")
+    phases = sorted(
+        report["phases"].items(), key=lambda item: item[1]["wall_ms_total"], reverse=True
+    )
+    for name, phase in phases:
+        print(
+            f"  - {name:32s} x{phase['count']:<5d} p95={phase['wall_ms_p95']:8.1f}ms "
+            f"cpu={phase['cpu_ms_total']:10.1f}ms"
+        )
+
+
+def main():
+    """メイン実行"""
+    parser = argparse.ArgumentParser(description="ワークフローの記録・再生ベンチマーク")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    capture_parser = subparsers.add_parser("capture", help="既存DBからコーパスを作成")
+    capture_parser.add_argument("--db", default="db/knowledge.db", help="読み込むDB")
+    capture_parser.add_argument("--limit", type=int, default=500, help="件数の上限")
+    capture_parser.add_argument("--out", required=True, help="出力先のJSONL")
+    capture_parser.set_defaults(func=capture)
+
+    replay_parser = subparsers.add_parser("replay", help="コーパスを再生")
+    replay_parser.add_argument("corpus", help="コーパス（JSONL）")
+    replay_parser.add_argument("--concurrency", type=int, default=4, help="同時実行数")
+    replay_parser.add_argument(
+        "--rate", type=float, default=None, help="1秒あたりの到着件数（省略時は全件を即時投入）"
+    )
+    replay_parser.add_argument(
+        "--mcp-latency", type=float, default=0.0, help="MCPスタブの情報源ごとの遅延（秒）"
+    )
+    replay_parser.add_argument("--repeat", type=int, default=1, help="コーパスを繰り返す回数")
+    replay_parser.add_argument(
+        "--stall-ms", type=float, default=ReplayHarness.DEFAULT_STALL_THRESHOLD_MS,
+        help="DB書き込みの停滞とみなす時間（ミリ秒）",
+    )
+    replay_parser.add_argument("--seed", type=int, default=0, help="到着間隔の乱数シード")
+    replay_parser.add_argument(
+        "--workers", type=int, default=8, help="サブエージェント実行プールのワーカー数"
+    )
+    replay_parser.add_argument(
+        "--backend", choices=["thread", "process"], default="thread",
+        help="サブエージェントの実行バックエンド",
+    )
+    replay_parser.add_argument("--json", help="レポートの保存先（JSON）")
+    replay_parser.set_defaults(func=replay)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
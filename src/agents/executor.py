@@ -5,7 +5,10 @@ SubAgentとHookの実行エンジン
 """
 
 import asyncio
+import importlib
 import logging
+import sys
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
@@ -13,6 +16,7 @@ from datetime import datetime
 from typing import Any, Callable, Dict, List, Optional
 
 from .loader import AgentLoader, HookConfig, HookLoader, SubAgentConfig
+from .process_pool import SubAgentProcessPool, validate_backend
 
 logger = logging.getLogger(__name__)
 
@@ -34,19 +38,130 @@ class ExecutionResult:
 
 
 class SubAgentExecutor:
-    """SubAgent実行エンジン"""
+    """
+    SubAgent実行エンジン
 
-    def __init__(self, loader: Optional[AgentLoader] = None):
+    エージェントのインスタンスは class_name ごとに1つ生成してキャッシュし、
+    すべての実行（スレッド）で共有する。BaseSubAgent は実行中の状態を
+    スレッドローカルに持つため、同じインスタンスを並行して実行できる。
+    """
+
+    def __init__(
+        self,
+        loader: Optional[AgentLoader] = None,
+        backend: str = "thread",
+        warm: bool = True,
+    ):
+        """
+        Args:
+            loader: SubAgent設定ローダー
+            backend: エージェント処理の実行バックエンド
+                     （'thread' | 'process'、processはCPUバウンドなエージェント向け）
+            warm: 生成時に有効なエージェントを事前に生成しておくか
+                  （processバックエンドではワーカープロセスを起動して事前生成する）
+        """
         self.loader = loader or AgentLoader()
         self.loader.load()
+        self.backend = validate_backend(backend)
         self._executor = ThreadPoolExecutor(max_workers=self._get_max_workers())
+        self._process_pool: Optional[SubAgentProcessPool] = None
         self._results: List[ExecutionResult] = []
 
+        # エージェントのインスタンス（class_name -> インスタンス）
+        self._instances: Dict[str, Any] = {}
+        self._instances_lock = threading.Lock()
+        if warm:
+            self.warm_up()
+
     def _get_max_workers(self) -> int:
         """並列実行の最大ワーカー数を取得"""
         config = self.loader.get_execution_config()
         return config.get("max_concurrent", 3)
 
+    def _get_process_pool(self) -> SubAgentProcessPool:
+        """プロセスプールを取得（初回に起動し、class_nameを持つエージェントを事前生成）"""
+        if self._process_pool is None or self._process_pool.closed:
+            class_paths = [
+                a.class_name
+                for a in self.loader.get_all_agents().values()
+                if a.enabled and a.class_name
+            ]
+            self._process_pool = SubAgentProcessPool(
+                class_paths, max_workers=self._get_max_workers()
+            )
+        return self._process_pool
+
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        有効なエージェントを事前に生成（生成に失敗したエージェントは実行時に再試行する）
+
+        Returns:
+            {'loaded': [class_name], 'failed': {class_name: エラー}}
+        """
+        loaded: List[str] = []
+        failed: Dict[str, str] = {}
+        try:
+            agents = [
+                a
+                for a in self.loader.get_all_agents().values()
+                if a.enabled and a.class_name
+            ]
+        except Exception as e:
+            logger.warning(f"エージェントの事前生成をスキップしました: {e}")
+            return {"loaded": loaded, "failed": failed}
+
+        if self.backend == "process":
+            try:
+                self._get_process_pool()
+                loaded = [a.class_name for a in agents]
+            except Exception as e:
+                logger.warning(f"ワーカープロセスの起動に失敗しました: {e}")
+                failed = {a.class_name: str(e) for a in agents}
+            return {"loaded": loaded, "failed": failed}
+
+        for agent in agents:
+            try:
+                self._get_agent_instance(agent)
+                loaded.append(agent.class_name)
+            except Exception as e:
+                failed[agent.class_name] = str(e)
+                logger.warning(f"エージェントの事前生成に失敗しました [{agent.name}]: {e}")
+        logger.info(f"エージェントを事前生成しました: {len(loaded)}件")
+        return {"loaded": loaded, "failed": failed}
+
+    def _get_agent_instance(self, agent: SubAgentConfig) -> Any:
+        """
+        キャッシュ済みのインスタンスを取得（未生成なら生成してキャッシュ）
+
+        生成はロック内で行い、同時に初回実行されても1つだけ生成する。
+        生成に失敗した場合はキャッシュせず、次回の実行で再試行する。
+        """
+        instance = self._instances.get(agent.class_name)
+        if instance is not None:
+            return instance
+        with self._instances_lock:
+            instance = self._instances.get(agent.class_name)
+            if instance is None:
+                instance = self._load_agent_instance(agent)
+                self._instances[agent.class_name] = instance
+            return instance
+
+    def clear_instance_cache(self) -> None:
+        """インスタンスのキャッシュを破棄（エージェントの実装・設定を再読み込みする場合）"""
+        with self._instances_lock:
+            self._instances.clear()
+
+    @property
+    def cached_agents(self) -> List[str]:
+        """生成済みのエージェント（class_name）"""
+        return list(self._instances)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """スレッドプールとプロセスプールを終了"""
+        self._executor.shutdown(wait=wait)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+
     def execute(
         self,
         agent_id: str,
@@ -116,10 +231,14 @@ class SubAgentExecutor:
                     f"Agent [{agent.name}] missing capabilities: {missing}"
                 )
 
-        # 3. エージェントインスタンスの動的ロード
-        #    agentのclass_nameから対応するクラスを取得
+        # 3. エージェントインスタンスの取得
+        #    agentのclass_nameごとに生成済みのインスタンスを使う
+        #    （processバックエンドではワーカープロセス内で事前生成済みのものを使う）
+        if self.backend == "process":
+            return self._execute_in_process(agent, input_data)
+
         try:
-            agent_instance = self._load_agent_instance(agent)
+            agent_instance = self._get_agent_instance(agent)
         except Exception as e:
             logger.error(f"Failed to load agent instance for {agent.name}: {e}")
             return {
@@ -161,9 +280,34 @@ class SubAgentExecutor:
                 },
             }
 
+    def _execute_in_process(
+        self, agent: SubAgentConfig, input_data: Dict[str, Any]
+    ) -> Any:
+        """ワーカープロセスでエージェントを実行"""
+        try:
+            if not agent.class_name:
+                raise ValueError(f"Agent {agent.name} has no class_name defined")
+            output = self._get_process_pool().run(agent.class_name, input_data)
+            logger.info(
+                f"SubAgent完了: {agent.name} - status: {output.get('status', 'completed')}"
+            )
+            return output
+        except Exception as e:
+            logger.error(f"Agent execution failed for {agent.name}: {e}")
+            return {
+                "agent": agent.name,
+                "status": "error",
+                "error": str(e),
+                "capabilities": agent.capabilities,
+                "metadata": {
+                    "description": agent.description,
+                    "priority": agent.priority,
+                },
+            }
+
     def _load_agent_instance(self, agent: SubAgentConfig) -> Any:
         """
-        エージェント設定からインスタンスを動的にロード
+        エージェント設定からインスタンスを動的にロード（実行時は _get_agent_instance() を使う）
 
         Args:
             agent: SubAgentConfig - エージェント設定
@@ -188,9 +332,6 @@ class SubAgentExecutor:
 
         try:
             # モジュールをダイナミックにインポート
-            import importlib
-            import sys
-
             # sys.modules に既に存在するモジュールを優先的に使用（テスト対応）
             if module_name in sys.modules:
                 module = sys.modules[module_name]
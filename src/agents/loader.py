@@ -26,6 +26,7 @@ class SubAgentConfig:
     model: str = "claude-sonnet-4-20250514"
     enabled: bool = True
     class_name: Optional[str] = None
+    depends_on: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -80,6 +81,8 @@ class AgentLoader:
                     priority=agent_data.get("priority", "medium"),
                     model=agent_data.get("model", "claude-sonnet-4-20250514"),
                     enabled=agent_data.get("enabled", True),
+                    class_name=agent_data.get("class_name"),
+                    depends_on=agent_data.get("depends_on") or [],
                 )
 
             # 実行設定を読み込み
@@ -113,6 +116,12 @@ class AgentLoader:
             self.load()
         return [a for a in self._agents.values() if a.priority == priority]
 
+    def get_dependencies(self) -> Dict[str, List[str]]:
+        """SubAgentの依存関係（depends_on）を取得"""
+        if not self._loaded:
+            self.load()
+        return {agent_id: list(a.depends_on) for agent_id, a in self._agents.items()}
+
     def get_execution_config(self) -> Dict[str, Any]:
         """実行設定を取得"""
         if not self._loaded:
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+SubAgent Process Pool
+サブエージェントをプロセスプールで実行するバックエンド
+
+ルールベースのサブエージェント（正規表現・キーワード照合が中心）はCPUバウンドで、
+スレッドで並列実行してもGILにより直列化される。プロセスバックエンドでは
+常駐の ProcessPoolExecutor の各ワーカーでサブエージェントを事前に
+インスタンス化しておき、実行時はクラスパスと最小限の入力だけを送る。
+"""
+
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.utils.document_analysis import DocumentAnalysis
+
+logger = logging.getLogger(__name__)
+
+# 実行バックエンド
+EXECUTION_BACKENDS = ("thread", "process")
+# プロセス内でのみ有効な入力（ワーカー側で再生成する）
+PROCESS_LOCAL_KEYS = ("analysis",)
+# 既存ナレッジのうちサブエージェントが参照するフィールド
+KNOWLEDGE_FIELDS = ("id", "title", "content")
+
+
+def validate_backend(backend: str) -> str:
+    """実行バックエンド名を検証"""
+    if backend not in EXECUTION_BACKENDS:
+        raise ValueError(
+            f"未対応の実行バックエンドです: {backend}（{' / '.join(EXECUTION_BACKENDS)}）"
+        )
+    return backend
+
+
+def class_path_of(instance: Any) -> str:
+    """インスタンスのクラスパス（module.ClassName）"""
+    cls = type(instance)
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def minimal_payload(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ワーカープロセスへ送る入力を作成
+
+    プロセス内でのみ有効な値（共有の解析コンテキスト等）を除き、
+    既存ナレッジは参照するフィールドだけに絞る。
+    """
+    payload = {k: v for k, v in input_data.items() if k not in PROCESS_LOCAL_KEYS}
+    if payload.get("existing_knowledge"):
+        payload["existing_knowledge"] = [
+            {field: k.get(field) for field in KNOWLEDGE_FIELDS if field in k}
+            for k in payload["existing_knowledge"]
+        ]
+    return payload
+
+
+# ========== ワーカープロセス側 ==========
+
+# ワーカー内のサブエージェント（クラスパス -> インスタンス）
+_worker_agents: Dict[str, Any] = {}
+# 直近の文書解析（同じワーカーで続けて実行するサブエージェント間で共有）
+_worker_analysis: Optional[DocumentAnalysis] = None
+
+
+def _get_worker_agent(class_path: str) -> Any:
+    """ワーカー内のサブエージェントを取得（未生成なら生成）"""
+    agent = _worker_agents.get(class_path)
+    if agent is None:
+        module_name, class_name = class_path.rsplit(".", 1)
+        agent = getattr(importlib.import_module(module_name), class_name)()
+        _worker_agents[class_path] = agent
+    return agent
+
+
+def _init_worker(class_paths: Tuple[str, ...]) -> None:
+    """ワーカー起動時にサブエージェントを事前生成"""
+    for class_path in class_paths:
+        _get_worker_agent(class_path)
+
+
+def _ping() -> int:
+    """ワーカー起動確認用"""
+    return os.getpid()
+
+
+def _run_in_worker(class_path: str, input_data: Dict[str, Any]) -> Any:
+    """ワーカー内でサブエージェントを実行"""
+    global _worker_analysis
+    agent = _get_worker_agent(class_path)
+
+    title = input_data.get("title", "")
+    content = input_data.get("content", "")
+    if _worker_analysis is None or not _worker_analysis.matches(title, content):
+        _worker_analysis = DocumentAnalysis(title, content)
+
+    result = agent.execute({**input_data, "analysis": _worker_analysis})
+    return result.to_dict() if hasattr(result, "to_dict") else result
+
+
+# ========== 親プロセス側 ==========
+
+
+class SubAgentProcessPool:
+    """サブエージェント用の常駐プロセスプール"""
+
+    def __init__(
+        self,
+        class_paths: Iterable[str],
+        max_workers: Optional[int] = None,
+        warm: bool = True,
+    ):
+        """
+        Args:
+            class_paths: 各ワーカーで事前生成するサブエージェントのクラスパス
+            max_workers: ワーカープロセス数（Noneの場合はCPUコア数）
+            warm: 生成時に全ワーカーを起動しておくか
+        """
+        self.class_paths = tuple(dict.fromkeys(class_paths))
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # 親プロセスはスレッドを多数持つため fork ではなく spawn で起動する
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.class_paths,),
+        )
+        self._lock = threading.Lock()
+        self._closed = False
+        if warm:
+            self.warm_up()
+
+    def warm_up(self) -> None:
+        """全ワーカーを起動し、サブエージェントの事前生成を済ませる"""
+        futures = [self._executor.submit(_ping) for _ in range(self.max_workers)]
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    @property
+    def closed(self) -> bool:
+        """シャットダウン済みか"""
+        return self._closed
+
+    def submit(self, class_path: str, input_data: Dict[str, Any]) -> Future:
+        """
+        サブエージェントの実行を投入
+
+        Args:
+            class_path: サブエージェントのクラスパス
+            input_data: 入力データ（minimal_payload で最小化して送る）
+
+        Returns:
+            結果（SubAgentResult.to_dict() 形式）の Future
+        """
+        if self._closed:
+            raise RuntimeError("SubAgentProcessPool はシャットダウン済みです")
+        return self._executor.submit(
+            _run_in_worker, class_path, minimal_payload(input_data)
+        )
+
+    def run(
+        self,
+        class_path: str,
+        input_data: Dict[str, Any],
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """サブエージェントを実行し、結果を待つ"""
+        return self.submit(class_path, input_data).result(timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """ワーカープロセスを終了"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __enter__(self) -> "SubAgentProcessPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
+    def __repr__(self) -> str:
+        return (
+            f"<SubAgentProcessPool agents={len(self.class_paths)} "
+            f"max_workers={self.max_workers} closed={self._closed}>"
+        )
@@ -34,6 +34,8 @@ from enum import Enum
 from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
+from src.utils.keyword_matcher import match_keywords, register_keywords
+
 logger = logging.getLogger(__name__)
 
 
@@ -268,6 +270,11 @@ class AIOrchestrator:
             "セキュリティ",
         ]
 
+        register_keywords(
+            "ai_orchestrator",
+            self.faq_patterns + self.investigation_patterns + self.evidence_patterns,
+        )
+
     def _init_clients(self):
         """AIクライアントを初期化"""
         # OpenAI
@@ -330,21 +337,21 @@ class AIOrchestrator:
         Returns:
             QueryType: FAQ/INVESTIGATION/EVIDENCE/GENERAL
         """
-        query_lower = query.lower()
+        hits = match_keywords(query.lower())
         logger.info(f"[Claude] 一次判断開始: {query[:50]}...")
 
         # FAQチェック（定型回答→Claude）
-        if any(p in query_lower for p in self.faq_patterns):
+        if hits.any(self.faq_patterns):
             logger.info("[Claude] 判定結果: FAQ → Claude定型回答")
             return QueryType.FAQ
 
         # 根拠要求チェック（エビデンス→Perplexity）
-        if any(p in query_lower for p in self.evidence_patterns):
+        if hits.any(self.evidence_patterns):
             logger.info("[Claude] 判定結果: EVIDENCE → Perplexity根拠収集")
             return QueryType.EVIDENCE
 
         # 調査チェック（情報収集→Gemini）
-        if any(p in query_lower for p in self.investigation_patterns):
+        if hits.any(self.investigation_patterns):
             logger.info("[Claude] 判定結果: INVESTIGATION → Gemini情報収集")
             return QueryType.INVESTIGATION
 
@@ -70,6 +70,9 @@ class EnvironmentConfig:
             "workflow_timeout": self.get_int_env("WORKFLOW_TIMEOUT", 300),
             "subagent_parallel": self.get_bool_env("SUBAGENT_PARALLEL", True),
             "subagent_timeout": self.get_int_env("SUBAGENT_TIMEOUT", 60),
+            "workflow_tracing": self.get_bool_env("WORKFLOW_TRACING", True),
+            # 入力の記録先（JSONL、空の場合は記録しない）
+            "workflow_record_path": self.get_env("WORKFLOW_RECORD_PATH", ""),
             # SubAgent設定
             "subagent_architect_enabled": self.get_bool_env(
                 "SUBAGENT_ARCHITECT_ENABLED", True
@@ -134,6 +137,43 @@ class EnvironmentConfig:
             "cache_enabled": self.get_bool_env("CACHE_ENABLED", True),
             "cache_type": self.get_env("CACHE_TYPE", "simple"),
             "cache_default_timeout": self.get_int_env("CACHE_DEFAULT_TIMEOUT", 300),
+            # キャッシュウォームアップ設定
+            "cache_warmup_enabled": self.get_bool_env("CACHE_WARMUP_ENABLED", True),
+            "cache_warmup_interval": self.get_int_env("CACHE_WARMUP_INTERVAL", 1800),
+            "cache_warmup_budget": self.get_int_env("CACHE_WARMUP_BUDGET", 30),
+            "cache_warmup_top_queries": self.get_int_env(
+                "CACHE_WARMUP_TOP_QUERIES", 50
+            ),
+            "cache_warmup_top_entries": self.get_int_env(
+                "CACHE_WARMUP_TOP_ENTRIES", 100
+            ),
+            # AI回答の事前生成は API 費用がかかるため明示的に指定した場合のみ
+            "cache_warmup_ai_queries": self.get_int_env("CACHE_WARMUP_AI_QUERIES", 0),
+            # サブエージェント実行プール設定
+            "workflow_max_workers": self.get_int_env("WORKFLOW_SUBAGENT_WORKERS", 8),
+            "workflow_backend": self.get_env("WORKFLOW_SUBAGENT_BACKEND", "thread"),
+            "subagent_cache_size": self.get_int_env("SUBAGENT_CACHE_SIZE", 256),
+            "subagent_cache_persistent": self.get_bool_env(
+                "SUBAGENT_CACHE_PERSISTENT", False
+            ),
+            # 保存後のMCP補強設定
+            "mcp_source_timeout": self.get_int_env("MCP_SOURCE_TIMEOUT", 10),
+            "mcp_recent_ttl": self.get_int_env("MCP_RECENT_TTL", 600),
+            # 過負荷時の縮退設定（優先度の低いサブエージェント・MCP補強を後回しにする）
+            "load_shedding_enabled": self.get_bool_env("LOAD_SHEDDING_ENABLED", False),
+            "load_shedding_queue_depth": self.get_int_env(
+                "LOAD_SHEDDING_QUEUE_DEPTH", 16
+            ),
+            "load_shedding_backlog_depth": self.get_int_env(
+                "LOAD_SHEDDING_BACKLOG_DEPTH", 20
+            ),
+            "load_shedding_latency_slo_ms": self.get_int_env(
+                "LOAD_SHEDDING_LATENCY_SLO_MS", 30000
+            ),
+            "load_shedding_cooldown": self.get_int_env("LOAD_SHEDDING_COOLDOWN", 30),
+            # バックグラウンドジョブキュー設定
+            "job_queue_workers": self.get_int_env("JOB_QUEUE_WORKERS", 2),
+            "job_max_attempts": self.get_int_env("JOB_MAX_ATTEMPTS", 3),
             # Git設定
             "git_branch": self.get_env("GIT_BRANCH", "develop"),
             "git_auto_commit": self.get_bool_env("GIT_AUTO_COMMIT", False),
@@ -0,0 +1,173 @@
+"""
+SubAgent DAG Scheduler
+サブエージェントの依存関係（DAG）に基づくスケジューラ
+
+依存関係は config/agents/subagents.yaml の depends_on で宣言する。
+固定フェーズ + gather のバリアではなく、各サブエージェントは依存先が
+すべて完了した時点で開始する。実行後はノードごとの開始・終了時刻から
+クリティカルパス（ワークフロー時間を決めている依存の連鎖）を求める。
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional
+
+# (ノード名, 依存先の結果) -> 結果
+NodeRunner = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+class DependencyCycleError(ValueError):
+    """依存関係に循環がある"""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__(f"サブエージェントの依存関係が循環しています: {' -> '.join(cycle)}")
+
+
+class SubAgentDAG:
+    """サブエージェントの依存グラフ"""
+
+    def __init__(self, dependencies: Mapping[str, Iterable[str]]):
+        """
+        Args:
+            dependencies: {ノード名: 依存先ノード名のリスト}（宣言順が実行順の基準）
+
+        Raises:
+            ValueError: 未定義のノードに依存している場合
+            DependencyCycleError: 依存関係が循環している場合
+        """
+        self.nodes: List[str] = list(dependencies)
+        self.dependencies: Dict[str, List[str]] = {
+            name: list(dict.fromkeys(deps or [])) for name, deps in dependencies.items()
+        }
+        for name, deps in self.dependencies.items():
+            unknown = [d for d in deps if d not in self.dependencies]
+            if unknown:
+                raise ValueError(f"{name} が未定義のサブエージェントに依存しています: {unknown}")
+
+        self.dependents: Dict[str, List[str]] = {name: [] for name in self.nodes}
+        for name, deps in self.dependencies.items():
+            for dep in deps:
+                self.dependents[dep].append(name)
+
+        self.order: List[str] = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """宣言順を保ったトポロジカル順（循環があれば DependencyCycleError）"""
+        remaining = {name: len(deps) for name, deps in self.dependencies.items()}
+        order: List[str] = []
+        ready = [name for name in self.nodes if remaining[name] == 0]
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for dependent in self.dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+            ready.sort(key=self.nodes.index)
+
+        if len(order) < len(self.nodes):
+            raise DependencyCycleError(self._find_cycle(set(self.nodes) - set(order)))
+        return order
+
+    def _find_cycle(self, candidates: set) -> List[str]:
+        """循環に含まれるノード列を1つ求める（エラーメッセージ用）"""
+        start = next(name for name in self.nodes if name in candidates)
+        path: List[str] = []
+        node = start
+        while node not in path:
+            path.append(node)
+            node = next(d for d in self.dependencies[node] if d in candidates)
+        return path[path.index(node) :] + [node]
+
+    @property
+    def roots(self) -> List[str]:
+        """依存先のないノード"""
+        return [name for name in self.order if not self.dependencies[name]]
+
+    def critical_path(self, durations: Mapping[str, float]) -> Dict[str, Any]:
+        """
+        所要時間が最長となる依存の連鎖を求める
+
+        Args:
+            durations: {ノード名: 所要時間(ms)}
+
+        Returns:
+            {'path': [ノード名], 'duration_ms': float}
+        """
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name in self.order:
+            longest = max(
+                self.dependencies[name], key=lambda d: finish[d], default=None
+            )
+            previous[name] = longest
+            finish[name] = (finish[longest] if longest else 0.0) + durations.get(name, 0.0)
+
+        if not finish:
+            return {"path": [], "duration_ms": 0.0}
+
+        node: Optional[str] = max(self.order, key=lambda n: finish[n])
+        total = finish[node]
+        path: List[str] = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return {"path": path[::-1], "duration_ms": round(total, 1)}
+
+    async def run(self, runner: NodeRunner) -> Dict[str, Any]:
+        """
+        依存先が完了したノードから順に実行
+
+        依存先が失敗（例外）した場合も、そのエラー結果を渡して後続を実行する。
+
+        Args:
+            runner: ノードを実行するコルーチン関数 (name, dependency_results) -> result
+
+        Returns:
+            {
+                'results': {ノード名: 結果 or 例外}（宣言順）,
+                'timings': {ノード名: {'start_ms', 'end_ms', 'duration_ms'}},
+                'critical_path': [ノード名], 'critical_path_ms': float,
+                'makespan_ms': float
+            }
+        """
+        started_at = time.perf_counter()
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, float]] = {}
+        tasks: Dict[str, asyncio.Future] = {}
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started_at) * 1000, 1)
+
+        async def run_node(name: str) -> None:
+            deps = self.dependencies[name]
+            if deps:
+                await asyncio.gather(*(tasks[d] for d in deps), return_exceptions=True)
+            start_ms = elapsed_ms()
+            try:
+                results[name] = await runner(name, {d: results[d] for d in deps})
+            except Exception as e:
+                results[name] = e
+            end_ms = elapsed_ms()
+            timings[name] = {
+                "start_ms": start_ms,
+                "end_ms": end_ms,
+                "duration_ms": round(end_ms - start_ms, 1),
+            }
+
+        # トポロジカル順に生成するため、依存先のタスクは常に先に存在する
+        for name in self.order:
+            tasks[name] = asyncio.ensure_future(run_node(name))
+        await asyncio.gather(*tasks.values())
+
+        critical = self.critical_path(
+            {name: t["duration_ms"] for name, t in timings.items()}
+        )
+        return {
+            "results": {name: results[name] for name in self.nodes},
+            "timings": timings,
+            "critical_path": critical["path"],
+            "critical_path_ms": critical["duration_ms"],
+            "makespan_ms": elapsed_ms(),
+        }
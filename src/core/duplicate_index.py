@@ -0,0 +1,617 @@
+"""
+Near-Duplicate Index
+コーパス全体を対象とした近似重複インデックス（MinHash/LSH）
+
+ナレッジごとのMinHash署名を knowledge_minhash テーブルに保存し、
+LSHバンドインデックスをメモリ上に保持する。新規ナレッジの重複候補は
+バケット参照だけで取得できるため、コーパス件数に依存せず一定時間で検索できる。
+
+あわせて再投稿検知用のフィンガープリント（完全一致ハッシュ + SimHash）を
+knowledge_fingerprints に保存し、同一・ほぼ同一の再投稿を索引だけで判定する。
+
+署名はタイトルと内容のシングル（共有トークナイザの文字n-gram）の和集合から計算する。
+タイトル・内容の更新や削除はトリガーで署名テーブルから消え、sync() で追従する。
+検索時は保存済みの署名だけを読み込み、未計算分の補完・再同期はバックグラウンドで行う
+（大量の既存データの署名は scripts/dedup_corpus.py で事前に計算できる）。
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from src.mcp.sqlite_client import SQLiteClient
+from src.utils.fingerprint import (
+    DEFAULT_MAX_HAMMING_DISTANCE,
+    compute_fingerprint,
+    from_signed64,
+    hamming_distance,
+    simhash_blocks,
+    to_signed64,
+)
+from src.utils.minhash import DEFAULT_BANDS, DEFAULT_NUM_PERM, LSHIndex, MinHasher
+from src.utils.text_tokenizer import text_similarity, tokenize
+
+logger = logging.getLogger(__name__)
+
+# (ナレッジID, MinHash署名, フィンガープリント)
+_Entry = Tuple[int, Tuple[int, ...], Dict[str, Any]]
+
+
+def document_shingles(title: str, content: str) -> FrozenSet[str]:
+    """タイトル+内容のシングル集合"""
+    return tokenize(title or "").shingles | tokenize(content or "").shingles
+
+
+def compute_entry(
+    hasher: MinHasher, knowledge_id: int, title: str, content: str
+) -> _Entry:
+    """
+    ナレッジ1件の (ID, MinHash署名, フィンガープリント) を計算
+
+    DBに依存しないため、一括処理のワーカープロセスからも利用できる。
+    """
+    return (
+        knowledge_id,
+        hasher.signature(document_shingles(title, content)),
+        compute_fingerprint(title, content),
+    )
+
+
+class NearDuplicateIndex:
+    """近似重複インデックス"""
+
+    SCHEMA_PATH = (
+        Path(__file__).resolve().parents[2] / "db" / "duplicate_index_schema.sql"
+    )
+
+    # 候補とする推定Jaccard係数の下限
+    DEFAULT_THRESHOLD = 0.4
+    # 署名テーブルとの再同期間隔（秒）
+    DEFAULT_SYNC_INTERVAL_SECONDS = 300.0
+    # 署名の一括書き込み件数
+    SYNC_BATCH_SIZE = 500
+    # SimHashが近い候補を再投稿とみなす内容類似度（Jaccard係数）の下限
+    RESUBMISSION_MIN_SIMILARITY = 0.9
+
+    def __init__(
+        self,
+        db_client: SQLiteClient,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+        sync_interval_seconds: float = DEFAULT_SYNC_INTERVAL_SECONDS,
+    ):
+        """
+        Args:
+            db_client: SQLiteクライアント
+            num_perm: 署名長
+            bands: LSHのバンド数
+            sync_interval_seconds: 署名テーブルとの再同期間隔
+                                   （0以下で検索のたびに検索スレッドで同期）
+        """
+        self.db_client = db_client
+        self.hasher = MinHasher(num_perm)
+        self.lsh = LSHIndex(num_perm, bands)
+        self.sync_interval_seconds = sync_interval_seconds
+
+        # _lock はメモリ上のインデックス、_sync_lock は同期処理全体を保護する
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._loaded = False
+        self._last_sync = 0.0
+        self._sync_thread: Optional[threading.Thread] = None
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        """署名テーブルの適用"""
+        if not self.SCHEMA_PATH.exists():
+            return
+        with open(self.SCHEMA_PATH, "r", encoding="utf-8") as f:
+            schema = f.read()
+        with self.db_client.get_connection() as conn:
+            conn.executescript(schema)
+
+    # ========== 署名 ==========
+
+    def compute_signature(self, title: str, content: str) -> Tuple[int, ...]:
+        """タイトル+内容のMinHash署名を計算"""
+        return self.hasher.signature(document_shingles(title, content))
+
+    def store_entries(self, entries: List[_Entry]) -> None:
+        """
+        署名・フィンガープリントをDBに保存（メモリ上のインデックスは更新しない）
+
+        Args:
+            entries: [(ナレッジID, MinHash署名, フィンガープリント)]
+        """
+        ids = [(knowledge_id,) for knowledge_id, _, _ in entries]
+        with self.db_client.get_connection() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO knowledge_minhash (knowledge_id, signature, num_perm)
+                VALUES (?, ?, ?)
+                """,
+                [
+                    (knowledge_id, MinHasher.to_bytes(sig), self.hasher.num_perm)
+                    for knowledge_id, sig, _ in entries
+                ],
+            )
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO knowledge_fingerprints (knowledge_id, content_hash, simhash)
+                VALUES (?, ?, ?)
+                """,
+                [
+                    (knowledge_id, fp["content_hash"], to_signed64(fp["simhash"]))
+                    for knowledge_id, _, fp in entries
+                ],
+            )
+            conn.executemany(
+                "DELETE FROM knowledge_simhash_blocks WHERE knowledge_id = ?", ids
+            )
+            conn.executemany(
+                """
+                INSERT INTO knowledge_simhash_blocks (block, value, knowledge_id)
+                VALUES (?, ?, ?)
+                """,
+                [
+                    (block, value, knowledge_id)
+                    for knowledge_id, _, fp in entries
+                    for block, value in enumerate(simhash_blocks(fp["simhash"]))
+                ],
+            )
+            conn.commit()
+
+    # ========== 同期 ==========
+
+    def load(self) -> int:
+        """
+        保存済み署名をメモリに読み込み、未計算分を補完（初回のみ、呼び出し元で実行）
+
+        スクリプト・起動処理向け。検索時は _ensure_fresh() で保存済み署名だけを読み込む。
+
+        Returns:
+            インデックス件数
+        """
+        if self._load_stored():
+            self.sync()
+        return len(self.lsh)
+
+    def _load_stored(self) -> bool:
+        """
+        保存済み署名をメモリに読み込む（署名は計算しない）
+
+        Returns:
+            今回読み込んだ場合 True（読み込み済みの場合 False）
+        """
+        with self._lock:
+            if self._loaded:
+                return False
+            with self.db_client.get_connection() as conn:
+                cursor = conn.execute(
+                    "SELECT knowledge_id, signature FROM knowledge_minhash WHERE num_perm = ?",
+                    (self.hasher.num_perm,),
+                )
+                # 保存形式のまま保持する（タプルに展開しない）
+                for row in cursor:
+                    self.lsh.add(row[0], row[1])
+            self._loaded = True
+            return True
+
+    def sync(self) -> Dict[str, int]:
+        """
+        署名テーブルとナレッジテーブルに追従
+
+        - 署名が無効化された（更新・削除された）エントリをメモリから除去
+        - 署名・フィンガープリントのないエントリ（既存データ・更新後のデータ）を計算して保存
+
+        署名の計算中はインデックスのロックを保持せず、バッチごとに反映するため、
+        同期中も検索は読み込み済みの署名で実行できる。
+
+        Returns:
+            {'removed': int, 'added': int}
+        """
+        with self._sync_lock:
+            with self._lock:
+                with self.db_client.get_connection() as conn:
+                    stored = {
+                        row[0]
+                        for row in conn.execute(
+                            "SELECT knowledge_id FROM knowledge_minhash WHERE num_perm = ?",
+                            (self.hasher.num_perm,),
+                        )
+                    }
+                removed = self.lsh.keys() - stored
+                for knowledge_id in removed:
+                    self.lsh.remove(knowledge_id)
+
+            added = 0
+            conn = self.db_client.get_connection()
+            try:
+                cursor = conn.execute(
+                    """
+                    SELECT k.id, k.title, k.content
+                    FROM knowledge_entries k
+                    LEFT JOIN knowledge_minhash m
+                        ON m.knowledge_id = k.id AND m.num_perm = ?
+                    LEFT JOIN knowledge_fingerprints f ON f.knowledge_id = k.id
+                    WHERE m.knowledge_id IS NULL OR f.knowledge_id IS NULL
+                    ORDER BY k.id
+                    """,
+                    (self.hasher.num_perm,),
+                )
+                batch: List[_Entry] = []
+                for row in cursor:
+                    batch.append(compute_entry(self.hasher, row[0], row[1], row[2]))
+                    if len(batch) >= self.SYNC_BATCH_SIZE:
+                        added += self._apply_batch(batch)
+                        batch = []
+                added += self._apply_batch(batch)
+            finally:
+                conn.close()
+
+            self._last_sync = time.monotonic()
+            return {"removed": len(removed), "added": added}
+
+    def _apply_batch(self, batch: List[_Entry]) -> int:
+        """計算した署名をDBとメモリに反映"""
+        if not batch:
+            return 0
+        with self._lock:
+            self.store_entries(batch)
+            if self._loaded:
+                for knowledge_id, signature, _ in batch:
+                    self.lsh.add(knowledge_id, signature)
+        return len(batch)
+
+    def sync_in_background(self) -> bool:
+        """
+        バックグラウンドスレッドで sync() を実行
+
+        Returns:
+            新たに開始した場合 True（同期中の場合 False）
+        """
+        with self._lock:
+            if self._sync_thread and self._sync_thread.is_alive():
+                return False
+            self._sync_thread = threading.Thread(
+                target=self._run_background_sync,
+                name="near-duplicate-sync",
+                daemon=True,
+            )
+            self._sync_thread.start()
+            return True
+
+    def _run_background_sync(self) -> None:
+        try:
+            self.sync()
+        except Exception as e:
+            logger.warning(f"近似重複インデックスの同期でエラー: {e}")
+
+    def wait_for_sync(self, timeout: Optional[float] = None) -> bool:
+        """
+        バックグラウンド同期の完了を待つ
+
+        Returns:
+            同期中でなくなった場合 True
+        """
+        thread = self._sync_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def _ensure_fresh(self) -> None:
+        """
+        検索前の追従
+
+        未計算分の補完・再同期はバックグラウンドで行い、検索は読み込み済みの署名で実行する
+        （sync_interval_seconds が0以下の場合のみ検索スレッドで同期する）。
+        """
+        if self.sync_interval_seconds <= 0:
+            self._load_stored()
+            self.sync()
+        elif self._load_stored():
+            self.sync_in_background()
+        elif time.monotonic() - self._last_sync >= self.sync_interval_seconds:
+            self.sync_in_background()
+
+    # ========== 更新・検索 ==========
+
+    def add(self, knowledge_id: int, title: str, content: str) -> None:
+        """ナレッジの署名・フィンガープリントを計算してDBとメモリに追加"""
+        entry = compute_entry(self.hasher, knowledge_id, title, content)
+        with self._lock:
+            self.store_entries([entry])
+            if self._loaded:
+                self.lsh.add(knowledge_id, entry[1])
+
+    def add_batch(self, documents: List[Tuple[int, str, str]]) -> None:
+        """
+        複数ナレッジの署名・フィンガープリントをまとめて追加（DB書き込みは1回）
+
+        Args:
+            documents: [(ナレッジID, タイトル, 内容)]
+        """
+        entries = [
+            compute_entry(self.hasher, knowledge_id, title, content)
+            for knowledge_id, title, content in documents
+        ]
+        if not entries:
+            return
+        with self._lock:
+            self.store_entries(entries)
+            if self._loaded:
+                for knowledge_id, signature, _ in entries:
+                    self.lsh.add(knowledge_id, signature)
+
+    def remove(self, knowledge_id: int) -> None:
+        """ナレッジの署名・フィンガープリントを削除"""
+        with self._lock:
+            with self.db_client.get_connection() as conn:
+                for table in (
+                    "knowledge_minhash",
+                    "knowledge_fingerprints",
+                    "knowledge_simhash_blocks",
+                ):
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE knowledge_id = ?",  # nosec B608
+                        (knowledge_id,),
+                    )
+                conn.commit()
+            self.lsh.remove(knowledge_id)
+
+    def find_resubmission(
+        self,
+        title: str,
+        content: str,
+        fingerprint: Optional[Dict[str, Any]] = None,
+        max_distance: int = DEFAULT_MAX_HAMMING_DISTANCE,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        同一・ほぼ同一の既存ナレッジ（再投稿）を検索
+
+        完全一致ハッシュで一致すれば exact、SimHashのハミング距離が
+        max_distance 以下かつ内容の類似度が RESUBMISSION_MIN_SIMILARITY 以上なら
+        near_exact とする。いずれも有効なナレッジのみ対象。
+
+        Args:
+            title: タイトル
+            content: 内容
+            fingerprint: 計算済みのフィンガープリント（PreTaskHookの結果）
+            max_distance: ほぼ同一とみなすハミング距離の上限
+
+        Returns:
+            {'knowledge_id', 'title', 'match_type', 'hamming_distance', 'similarity'}
+            または None
+        """
+        self._ensure_fresh()
+        fingerprint = fingerprint or compute_fingerprint(title, content)
+        value = fingerprint["simhash"]
+
+        with self.db_client.get_connection() as conn:
+            row = conn.execute(
+                """
+                SELECT k.id, k.title
+                FROM knowledge_fingerprints f
+                JOIN knowledge_entries k ON k.id = f.knowledge_id
+                WHERE f.content_hash = ? AND k.status = 'active'
+                ORDER BY k.id
+                LIMIT 1
+                """,
+                (fingerprint["content_hash"],),
+            ).fetchone()
+            if row:
+                return {
+                    "knowledge_id": row["id"],
+                    "title": row["title"],
+                    "match_type": "exact",
+                    "hamming_distance": 0,
+                    "similarity": 1.0,
+                }
+
+            # いずれかのブロックが一致する候補をハミング距離で絞り込む
+            # （ブロック一致は多数になり得るため、この段階では本文を読まない）
+            blocks = list(enumerate(simhash_blocks(value)))
+            block_sql = " OR ".join(["(b.block = ? AND b.value = ?)"] * len(blocks))
+            candidates = conn.execute(
+                f"""
+                SELECT DISTINCT f.knowledge_id, f.simhash
+                FROM knowledge_simhash_blocks b
+                JOIN knowledge_fingerprints f ON f.knowledge_id = b.knowledge_id
+                WHERE {block_sql}
+                """,  # nosec B608 - プレースホルダのみで構築
+                [param for pair in blocks for param in pair],
+            ).fetchall()
+
+            distances = {}
+            for candidate in candidates:
+                distance = hamming_distance(value, from_signed64(candidate["simhash"]))
+                if distance <= max_distance:
+                    distances[candidate["knowledge_id"]] = distance
+            if not distances:
+                return None
+
+            # 内容の類似度の確認に必要な、絞り込み後の候補だけ本文を読む
+            placeholders = ", ".join("?" for _ in distances)
+            rows = conn.execute(
+                f"""
+                SELECT id, title, content FROM knowledge_entries
+                WHERE id IN ({placeholders}) AND status = 'active'
+                """,  # nosec B608 - プレースホルダのみで構築
+                list(distances),
+            ).fetchall()
+
+        matches = sorted(
+            ((distances[row["id"]], row) for row in rows),
+            key=lambda item: (item[0], item[1]["id"]),
+        )
+        for distance, candidate in matches:
+            similarity = text_similarity(
+                f"{title}\n{content}", f"{candidate['title']}\n{candidate['content']}"
+            )
+            if similarity >= self.RESUBMISSION_MIN_SIMILARITY:
+                return {
+                    "knowledge_id": candidate["id"],
+                    "title": candidate["title"],
+                    "match_type": "near_exact",
+                    "hamming_distance": distance,
+                    "similarity": round(similarity, 3),
+                }
+        return None
+
+    def query(
+        self,
+        title: str,
+        content: str,
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = 10,
+        exclude_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        近似重複の候補を検索
+
+        Args:
+            title: タイトル
+            content: 内容
+            threshold: 推定Jaccard係数の下限
+            limit: 最大件数
+            exclude_id: 除外するナレッジID（更新時の自分自身など）
+
+        Returns:
+            有効なナレッジのリスト（推定Jaccard係数 near_duplicate_score の降順）
+        """
+        self._ensure_fresh()
+        signature = self.compute_signature(title, content)
+        matches = self.lsh.query(signature, threshold=threshold, exclude=exclude_id)
+        if not matches:
+            return []
+
+        # 候補を多めに取得し、アーカイブ済み・削除済みを除外
+        matches = matches[: limit * 2]
+        scores = dict(matches)
+        rows = self.db_client.get_knowledge_batch([k for k, _ in matches])
+        found = {row["id"] for row in rows}
+        for knowledge_id in scores.keys() - found:
+            self.lsh.remove(knowledge_id)
+
+        results = []
+        for row in rows:
+            if row.get("status", "active") != "active":
+                continue
+            row["near_duplicate_score"] = round(scores[row["id"]], 3)
+            results.append(row)
+        return results[:limit]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """インデックスの状態"""
+        return {
+            "loaded": self._loaded,
+            "syncing": bool(self._sync_thread and self._sync_thread.is_alive()),
+            "entries": len(self.lsh),
+            "num_perm": self.lsh.num_perm,
+            "bands": self.lsh.bands,
+            "rows_per_band": self.lsh.rows,
+        }
+
+
+class BatchDuplicateIndex:
+    """
+    一括処理内の重複検知
+
+    まだ保存していない投稿同士を、バッチ内の位置をキーとして索引する。
+    署名・閾値は共有の NearDuplicateIndex と同じものを使う。
+    """
+
+    def __init__(
+        self,
+        index: NearDuplicateIndex,
+        threshold: float = NearDuplicateIndex.DEFAULT_THRESHOLD,
+    ):
+        """
+        Args:
+            index: 共有の近似重複インデックス（署名の計算に使う）
+            threshold: 近似重複とみなす推定Jaccard係数の下限
+        """
+        self.index = index
+        self.threshold = threshold
+        self.lsh = LSHIndex(index.hasher.num_perm, index.lsh.bands)
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, int] = {}
+        self._texts: Dict[int, str] = {}
+
+    def check(
+        self,
+        position: int,
+        title: str,
+        content: str,
+        fingerprint: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        先に登録した投稿との重複を判定し、重複でなければ登録する
+
+        Args:
+            position: バッチ内の位置
+            title: タイトル
+            content: 内容
+            fingerprint: 計算済みのフィンガープリント
+
+        Returns:
+            {
+                'duplicate_of': 同一・ほぼ同一の投稿の位置 or None,
+                'match_type': 'exact' | 'near_exact' | None,
+                'similarity': float,
+                'similar': [(位置, 推定Jaccard係数)]（近似重複の候補）
+            }
+        """
+        fingerprint = fingerprint or compute_fingerprint(title, content)
+        text = f"{title}\n{content}"
+        signature = self.index.compute_signature(title, content)
+
+        with self._lock:
+            original = self._hashes.get(fingerprint["content_hash"])
+            if original is not None:
+                return {
+                    "duplicate_of": original,
+                    "match_type": "exact",
+                    "similarity": 1.0,
+                    "similar": [],
+                }
+
+            similar = self.lsh.query(signature, threshold=self.threshold)
+            for candidate, _ in similar:
+                similarity = text_similarity(text, self._texts[candidate])
+                if similarity >= NearDuplicateIndex.RESUBMISSION_MIN_SIMILARITY:
+                    return {
+                        "duplicate_of": candidate,
+                        "match_type": "near_exact",
+                        "similarity": round(similarity, 3),
+                        "similar": [],
+                    }
+
+            self._hashes[fingerprint["content_hash"]] = position
+            self._texts[position] = text
+            self.lsh.add(position, signature)
+            return {
+                "duplicate_of": None,
+                "match_type": None,
+                "similarity": 0.0,
+                "similar": [(p, round(score, 3)) for p, score in similar],
+            }
+
+
+# DBファイルごとに共有するインデックス
+_indexes: Dict[str, NearDuplicateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_near_duplicate_index(db_client: SQLiteClient) -> NearDuplicateIndex:
+    """DBファイルごとの共有インデックスを取得"""
+    key = str(Path(db_client.db_path).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = NearDuplicateIndex(db_client)
+            _indexes[key] = index
+        return index
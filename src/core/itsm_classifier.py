@@ -4,7 +4,14 @@ ITSMタイプ自動分類器
 """
 
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from src.utils.keyword_matcher import (
+    KeywordHits,
+    match_keywords,
+    match_keywords_joined,
+    register_keywords,
+)
 
 
 class ITSMClassifier:
@@ -13,6 +20,15 @@ class ITSMClassifier:
     def __init__(self):
         """分類ルールを初期化"""
         self.classification_rules = self._load_classification_rules()
+        register_keywords(
+            "itsm_classifier",
+            (
+                keyword
+                for rules in self.classification_rules.values()
+                for key in ("primary_keywords", "secondary_keywords")
+                for keyword in rules.get(key, [])
+            ),
+        )
 
     def classify(self, title: str, content: str) -> Dict[str, Any]:
         """
@@ -25,11 +41,13 @@ class ITSMClassifier:
         Returns:
             分類結果
         """
-        text = (title + " " + content).lower()
+        # タイトル・本文を1回だけ走査し、全ITSMタイプのスコア計算で共有
+        hits = match_keywords_joined([title.lower(), content.lower()])
+        text = hits.text
 
         scores = {}
         for itsm_type, rules in self.classification_rules.items():
-            score = self._calculate_score(text, rules)
+            score = self._calculate_score(text, rules, hits)
             scores[itsm_type] = score
 
         # 最高スコアのITSMタイプを選択
@@ -166,19 +184,23 @@ class ITSMClassifier:
             },
         }
 
-    def _calculate_score(self, text: str, rules: Dict[str, Any]) -> float:
+    def _calculate_score(
+        self, text: str, rules: Dict[str, Any], hits: Optional[KeywordHits] = None
+    ) -> float:
         """テキストに対するスコアを計算"""
+        if hits is None:
+            hits = match_keywords(text)
         primary_keywords = rules.get("primary_keywords", [])
         secondary_keywords = rules.get("secondary_keywords", [])
         weight_primary = rules.get("weight_primary", 0.5)
         weight_secondary = rules.get("weight_secondary", 0.5)
 
         # プライマリキーワードのマッチ数
-        primary_matches = sum(1 for keyword in primary_keywords if keyword in text)
+        primary_matches = hits.count(primary_keywords)
         primary_score = min(1.0, primary_matches / max(1, len(primary_keywords)))
 
         # セカンダリキーワードのマッチ数
-        secondary_matches = sum(1 for keyword in secondary_keywords if keyword in text)
+        secondary_matches = hits.count(secondary_keywords)
         secondary_score = min(1.0, secondary_matches / max(1, len(secondary_keywords)))
 
         # 重み付けスコア
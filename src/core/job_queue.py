@@ -0,0 +1,564 @@
+"""
+Job Queue
+永続化されたバックグラウンドジョブキュー
+
+ナレッジ生成などの時間のかかる処理をHTTPリクエストのスレッドから切り離す。
+ジョブは jobs テーブルに保存され、バックグラウンドのワーカースレッドが取得して実行する。
+
+- 投入時はジョブIDを返し、状態は get() で確認する
+- 実行中のフェーズは progress に保存し、リスナー（SocketIO等）へ通知する
+- 例外で終わったジョブは待機時間を置いて再試行する（max_attempts まで）
+- 実行中は処理の進捗とは別に生存確認（heartbeat）を定期的に更新し、
+  途絶えた実行中のジョブは再起動後などに再投入する
+- 再投入されたジョブの古い試行は、結果を保存しない（locked_by と attempts で判定）
+- 同じ idempotency_key の再投入は既存のジョブを返す
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.mcp.sqlite_client import SQLiteClient
+
+# (payload, job, report_progress) -> result
+JobHandler = Callable[
+    [Dict[str, Any], Dict[str, Any], Callable[..., None]], Dict[str, Any]
+]
+# 進捗イベントのリスナー
+JobListener = Callable[[Dict[str, Any]], None]
+
+
+class JobQueue:
+    """永続化ジョブキュー + ワーカースレッド"""
+
+    SCHEMA_PATH = Path(__file__).resolve().parents[2] / "db" / "job_queue_schema.sql"
+
+    # ジョブの状態
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    # 待ち時間の統計に使う直近のジョブ数
+    WAIT_STATS_WINDOW = 100
+
+    # この試行がジョブを保持している場合のみ更新する条件
+    # （再投入後に別の試行が取得したジョブを、古い試行が上書きしない）
+    _OWNED_BY_ATTEMPT = "id = ? AND status = 'running' AND locked_by = ? AND attempts = ?"
+
+    def __init__(
+        self,
+        db_client: SQLiteClient,
+        workers: int = 2,
+        max_attempts: int = 3,
+        retry_delay_seconds: float = 5.0,
+        lease_seconds: float = 120.0,
+        poll_interval_seconds: float = 1.0,
+        heartbeat_interval_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            db_client: SQLiteクライアント（jobs テーブルを作成する）
+            workers: ワーカースレッド数
+            max_attempts: 1ジョブあたりの最大試行回数
+            retry_delay_seconds: 再試行までの待機時間（試行ごとに2倍）
+            lease_seconds: 生存確認が途絶えた実行中ジョブを再投入するまでの秒数
+            poll_interval_seconds: キューを確認する間隔
+            heartbeat_interval_seconds: 実行中に生存確認を更新する間隔
+                                        （Noneの場合は lease_seconds の1/4）
+        """
+        if workers < 1:
+            raise ValueError(f"workers は1以上を指定してください: {workers}")
+
+        self.db_client = db_client
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.heartbeat_interval_seconds = (
+            heartbeat_interval_seconds
+            if heartbeat_interval_seconds is not None
+            else lease_seconds / 4
+        )
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._listeners: List[JobListener] = []
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        """ジョブテーブルの適用"""
+        if not self.SCHEMA_PATH.exists():
+            return
+        with open(self.SCHEMA_PATH, "r", encoding="utf-8") as f:
+            schema = f.read()
+        with self.db_client.get_connection() as conn:
+            conn.executescript(schema)
+
+    # ========== 登録 ==========
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        """ジョブ種別の処理を登録"""
+        self._handlers[job_type] = handler
+
+    def add_listener(self, listener: JobListener) -> None:
+        """進捗イベントのリスナーを登録"""
+        self._listeners.append(listener)
+
+    # ========== 投入・参照 ==========
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        ジョブを投入
+
+        Args:
+            job_type: ジョブ種別（register() 済みであること）
+            payload: 処理の入力（JSONに変換できる値）
+            idempotency_key: 同じキーのジョブがあれば投入せずにそれを返す
+            max_attempts: 最大試行回数（Noneの場合は既定値）
+
+        Returns:
+            ジョブ
+
+        Raises:
+            ValueError: 未登録のジョブ種別の場合
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"未登録のジョブ種別です: {job_type}")
+
+        if idempotency_key:
+            existing = self.get_by_idempotency_key(idempotency_key)
+            if existing:
+                return existing
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.db_client.get_connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO jobs (
+                    id, job_type, payload, idempotency_key, status, max_attempts,
+                    progress, created_at, available_at
+                ) VALUES (?, ?, ?, ?, 'queued', ?, '{}', ?, ?)
+                ON CONFLICT(idempotency_key) DO NOTHING
+                """,
+                (
+                    job_id,
+                    job_type,
+                    json.dumps(payload, ensure_ascii=False),
+                    idempotency_key,
+                    max_attempts or self.max_attempts,
+                    now,
+                    now,
+                ),
+            )
+            conn.commit()
+
+        self._wakeup.set()
+        job = self.get(job_id)
+        if job is None and idempotency_key:
+            # 同時に同じキーで投入された
+            job = self.get_by_idempotency_key(idempotency_key)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """ジョブを取得"""
+        with self.db_client.get_connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def get_by_idempotency_key(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """idempotency_key でジョブを取得"""
+        with self.db_client.get_connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    @staticmethod
+    def _row_to_job(row) -> Dict[str, Any]:
+        """行をジョブの辞書に変換（JSON列を展開し、待ち時間を付与）"""
+        job = dict(row)
+        for key in ("payload", "progress", "result"):
+            job[key] = json.loads(job[key]) if job.get(key) else {}
+        job["wait_ms"] = (
+            round((job["started_at"] - job["created_at"]) * 1000)
+            if job.get("started_at")
+            else None
+        )
+        return job
+
+    # ========== メトリクス ==========
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        キューの状況
+
+        Returns:
+            {
+                'depth': 実行待ち件数（再試行の待機中を除く）, 'delayed': 再試行の待機中の件数,
+                'running', 'completed', 'failed': 件数,
+                'oldest_wait_ms': 最も古い実行待ちジョブの待ち時間,
+                'avg_wait_ms', 'max_wait_ms': 直近のジョブの投入〜開始の待ち時間,
+                'workers': ワーカー数, 'workers_alive': 稼働中のワーカー数
+            }
+        """
+        now = time.time()
+        with self.db_client.get_connection() as conn:
+            counts = dict(
+                conn.execute(
+                    "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+                ).fetchall()
+            )
+            queued = conn.execute(
+                """
+                SELECT
+                    SUM(CASE WHEN available_at <= ? THEN 1 ELSE 0 END),
+                    MIN(CASE WHEN available_at <= ? THEN created_at END)
+                FROM jobs WHERE status = 'queued'
+                """,
+                (now, now),
+            ).fetchone()
+            waits = [
+                row[0]
+                for row in conn.execute(
+                    """
+                    SELECT started_at - created_at FROM jobs
+                    WHERE started_at IS NOT NULL
+                    ORDER BY started_at DESC LIMIT ?
+                    """,
+                    (self.WAIT_STATS_WINDOW,),
+                )
+            ]
+
+        depth = queued[0] or 0
+        return {
+            "depth": depth,
+            "delayed": counts.get(self.QUEUED, 0) - depth,
+            "running": counts.get(self.RUNNING, 0),
+            "completed": counts.get(self.COMPLETED, 0),
+            "failed": counts.get(self.FAILED, 0),
+            "oldest_wait_ms": round((now - queued[1]) * 1000) if queued[1] else 0,
+            "avg_wait_ms": round(sum(waits) * 1000 / len(waits)) if waits else 0,
+            "max_wait_ms": round(max(waits) * 1000) if waits else 0,
+            "workers": self.workers,
+            "workers_alive": sum(1 for t in self._threads if t.is_alive()),
+        }
+
+    # ========== ワーカー ==========
+
+    def start(self) -> None:
+        """ワーカースレッドを起動（途絶えた実行中ジョブを再投入してから）"""
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop.clear()
+        self.recover_stale_jobs()
+        self._threads = [
+            threading.Thread(
+                target=self._worker_loop, name=f"job-worker-{i}", daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """ワーカースレッドを停止（実行中のジョブの完了を待つ）"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def recover_stale_jobs(self) -> int:
+        """
+        生存確認が lease_seconds 以上途絶えた実行中ジョブを再投入
+
+        Returns:
+            再投入した件数
+        """
+        with self.db_client.get_connection() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = 'queued', locked_by = NULL, available_at = ?
+                WHERE status = 'running' AND COALESCE(heartbeat_at, 0) < ?
+                """,
+                (time.time(), time.time() - self.lease_seconds),
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def _worker_loop(self) -> None:
+        last_recovery = time.monotonic()
+        while not self._stop.is_set():
+            if time.monotonic() - last_recovery >= self.lease_seconds:
+                self.recover_stale_jobs()
+                last_recovery = time.monotonic()
+
+            if not self.run_next():
+                self._wakeup.wait(self.poll_interval_seconds)
+                self._wakeup.clear()
+
+    def run_next(self) -> bool:
+        """
+        実行待ちのジョブを1件取得して実行
+
+        Returns:
+            ジョブを実行した場合 True
+        """
+        job = self._claim()
+        if job is None:
+            return False
+        self._execute(job)
+        return True
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """実行待ちのジョブを1件取得して実行中にする（UPDATE ... RETURNING で排他）"""
+        now = time.time()
+        with self.db_client.get_connection() as conn:
+            row = conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'running', attempts = attempts + 1, locked_by = ?,
+                    started_at = COALESCE(started_at, ?), heartbeat_at = ?
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status = 'queued' AND available_at <= ?
+                    ORDER BY available_at, created_at
+                    LIMIT 1
+                )
+                RETURNING *
+                """,
+                (self.worker_id, now, now, now),
+            ).fetchone()
+            conn.commit()
+        return self._row_to_job(row) if row else None
+
+    def _owner_params(self, job: Dict[str, Any]) -> tuple:
+        return (job["id"], self.worker_id, job["attempts"])
+
+    def _heartbeat(self, job: Dict[str, Any]) -> bool:
+        """
+        生存確認を更新
+
+        Returns:
+            この試行がまだジョブを保持している場合 True
+        """
+        with self.db_client.get_connection() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE {self._OWNED_BY_ATTEMPT}",
+                (time.time(), *self._owner_params(job)),
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def _run_heartbeat(self, job: Dict[str, Any], done: threading.Event) -> None:
+        """処理の実行中、進捗の報告がなくても生存確認を更新し続ける"""
+        while not done.wait(self.heartbeat_interval_seconds):
+            try:
+                if not self._heartbeat(job):
+                    return
+            except Exception as e:
+                print(f"⚠️  ジョブの生存確認の更新でエラー: {e}")
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        """ジョブを実行し、結果を保存"""
+        handler = self._handlers.get(job["job_type"])
+        self._notify(job, self.RUNNING, phase="started")
+
+        def report_progress(phase: str, **details: Any) -> None:
+            job["progress"] = {**job["progress"], **details, "phase": phase}
+            with self.db_client.get_connection() as conn:
+                conn.execute(
+                    f"""
+                    UPDATE jobs SET progress = ?, heartbeat_at = ?
+                    WHERE {self._OWNED_BY_ATTEMPT}
+                    """,  # nosec B608 - 条件は定数
+                    (
+                        json.dumps(job["progress"], ensure_ascii=False),
+                        time.time(),
+                        *self._owner_params(job),
+                    ),
+                )
+                conn.commit()
+            self._notify(job, self.RUNNING, phase=phase, details=details)
+
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._run_heartbeat,
+            args=(job, done),
+            name=f"job-heartbeat-{job['id'][:8]}",
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            if handler is None:
+                raise ValueError(f"未登録のジョブ種別です: {job['job_type']}")
+            result = handler(job["payload"], job, report_progress) or {}
+        except Exception as e:
+            self._fail_or_retry(job, str(e))
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+
+        # 処理が失敗を返した場合（入力不正など）は再試行しない
+        status = self.FAILED if result.get("success") is False else self.COMPLETED
+        self._finish(job, status, result=result, error=result.get("error"))
+
+    def _fail_or_retry(self, job: Dict[str, Any], error: str) -> None:
+        """例外で終わったジョブを再試行待ちに戻す（最大試行回数に達したら失敗）"""
+        if job["attempts"] >= job["max_attempts"]:
+            self._finish(job, self.FAILED, error=error)
+            return
+
+        delay = self.retry_delay_seconds * (2 ** (job["attempts"] - 1))
+        with self.db_client.get_connection() as conn:
+            cursor = conn.execute(
+                f"""
+                UPDATE jobs SET status = 'queued', locked_by = NULL, error = ?, available_at = ?
+                WHERE {self._OWNED_BY_ATTEMPT}
+                """,  # nosec B608 - 条件は定数
+                (error, time.time() + delay, *self._owner_params(job)),
+            )
+            conn.commit()
+        if cursor.rowcount == 0:
+            self._warn_lease_lost(job)
+            return
+        self._notify(job, self.QUEUED, phase="retrying", details={"error": error})
+
+    def _finish(
+        self,
+        job: Dict[str, Any],
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        with self.db_client.get_connection() as conn:
+            cursor = conn.execute(
+                f"""
+                UPDATE jobs SET status = ?, result = ?, error = ?, locked_by = NULL, finished_at = ?
+                WHERE {self._OWNED_BY_ATTEMPT}
+                """,  # nosec B608 - 条件は定数
+                (
+                    status,
+                    json.dumps(result or {}, ensure_ascii=False, default=str),
+                    error,
+                    time.time(),
+                    *self._owner_params(job),
+                ),
+            )
+            conn.commit()
+        if cursor.rowcount == 0:
+            self._warn_lease_lost(job)
+            return
+        self._notify(job, status, phase=status, details={"error": error} if error else {})
+
+    @staticmethod
+    def _warn_lease_lost(job: Dict[str, Any]) -> None:
+        """再投入されて別の試行が保持しているジョブの結果は保存しない"""
+        print(
+            f"⚠️  ジョブ {job['id']} は再投入済みのため、試行 {job['attempts']} の結果を破棄しました"
+        )
+
+    def _notify(
+        self,
+        job: Dict[str, Any],
+        status: str,
+        phase: str,
+        details: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """リスナーに進捗イベントを通知（リスナーのエラーは処理に影響させない）"""
+        event = {
+            "job_id": job["id"],
+            "job_type": job["job_type"],
+            "status": status,
+            "phase": phase,
+            "attempt": job["attempts"],
+            "details": details or {},
+        }
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"⚠️  ジョブ進捗の通知でエラー: {e}")
+
+
+def make_knowledge_job_handler(
+    workflow_engine: Any,
+    on_complete: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None,
+) -> JobHandler:
+    """
+    ナレッジ生成ジョブの処理を作成
+
+    再試行時、前回の試行で保存まで完了していれば（progress に knowledge_id がある）
+    ワークフローを再実行せずにそのナレッジを返す。通常の再投稿検知と合わせて、
+    再試行でナレッジが二重に作成されないようにする。
+
+    Args:
+        workflow_engine: WorkflowEngine
+        on_complete: 完了後の処理 (payload, result) -> None（対話セッションの完了記録など）
+    """
+
+    def handler(
+        payload: Dict[str, Any], job: Dict[str, Any], report_progress: Callable[..., None]
+    ) -> Dict[str, Any]:
+        saved_id = job["progress"].get("knowledge_id")
+        if saved_id:
+            result = {"success": True, "knowledge_id": saved_id, "recovered": True}
+        else:
+            result = workflow_engine.process_knowledge(
+                title=payload.get("title", ""),
+                content=payload.get("content", ""),
+                itsm_type=payload.get("itsm_type") or "Other",
+                created_by=payload.get("created_by"),
+                force_reprocess=bool(payload.get("force_reprocess", False)),
+                progress_callback=report_progress,
+            )
+        if on_complete:
+            on_complete(payload, result)
+        return result
+
+    return handler
+
+
+def make_backfill_job_handler(workflow_engine: Any) -> JobHandler:
+    """
+    縮退モードで後回しにしたサブエージェント・MCP補強の補完ジョブの処理を作成
+
+    過負荷が続いている間は例外で終えて再試行を待つ（最後の試行では負荷に関わらず補完する）。
+
+    Args:
+        workflow_engine: WorkflowEngine
+    """
+
+    def handler(
+        payload: Dict[str, Any], job: Dict[str, Any], report_progress: Callable[..., None]
+    ) -> Dict[str, Any]:
+        load = workflow_engine.current_load()
+        if load["mode"] != "normal" and job["attempts"] < job["max_attempts"]:
+            raise RuntimeError(
+                f"過負荷が続いているため補完を延期します ({load['mode']})"
+            )
+        report_progress("backfilling", subagents=payload.get("subagents", []))
+        return workflow_engine.backfill_knowledge(
+            payload["knowledge_id"],
+            payload["execution_id"],
+            payload.get("subagents", []),
+            enrichment=bool(payload.get("enrichment", False)),
+        )
+
+    return handler
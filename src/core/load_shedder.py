@@ -0,0 +1,231 @@
+"""
+Load Shedder
+過負荷時のサブエージェントの縮退判定
+
+障害が集中して投稿が殺到すると、すべての投稿で7体のサブエージェントと
+MCP補強を実行するためスループットが大きく低下する。LoadShedder は
+サブエージェント実行プールの待ち件数（タイムアウト後もワーカーを占有している
+処理を含む）・ジョブキューの滞留件数・直近のワークフローのレイテンシ（p95）を監視し、過負荷の度合いに応じて
+優先度の低いサブエージェントとMCP補強を後回しにする縮退レベルを返す。
+
+- degraded: 優先度 low のサブエージェントとMCP補強を後回しにする
+- critical: 優先度 low・medium のサブエージェントとMCP補強を後回しにする
+
+後回しにした処理は WorkflowEngine がバックグラウンドジョブで補完する。
+縮退レベルを下げるのは、過負荷を最後に検知してから cooldown_seconds 経過後
+（閾値付近での切り替わりの繰り返しを防ぐ）。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class LoadShedder:
+    """過負荷の検知と縮退レベルの判定"""
+
+    # 縮退レベル
+    NORMAL = "normal"
+    DEGRADED = "degraded"
+    CRITICAL = "critical"
+    LEVELS = (NORMAL, DEGRADED, CRITICAL)
+
+    # 縮退レベルごとに後回しにするサブエージェントの優先度
+    SHED_PRIORITIES = {
+        NORMAL: (),
+        DEGRADED: ("low",),
+        CRITICAL: ("low", "medium"),
+    }
+
+    DEFAULT_QUEUE_DEPTH = 16
+    DEFAULT_SEVERE_FACTOR = 2.0
+    DEFAULT_LATENCY_WINDOW = 50
+    DEFAULT_COOLDOWN_SECONDS = 30.0
+    # レイテンシで判定するのに必要な件数
+    LATENCY_MIN_SAMPLES = 5
+    # ジョブキューの滞留件数を取得し直す間隔（秒、取得はSQLを伴うため）
+    BACKLOG_REFRESH_SECONDS = 1.0
+
+    def __init__(
+        self,
+        queue_depth: Optional[int] = DEFAULT_QUEUE_DEPTH,
+        backlog_depth: Optional[int] = None,
+        backlog_source: Optional[Callable[[], int]] = None,
+        latency_slo_ms: Optional[float] = None,
+        severe_factor: float = DEFAULT_SEVERE_FACTOR,
+        latency_window: int = DEFAULT_LATENCY_WINDOW,
+        cooldown_seconds: float = DEFAULT_COOLDOWN_SECONDS,
+    ):
+        """
+        Args:
+            queue_depth: サブエージェント実行プールの待ち件数（タイムアウト後も実行中の件数を含む）の
+                         閾値（None・0は監視しない）
+            backlog_depth: ジョブキューの滞留件数の閾値（None・0は監視しない）
+            backlog_source: ジョブキューの滞留件数を返す関数
+            latency_slo_ms: ワークフローのレイテンシ（直近の p95）の目標（None・0は監視しない）
+            severe_factor: 閾値のこの倍数を超えたら critical とする
+            latency_window: p95 を求める直近のワークフロー数
+            cooldown_seconds: 過負荷を最後に検知してから縮退レベルを下げるまでの秒数
+
+        Raises:
+            ValueError: severe_factor が1未満、latency_window が1未満の場合
+        """
+        if severe_factor < 1:
+            raise ValueError(f"severe_factor は1以上を指定してください: {severe_factor}")
+        if latency_window < 1:
+            raise ValueError(f"latency_window は1以上を指定してください: {latency_window}")
+
+        self.queue_depth = queue_depth
+        self.backlog_depth = backlog_depth
+        self.backlog_source = backlog_source
+        self.latency_slo_ms = latency_slo_ms
+        self.severe_factor = severe_factor
+        self.cooldown_seconds = cooldown_seconds
+
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._backlog: Tuple[float, int] = (0.0, 0)
+        self._lock = threading.Lock()
+        self._level = self.NORMAL
+        self._reasons: List[str] = []
+        self._raised_at = 0.0
+
+        self._evaluations = 0
+        self._decisions = {level: 0 for level in self.LEVELS}
+        self._deferred_subagents = 0
+        self._deferred_enrichments = 0
+
+    # ========== 判定 ==========
+
+    def evaluate(self, pool_stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        現在の負荷から縮退レベルを判定
+
+        Args:
+            pool_stats: サブエージェント実行プールの状況（SubAgentRuntime.stats()）
+
+        Returns:
+            {
+                'mode': 'normal' | 'degraded' | 'critical',
+                'reasons': [過負荷と判定した理由],
+                'shed_priorities': [後回しにする優先度],
+                'defer_enrichment': MCP補強を後回しにするか
+            }
+        """
+        pool_stats = pool_stats or {}
+        signals = [
+            # タイムアウトした処理は呼び出し元から見えなくなってもワーカーを空けないため待ちに含める
+            self._signal(
+                "サブエージェントの待ち",
+                pool_stats.get("queued", 0) + pool_stats.get("abandoned", 0),
+                self.queue_depth,
+                "件",
+            ),
+            self._signal("ジョブの滞留", self._backlog_depth(), self.backlog_depth, "件"),
+            self._signal("レイテンシ p95", self.latency_p95(), self.latency_slo_ms, "ms"),
+        ]
+        observed = max((index for index, _ in signals), default=0)
+        reasons = [reason for index, reason in signals if index > 0]
+
+        now = time.monotonic()
+        with self._lock:
+            current = self.LEVELS.index(self._level)
+            if observed >= current:
+                if observed > 0:
+                    self._raised_at = now
+                self._level, self._reasons = self.LEVELS[observed], reasons
+            elif now - self._raised_at >= self.cooldown_seconds:
+                self._level, self._reasons = self.LEVELS[observed], reasons
+            self._evaluations += 1
+            self._decisions[self._level] += 1
+            return self._decision(self._level, self._reasons)
+
+    def _signal(
+        self, label: str, value: Optional[float], threshold: Optional[float], unit: str
+    ) -> Tuple[int, Optional[str]]:
+        """指標1つの縮退レベル（0: 正常, 1: degraded, 2: critical）と理由"""
+        if not threshold or value is None or value < threshold:
+            return 0, None
+        index = 2 if value >= threshold * self.severe_factor else 1
+        return index, f"{label} {value:g}{unit}（閾値 {threshold:g}{unit}）"
+
+    def _decision(self, level: str, reasons: List[str]) -> Dict[str, Any]:
+        return {
+            "mode": level,
+            "reasons": list(reasons),
+            "shed_priorities": list(self.SHED_PRIORITIES[level]),
+            "defer_enrichment": level != self.NORMAL,
+        }
+
+    def _backlog_depth(self) -> Optional[int]:
+        """ジョブキューの滞留件数（BACKLOG_REFRESH_SECONDS の間は前回の値を使う）"""
+        if self.backlog_source is None or not self.backlog_depth:
+            return None
+        fetched_at, depth = self._backlog
+        if time.monotonic() - fetched_at >= self.BACKLOG_REFRESH_SECONDS:
+            try:
+                depth = int(self.backlog_source())
+            except Exception as e:
+                print(f"⚠️  ジョブの滞留件数の取得でエラー: {e}")
+            self._backlog = (time.monotonic(), depth)
+        return depth
+
+    # ========== 記録 ==========
+
+    def record_latency(self, latency_ms: float) -> None:
+        """完了したワークフローのレイテンシを記録"""
+        with self._lock:
+            self._latencies.append(latency_ms)
+
+    def latency_p95(self) -> Optional[float]:
+        """直近のワークフローのレイテンシの p95（件数が足りない場合は None）"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < self.LATENCY_MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def record_shed(self, subagents: List[str], enrichment: bool) -> None:
+        """後回しにした処理を記録（統計用）"""
+        with self._lock:
+            self._deferred_subagents += len(subagents)
+            self._deferred_enrichments += int(enrichment)
+
+    @property
+    def mode(self) -> str:
+        """直近の判定の縮退レベル"""
+        return self._level
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        縮退の状況
+
+        Returns:
+            {
+                'mode': 直近の縮退レベル, 'reasons': 理由,
+                'evaluations': 判定回数, 'decisions': {縮退レベル: 回数},
+                'deferred_subagents': 後回しにしたサブエージェントの延べ数,
+                'deferred_enrichments': 後回しにしたMCP補強の件数,
+                'latency_p95_ms': 直近の p95, 'thresholds': 各閾値
+            }
+        """
+        latency_p95 = self.latency_p95()
+        with self._lock:
+            return {
+                "mode": self._level,
+                "reasons": list(self._reasons),
+                "evaluations": self._evaluations,
+                "decisions": dict(self._decisions),
+                "deferred_subagents": self._deferred_subagents,
+                "deferred_enrichments": self._deferred_enrichments,
+                "latency_p95_ms": latency_p95,
+                "thresholds": {
+                    "queue_depth": self.queue_depth,
+                    "backlog_depth": self.backlog_depth,
+                    "latency_slo_ms": self.latency_slo_ms,
+                    "severe_factor": self.severe_factor,
+                },
+            }
+
+    def __repr__(self) -> str:
+        return f"<LoadShedder mode='{self._level}'>"
@@ -0,0 +1,321 @@
+"""
+MCP Enrichment Stage
+保存後のMCP補強（ナレッジ保存のクリティカルパスから分離）
+
+Context7・Claude-Mem の応答時間をナレッジの保存時間に含めないよう、
+ナレッジを保存した後にバックグラウンドで補強し、結果を知見（insights）に追記する。
+
+- 情報源ごとのタイムアウト（遅い情報源があっても他の情報源の結果は追記する）
+- 同じ技術・キーワードを最近補強した場合は、MCPを呼び出さずに前回の結果を使う
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait as wait_futures
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.mcp.sqlite_client import SQLiteClient
+from src.utils import tracing
+from src.utils.deadline import Deadline
+
+# 技術ドキュメントを参照する技術（ナレッジのタグと照合）
+ENRICHED_TECHNOLOGIES = ("flask", "sqlite", "python", "apache", "nginx")
+
+
+class MCPEnrichmentStage:
+    """保存後のMCP補強ステージ"""
+
+    DEFAULT_SOURCE_TIMEOUT_SECONDS = 10.0
+    DEFAULT_RECENT_TTL_SECONDS = 600.0
+    DEFAULT_MAX_RECENT_ENTRIES = 256
+
+    def __init__(
+        self,
+        db_client: SQLiteClient,
+        integration: Any,
+        source_timeout: Optional[float] = DEFAULT_SOURCE_TIMEOUT_SECONDS,
+        recent_ttl: float = DEFAULT_RECENT_TTL_SECONDS,
+        max_workers: int = 2,
+        max_recent_entries: int = DEFAULT_MAX_RECENT_ENTRIES,
+    ):
+        """
+        Args:
+            db_client: 知見を追記するデータベース
+            integration: MCP連携（MCPIntegration）
+            source_timeout: 情報源1つあたりの待ち時間の上限（秒、Noneは無制限）
+            recent_ttl: 同じ技術・キーワードの補強結果を再利用する期間（秒、0は再利用しない）
+            max_workers: 同時に補強するナレッジ数
+            max_recent_entries: 再利用のために保持する補強結果の件数の上限
+        """
+        self.db_client = db_client
+        self.integration = integration
+        self.source_timeout = source_timeout
+        self.recent_ttl = recent_ttl
+        self.max_recent_entries = max_recent_entries
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="mcp-enrichment"
+        )
+        # 情報源の呼び出し用（タイムアウトした呼び出しが終わるまでスレッドを占有するため分ける）
+        self._source_executor = ThreadPoolExecutor(
+            max_workers=max_workers * 2, thread_name_prefix="mcp-source"
+        )
+
+        # (情報源, 技術・キーワード...) -> (取得時刻, 結果)
+        self._recent: "OrderedDict[Tuple[str, ...], Tuple[float, Any]]" = OrderedDict()
+        self._pending: Set[Future] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._scheduled = 0
+        self._completed = 0
+        self._failed = 0
+        self._reused_sources = 0
+        self._source_timeouts = 0
+
+    # ========== 補強 ==========
+
+    @staticmethod
+    def detect_technologies(tags: List[str]) -> List[str]:
+        """技術ドキュメントを参照するタグ"""
+        return [tag for tag in tags if tag.lower() in ENRICHED_TECHNOLOGIES]
+
+    @staticmethod
+    def insights_for(enrichments: Dict[str, Any]) -> List[str]:
+        """補強結果から知見に追記する文言"""
+        insights = []
+        if enrichments.get("related_memories"):
+            insights.append(
+                f"📚 過去の関連記憶: {len(enrichments['related_memories'])}件見つかりました"
+            )
+        if enrichments.get("technical_documentation"):
+            insights.append(
+                f"📖 技術ドキュメント: {len(enrichments['technical_documentation'])}個の技術について参照可能"
+            )
+        return insights
+
+    def schedule(
+        self, knowledge_id: int, content: str, tags: List[str]
+    ) -> Optional[Future]:
+        """
+        保存済みのナレッジの補強を予約
+
+        Returns:
+            補強結果（enrich() の戻り値）の Future（終了済みの場合は None）
+        """
+        with self._lock:
+            if self._closed:
+                return None
+            # 予約元のトレースに補強のスパンを追加する（保存後に記録される）
+            future = self._executor.submit(
+                tracing.bind(self._run), knowledge_id, content, tags
+            )
+            self._pending.add(future)
+            self._scheduled += 1
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def _run(self, knowledge_id: int, content: str, tags: List[str]) -> Dict[str, Any]:
+        try:
+            with tracing.span("mcp_enrichment", knowledge_id=knowledge_id) as span:
+                result = self.enrich(knowledge_id, content, tags)
+                span.set_attributes(
+                    reused_sources=result["reused_sources"],
+                    timed_out_sources=result["timed_out_sources"],
+                )
+        except Exception as e:
+            with self._lock:
+                self._failed += 1
+            print(f"⚠️  MCP補強でエラー (ID: {knowledge_id}): {e}")
+            return {"knowledge_id": knowledge_id, "error": str(e)}
+        with self._lock:
+            self._completed += 1
+        return result
+
+    def enrich(self, knowledge_id: int, content: str, tags: List[str]) -> Dict[str, Any]:
+        """
+        ナレッジを補強し、知見に追記
+
+        Returns:
+            {
+                'knowledge_id': ナレッジID, 'enrichments': 補強情報,
+                'insights': 追記した知見, 'reused_sources': 前回の結果を使った情報源,
+                'timed_out_sources': タイムアウトした情報源
+            }
+        """
+        technologies = self.detect_technologies(tags)
+        keywords = list(self.integration.memory_keywords(content))
+
+        sources: Dict[str, Tuple[Tuple[str, ...], Callable[[Deadline], Any]]] = {}
+        if technologies:
+            sources["technical_documentation"] = (
+                ("technical_documentation",)
+                + tuple(sorted(t.lower() for t in technologies)),
+                lambda deadline: self.integration.fetch_technical_documentation(
+                    technologies, deadline
+                ),
+            )
+        if keywords:
+            sources["related_memories"] = (
+                ("related_memories",) + tuple(keywords),
+                lambda deadline: self.integration.fetch_related_memories(
+                    keywords, deadline
+                ),
+            )
+
+        values: Dict[str, Any] = {}
+        reused: List[str] = []
+        running: Dict[str, Tuple[Tuple[str, ...], Deadline, Future]] = {}
+        for name, (key, fetch) in sources.items():
+            value = self._recall(key)
+            if value is not None:
+                values[name] = value
+                reused.append(name)
+                continue
+            deadline = Deadline(self.source_timeout)
+            running[name] = (
+                key,
+                deadline,
+                self._source_executor.submit(
+                    tracing.bind(self._fetch), name, fetch, deadline
+                ),
+            )
+
+        # 情報源は並行して呼び出し、それぞれ source_timeout まで待つ
+        timed_out: List[str] = []
+        for name, (key, deadline, future) in running.items():
+            try:
+                values[name] = future.result(deadline.remaining())
+            except FutureTimeoutError:
+                # 実行中の呼び出しには残りのMCP呼び出しの打ち切りを伝える
+                deadline.cancel()
+                timed_out.append(name)
+                continue
+            except Exception as e:
+                print(f"⚠️  MCP補強でエラー ({name}): {e}")
+                continue
+            self._remember(key, values[name])
+
+        if reused or timed_out:
+            with self._lock:
+                self._reused_sources += len(reused)
+                self._source_timeouts += len(timed_out)
+        if timed_out:
+            print(f"⏱️  MCP補強がタイムアウトしました: {', '.join(timed_out)} (ID: {knowledge_id})")
+
+        enrichments = {name: value for name, value in values.items() if value}
+        insights = self.insights_for(enrichments)
+        if insights:
+            self.db_client.append_knowledge_insights(knowledge_id, insights)
+
+        return {
+            "knowledge_id": knowledge_id,
+            "enrichments": enrichments,
+            "insights": insights,
+            "reused_sources": reused,
+            "timed_out_sources": timed_out,
+        }
+
+    @staticmethod
+    def _fetch(name: str, fetch: Callable[[Deadline], Any], deadline: Deadline) -> Any:
+        """情報源を呼び出す（情報源ごとのスパンを記録）"""
+        with tracing.span(f"mcp.{name}") as span:
+            value = fetch(deadline)
+            if deadline.cancelled:
+                span.set_status("timeout")
+            return value
+
+    # ========== 最近の補強結果 ==========
+
+    def _recall(self, key: Tuple[str, ...]) -> Any:
+        """recent_ttl 以内に取得した結果（ない場合は None）"""
+        with self._lock:
+            entry = self._recent.get(key)
+            if entry is None:
+                return None
+            fetched_at, value = entry
+            if time.monotonic() - fetched_at > self.recent_ttl:
+                del self._recent[key]
+                return None
+            self._recent.move_to_end(key)
+            return value
+
+    def _remember(self, key: Tuple[str, ...], value: Any) -> None:
+        if self.recent_ttl <= 0:
+            return
+        with self._lock:
+            self._recent[key] = (time.monotonic(), value)
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.max_recent_entries:
+                self._recent.popitem(last=False)
+
+    # ========== ライフサイクル ==========
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        予約済みの補強の終了を待つ
+
+        Returns:
+            すべて終了した場合 True
+        """
+        with self._lock:
+            pending = list(self._pending)
+        _, not_done = wait_futures(pending, timeout=timeout)
+        return not not_done
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        終了（以降の予約は受け付けない）
+
+        Args:
+            wait: 予約済みの補強の終了を待つか（待たない場合は未開始の補強を取り消す）
+        """
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        # タイムアウトした情報源の呼び出しは待たない
+        self._source_executor.shutdown(wait=False)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    # ========== メトリクス ==========
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        補強の状況
+
+        Returns:
+            {
+                'scheduled': 予約数, 'pending': 未終了の数, 'completed': 完了数,
+                'failed': 失敗数, 'reused_sources': 前回の結果を使った情報源の数,
+                'source_timeouts': タイムアウトした情報源の数,
+                'recent_entries': 再利用のために保持している結果の数
+            }
+        """
+        with self._lock:
+            return {
+                "scheduled": self._scheduled,
+                "pending": len(self._pending),
+                "completed": self._completed,
+                "failed": self._failed,
+                "reused_sources": self._reused_sources,
+                "source_timeouts": self._source_timeouts,
+                "recent_entries": len(self._recent),
+                "source_timeout": self.source_timeout,
+                "recent_ttl": self.recent_ttl,
+            }
+
+    def __repr__(self) -> str:
+        return (
+            f"<MCPEnrichmentStage pending={len(self._pending)} "
+            f"source_timeout={self.source_timeout}>"
+        )
@@ -0,0 +1,253 @@
+"""
+SubAgent Result Cache
+サブエージェント結果のキャッシュ（入力のハッシュによるメモ化）
+
+誤字の修正や再実行では、変更されていないフィールドだけを参照するサブエージェントの
+結果は前回と同じになる。各サブエージェントは参照する入力フィールド
+（CACHE_INPUT_FIELDS）と処理のバージョン（CACHE_VERSION）を宣言し、
+それらのハッシュをキーに結果を再利用する。
+
+- メモリ: 件数上限付きのLRU（プロセス内）
+- SQLite: 任意の第2層（再起動後・複数プロセス間で共有）
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.agents.process_pool import class_path_of
+from src.mcp.sqlite_client import SQLiteClient
+
+# キャッシュする結果の状態（失敗・タイムアウトは再実行する）
+CACHEABLE_STATUSES = ("success", "warning")
+
+
+class SubAgentResultCache:
+    """サブエージェント結果のキャッシュ"""
+
+    SCHEMA_PATH = (
+        Path(__file__).resolve().parents[2] / "db" / "subagent_cache_schema.sql"
+    )
+
+    DEFAULT_MAX_ENTRIES = 256
+    DEFAULT_MAX_PERSISTENT_ENTRIES = 10000
+    # 永続層の件数上限を確認する間隔（書き込み件数）
+    PRUNE_INTERVAL = 100
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        db_client: Optional[SQLiteClient] = None,
+        max_persistent_entries: int = DEFAULT_MAX_PERSISTENT_ENTRIES,
+    ):
+        """
+        Args:
+            max_entries: メモリに保持する件数の上限
+            db_client: 指定した場合、SQLiteにも保存する（メモリにない結果を引き継ぐ）
+            max_persistent_entries: SQLiteに保持する件数の上限（古く使われていない順に削除）
+        """
+        self.max_entries = max_entries
+        self.db_client = db_client
+        self.max_persistent_entries = max_persistent_entries
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._persistent_hits = 0
+        self._misses = 0
+        self._writes = 0
+
+        if db_client is not None:
+            self._ensure_schema()
+
+    def _ensure_schema(self):
+        """キャッシュテーブルの適用"""
+        if not self.SCHEMA_PATH.exists():
+            return
+        with open(self.SCHEMA_PATH, "r", encoding="utf-8") as f:
+            schema = f.read()
+        with self.db_client.get_connection() as conn:
+            conn.executescript(schema)
+
+    # ========== キー ==========
+
+    @staticmethod
+    def key_for(subagent: Any, input_data: Dict[str, Any]) -> Optional[str]:
+        """
+        キャッシュキーを計算
+
+        Args:
+            subagent: サブエージェント（cache_inputs() を持つこと）
+            input_data: 入力データ
+
+        Returns:
+            SHA-256（キャッシュしないサブエージェントの場合は None）
+        """
+        cache_inputs = getattr(subagent, "cache_inputs", None)
+        inputs = cache_inputs(input_data) if callable(cache_inputs) else None
+        if not isinstance(inputs, dict):
+            return None
+        payload = json.dumps(
+            {
+                "agent": class_path_of(subagent),
+                "version": str(getattr(subagent, "CACHE_VERSION", "")),
+                "inputs": inputs,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ========== 参照・保存 ==========
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュ済みの結果を取得（呼び出し元が変更しても影響しないよう複製を返す）
+
+        Returns:
+            SubAgentResult.to_dict() 形式の結果（ない場合は None）
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return copy.deepcopy(result)
+
+        result = self._get_persistent(key)
+        with self._lock:
+            if result is None:
+                self._misses += 1
+                return None
+            self._persistent_hits += 1
+            self._remember(key, result)
+        return copy.deepcopy(result)
+
+    def put(self, key: str, subagent_name: str, result: Dict[str, Any]) -> bool:
+        """
+        結果を保存（失敗・タイムアウトの結果は保存しない）
+
+        Returns:
+            保存した場合 True
+        """
+        if result.get("status") not in CACHEABLE_STATUSES:
+            return False
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._remember(key, result)
+            self._writes += 1
+            prune = self._writes % self.PRUNE_INTERVAL == 0
+
+        if self.db_client is not None:
+            self._put_persistent(key, subagent_name, result, prune)
+        return True
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        """メモリに保存（上限を超えたら最も古く使われた結果を削除、ロック内で呼ぶ）"""
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """メモリ上の結果を削除（永続層は残す）"""
+        with self._lock:
+            self._entries.clear()
+
+    # ========== 永続層 ==========
+
+    def _get_persistent(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.db_client is None:
+            return None
+        try:
+            with self.db_client.get_connection() as conn:
+                row = conn.execute(
+                    "SELECT result FROM subagent_result_cache WHERE cache_key = ?",
+                    (key,),
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE subagent_result_cache SET last_used_at = ? WHERE cache_key = ?",
+                    (time.time(), key),
+                )
+                conn.commit()
+            return json.loads(row["result"])
+        except Exception as e:
+            print(f"⚠️  サブエージェント結果キャッシュの読み込みでエラー: {e}")
+            return None
+
+    def _put_persistent(
+        self, key: str, subagent_name: str, result: Dict[str, Any], prune: bool
+    ) -> None:
+        now = time.time()
+        try:
+            with self.db_client.get_connection() as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO subagent_result_cache (
+                        cache_key, subagent_name, result, created_at, last_used_at
+                    ) VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (
+                        key,
+                        subagent_name,
+                        json.dumps(result, ensure_ascii=False, default=str),
+                        now,
+                        now,
+                    ),
+                )
+                if prune:
+                    conn.execute(
+                        """
+                        DELETE FROM subagent_result_cache WHERE cache_key NOT IN (
+                            SELECT cache_key FROM subagent_result_cache
+                            ORDER BY last_used_at DESC LIMIT ?
+                        )
+                        """,
+                        (self.max_persistent_entries,),
+                    )
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️  サブエージェント結果キャッシュの保存でエラー: {e}")
+
+    # ========== メトリクス ==========
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        キャッシュの利用状況
+
+        Returns:
+            {
+                'entries': メモリ上の件数, 'max_entries': 上限,
+                'hits': ヒット数（永続層を含む）, 'persistent_hits': 永続層からのヒット数,
+                'misses': ミス数, 'hit_rate': ヒット率, 'persistent': 永続層の有無
+            }
+        """
+        with self._lock:
+            hits = self._hits + self._persistent_hits
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": hits,
+                "persistent_hits": self._persistent_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "persistent": self.db_client is not None,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return (
+            f"<SubAgentResultCache entries={len(self._entries)}/{self.max_entries} "
+            f"persistent={self.db_client is not None}>"
+        )
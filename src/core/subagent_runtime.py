@@ -0,0 +1,310 @@
+"""
+SubAgent Runtime
+サブエージェント実行用の常駐ワーカープールとイベントループ
+
+WorkflowEngine はリクエストごとにグローバルなイベントループを取得・生成し、
+サブエージェント1回ごとに ThreadPoolExecutor を生成していた。Flask のワーカー
+スレッドにはイベントループがないため、並行リクエストでループのエラーや
+スレッドの生成・破棄が多発していた。
+
+SubAgentRuntime は専用スレッドで1つのイベントループを動かし続け、
+サブエージェントは常駐のスレッドプールで実行する。呼び出し側のスレッドは
+コルーチンを投入して結果を待つだけなので、どのスレッドからでも呼び出せる。
+"""
+
+import asyncio
+import atexit
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+# サブエージェント実行プールのワーカー数（既定値）
+DEFAULT_MAX_WORKERS = int(os.getenv("WORKFLOW_SUBAGENT_WORKERS", "8"))
+# 起動時・シャットダウン時にループスレッドを待つ秒数
+STARTUP_TIMEOUT_SECONDS = 5.0
+SHUTDOWN_TIMEOUT_SECONDS = 5.0
+
+
+class SubAgentRuntime:
+    """
+    常駐ワーカープール + 専用イベントループスレッド
+
+    プールの飽和状況（実行中・待ち件数、投入時に全ワーカーが使用中だった件数、
+    待ち時間）を stats() で取得できる。呼び出し元がタイムアウトした後も実行中の
+    処理はワーカーを占有しているため、abandoned として別に数える。
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, name: str = "subagent"):
+        """
+        Args:
+            max_workers: ワーカースレッド数
+            name: スレッド名のプレフィックス
+
+        Raises:
+            ValueError: max_workers が1未満の場合
+            RuntimeError: イベントループを起動できなかった場合
+        """
+        if max_workers < 1:
+            raise ValueError(f"max_workers は1以上を指定してください: {max_workers}")
+
+        self.max_workers = max_workers
+        self.name = name
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"{name}-worker"
+        )
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+        self._thread = threading.Thread(
+            target=self._run_loop, name=f"{name}-loop", daemon=True
+        )
+        self._lock = threading.Lock()
+        self._closed = False
+        self._ready = threading.Event()
+        self._loop_started = False
+        self._startup_error: Optional[BaseException] = None
+
+        # 飽和メトリクス
+        self._active = 0
+        self._queued = 0
+        self._peak_active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._saturated_submissions = 0
+        self._total_queue_wait = 0.0
+        self._abandoned = 0
+        self._cancelled_before_start = 0
+
+        self._thread.start()
+        # ループが実際に動き出すまで待つ（起動できなければ投入した処理が永久に終わらない）
+        self._ready.wait(STARTUP_TIMEOUT_SECONDS)
+        if not self._loop_started:
+            self.shutdown(wait=False)
+            raise RuntimeError(
+                "サブエージェント実行用のイベントループを起動できませんでした"
+                + (f": {self._startup_error}" if self._startup_error else "")
+            )
+
+    # ========== イベントループ ==========
+
+    def _mark_started(self) -> None:
+        """ループ上で最初に実行されるコールバック"""
+        self._loop_started = True
+        self._ready.set()
+
+    def _run_loop(self) -> None:
+        """専用スレッドでイベントループを実行（停止後は残タスクを取り消して閉じる）"""
+        try:
+            asyncio.set_event_loop(self._loop)
+            self._loop.call_soon(self._mark_started)
+            self._loop.run_forever()
+        except Exception as e:
+            # 起動前の失敗は __init__ で RuntimeError として通知する
+            self._startup_error = e
+        finally:
+            self._ready.set()
+            if self._loop_started:
+                pending = asyncio.all_tasks(self._loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    self._loop.run_until_complete(
+                        asyncio.gather(*pending, return_exceptions=True)
+                    )
+                self._loop.close()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """専用イベントループ"""
+        return self._loop
+
+    def in_loop_thread(self) -> bool:
+        """現在のスレッドがイベントループのスレッドか"""
+        return threading.current_thread() is self._thread
+
+    @property
+    def closed(self) -> bool:
+        """シャットダウン済みか"""
+        return self._closed
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        コルーチンを専用ループで実行し、結果を待つ（任意のスレッドから呼び出し可能）
+
+        Args:
+            coro: 実行するコルーチン
+            timeout: 待ち時間の上限（秒、Noneは無制限）
+
+        Returns:
+            コルーチンの戻り値
+
+        Raises:
+            RuntimeError: シャットダウン済み、またはループのスレッドから呼び出した場合
+            concurrent.futures.TimeoutError: timeout を超えた場合（コルーチンは取り消される）
+        """
+        if self._closed:
+            coro.close()
+            raise RuntimeError("SubAgentRuntime はシャットダウン済みです")
+        if self.in_loop_thread():
+            # ループ内から結果を待つとデッドロックする
+            coro.close()
+            raise RuntimeError("イベントループのスレッドから run() は呼び出せません")
+
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    # ========== ワーカープール ==========
+
+    async def run_in_executor(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        常駐プールで関数を実行（専用ループ上のコルーチンから呼び出す）
+
+        待っているコルーチンが取り消された場合（asyncio.wait_for のタイムアウト等）、
+        開始前の処理は取り消し、実行中の処理は終わるまで abandoned として数える。
+        """
+        state: Dict[str, bool] = {"finished": False, "abandoned": False}
+        future = self._executor.submit(self._tracked(func, state), *args)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            self._abandon(future, state)
+            raise
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        """常駐プールで関数を実行（同期コードから呼び出す）"""
+        if self._closed:
+            raise RuntimeError("SubAgentRuntime はシャットダウン済みです")
+        return self._executor.submit(self._tracked(func), *args)
+
+    def _tracked(
+        self, func: Callable[..., Any], state: Optional[Dict[str, bool]] = None
+    ) -> Callable[..., Any]:
+        """飽和メトリクスを記録するラッパー（投入元のコンテキスト（トレースのスパン）で実行する）"""
+        submitted_at = time.perf_counter()
+        context = contextvars.copy_context()
+        state = state if state is not None else {"finished": False, "abandoned": False}
+        with self._lock:
+            self._submitted += 1
+            self._queued += 1
+            if self._active + self._queued > self.max_workers:
+                self._saturated_submissions += 1
+
+        def run(*args: Any) -> Any:
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._peak_active = max(self._peak_active, self._active)
+                self._total_queue_wait += time.perf_counter() - submitted_at
+            try:
+                return context.run(func, *args)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    state["finished"] = True
+                    if state["abandoned"]:
+                        self._abandoned -= 1
+
+        return run
+
+    def _abandon(self, future: Future, state: Dict[str, bool]) -> None:
+        """呼び出し元が結果を待たなくなった処理を記録"""
+        with self._lock:
+            if future.cancelled():
+                # 開始前に取り消した（ワーカーは使っていない）
+                self._queued -= 1
+                self._cancelled_before_start += 1
+            elif not state["finished"] and not state["abandoned"]:
+                state["abandoned"] = True
+                self._abandoned += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        プールの飽和状況
+
+        Returns:
+            {
+                'max_workers': int, 'active': int, 'queued': int,
+                'abandoned': int（呼び出し元がタイムアウトした後も実行中の件数、active に含む）,
+                'available': int（空いているワーカー数）,
+                'saturation': float（実行中 / ワーカー数）,
+                'peak_active': int, 'submitted': int, 'completed': int,
+                'saturated_submissions': int（投入時に全ワーカーが使用中だった件数）,
+                'cancelled_before_start': int（開始前に取り消した件数）,
+                'avg_queue_wait_ms': float, 'loop_running': bool
+            }
+        """
+        with self._lock:
+            started = self._submitted - self._queued - self._cancelled_before_start
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "abandoned": self._abandoned,
+                "available": max(0, self.max_workers - self._active),
+                "saturation": round(self._active / self.max_workers, 2),
+                "peak_active": self._peak_active,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "saturated_submissions": self._saturated_submissions,
+                "cancelled_before_start": self._cancelled_before_start,
+                "avg_queue_wait_ms": (
+                    round(self._total_queue_wait * 1000 / started, 2) if started else 0.0
+                ),
+                "loop_running": self._thread.is_alive() and not self._closed,
+            }
+
+    # ========== シャットダウン ==========
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        イベントループを停止し、ワーカープールを終了
+
+        Args:
+            wait: 実行中のサブエージェントの完了を待つか
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if wait and not self.in_loop_thread():
+            self._thread.join(SHUTDOWN_TIMEOUT_SECONDS)
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "SubAgentRuntime":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
+    def __repr__(self) -> str:
+        return (
+            f"<SubAgentRuntime name='{self.name}' max_workers={self.max_workers} "
+            f"closed={self._closed}>"
+        )
+
+
+# 共有ランタイム（プロセス内の WorkflowEngine で共有）
+_runtime: Optional[SubAgentRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_subagent_runtime() -> SubAgentRuntime:
+    """共有ランタイムを取得（シングルトン、プロセス終了時にシャットダウン）"""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None or _runtime.closed:
+            _runtime = SubAgentRuntime()
+            atexit.register(_runtime.shutdown)
+        return _runtime
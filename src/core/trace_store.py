@@ -0,0 +1,130 @@
+"""
+Trace Store
+ワークフローのトレース（処理区間）の保存
+
+WorkflowEngine が記録したスパンを workflow_spans テーブルに保存し、
+ワークフロー実行ごとにウォーターフォール・Chrome のトレース形式で取得する。
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+from src.mcp.sqlite_client import SQLiteClient
+from src.utils.tracing import to_chrome_trace, waterfall
+
+
+class TraceStore:
+    """スパンの保存先"""
+
+    SCHEMA_PATH = (
+        Path(__file__).resolve().parents[2] / "db" / "workflow_spans_schema.sql"
+    )
+
+    def __init__(self, db_client: SQLiteClient):
+        self.db_client = db_client
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        """スパンテーブルの適用"""
+        if not self.SCHEMA_PATH.exists():
+            return
+        with open(self.SCHEMA_PATH, "r", encoding="utf-8") as f:
+            schema = f.read()
+        with self.db_client.get_connection() as conn:
+            conn.executescript(schema)
+            # cpu_ms 追加前に作成したテーブル
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(workflow_spans)")}
+            if "cpu_ms" not in columns:
+                conn.execute("ALTER TABLE workflow_spans ADD COLUMN cpu_ms REAL")
+                conn.commit()
+
+    def save(self, execution_id: int, spans: List[Dict[str, Any]]) -> None:
+        """
+        スパンを保存
+
+        Args:
+            execution_id: ワークフロー実行ID
+            spans: Span.to_dict() 形式のスパン
+        """
+        if not spans:
+            return
+        with self.db_client.get_connection() as conn:
+            conn.executemany(
+                """
+                INSERT INTO workflow_spans (
+                    workflow_execution_id, trace_id, span_id, parent_span_id, name,
+                    start_time, duration_ms, cpu_ms, status, thread_name, attributes
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        execution_id,
+                        s["trace_id"],
+                        s["span_id"],
+                        s.get("parent_id"),
+                        s["name"],
+                        s["start_time"],
+                        s.get("duration_ms") or 0,
+                        s.get("cpu_ms"),
+                        s.get("status") or "ok",
+                        s.get("thread_name"),
+                        json.dumps(s.get("attributes") or {}, ensure_ascii=False, default=str),
+                    )
+                    for s in spans
+                ],
+            )
+            conn.commit()
+
+    def sink_for(self, execution_id: int):
+        """ワークフロー実行のスパンを保存する関数（start_trace() の sink）"""
+        return lambda spans: self.save(execution_id, spans)
+
+    def get_spans(self, execution_id: int) -> List[Dict[str, Any]]:
+        """ワークフロー実行のスパン（開始順）"""
+        return self.get_spans_for([execution_id])
+
+    def get_spans_for(self, execution_ids: List[int]) -> List[Dict[str, Any]]:
+        """複数のワークフロー実行のスパン（開始順、workflow_execution_id 付き）"""
+        spans: List[Dict[str, Any]] = []
+        for start in range(0, len(execution_ids), SQLiteClient.BATCH_CHUNK_SIZE):
+            chunk = execution_ids[start : start + SQLiteClient.BATCH_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            with self.db_client.get_connection() as conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT workflow_execution_id, trace_id, span_id, parent_span_id, name,
+                           start_time, duration_ms, cpu_ms, status, thread_name, attributes
+                    FROM workflow_spans
+                    WHERE workflow_execution_id IN ({placeholders})
+                    ORDER BY start_time, id
+                    """,  # nosec B608 - プレースホルダのみ
+                    chunk,
+                ).fetchall()
+            spans.extend(self._row_to_span(row) for row in rows)
+        spans.sort(key=lambda s: s["start_time"])
+        return spans
+
+    @staticmethod
+    def _row_to_span(row: Any) -> Dict[str, Any]:
+        return {
+            "workflow_execution_id": row["workflow_execution_id"],
+            "trace_id": row["trace_id"],
+            "span_id": row["span_id"],
+            "parent_id": row["parent_span_id"],
+            "name": row["name"],
+            "start_time": row["start_time"],
+            "duration_ms": row["duration_ms"],
+            "cpu_ms": row["cpu_ms"],
+            "status": row["status"],
+            "thread_name": row["thread_name"],
+            "attributes": json.loads(row["attributes"]) if row["attributes"] else {},
+        }
+
+    def waterfall(self, execution_id: int) -> List[Dict[str, Any]]:
+        """ウォーターフォール表示用のスパン（offset_ms・depth 付き）"""
+        return waterfall(self.get_spans(execution_id))
+
+    def chrome_trace(self, execution_id: int) -> Dict[str, Any]:
+        """Chrome のトレース形式"""
+        return to_chrome_trace(self.get_spans(execution_id))
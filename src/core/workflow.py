@@ -4,16 +4,31 @@ Core Workflow Engine
 """
 
 import sys
+import threading
 import time
+from concurrent.futures import Future
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 # モジュールパスを追加
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.agents.loader import AgentLoader
+from src.agents.process_pool import SubAgentProcessPool, class_path_of, validate_backend
+from src.core.dag_scheduler import SubAgentDAG
+from src.core.load_shedder import LoadShedder
+from src.core.mcp_enrichment import MCPEnrichmentStage
+from src.core.result_cache import SubAgentResultCache
+from src.core.trace_store import TraceStore
+from src.core.duplicate_index import (
+    BatchDuplicateIndex,
+    NearDuplicateIndex,
+    get_near_duplicate_index,
+)
+from src.core.subagent_runtime import SubAgentRuntime, get_subagent_runtime
 from src.hooks import (
     AutoSummaryHook,
     DeviationCheckHook,
@@ -32,18 +47,85 @@ from src.subagents import (
     ITSMExpertSubAgent,
     KnowledgeCuratorSubAgent,
     QASubAgent,
+    SubAgentResult,
 )
+from src.utils import tracing
+from src.utils.deadline import Deadline, DeadlineExceeded, deadline_scope
+from src.utils.document_analysis import DocumentAnalysis
+
+# 既定のタイムアウト（秒、config/base.py の WORKFLOW_TIMEOUT / SUBAGENT_TIMEOUT と同じ値）
+DEFAULT_WORKFLOW_TIMEOUT_SECONDS = 300
+DEFAULT_SUBAGENT_TIMEOUT_SECONDS = 60
 
 
 class WorkflowEngine:
     """ワークフローエンジン"""
 
-    def __init__(self, db_path: str = "db/knowledge.db"):
+    # 縮退モードで後回しにした処理を補完するジョブ
+    BACKFILL_JOB_TYPE = "subagent_backfill"
+    # 過負荷が続く間は補完を延期する（最後の試行では負荷に関わらず補完する）
+    BACKFILL_MAX_ATTEMPTS = 10
+
+    def __init__(
+        self,
+        db_path: str = "db/knowledge.db",
+        max_workers: Optional[int] = None,
+        dependencies: Optional[Dict[str, List[str]]] = None,
+        backend: str = "thread",
+        workflow_timeout: Optional[float] = DEFAULT_WORKFLOW_TIMEOUT_SECONDS,
+        subagent_timeout: Optional[float] = DEFAULT_SUBAGENT_TIMEOUT_SECONDS,
+        result_cache_size: int = SubAgentResultCache.DEFAULT_MAX_ENTRIES,
+        result_cache_persistent: bool = False,
+        mcp_source_timeout: Optional[float] = MCPEnrichmentStage.DEFAULT_SOURCE_TIMEOUT_SECONDS,
+        mcp_recent_ttl: float = MCPEnrichmentStage.DEFAULT_RECENT_TTL_SECONDS,
+        trace_workflows: bool = True,
+        mcp_client: Optional[Any] = None,
+        input_recorder: Optional[Any] = None,
+        markdown_dir: str = "data/knowledge",
+        load_shedder: Optional[LoadShedder] = None,
+        backfill_queue: Optional[Any] = None,
+    ):
         """
         Args:
             db_path: データベースファイルパス
+            max_workers: サブエージェント実行プールのワーカー数
+                         （Noneの場合はプロセス共有のプールを使用）
+            dependencies: サブエージェントの依存関係
+                          （Noneの場合は subagents.yaml の depends_on を使用）
+            backend: サブエージェント処理の実行バックエンド
+                     （'thread' | 'process'、processはGILを回避するためCPUバウンドな
+                     ルール処理をワーカープロセスで実行する）
+            workflow_timeout: 1件のナレッジ生成全体の期限（秒、Noneは無期限）
+            subagent_timeout: サブエージェント1体の待ち時間の上限
+                              （秒、Noneは無制限、ワークフローの残り時間でも制限する）
+            result_cache_size: サブエージェント結果のキャッシュ件数（0はキャッシュしない）
+            result_cache_persistent: キャッシュをデータベースにも保存するか
+            mcp_source_timeout: 保存後のMCP補強の情報源1つあたりの待ち時間の上限
+                                （秒、Noneは無制限）
+            mcp_recent_ttl: 同じ技術・キーワードのMCP補強結果を再利用する期間（秒）
+            trace_workflows: 処理区間（スパン）を workflow_spans テーブルに記録するか
+            mcp_client: 保存後のMCP補強に使うMCP連携（Noneはグローバルの mcp_integration、
+                        ベンチマークでは応答を固定したスタブを指定する）
+            input_recorder: 入力の記録先（record(title, content, itsm_type) を持つこと、
+                            再生ベンチマーク用のコーパス作成に使う）
+            markdown_dir: Markdownファイルの出力先
+            load_shedder: 過負荷時に優先度の低いサブエージェントとMCP補強を
+                          後回しにする判定（Noneは常にすべて実行する）
+            backfill_queue: 後回しにした処理の補完ジョブの投入先（JobQueue、
+                            BACKFILL_JOB_TYPE の処理を登録しておくこと。
+                            Noneの場合は縮退しない）
+
+        Raises:
+            ValueError: 未対応の実行バックエンドを指定した場合
+            DependencyCycleError: 依存関係が循環している場合
         """
+        self.backend = validate_backend(backend)
+        self.workflow_timeout = workflow_timeout
+        self.subagent_timeout = subagent_timeout
         self.db_client = SQLiteClient(db_path)
+        self.trace_store: Optional[TraceStore] = (
+            TraceStore(self.db_client) if trace_workflows else None
+        )
 
         # サブエージェント初期化
         self.subagents = {
@@ -55,6 +137,10 @@ class WorkflowEngine:
             "coordinator": CoordinatorSubAgent(),
             "documenter": DocumenterSubAgent(),
         }
+        # 依存関係（依存先がすべて完了したサブエージェントから実行する）
+        self.subagent_dag = self._build_subagent_dag(dependencies)
+        # 優先度（過負荷時は低いものから後回しにする）
+        self.subagent_priorities = self._load_subagent_priorities()
 
         # フック初期化
         self.hooks = {
@@ -65,69 +151,519 @@ class WorkflowEngine:
             "post_task": PostTaskHook(),
         }
 
+        # 近似重複インデックス（初回の重複チェック時に読み込む）
+        self._duplicate_index: Optional[NearDuplicateIndex] = None
+
+        # サブエージェント実行プール + イベントループ（初回実行時に起動）
+        self._max_workers = max_workers
+        self._runtime: Optional[SubAgentRuntime] = None
+        self._runtime_lock = threading.Lock()
+        # processバックエンドのワーカープロセス（初回実行時に起動）
+        self._process_pool: Optional[SubAgentProcessPool] = None
+        # 保存後のMCP補強（初回保存時に起動）
+        self._mcp_source_timeout = mcp_source_timeout
+        self._mcp_recent_ttl = mcp_recent_ttl
+        self._mcp_client = mcp_client
+        self._enrichment: Optional[MCPEnrichmentStage] = None
+        self.input_recorder = input_recorder
+        self.markdown_dir = markdown_dir
+        # 過負荷時の縮退
+        self.load_shedder = load_shedder
+        self.backfill_queue = backfill_queue
+
+        # 一括処理中のワークフロー実行のログ（execution_id -> 書き込み待ちのログ）
+        self._log_buffers: Dict[int, Dict[str, List[Dict[str, Any]]]] = {}
+
+        # サブエージェント結果のキャッシュ（参照する入力が前回と同じなら再実行しない）
+        self.result_cache: Optional[SubAgentResultCache] = (
+            SubAgentResultCache(
+                max_entries=result_cache_size,
+                db_client=self.db_client if result_cache_persistent else None,
+            )
+            if result_cache_size > 0
+            else None
+        )
+
     def process_knowledge(
         self,
         title: str,
         content: str,
         itsm_type: str = "Other",
         created_by: Optional[str] = None,
+        force_reprocess: bool = False,
+        progress_callback: Optional[Callable[..., None]] = None,
+        timeout: Optional[float] = None,
     ) -> Dict[str, Any]:
         """
         ナレッジ生成ワークフローを実行
 
+        同一・ほぼ同一の既存ナレッジがある場合（再投稿）は、サブエージェントを
+        実行せずに既存ナレッジのIDを返す。
+
         Args:
             title: タイトル
             content: 内容
             itsm_type: ITSMタイプ
             created_by: 作成者
+            force_reprocess: 再投稿でも通常どおり処理する場合 True
+            progress_callback: 進捗の通知先 (phase, **details) -> None
+                （ジョブキューから実行する場合の進捗表示・再試行用）
+            timeout: ワークフロー全体の期限（秒、Noneの場合は workflow_timeout）
+                     期限内に終わらなかったサブエージェントはタイムアウトとして記録し、
+                     取得できた結果でナレッジを作成する
 
         Returns:
-            処理結果
+            処理結果（再投稿の場合は duplicate_of・match_type を含む、
+            タイムアウトしたサブエージェントは timed_out_subagents に列挙）
+            MCP補強は保存後にバックグラウンドで行い、結果は知見に追記する
+            （予約できた場合は mcp_enrichment_scheduled が True）
+            過負荷で縮退した場合は degraded が True となり、load_shedding に
+            後回しにしたサブエージェント・補完ジョブのIDを含む
         """
         start_time = time.time()
+        deadline = Deadline(self.workflow_timeout if timeout is None else timeout)
+        report_progress = self._progress_reporter(progress_callback)
+        self._record_input(title, content, itsm_type)
 
         # ワークフロー実行を記録
         execution_id = self.db_client.create_workflow_execution(
             workflow_type="knowledge_generation"
         )
 
-        try:
-            # 1. Pre-Task Hook: 入力検証
-            print("🔍 Pre-Task Hook: 入力検証中...")
-            pre_task_result = self._execute_hook(
-                "pre_task",
-                {"title": title, "content": content, "itsm_type": itsm_type},
-                execution_id,
-            )
+        with self._trace(
+            "process_knowledge", execution_id, itsm_type=itsm_type
+        ) as root:
+            try:
+                # 1. Pre-Task Hook: 入力検証
+                print("🔍 Pre-Task Hook: 入力検証中...")
+                report_progress("pre_task", execution_id=execution_id)
+                pre_task_result = self._execute_hook(
+                    "pre_task",
+                    {"title": title, "content": content, "itsm_type": itsm_type},
+                    execution_id,
+                )
 
-            if pre_task_result.block_execution:
-                raise ValueError(
-                    f"Pre-Task Hook でブロックされました: {pre_task_result.message}"
+                if pre_task_result.block_execution:
+                    raise ValueError(
+                        f"Pre-Task Hook でブロックされました: {pre_task_result.message}"
+                    )
+
+                # 同一・ほぼ同一の再投稿は既存ナレッジを返して終了
+                fingerprint = pre_task_result.details.get("fingerprint")
+                if fingerprint and not force_reprocess:
+                    with tracing.span("resubmission_check"):
+                        resubmission = self._find_resubmission(title, content, fingerprint)
+                    if resubmission:
+                        root.set_attribute("duplicate_of", resubmission["knowledge_id"])
+                        return self._complete_resubmission(
+                            resubmission, execution_id, start_time
+                        )
+
+                # 2. 既存ナレッジを検索（重複チェック用）
+                # コーパス全体の近似重複候補に、タイトル検索の結果を加える
+                deadline.check("duplicate_search")
+                report_progress("duplicate_search")
+                with tracing.span("duplicate_search") as span:
+                    near_duplicates = self._find_near_duplicates(title, content)
+                    existing_knowledge = self._merge_knowledge(
+                        near_duplicates,
+                        self.db_client.search_knowledge(query=title, limit=10),
+                    )
+                    span.set_attribute("candidates", len(existing_knowledge))
+
+                # 過負荷の場合は優先度の低いサブエージェント・MCP補強を後回しにする
+                shedding = self._plan_load_shedding()
+                deferred = shedding["deferred_subagents"] if shedding else []
+                if shedding:
+                    root.set_attribute("degraded", shedding["mode"])
+
+                # 3. サブエージェント並列実行（依存先が完了したものから開始）
+                # 小文字化・トークン化・類似度などの解析結果は全サブエージェントで共有する
+                deadline.check("subagents")
+                total = len(self.subagents) - len(deferred)
+                print(f"\n⚙️  {total}個のサブエージェントを実行中...")
+                report_progress("subagents", total=total)
+                schedule: Dict[str, Any] = {}
+                with tracing.span("subagents", total=total) as span:
+                    subagent_results = self._execute_subagents_parallel(
+                        {
+                            "title": title,
+                            "content": content,
+                            "itsm_type": itsm_type,
+                            "existing_knowledge": existing_knowledge,
+                            "analysis": DocumentAnalysis(title, content),
+                        },
+                        execution_id,
+                        schedule,
+                        deadline,
+                        deferred,
+                    )
+                    span.set_attribute("critical_path", schedule.get("critical_path"))
+                timed_out = [
+                    name
+                    for name, r in subagent_results.items()
+                    if r.get("status") == "timeout"
+                ]
+                if timed_out:
+                    print(f"  ⏱️  タイムアウト: {', '.join(timed_out)}（取得できた結果で続行）")
+
+                # 4〜6. 品質チェック・統合レビュー・ナレッジの集約
+                report_progress("quality_check")
+                hook_results, post_task_result, aggregated_knowledge = (
+                    self._review_and_aggregate(
+                        title,
+                        content,
+                        itsm_type,
+                        existing_knowledge,
+                        near_duplicates,
+                        subagent_results,
+                        execution_id,
+                    )
+                )
+
+                # 7. データベースに保存
+                print("\n💾 データベースに保存中...")
+                report_progress("saving")
+                with tracing.span("db.save_knowledge"):
+                    knowledge_id = self._save_knowledge(
+                        aggregated_knowledge, created_by, subagent_results
+                    )
+                root.set_attribute("knowledge_id", knowledge_id)
+                report_progress("saved", knowledge_id=knowledge_id)
+
+                # 8. Markdownファイルとして保存
+                markdown_path = self._save_markdown(knowledge_id, aggregated_knowledge)
+
+                # 9. MCP補強を予約（保存の完了を待たせない、補強のスパンは後から記録される）
+                enrichment = None
+                if not (shedding and shedding["enrichment_deferred"]):
+                    with tracing.span("mcp_enrichment.schedule"):
+                        enrichment = self._schedule_enrichment(
+                            knowledge_id, aggregated_knowledge
+                        )
+
+                # 後回しにしたサブエージェント・MCP補強の補完ジョブを投入
+                if shedding:
+                    shedding["backfill_job_id"] = self._schedule_backfill(
+                        knowledge_id, execution_id, shedding
+                    )
+
+                # 実行時間
+                execution_time_ms = int((time.time() - start_time) * 1000)
+                if self.load_shedder is not None:
+                    self.load_shedder.record_latency(execution_time_ms)
+
+                # ワークフロー実行結果を更新
+                used_subagents = [
+                    name
+                    for name, r in subagent_results.items()
+                    if r.get("status") != "deferred"
+                ]
+                triggered_hooks = [h["hook_name"] for h in hook_results]
+
+                with tracing.span("db.update_execution"):
+                    self.db_client.update_workflow_execution(
+                        execution_id,
+                        status="completed",
+                        subagents_used=used_subagents,
+                        hooks_triggered=triggered_hooks,
+                        execution_time_ms=execution_time_ms,
+                    )
+
+                print(
+                    f"\n✨ ナレッジ生成完了！ (ID: {knowledge_id}, 実行時間: {execution_time_ms}ms)"
                 )
+                report_progress("completed", knowledge_id=knowledge_id)
+
+                return {
+                    "success": True,
+                    "knowledge_id": knowledge_id,
+                    "execution_id": execution_id,
+                    "execution_time_ms": execution_time_ms,
+                    "markdown_path": markdown_path,
+                    "subagent_results": subagent_results,
+                    "hook_results": hook_results,
+                    "post_task_assessment": post_task_result.details.get(
+                        "overall_assessment", {}
+                    ),
+                    "aggregated_knowledge": aggregated_knowledge,
+                    "schedule": schedule,
+                    "timed_out_subagents": timed_out,
+                    "subagent_cache": self._cache_summary(subagent_results),
+                    "mcp_enrichment_scheduled": enrichment is not None,
+                    "degraded": shedding is not None,
+                    "load_shedding": shedding,
+                }
+
+            except Exception as e:
+                # エラー処理
+                execution_time_ms = int((time.time() - start_time) * 1000)
+                self.db_client.update_workflow_execution(
+                    execution_id,
+                    status="failed",
+                    execution_time_ms=execution_time_ms,
+                    error_message=str(e),
+                )
+
+                print(f"\n❌ エラーが発生しました: {str(e)}")
+                root.set_status("timeout" if isinstance(e, DeadlineExceeded) else "error")
+                root.set_attribute("error", str(e))
+
+                return {
+                    "success": False,
+                    "error": str(e),
+                    "execution_id": execution_id,
+                    "timed_out": isinstance(e, DeadlineExceeded),
+                }
+
+    def _trace(self, name: str, execution_id: int, **attributes: Any):
+        """ワークフロー実行のトレースを開始（記録しない場合は何もしないスパン）"""
+        if self.trace_store is None:
+            return nullcontext(tracing.NOOP_SPAN)
+        return tracing.start_trace(
+            name,
+            sink=self.trace_store.sink_for(execution_id),
+            execution_id=execution_id,
+            **attributes,
+        )
+
+    def _record_input(self, title: str, content: str, itsm_type: str) -> None:
+        """入力を記録（記録のエラーはワークフローに影響させない）"""
+        if self.input_recorder is None:
+            return
+        try:
+            self.input_recorder.record(title, content, itsm_type)
+        except Exception as e:
+            print(f"⚠️  入力の記録でエラー: {e}")
+
+    # ========== 過負荷時の縮退 ==========
+
+    def current_load(self) -> Dict[str, Any]:
+        """現在の負荷の縮退レベル（LoadShedder.evaluate()、未設定の場合は常に normal）"""
+        if self.load_shedder is None:
+            return {
+                "mode": LoadShedder.NORMAL,
+                "reasons": [],
+                "shed_priorities": [],
+                "defer_enrichment": False,
+            }
+        return self.load_shedder.evaluate(self.runtime.stats())
+
+    def _plan_load_shedding(self) -> Optional[Dict[str, Any]]:
+        """
+        過負荷の場合に後回しにするサブエージェント・MCP補強を決める
+
+        後回しにしないサブエージェントの依存先は、優先度に関わらず実行する。
+        補完ジョブを投入できない場合（backfill_queue が未設定）は縮退しない。
+
+        Returns:
+            縮退しない場合は None、縮退する場合は
+            {'mode', 'reasons', 'deferred_subagents', 'enrichment_deferred'}
+        """
+        if self.load_shedder is None or self.backfill_queue is None:
+            return None
+        try:
+            decision = self.current_load()
+        except Exception as e:
+            print(f"⚠️  負荷の判定でエラー: {e}")
+            return None
+        if decision["mode"] == LoadShedder.NORMAL:
+            return None
+
+        deferred = {
+            name
+            for name in self.subagents
+            if self.subagent_priorities.get(name) in decision["shed_priorities"]
+        }
+        # 依存される側より先に依存する側を見る（実行するものの依存先は実行する）
+        for name in reversed(self.subagent_dag.order):
+            if name not in deferred:
+                deferred.difference_update(self.subagent_dag.dependencies[name])
+        deferred_subagents = [name for name in self.subagent_dag.order if name in deferred]
+
+        self.load_shedder.record_shed(deferred_subagents, decision["defer_enrichment"])
+        print(
+            f"🚦 過負荷のため縮退モード ({decision['mode']}): "
+            f"{', '.join(deferred_subagents) or 'なし'} とMCP補強を後回しにします "
+            f"[{'; '.join(decision['reasons'])}]"
+        )
+        return {
+            "mode": decision["mode"],
+            "reasons": decision["reasons"],
+            "deferred_subagents": deferred_subagents,
+            "enrichment_deferred": decision["defer_enrichment"],
+        }
 
-            # 2. 既存ナレッジを検索（重複チェック用）
-            existing_knowledge = self.db_client.search_knowledge(query=title, limit=10)
+    def _schedule_backfill(
+        self, knowledge_id: int, execution_id: int, shedding: Dict[str, Any]
+    ) -> Optional[str]:
+        """
+        後回しにした処理の補完ジョブを投入（投入の失敗は保存結果に影響させない）
 
-            # 3. サブエージェント並列実行
-            print(f"\n⚙️  {len(self.subagents)}個のサブエージェントを実行中...")
-            subagent_results = self._execute_subagents_parallel(
+        Returns:
+            ジョブID（投入できなかった場合は None）
+        """
+        try:
+            job = self.backfill_queue.enqueue(
+                self.BACKFILL_JOB_TYPE,
                 {
-                    "title": title,
-                    "content": content,
-                    "itsm_type": itsm_type,
-                    "existing_knowledge": existing_knowledge,
+                    "knowledge_id": knowledge_id,
+                    "execution_id": execution_id,
+                    "subagents": shedding["deferred_subagents"],
+                    "enrichment": shedding["enrichment_deferred"],
                 },
-                execution_id,
+                idempotency_key=f"backfill:{execution_id}",
+                max_attempts=self.BACKFILL_MAX_ATTEMPTS,
             )
+            return job["id"]
+        except Exception as e:
+            print(f"⚠️  補完ジョブの投入でエラー (ID: {knowledge_id}): {e}")
+            return None
+
+    def backfill_knowledge(
+        self,
+        knowledge_id: int,
+        execution_id: int,
+        subagents: Iterable[str],
+        enrichment: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        縮退モードで後回しにしたサブエージェント・MCP補強を実行し、ナレッジに反映
+
+        依存先の結果は元のワークフロー実行のサブエージェントログから復元する。
+        要約・Markdownは補完した結果で更新し、知見は追記する。
+
+        Args:
+            knowledge_id: ナレッジID
+            execution_id: 元のワークフロー実行ID（ログ・スパンはこの実行に追加する）
+            subagents: 実行するサブエージェント
+            enrichment: MCP補強も予約するか
+
+        Returns:
+            {'success', 'knowledge_id', 'backfilled_subagents', 'failed_subagents',
+             'mcp_enrichment_scheduled'}
+        """
+        knowledge = self.db_client.get_knowledge(knowledge_id)
+        if knowledge is None:
+            return {"success": False, "error": f"ナレッジが見つかりません (ID: {knowledge_id})"}
+
+        names = [name for name in self.subagent_dag.order if name in set(subagents)]
+        print(f"\n🔁 縮退モードの補完 (ID: {knowledge_id}): {', '.join(names) or 'MCP補強'}")
+
+        with self._trace("subagent_backfill", execution_id, knowledge_id=knowledge_id):
+            results: Dict[str, Any] = {
+                log["subagent_name"]: {
+                    "status": log["status"],
+                    "data": log.get("output_data") or {},
+                }
+                for log in self.db_client.get_subagent_logs(execution_id)
+            }
+            title, content = knowledge["title"], knowledge["content"]
+            input_data = {
+                "title": title,
+                "content": content,
+                "itsm_type": knowledge["itsm_type"],
+                "existing_knowledge": [
+                    k
+                    for k in self._find_near_duplicates(title, content)
+                    if k.get("id") != knowledge_id
+                ],
+                "analysis": DocumentAnalysis(title, content),
+            }
+
+            for name in names:
+                dependencies = self.subagent_dag.dependencies[name]
+                node_input = input_data
+                if dependencies:
+                    node_input = {
+                        **input_data,
+                        "dependency_results": {
+                            dep: results.get(dep, {"status": "error", "data": {}})
+                            for dep in dependencies
+                        },
+                    }
+                with tracing.span(f"subagent.{name}", backfill=True):
+                    results[name] = self._execute_single_subagent(
+                        name, node_input, execution_id
+                    )
+
+            aggregated = self._aggregate_knowledge(
+                title, content, knowledge["itsm_type"], results
+            )
+            with tracing.span("db.backfill_knowledge"):
+                if aggregated["summary_technical"] or aggregated["summary_non_technical"]:
+                    self.db_client.update_knowledge(
+                        knowledge_id,
+                        summary_technical=aggregated["summary_technical"],
+                        summary_non_technical=aggregated["summary_non_technical"],
+                    )
+                if aggregated["insights"]:
+                    self.db_client.append_knowledge_insights(
+                        knowledge_id, aggregated["insights"]
+                    )
+            if aggregated["markdown"]:
+                self._save_markdown(knowledge_id, aggregated)
+
+            scheduled = None
+            if enrichment:
+                scheduled = self._schedule_enrichment(
+                    knowledge_id, {"content": content, "tags": knowledge.get("tags") or []}
+                )
+
+        return {
+            "success": True,
+            "knowledge_id": knowledge_id,
+            "backfilled_subagents": names,
+            "failed_subagents": [
+                name
+                for name in names
+                if results[name].get("status") not in ("success", "warning")
+            ],
+            "mcp_enrichment_scheduled": scheduled is not None,
+        }
 
-            # 4. 品質チェックフック実行
-            print("\n✅ 品質チェック実行中...")
+    @staticmethod
+    def _progress_reporter(
+        progress_callback: Optional[Callable[..., None]],
+    ) -> Callable[..., None]:
+        """進捗の通知関数を作成（通知先のエラーはワークフローに影響させない）"""
+
+        def report(phase: str, **details: Any) -> None:
+            if progress_callback is None:
+                return
+            try:
+                progress_callback(phase, **details)
+            except Exception as e:
+                print(f"⚠️  進捗の通知でエラー ({phase}): {e}")
+
+        return report
+
+    def _review_and_aggregate(
+        self,
+        title: str,
+        content: str,
+        itsm_type: str,
+        existing_knowledge: List[Dict[str, Any]],
+        near_duplicates: List[Dict[str, Any]],
+        subagent_results: Dict[str, Any],
+        execution_id: int,
+    ) -> Tuple[List[Dict[str, Any]], Optional[HookResult], Dict[str, Any]]:
+        """
+        品質チェックフック・Post-Task Hook を実行し、ナレッジを集約
+
+        Returns:
+            (品質チェック結果のリスト, Post-Task Hookの結果, 集約したナレッジ)
+        """
+        # 4. 品質チェックフック実行
+        print("\n✅ 品質チェック実行中...")
+        with tracing.span("quality_check"):
             hook_results = self._execute_quality_hooks(
                 {
                     "title": title,
                     "content": content,
                     "itsm_type": itsm_type,
                     "existing_knowledge": existing_knowledge,
+                    "near_duplicates": near_duplicates,
                     "qa_result": subagent_results.get("qa", {}).get("data", {}),
                     "itsm_expert_result": subagent_results.get("itsm_expert", {}).get(
                         "data", {}
@@ -139,74 +675,541 @@ class WorkflowEngine:
                 execution_id,
             )
 
-            # 5. Post-Task Hook: 統合レビュー
-            print("\n📊 Post-Task Hook: 統合レビュー中...")
-            post_task_result = self._execute_hook(
-                "post_task",
-                {"subagent_results": subagent_results, "hook_results": hook_results},
-                execution_id,
-            )
+        # 5. Post-Task Hook: 統合レビュー
+        print("\n📊 Post-Task Hook: 統合レビュー中...")
+        post_task_result = self._execute_hook(
+            "post_task",
+            {"subagent_results": subagent_results, "hook_results": hook_results},
+            execution_id,
+        )
 
-            # 6. ナレッジを集約
+        # 6. ナレッジを集約
+        with tracing.span("aggregate"):
             aggregated_knowledge = self._aggregate_knowledge(
                 title, content, itsm_type, subagent_results
             )
 
-            # 7. データベースに保存
-            print("\n💾 データベースに保存中...")
-            knowledge_id = self._save_knowledge(
-                aggregated_knowledge, created_by, subagent_results
+        return hook_results, post_task_result, aggregated_knowledge
+
+    # ========== 一括処理 ==========
+
+    def process_knowledge_batch(
+        self,
+        items: Iterable[Dict[str, Any]],
+        concurrency: int = 4,
+        chunk_size: int = 50,
+        created_by: Optional[str] = None,
+        force_reprocess: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        複数のナレッジをまとめて生成（大量インポート用）
+
+        process_knowledge() を件数分呼び出す場合と比べて、
+        - 近似重複インデックスをバッチ全体で共有し、バッチ内の同一・ほぼ同一の
+          投稿も検知する（後の投稿は先の投稿のナレッジIDを返す）
+        - チャンク内の最大 concurrency 件のサブエージェントを同時に実行する
+        - ナレッジ・ログ・ワークフロー実行の更新・Markdownのパスを
+          チャンクごとにまとめて書き込む
+
+        既存ナレッジの候補はコーパス全体の近似重複インデックスから取得する
+        （1件ごとのタイトル検索は行わない）。
+
+        Args:
+            items: [{'title', 'content', 'itsm_type'(任意), 'created_by'(任意)}]
+            concurrency: 同時に処理する件数
+            chunk_size: まとめて書き込む件数（結果はチャンクの書き込み後に返る）
+            created_by: 作成者（項目で指定がない場合）
+            force_reprocess: 再投稿でも通常どおり処理する場合 True
+
+        Returns:
+            1件ごとの処理結果のイテレータ（チャンク内は完了順、'index' は items 内の位置）
+
+        Raises:
+            ValueError: concurrency・chunk_size が1未満の場合
+        """
+        if concurrency < 1 or chunk_size < 1:
+            raise ValueError("concurrency と chunk_size は1以上を指定してください")
+        return self._iter_knowledge_batch(
+            items, concurrency, chunk_size, created_by, force_reprocess
+        )
+
+    def _iter_knowledge_batch(
+        self,
+        items: Iterable[Dict[str, Any]],
+        concurrency: int,
+        chunk_size: int,
+        created_by: Optional[str],
+        force_reprocess: bool,
+    ) -> Iterator[Dict[str, Any]]:
+        """チャンクごとに処理し、結果を順次返す"""
+        batch_index = BatchDuplicateIndex(self.duplicate_index)
+        # バッチ内の位置 -> 作成したナレッジID（バッチ内の重複の解決用）
+        knowledge_ids: Dict[int, Optional[int]] = {}
+
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        for index, item in enumerate(items):
+            chunk.append((index, item))
+            if len(chunk) >= chunk_size:
+                yield from self._process_batch_chunk(
+                    chunk, batch_index, knowledge_ids, concurrency, created_by, force_reprocess
+                )
+                chunk = []
+        if chunk:
+            yield from self._process_batch_chunk(
+                chunk, batch_index, knowledge_ids, concurrency, created_by, force_reprocess
             )
 
-            # 8. Markdownファイルとして保存
-            markdown_path = self._save_markdown(knowledge_id, aggregated_knowledge)
+    def _process_batch_chunk(
+        self,
+        chunk: List[Tuple[int, Dict[str, Any]]],
+        batch_index: BatchDuplicateIndex,
+        knowledge_ids: Dict[int, Optional[int]],
+        concurrency: int,
+        created_by: Optional[str],
+        force_reprocess: bool,
+    ) -> List[Dict[str, Any]]:
+        """チャンクを処理し、まとめて書き込む（結果は完了順）"""
+        start_time = time.time()
+        execution_ids = self.db_client.create_workflow_executions(
+            "knowledge_generation", len(chunk)
+        )
+        for execution_id in execution_ids:
+            self._log_buffers[execution_id] = {"subagent_logs": [], "hook_logs": []}
 
-            # 実行時間
-            execution_time_ms = int((time.time() - start_time) * 1000)
+        try:
+            # 1〜2. 入力検証・重複判定（バッチ内の重複を判定するため入力順に行う）
+            records = [
+                self._prepare_batch_item(
+                    index, item, execution_id, batch_index, created_by, force_reprocess
+                )
+                for (index, item), execution_id in zip(chunk, execution_ids)
+            ]
+            finished = [r for r in records if r["status"] != "pending"]
 
-            # ワークフロー実行結果を更新
-            used_subagents = list(subagent_results.keys())
-            triggered_hooks = [h["hook_name"] for h in hook_results]
+            # 3〜6. サブエージェント実行〜集約（最大 concurrency 件を同時に）
+            pending = [r for r in records if r["status"] == "pending"]
+            print(f"\n📦 {len(pending)}/{len(records)}件のナレッジを処理中...")
+            try:
+                finished += self.runtime.run(self._run_batch_items(pending, concurrency))
+            except Exception as e:
+                print(f"Warning: Batch execution failed: {e}. Falling back to sequential.")
+                for record in pending:
+                    self._run_batch_item_sequential(record)
+                finished += pending
+
+            # 7〜8. まとめて書き込み
+            self._write_batch_chunk(records, knowledge_ids)
+        finally:
+            for execution_id in execution_ids:
+                self._log_buffers.pop(execution_id, None)
+
+        print(
+            f"💾 {len(records)}件を書き込みました "
+            f"(実行時間: {int((time.time() - start_time) * 1000)}ms)"
+        )
+        return [self._batch_item_result(record) for record in finished]
 
-            self.db_client.update_workflow_execution(
+    def _prepare_batch_item(
+        self,
+        index: int,
+        item: Dict[str, Any],
+        execution_id: int,
+        batch_index: BatchDuplicateIndex,
+        created_by: Optional[str],
+        force_reprocess: bool,
+    ) -> Dict[str, Any]:
+        """入力検証と、既存ナレッジ・バッチ内の投稿との重複判定"""
+        title = item.get("title", "")
+        content = item.get("content", "")
+        record: Dict[str, Any] = {
+            "index": index,
+            "execution_id": execution_id,
+            "start_time": time.time(),
+            "title": title,
+            "content": content,
+            "itsm_type": item.get("itsm_type", "Other"),
+            "created_by": item.get("created_by", created_by),
+            "status": "pending",
+            "batch_similar": [],
+        }
+
+        try:
+            pre_task_result = self._execute_hook(
+                "pre_task",
+                {"title": title, "content": content, "itsm_type": record["itsm_type"]},
                 execution_id,
-                status="completed",
-                subagents_used=used_subagents,
-                hooks_triggered=triggered_hooks,
-                execution_time_ms=execution_time_ms,
             )
+            if pre_task_result and pre_task_result.block_execution:
+                raise ValueError(
+                    f"Pre-Task Hook でブロックされました: {pre_task_result.message}"
+                )
+            fingerprint = (
+                pre_task_result.details.get("fingerprint") if pre_task_result else None
+            )
+
+            if not force_reprocess:
+                resubmission = fingerprint and self._find_resubmission(
+                    title, content, fingerprint
+                )
+                if resubmission:
+                    record.update(status="duplicate", resubmission=resubmission)
+                    return record
+
+                batch_match = batch_index.check(index, title, content, fingerprint)
+                if batch_match["duplicate_of"] is not None:
+                    record.update(status="duplicate", batch_match=batch_match)
+                    return record
+                record["batch_similar"] = batch_match["similar"]
+
+            near_duplicates = self._find_near_duplicates(title, content)
+            record["near_duplicates"] = near_duplicates
+            record["existing_knowledge"] = near_duplicates
+        except Exception as e:
+            record.update(status="failed", error=str(e))
+        return record
+
+    def _batch_input_data(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """サブエージェントの入力"""
+        return {
+            "title": record["title"],
+            "content": record["content"],
+            "itsm_type": record["itsm_type"],
+            "existing_knowledge": record["existing_knowledge"],
+            "analysis": DocumentAnalysis(record["title"], record["content"]),
+        }
+
+    def _finish_batch_item(self, record: Dict[str, Any]) -> None:
+        """品質チェック・統合レビュー・集約（スレッド内で実行）"""
+        record["hook_results"], record["post_task_result"], record["aggregated"] = (
+            self._review_and_aggregate(
+                record["title"],
+                record["content"],
+                record["itsm_type"],
+                record["existing_knowledge"],
+                record["near_duplicates"],
+                record["subagent_results"],
+                record["execution_id"],
+            )
+        )
+        record["status"] = "completed"
 
-            print(
-                f"\n✨ ナレッジ生成完了！ (ID: {knowledge_id}, 実行時間: {execution_time_ms}ms)"
+    async def _run_batch_items(
+        self, records: List[Dict[str, Any]], concurrency: int
+    ) -> List[Dict[str, Any]]:
+        """サブエージェント実行〜集約を最大 concurrency 件同時に行う（完了順に返す）"""
+        semaphore = asyncio.Semaphore(concurrency)
+        finished: List[Dict[str, Any]] = []
+
+        async def run(record: Dict[str, Any]) -> None:
+            async with semaphore:
+                try:
+                    record["subagent_results"] = await self._execute_subagents_async(
+                        self._batch_input_data(record), record["execution_id"]
+                    )
+                    await self.runtime.run_in_executor(self._finish_batch_item, record)
+                except Exception as e:
+                    record.update(status="failed", error=str(e))
+            finished.append(record)
+
+        await asyncio.gather(*(run(record) for record in records))
+        return finished
+
+    def _run_batch_item_sequential(self, record: Dict[str, Any]) -> None:
+        """サブエージェント実行〜集約を順次実行（フォールバック用）"""
+        try:
+            record["subagent_results"] = self._execute_subagents_sequential(
+                self._batch_input_data(record), record["execution_id"]
             )
+            self._finish_batch_item(record)
+        except Exception as e:
+            record.update(status="failed", error=str(e))
 
-            return {
-                "success": True,
-                "knowledge_id": knowledge_id,
-                "execution_id": execution_id,
-                "execution_time_ms": execution_time_ms,
-                "markdown_path": markdown_path,
-                "subagent_results": subagent_results,
-                "hook_results": hook_results,
-                "post_task_assessment": post_task_result.details.get(
-                    "overall_assessment", {}
+    def _write_batch_chunk(
+        self, records: List[Dict[str, Any]], knowledge_ids: Dict[int, Optional[int]]
+    ) -> None:
+        """チャンクのナレッジ・ログ・Markdown・実行結果をまとめて書き込む"""
+        completed = [r for r in records if r["status"] == "completed"]
+        try:
+            ids = self.db_client.create_knowledge_batch(
+                [
+                    {
+                        "title": r["aggregated"]["title"],
+                        "itsm_type": r["aggregated"]["itsm_type"],
+                        "content": r["aggregated"]["content"],
+                        "summary_technical": r["aggregated"]["summary_technical"],
+                        "summary_non_technical": r["aggregated"]["summary_non_technical"],
+                        "insights": r["aggregated"]["insights"],
+                        "tags": r["aggregated"]["tags"],
+                        "created_by": r["created_by"],
+                    }
+                    for r in completed
+                ]
+            )
+        except Exception as e:
+            for r in completed:
+                r.update(status="failed", error=str(e))
+            completed, ids = [], []
+
+        for record, knowledge_id in zip(completed, ids):
+            record["knowledge_id"] = knowledge_id
+            knowledge_ids[record["index"]] = knowledge_id
+
+        # 近似重複インデックスに署名を追加（後続のチャンクから参照できる）
+        try:
+            self.duplicate_index.add_batch(
+                [(r["knowledge_id"], r["title"], r["content"]) for r in completed]
+            )
+        except Exception as e:
+            print(f"⚠️  近似重複インデックスの更新でエラー: {e}")
+
+        markdown_paths = []
+        duplicate_checks = []
+        deviation_checks = []
+        for record in completed:
+            knowledge_id = record["knowledge_id"]
+            try:
+                record["markdown_path"] = self._write_markdown(
+                    knowledge_id, record["aggregated"]
+                )
+                markdown_paths.append((knowledge_id, record["markdown_path"]))
+            except OSError as e:
+                print(f"⚠️  Markdownの保存でエラー (ID: {knowledge_id}): {e}")
+            self._schedule_enrichment(knowledge_id, record["aggregated"])
+
+            qa_data = record["subagent_results"].get("qa", {}).get("data", {})
+            for similar in qa_data.get("duplicates", {}).get("similar_knowledge", []):
+                duplicate_checks.append(
+                    (knowledge_id, similar["knowledge_id"], similar["overall_similarity"])
+                )
+            # バッチ内で先に処理した近似重複
+            for position, score in record["batch_similar"]:
+                if knowledge_ids.get(position):
+                    duplicate_checks.append((knowledge_id, knowledge_ids[position], score))
+
+            itsm_data = record["subagent_results"].get("itsm_expert", {}).get("data", {})
+            for deviation in itsm_data.get("deviations", []):
+                deviation_checks.append(
+                    {
+                        "knowledge_id": knowledge_id,
+                        "deviation_type": deviation["deviation_type"],
+                        "severity": deviation["severity"],
+                        "description": deviation["description"],
+                        "itsm_principle": deviation.get("itsm_principle"),
+                    }
+                )
+
+        # バッチ内の同一・ほぼ同一の投稿は、先の投稿のナレッジIDを返す
+        for record in records:
+            batch_match = record.get("batch_match")
+            if batch_match:
+                record["knowledge_id"] = knowledge_ids.get(batch_match["duplicate_of"])
+                if record["knowledge_id"] is None:
+                    record.update(status="failed", error="重複元の投稿の処理に失敗しました")
+
+        subagent_logs: List[Dict[str, Any]] = []
+        hook_logs: List[Dict[str, Any]] = []
+        execution_updates = []
+        for record in records:
+            buffer = self._log_buffers.get(record["execution_id"], {})
+            subagent_logs.extend(buffer.get("subagent_logs", []))
+            hook_logs.extend(buffer.get("hook_logs", []))
+
+            record["execution_time_ms"] = int((time.time() - record["start_time"]) * 1000)
+            update = {
+                "execution_id": record["execution_id"],
+                "status": "failed" if record["status"] == "failed" else "completed",
+                "execution_time_ms": record["execution_time_ms"],
+            }
+            if record["status"] == "completed":
+                update["subagents_used"] = list(record["subagent_results"].keys())
+                update["hooks_triggered"] = [h["hook_name"] for h in record["hook_results"]]
+            elif record["status"] == "duplicate":
+                update["hooks_triggered"] = ["pre_task"]
+            else:
+                update["error_message"] = record.get("error")
+            execution_updates.append(update)
+
+        self.db_client.record_workflow_batch(
+            execution_updates,
+            subagent_logs=subagent_logs,
+            hook_logs=hook_logs,
+            markdown_paths=markdown_paths,
+            duplicate_checks=duplicate_checks,
+            deviation_checks=deviation_checks,
+        )
+
+    @staticmethod
+    def _batch_item_result(record: Dict[str, Any]) -> Dict[str, Any]:
+        """一括処理の1件分の結果（process_knowledge() の戻り値と同じ形式 + index）"""
+        result: Dict[str, Any] = {
+            "index": record["index"],
+            "success": record["status"] != "failed",
+            "execution_id": record["execution_id"],
+            "execution_time_ms": record.get("execution_time_ms"),
+        }
+        if record["status"] == "failed":
+            result["error"] = record.get("error")
+        elif record["status"] == "duplicate":
+            match = record.get("resubmission") or record["batch_match"]
+            knowledge_id = record.get("knowledge_id") or match.get("knowledge_id")
+            result.update(
+                knowledge_id=knowledge_id,
+                duplicate_of=knowledge_id,
+                match_type=match["match_type"],
+                similarity=match["similarity"],
+            )
+            if "resubmission" in record:
+                result["hamming_distance"] = match["hamming_distance"]
+            else:
+                result["batch_duplicate_of"] = match["duplicate_of"]
+        else:
+            post_task_result = record["post_task_result"]
+            result.update(
+                knowledge_id=record["knowledge_id"],
+                markdown_path=record.get("markdown_path"),
+                subagent_results=record["subagent_results"],
+                hook_results=record["hook_results"],
+                post_task_assessment=(
+                    post_task_result.details.get("overall_assessment", {})
+                    if post_task_result
+                    else {}
                 ),
-                "aggregated_knowledge": aggregated_knowledge,
+                aggregated_knowledge=record["aggregated"],
+                batch_similar=[position for position, _ in record["batch_similar"]],
+            )
+        return result
+
+    def _build_subagent_dag(
+        self, dependencies: Optional[Dict[str, List[str]]] = None
+    ) -> SubAgentDAG:
+        """依存グラフを構築（未登録のサブエージェントへの依存は無視）"""
+        if dependencies is None:
+            dependencies = AgentLoader().get_dependencies()
+        return SubAgentDAG(
+            {
+                name: [d for d in dependencies.get(name, []) if d in self.subagents]
+                for name in self.subagents
             }
+        )
+
+    def _load_subagent_priorities(self) -> Dict[str, str]:
+        """優先度（subagents.yaml の priority、未定義の場合はサブエージェントの priority）"""
+        configs = AgentLoader().get_all_agents()
+        return {
+            name: configs[name].priority if name in configs else agent.priority
+            for name, agent in self.subagents.items()
+        }
 
+    @property
+    def runtime(self) -> SubAgentRuntime:
+        """サブエージェント実行用の常駐ワーカープールとイベントループ"""
+        with self._runtime_lock:
+            if self._runtime is None or self._runtime.closed:
+                if self._max_workers is None:
+                    self._runtime = get_subagent_runtime()
+                else:
+                    self._runtime = SubAgentRuntime(
+                        max_workers=self._max_workers, name="workflow"
+                    )
+            return self._runtime
+
+    @property
+    def process_pool(self) -> SubAgentProcessPool:
+        """processバックエンドのワーカープロセス（各ワーカーでサブエージェントを事前生成）"""
+        with self._runtime_lock:
+            if self._process_pool is None or self._process_pool.closed:
+                self._process_pool = SubAgentProcessPool(
+                    [class_path_of(agent) for agent in self.subagents.values()],
+                    max_workers=self._max_workers,
+                )
+            return self._process_pool
+
+    @property
+    def enrichment(self) -> MCPEnrichmentStage:
+        """保存後のMCP補強ステージ"""
+        with self._runtime_lock:
+            if self._enrichment is None or self._enrichment.closed:
+                self._enrichment = MCPEnrichmentStage(
+                    self.db_client,
+                    self._mcp_client or mcp_integration,
+                    source_timeout=self._mcp_source_timeout,
+                    recent_ttl=self._mcp_recent_ttl,
+                )
+            return self._enrichment
+
+    def shutdown(self, wait: bool = True) -> None:
+        """専用の実行プール・MCP補強ステージを終了（共有プールはプロセス終了時に終了する）"""
+        if self._enrichment is not None:
+            self._enrichment.shutdown(wait=wait)
+        if self._max_workers is not None and self._runtime is not None:
+            self._runtime.shutdown(wait=wait)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+
+    @property
+    def duplicate_index(self) -> NearDuplicateIndex:
+        """近似重複インデックス（同じDBファイルのエンジン間で共有）"""
+        if self._duplicate_index is None:
+            self._duplicate_index = get_near_duplicate_index(self.db_client)
+        return self._duplicate_index
+
+    def _find_near_duplicates(self, title: str, content: str) -> List[Dict[str, Any]]:
+        """コーパス全体から近似重複の候補を検索（MinHash/LSH）"""
+        try:
+            return self.duplicate_index.query(title, content, limit=10)
         except Exception as e:
-            # エラー処理
-            execution_time_ms = int((time.time() - start_time) * 1000)
-            self.db_client.update_workflow_execution(
-                execution_id,
-                status="failed",
-                execution_time_ms=execution_time_ms,
-                error_message=str(e),
-            )
+            print(f"⚠️  近似重複インデックスの検索でエラー: {e}")
+            return []
+
+    def _find_resubmission(
+        self, title: str, content: str, fingerprint: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """フィンガープリントで同一・ほぼ同一の既存ナレッジを検索"""
+        try:
+            return self.duplicate_index.find_resubmission(title, content, fingerprint)
+        except Exception as e:
+            print(f"⚠️  再投稿チェックでエラー: {e}")
+            return None
+
+    def _complete_resubmission(
+        self, resubmission: Dict[str, Any], execution_id: int, start_time: float
+    ) -> Dict[str, Any]:
+        """再投稿として既存ナレッジを返す"""
+        execution_time_ms = int((time.time() - start_time) * 1000)
+        knowledge_id = resubmission["knowledge_id"]
+        self.db_client.update_workflow_execution(
+            execution_id,
+            status="completed",
+            subagents_used=[],
+            hooks_triggered=["pre_task"],
+            execution_time_ms=execution_time_ms,
+        )
 
-            print(f"\n❌ エラーが発生しました: {str(e)}")
+        label = "同一" if resubmission["match_type"] == "exact" else "ほぼ同一"
+        print(
+            f"\n♻️  既存ナレッジと{label}のため処理をスキップしました "
+            f"(ID: {knowledge_id}, 実行時間: {execution_time_ms}ms)"
+        )
 
-            return {"success": False, "error": str(e), "execution_id": execution_id}
+        return {
+            "success": True,
+            "knowledge_id": knowledge_id,
+            "execution_id": execution_id,
+            "execution_time_ms": execution_time_ms,
+            "duplicate_of": knowledge_id,
+            "match_type": resubmission["match_type"],
+            "hamming_distance": resubmission["hamming_distance"],
+            "similarity": resubmission["similarity"],
+        }
+
+    @staticmethod
+    def _merge_knowledge(*knowledge_lists: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """ナレッジリストをIDで重複排除して結合（先のリストを優先）"""
+        merged: Dict[Any, Dict[str, Any]] = {}
+        for knowledge_list in knowledge_lists:
+            for knowledge in knowledge_list or []:
+                merged.setdefault(knowledge.get("id"), knowledge)
+        return list(merged.values())
 
     def _execute_hook(self, hook_name: str, context: Dict[str, Any], execution_id: int):
         """フックを実行"""
@@ -214,10 +1217,12 @@ class WorkflowEngine:
         if not hook or not hook.is_enabled():
             return None
 
-        result = hook.execute(context)
+        with tracing.span(f"hook.{hook_name}") as span:
+            result = hook.execute(context)
+            span.set_attribute("result", result.result.value)
 
         # ログ記録
-        self.db_client.log_hook_execution(
+        self._log_hook_execution(
             workflow_execution_id=execution_id,
             hook_name=hook_name,
             hook_type=hook.hook_type,
@@ -228,32 +1233,56 @@ class WorkflowEngine:
 
         return result
 
+    def _log_hook_execution(self, **log: Any) -> None:
+        """フック実行をログ（一括処理中はチャンクごとにまとめて書き込む）"""
+        buffer = self._log_buffers.get(log["workflow_execution_id"])
+        if buffer is None:
+            with tracing.span("db.log_hook"):
+                self.db_client.log_hook_execution(**log)
+        else:
+            buffer["hook_logs"].append(log)
+
+    def _log_subagent_execution(self, **log: Any) -> None:
+        """サブエージェント実行をログ（一括処理中はチャンクごとにまとめて書き込む）"""
+        buffer = self._log_buffers.get(log["workflow_execution_id"])
+        if buffer is None:
+            with tracing.span("db.log_subagent"):
+                self.db_client.log_subagent_execution(**log)
+        else:
+            buffer["subagent_logs"].append(log)
+
     def _execute_subagents_parallel(
-        self, input_data: Dict[str, Any], execution_id: int
+        self,
+        input_data: Dict[str, Any],
+        execution_id: int,
+        schedule: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        deferred: Iterable[str] = (),
     ) -> Dict[str, Any]:
-        """サブエージェントを並列実行（真の並列実装）
+        """SubAgentを依存関係（DAG）に基づいて並列実行
 
-        SubAgentを依存関係に基づいて3つのフェーズで並列実行:
-        - Phase 1 (並列): Architect, KnowledgeCurator, ITSMExpert, DevOps
-        - Phase 2 (並列): QA, Coordinator (Phase 1の結果を利用)
-        - Phase 3 (順次): Documenter (全結果を統合)
+        各SubAgentは subagents.yaml の depends_on で宣言した依存先が
+        すべて完了した時点で開始する（固定フェーズのバリアは設けない）。
+        subagent_timeout（期限の残り時間で制限）以内に終わらないSubAgentは
+        タイムアウトの結果とし、後続はその結果を受け取って実行する。
+
+        Args:
+            input_data: 入力データ
+            execution_id: ワークフロー実行ID
+            schedule: 指定した場合、ノードごとの開始・終了時刻と
+                      クリティカルパスを記録する
+            deadline: ワークフロー全体の期限
+            deferred: 実行せずに後回しにするSubAgent（縮退モード）
         """
         results = {}
         start_time = time.time()
 
         try:
-            # Python 3.7+のイベントループ取得
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    raise RuntimeError()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-
-            # 非同期実行
-            results = loop.run_until_complete(
-                self._execute_subagents_async(input_data, execution_id)
+            # 常駐イベントループで非同期実行（呼び出し元スレッドのループには依存しない）
+            results = self.runtime.run(
+                self._execute_subagents_async(
+                    input_data, execution_id, schedule, deadline, deferred
+                )
             )
 
             parallel_time = int((time.time() - start_time) * 1000)
@@ -262,103 +1291,210 @@ class WorkflowEngine:
         except Exception as e:
             print(f"Warning: Parallel execution failed: {e}. Falling back to sequential.")
             # フォールバック: 順次実行
-            results = self._execute_subagents_sequential(input_data, execution_id)
+            results = self._execute_subagents_sequential(
+                input_data, execution_id, deadline, deferred
+            )
 
         return results
 
     async def _execute_subagents_async(
-        self, input_data: Dict[str, Any], execution_id: int
+        self,
+        input_data: Dict[str, Any],
+        execution_id: int,
+        schedule: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        deferred: Iterable[str] = (),
     ) -> Dict[str, Any]:
-        """非同期SubAgent実行"""
-        results = {}
-
-        # Phase 1: 独立して実行可能なSubAgent（並列実行）
-        phase1_agents = ["architect", "knowledge_curator", "itsm_expert", "devops"]
-        print(f"  → Phase 1: Executing {len(phase1_agents)} agents in parallel...")
-
-        phase1_tasks = [
-            self._execute_subagent_async(name, input_data, execution_id)
-            for name in phase1_agents
-        ]
-        phase1_results = await asyncio.gather(*phase1_tasks, return_exceptions=True)
-
-        # Phase 1結果を統合
-        for name, result in zip(phase1_agents, phase1_results):
-            if isinstance(result, Exception):
-                print(f"  ⚠️  {name} failed: {result}")
-                results[name] = {"status": "error", "data": {}}
-            else:
-                results[name] = result
-
-        # Phase 2: Phase 1の結果を利用するSubAgent（並列実行）
-        phase2_agents = ["qa", "coordinator"]
-        print(f"  → Phase 2: Executing {len(phase2_agents)} agents in parallel...")
-
-        # Phase 1の結果をinput_dataに追加
-        enhanced_input = {**input_data, "phase1_results": results}
+        """非同期SubAgent実行（依存先の完了を待って開始）"""
+        deferred = set(deferred)
+
+        async def run_node(name: str, dependency_results: Dict[str, Any]):
+            if name in deferred:
+                return self._deferred_result()
+            node_input = input_data
+            if dependency_results:
+                node_input = {
+                    **input_data,
+                    "dependency_results": {
+                        dep: self._normalize_subagent_result(result)
+                        for dep, result in dependency_results.items()
+                    },
+                }
+            return await self._execute_subagent_async(
+                name, node_input, execution_id, deadline
+            )
 
-        phase2_tasks = [
-            self._execute_subagent_async(name, enhanced_input, execution_id)
-            for name in phase2_agents
-        ]
-        phase2_results = await asyncio.gather(*phase2_tasks, return_exceptions=True)
+        print(
+            f"  → DAG: {len(self.subagent_dag.roots)}/{len(self.subagent_dag.nodes)} "
+            "agents start immediately..."
+        )
+        report = await self.subagent_dag.run(run_node)
 
-        # Phase 2結果を統合
-        for name, result in zip(phase2_agents, phase2_results):
+        results = {}
+        for name, result in report["results"].items():
             if isinstance(result, Exception):
                 print(f"  ⚠️  {name} failed: {result}")
-                results[name] = {"status": "error", "data": {}}
-            else:
-                results[name] = result
-
-        # Phase 3: 最終処理（順次実行 - 全結果を統合）
-        print(f"  → Phase 3: Executing documenter (final integration)...")
+            results[name] = self._normalize_subagent_result(result)
 
-        documenter_input = {**input_data, "all_results": results}
-        documenter_result = await self._execute_subagent_async(
-            "documenter", documenter_input, execution_id
+        print(
+            f"  → Critical path: {' → '.join(report['critical_path'])} "
+            f"({report['critical_path_ms']}ms / makespan {report['makespan_ms']}ms)"
         )
-
-        if isinstance(documenter_result, Exception):
-            print(f"  ⚠️  documenter failed: {documenter_result}")
-            results["documenter"] = {"status": "error", "data": {}}
-        else:
-            results["documenter"] = documenter_result
+        if schedule is not None:
+            schedule.update(
+                {
+                    "timings": report["timings"],
+                    "critical_path": report["critical_path"],
+                    "critical_path_ms": report["critical_path_ms"],
+                    "makespan_ms": report["makespan_ms"],
+                }
+            )
 
         return results
 
+    @staticmethod
+    def _deferred_result() -> Dict[str, Any]:
+        """後回しにしたSubAgentの結果（補完ジョブで実行し、ログもそのときに記録する）"""
+        return {
+            "status": "deferred",
+            "data": {},
+            "message": "過負荷のため後で補完します",
+            "execution_time_ms": 0,
+        }
+
+    @staticmethod
+    def _normalize_subagent_result(result: Any) -> Dict[str, Any]:
+        """例外をエラー結果に変換"""
+        if isinstance(result, Exception):
+            return {"status": "error", "data": {}}
+        return result
+
     async def _execute_subagent_async(
-        self, name: str, input_data: Dict[str, Any], execution_id: int
+        self,
+        name: str,
+        input_data: Dict[str, Any],
+        execution_id: int,
+        deadline: Optional[Deadline] = None,
     ) -> Dict[str, Any]:
-        """単一SubAgentを非同期実行"""
-        loop = asyncio.get_event_loop()
-
-        # SubAgent実行を別スレッドで実行（CPUバウンド処理の並列化）
-        with ThreadPoolExecutor(max_workers=1) as executor:
-            result = await loop.run_in_executor(
-                executor,
-                self._execute_single_subagent,
-                name,
-                input_data,
-                execution_id
+        """単一SubAgentを非同期実行（subagent_timeout・期限を超えたらタイムアウト）
+
+        SubAgentにはこの実行用の子の期限を渡し、タイムアウトしたらキャンセルする。
+        SubAgentは check_deadline() の区切りで打ち切り、プールの空き待ちのまま
+        期限を過ぎた場合は実行しない。
+        スパンはプールの空き待ちを含む（子の agent.process の開始までが待ち時間）。
+        """
+        agent_deadline = (
+            Deadline(self.subagent_timeout)
+            if deadline is None
+            else deadline.child(self.subagent_timeout)
+        )
+        timeout = agent_deadline.remaining()
+        with tracing.span(f"subagent.{name}") as span:
+            try:
+                # SubAgent実行を常駐プールのスレッドで実行
+                result = await asyncio.wait_for(
+                    self.runtime.run_in_executor(
+                        self._execute_single_subagent,
+                        name,
+                        input_data,
+                        execution_id,
+                        agent_deadline,
+                    ),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                # スレッドは止められないため、実行中の処理には打ち切りと結果の破棄を伝える
+                agent_deadline.cancel()
+                span.set_status("timeout")
+                return self._record_subagent_timeout(
+                    name, input_data, execution_id, timeout
+                )
+            span.set_attributes(
+                result=result.get("status"), cached=bool(result.get("cached"))
             )
+            return result
 
-        return result
+    def _record_subagent_timeout(
+        self,
+        name: str,
+        input_data: Dict[str, Any],
+        execution_id: int,
+        timeout: float,
+        message: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """タイムアウトしたSubAgentを記録し、タイムアウトの結果を返す"""
+        message = message or f"{timeout:.1f}秒以内に完了しませんでした"
+        execution_time_ms = int(timeout * 1000)
+        print(f"  ⏱️  {name}: {message}")
+        self._log_subagent_execution(
+            workflow_execution_id=execution_id,
+            subagent_name=name,
+            role=self.subagents[name].role if name in self.subagents else "",
+            input_data={"title": input_data.get("title", "")},
+            output_data={},
+            execution_time_ms=execution_time_ms,
+            status="timeout",
+            message=message,
+        )
+        return {
+            "status": "timeout",
+            "data": {},
+            "message": message,
+            "execution_time_ms": execution_time_ms,
+        }
 
     def _execute_single_subagent(
-        self, name: str, input_data: Dict[str, Any], execution_id: int
+        self,
+        name: str,
+        input_data: Dict[str, Any],
+        execution_id: int,
+        deadline: Optional[Deadline] = None,
     ) -> Dict[str, Any]:
-        """単一SubAgent実行（スレッド内で実行）"""
+        """単一SubAgent実行（スレッド内で実行、processバックエンドではワーカープロセスに委譲）
+
+        deadline はSubAgentの実行中の期限として設定する。期限切れの場合は実行せず、
+        キャンセルされた場合（呼び出し元がタイムアウト済み）は結果を記録しない。
+        """
         if name not in self.subagents:
             return {"status": "error", "data": {}, "message": f"SubAgent {name} not found"}
+        if deadline is not None and deadline.expired:
+            # プールの空き待ちの間に期限を過ぎた（キャンセル済みなら呼び出し元が記録する）
+            if deadline.cancelled:
+                return {"status": "timeout", "data": {}}
+            return self._record_subagent_timeout(
+                name,
+                input_data,
+                execution_id,
+                deadline.seconds or 0.0,
+                message="期限までに開始できませんでした",
+            )
 
         subagent = self.subagents[name]
+        cache_key, cached = self._lookup_cached_result(
+            name, subagent, input_data, execution_id
+        )
+        if cached is not None:
+            return cached
         print(f"    ├─ {name} ({subagent.role})...")
 
-        result = subagent.execute(input_data)
+        result = None
+        if self.backend == "process":
+            try:
+                result = SubAgentResult(
+                    **self.process_pool.run(class_path_of(subagent), input_data)
+                )
+            except Exception as e:
+                if deadline is not None and deadline.cancelled:
+                    return {"status": "timeout", "data": {}}
+                print(f"  ⚠️  {name}: process backend failed ({e}). Running in thread.")
+        if result is None:
+            with deadline_scope(deadline):
+                result = subagent.execute(input_data)
+        if deadline is not None and deadline.cancelled:
+            return result.to_dict()
 
         # ログ記録
-        self.db_client.log_subagent_execution(
+        self._log_subagent_execution(
             workflow_execution_id=execution_id,
             subagent_name=name,
             role=subagent.role,
@@ -369,21 +1505,98 @@ class WorkflowEngine:
             message=result.message,
         )
 
+        if cache_key is not None:
+            self.result_cache.put(cache_key, name, result.to_dict())
         return result.to_dict()
 
+    def _lookup_cached_result(
+        self, name: str, subagent: Any, input_data: Dict[str, Any], execution_id: int
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        キャッシュ済みの結果を取得（ヒットした場合は実行ログも記録する）
+
+        Returns:
+            (キャッシュキー, キャッシュ済みの結果)（キャッシュしない場合はキーも None）
+        """
+        if self.result_cache is None:
+            return None, None
+        cache_key = self.result_cache.key_for(subagent, input_data)
+        if cache_key is None:
+            return None, None
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+
+        print(f"    ├─ {name} ({subagent.role})... cached")
+        self._log_subagent_execution(
+            workflow_execution_id=execution_id,
+            subagent_name=name,
+            role=subagent.role,
+            input_data={"title": input_data.get("title", "")},
+            output_data=cached["data"],
+            execution_time_ms=0,
+            status=cached["status"],
+            message="キャッシュ済みの結果を再利用しました",
+        )
+        return cache_key, {**cached, "execution_time_ms": 0, "cached": True}
+
+    @staticmethod
+    def _cache_summary(subagent_results: Dict[str, Any]) -> Dict[str, Any]:
+        """今回のワークフローでのキャッシュのヒット数・ヒット率"""
+        hits = [name for name, r in subagent_results.items() if r.get("cached")]
+        total = len(subagent_results)
+        return {
+            "hits": len(hits),
+            "misses": total - len(hits),
+            "hit_rate": round(len(hits) / total, 3) if total else 0.0,
+            "cached_subagents": hits,
+        }
+
     def _execute_subagents_sequential(
-        self, input_data: Dict[str, Any], execution_id: int
+        self,
+        input_data: Dict[str, Any],
+        execution_id: int,
+        deadline: Optional[Deadline] = None,
+        deferred: Iterable[str] = (),
     ) -> Dict[str, Any]:
-        """SubAgentを順次実行（フォールバック用）"""
+        """SubAgentを依存関係の順に順次実行（フォールバック用、期限切れ以降は実行しない）"""
         results = {}
+        deferred = set(deferred)
+
+        for name in self.subagent_dag.order:
+            if name in deferred:
+                results[name] = self._deferred_result()
+                continue
+            if deadline is not None and deadline.expired:
+                results[name] = self._record_subagent_timeout(
+                    name,
+                    input_data,
+                    execution_id,
+                    0.0,
+                    message="ワークフローの期限を超えたため実行しませんでした",
+                )
+                continue
 
-        for name, subagent in self.subagents.items():
+            subagent = self.subagents[name]
             print(f"  → {name} ({subagent.role})...")
 
-            result = subagent.execute(input_data)
+            dependencies = self.subagent_dag.dependencies[name]
+            node_input = input_data
+            if dependencies:
+                node_input = {
+                    **input_data,
+                    "dependency_results": {dep: results[dep] for dep in dependencies},
+                }
+            cache_key, cached = self._lookup_cached_result(
+                name, subagent, node_input, execution_id
+            )
+            if cached is not None:
+                results[name] = cached
+                continue
+            result = subagent.execute(node_input)
 
             # ログ記録
-            self.db_client.log_subagent_execution(
+            self._log_subagent_execution(
                 workflow_execution_id=execution_id,
                 subagent_name=name,
                 role=subagent.role,
@@ -395,8 +1608,10 @@ class WorkflowEngine:
             )
 
             results[name] = result.to_dict()
+            if cache_key is not None:
+                self.result_cache.put(cache_key, name, results[name])
 
-        return results
+        return {name: results[name] for name in self.subagents}
 
     def _execute_quality_hooks(
         self, context: Dict[str, Any], execution_id: int
@@ -421,9 +1636,13 @@ class WorkflowEngine:
         return hook_results
 
     def _aggregate_knowledge(
-        self, title: str, content: str, itsm_type: str, subagent_results: Dict[str, Any]
+        self,
+        title: str,
+        content: str,
+        itsm_type: str,
+        subagent_results: Dict[str, Any],
     ) -> Dict[str, Any]:
-        """サブエージェント結果を集約"""
+        """サブエージェント結果を集約（MCP補強は保存後に行う）"""
         # Documenterの結果から要約を取得
         documenter_data = subagent_results.get("documenter", {}).get("data", {})
         summary_technical = documenter_data.get("summary_technical", "")
@@ -448,36 +1667,6 @@ class WorkflowEngine:
         insights.extend(recommendations)
         insights.extend(improvements)
 
-        # MCP連携でナレッジを補強
-        mcp_enrichments = {}
-        try:
-            # 検出された技術を抽出
-            detected_techs = [
-                tag
-                for tag in tags
-                if tag.lower() in ["flask", "sqlite", "python", "apache", "nginx"]
-            ]
-
-            # MCP統合でナレッジ補強
-            mcp_enrichments = mcp_integration.enrich_knowledge_with_mcps(
-                knowledge_content=content,
-                detected_technologies=detected_techs,
-                itsm_type=itsm_type,
-            )
-
-            # MCP補強情報をinsightsに追加
-            if mcp_enrichments.get("related_memories"):
-                insights.append(
-                    f"📚 過去の関連記憶: {len(mcp_enrichments['related_memories'])}件見つかりました"
-                )
-            if mcp_enrichments.get("technical_documentation"):
-                insights.append(
-                    f"📖 技術ドキュメント: {len(mcp_enrichments['technical_documentation'])}個の技術について参照可能"
-                )
-
-        except Exception as e:
-            print(f"⚠️  MCP補強でエラー: {e}")
-
         return {
             "title": title,
             "content": content,
@@ -490,9 +1679,25 @@ class WorkflowEngine:
             "insights": insights,
             "markdown": documenter_data.get("markdown", ""),
             "html": documenter_data.get("html", ""),
-            "mcp_enrichments": mcp_enrichments,
         }
 
+    def _schedule_enrichment(
+        self, knowledge_id: int, knowledge: Dict[str, Any]
+    ) -> Optional[Future]:
+        """
+        保存したナレッジのMCP補強を予約（予約の失敗は保存結果に影響させない）
+
+        Returns:
+            補強結果の Future（予約できなかった場合は None）
+        """
+        try:
+            return self.enrichment.schedule(
+                knowledge_id, knowledge["content"], knowledge["tags"]
+            )
+        except Exception as e:
+            print(f"⚠️  MCP補強の予約でエラー (ID: {knowledge_id}): {e}")
+            return None
+
     def _save_knowledge(
         self,
         knowledge: Dict[str, Any],
@@ -512,6 +1717,14 @@ class WorkflowEngine:
             created_by=created_by,
         )
 
+        # 近似重複インデックスに署名を追加
+        try:
+            self.duplicate_index.add(
+                knowledge_id, knowledge["title"], knowledge["content"]
+            )
+        except Exception as e:
+            print(f"⚠️  近似重複インデックスの更新でエラー: {e}")
+
         # 重複検知結果を記録
         qa_data = subagent_results.get("qa", {}).get("data", {})
         duplicates = qa_data.get("duplicates", {})
@@ -539,16 +1752,23 @@ class WorkflowEngine:
 
     def _save_markdown(self, knowledge_id: int, knowledge: Dict[str, Any]) -> str:
         """Markdownファイルとして保存"""
-        markdown_dir = Path("data/knowledge")
+        filepath = self._write_markdown(knowledge_id, knowledge)
+
+        # データベースにパスを保存
+        self.db_client.update_knowledge(knowledge_id, markdown_path=filepath)
+
+        return filepath
+
+    def _write_markdown(self, knowledge_id: int, knowledge: Dict[str, Any]) -> str:
+        """Markdownファイルを書き出す（パスのDB保存は呼び出し元）"""
+        markdown_dir = Path(self.markdown_dir)
         markdown_dir.mkdir(parents=True, exist_ok=True)
 
         filename = f"{knowledge_id:05d}_{knowledge['itsm_type']}.md"
         filepath = markdown_dir / filename
 
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(knowledge["markdown"])
-
-        # データベースにパスを保存
-        self.db_client.update_knowledge(knowledge_id, markdown_path=str(filepath))
+        with tracing.span("markdown.write"):
+            with open(filepath, "w", encoding="utf-8") as f:
+                f.write(knowledge["markdown"])
 
         return str(filepath)
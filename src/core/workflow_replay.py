@@ -0,0 +1,449 @@
+"""
+Workflow Replay
+ナレッジ生成ワークフローの記録・再生（スループットの計測・容量計画）
+
+本番の process_knowledge の入力を、個人情報・秘密情報を伏せてJSONLのコーパスに記録し、
+一時DBに対して指定した同時実行数・到着レートで再生する。
+MCPは応答を固定したローカルのスタブ（遅延を指定可能）に置き換えるため、
+外部サーバーなしに1台で計測できる（ワークフローのサブエージェントはルールベースで、
+AIの呼び出しはない）。
+
+レポート: スループット、レイテンシのパーセンタイル、DB書き込みの停滞、フェーズごとのCPU時間
+（フェーズの時間はワークフローのトレースのスパンから集計する）
+"""
+
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.core.workflow import WorkflowEngine
+from src.mcp.mcp_integration import MCPIntegration
+from src.mcp.sqlite_client import SQLiteClient
+from src.utils.deadline import Deadline
+
+# ========== 入力の匿名化 ==========
+
+# (パターン, 置換) の順に適用する
+SANITIZE_RULES = [
+    # URL中の認証情報
+    (re.compile(r"(\w+://)[^/\s:@]+:[^/\s@]+@"), r"\1***:***@"),
+    # メールアドレス
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "user@example.com"),
+    # パスワード・トークンなどの値
+    (
+        re.compile(
+            r"(?i)\b(password|passwd|pwd|secret|token|api[_-]?key|access[_-]?key)"
+            r"(\s*[:=]\s*)(\S+)"
+        ),
+        r"\1\2***",
+    ),
+    # 電話番号
+    (re.compile(r"\b0\d{1,4}-\d{1,4}-\d{4}\b"), "000-0000-0000"),
+    # IPv4アドレス（文書用のアドレスに置換）
+    (re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b"), "192.0.2.1"),
+    # 長いトークン・ハッシュ（処理量が変わらないよう長さは保つ）
+    (re.compile(r"\b[A-Za-z0-9+/_-]{32,}\b"), lambda m: "x" * len(m.group())),
+]
+
+
+def sanitize_text(text: str) -> str:
+    """個人情報・秘密情報を伏せる（文章の構成と長さはできるだけ保つ）"""
+    for pattern, replacement in SANITIZE_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def sanitize_input(title: str, content: str, itsm_type: str) -> Dict[str, str]:
+    """記録用の入力"""
+    return {
+        "title": sanitize_text(title or ""),
+        "content": sanitize_text(content or ""),
+        "itsm_type": itsm_type or "Other",
+    }
+
+
+# ========== コーパス ==========
+
+
+class WorkflowRecorder:
+    """process_knowledge の入力をJSONLに記録（WorkflowEngine の input_recorder）"""
+
+    def __init__(self, path: str, sample_rate: float = 1.0):
+        """
+        Args:
+            path: 記録先のJSONLファイル
+            sample_rate: 記録する割合（0〜1）
+        """
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, title: str, content: str, itsm_type: str) -> bool:
+        """
+        入力を匿名化して追記
+
+        Returns:
+            記録した場合 True（サンプリングで除外した場合は False）
+        """
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:  # nosec B311 - サンプリング用
+            return False
+        line = json.dumps(
+            {"recorded_at": time.time(), **sanitize_input(title, content, itsm_type)},
+            ensure_ascii=False,
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.recorded += 1
+        return True
+
+
+def load_corpus(path: str) -> List[Dict[str, str]]:
+    """コーパスを読み込む（空行・壊れた行は除く）"""
+    corpus = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("title") and entry.get("content"):
+                corpus.append(
+                    {
+                        "title": entry["title"],
+                        "content": entry["content"],
+                        "itsm_type": entry.get("itsm_type") or "Other",
+                    }
+                )
+    return corpus
+
+
+def write_corpus(path: str, entries: Iterable[Dict[str, str]]) -> int:
+    """入力を匿名化してコーパスに書き出す（件数を返す）"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            sanitized = sanitize_input(
+                entry.get("title", ""), entry.get("content", ""), entry.get("itsm_type", "")
+            )
+            f.write(json.dumps(sanitized, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def capture_from_database(db_client: SQLiteClient, limit: int = 500) -> List[Dict[str, str]]:
+    """既存のナレッジからコーパスの元になる入力を取得（新しい順）"""
+    with db_client.get_connection() as conn:
+        rows = conn.execute(
+            "SELECT title, content, itsm_type FROM knowledge_entries "
+            "ORDER BY created_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+# ========== MCPのスタブ ==========
+
+
+class StubMCPIntegration(MCPIntegration):
+    """応答を固定したMCP連携（外部サーバーに接続せず、指定した遅延だけ待つ）"""
+
+    def __init__(self, docs_latency: float = 0.0, memories_latency: float = 0.0):
+        """
+        Args:
+            docs_latency: 技術ドキュメント取得の遅延（秒）
+            memories_latency: 過去の記憶検索の遅延（秒）
+        """
+        super().__init__(auto_connect=False)
+        self.docs_latency = docs_latency
+        self.memories_latency = memories_latency
+
+    def fetch_technical_documentation(
+        self, technologies: List[str], deadline: Optional[Deadline] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        self._wait(self.docs_latency, deadline)
+        return {
+            tech: [{"title": f"{tech} best practices", "source": "stub"}]
+            for tech in technologies[:3]
+        }
+
+    def fetch_related_memories(
+        self, keywords: List[str], deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
+        self._wait(self.memories_latency, deadline)
+        return [{"title": f"過去の記憶: {keyword}", "source": "stub"} for keyword in keywords][:5]
+
+    @staticmethod
+    def _wait(latency: float, deadline: Optional[Deadline]) -> None:
+        if deadline is not None:
+            latency = deadline.cap(latency)
+        if latency and latency > 0:
+            time.sleep(latency)
+
+
+# ========== 再生 ==========
+
+
+def percentile_summary(values: List[float]) -> Dict[str, float]:
+    """パーセンタイル（最近順位法）・平均・最大"""
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def nearest_rank(percentile: float) -> float:
+        index = int(len(ordered) * percentile / 100)
+        return round(ordered[min(index, len(ordered) - 1)], 3)
+
+    return {
+        "p50": nearest_rank(50),
+        "p90": nearest_rank(90),
+        "p95": nearest_rank(95),
+        "p99": nearest_rank(99),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+class ReplayHarness:
+    """コーパスを一時DBに対して再生し、スループット・レイテンシを計測する"""
+
+    # DB書き込みの停滞とみなす時間（ミリ秒）
+    DEFAULT_STALL_THRESHOLD_MS = 50.0
+
+    def __init__(
+        self,
+        corpus: List[Dict[str, str]],
+        concurrency: int = 4,
+        arrival_rate: Optional[float] = None,
+        mcp_latency: float = 0.0,
+        repeat: int = 1,
+        stall_threshold_ms: float = DEFAULT_STALL_THRESHOLD_MS,
+        seed: int = 0,
+        force_reprocess: bool = True,
+        engine_options: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            corpus: 再生する入力（load_corpus() の戻り値）
+            concurrency: 同時に実行するワークフロー数
+            arrival_rate: 1秒あたりの到着件数（ポアソン到着、Noneは待たずに全件投入）
+            mcp_latency: MCPスタブの情報源ごとの遅延（秒）
+            repeat: コーパスを繰り返す回数
+            stall_threshold_ms: DB書き込みの停滞とみなす時間
+            seed: 到着間隔の乱数シード（同じ条件で再現するため）
+            force_reprocess: 再投稿の判定を行わず、毎回すべての処理を実行するか
+            engine_options: WorkflowEngine の追加引数（max_workers・backend 等）
+        """
+        if not corpus:
+            raise ValueError("コーパスが空です")
+        if concurrency < 1:
+            raise ValueError("concurrency は1以上を指定してください")
+        if arrival_rate is not None and arrival_rate <= 0:
+            raise ValueError("arrival_rate は正の値を指定してください")
+        self.corpus = corpus
+        self.concurrency = concurrency
+        self.arrival_rate = arrival_rate
+        self.mcp_latency = mcp_latency
+        self.repeat = repeat
+        self.stall_threshold_ms = stall_threshold_ms
+        self.seed = seed
+        self.force_reprocess = force_reprocess
+        self.engine_options = dict(engine_options or {})
+
+    def run(self) -> Dict[str, Any]:
+        """
+        一時ディレクトリのDB・Markdown出力先で再生
+
+        Returns:
+            レポート（report() を参照）
+        """
+        with tempfile.TemporaryDirectory(prefix="workflow-replay-") as scratch:
+            engine = WorkflowEngine(
+                db_path=os.path.join(scratch, "replay.db"),
+                mcp_client=StubMCPIntegration(self.mcp_latency, self.mcp_latency),
+                markdown_dir=os.path.join(scratch, "knowledge"),
+                **{**self.engine_options, "trace_workflows": True},
+            )
+            try:
+                return self._replay(engine)
+            finally:
+                engine.shutdown()
+
+    def arrival_offsets(self, count: int) -> List[float]:
+        """各リクエストの到着時刻（開始からの秒数）"""
+        if self.arrival_rate is None:
+            return [0.0] * count
+        rng = random.Random(self.seed)  # nosec B311 - 到着間隔の再現用
+        offsets, elapsed = [], 0.0
+        for _ in range(count):
+            offsets.append(elapsed)
+            elapsed += rng.expovariate(self.arrival_rate)
+        return offsets
+
+    def _replay(self, engine: WorkflowEngine) -> Dict[str, Any]:
+        items = [
+            self.corpus[i % len(self.corpus)]
+            for i in range(len(self.corpus) * self.repeat)
+        ]
+        offsets = self.arrival_offsets(len(items))
+
+        executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="replay"
+        )
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        try:
+            futures = []
+            for item, offset in zip(items, offsets):
+                # 到着時刻まで待ってから投入（同時実行数を超えた分はキューで待つ）
+                delay = started + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(
+                    executor.submit(self._run_one, engine, item, started + offset)
+                )
+            samples = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+            cpu_seconds = time.process_time() - cpu_started
+        finally:
+            executor.shutdown()
+
+        # 保存後のMCP補強のスパンも集計に含める（スループットには含めない）
+        engine.enrichment.wait()
+        return self.report(engine, samples, elapsed, cpu_seconds)
+
+    def _run_one(
+        self, engine: WorkflowEngine, item: Dict[str, str], arrived_at: float
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            result = engine.process_knowledge(
+                title=item["title"],
+                content=item["content"],
+                itsm_type=item["itsm_type"],
+                created_by="replay",
+                force_reprocess=self.force_reprocess,
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        finished = time.perf_counter()
+        return {
+            "execution_id": result.get("execution_id"),
+            "success": bool(result.get("success")),
+            "queue_ms": (started - arrived_at) * 1000,
+            "service_ms": (finished - started) * 1000,
+            "latency_ms": (finished - arrived_at) * 1000,
+        }
+
+    # ========== レポート ==========
+
+    def report(
+        self,
+        engine: WorkflowEngine,
+        samples: List[Dict[str, Any]],
+        elapsed: float,
+        cpu_seconds: float,
+    ) -> Dict[str, Any]:
+        """
+        計測結果を集計
+
+        Returns:
+            {
+                'requests', 'succeeded', 'failed', 'elapsed_seconds',
+                'throughput_per_second': 成功件数 / 経過時間,
+                'process_cpu_seconds', 'cpu_utilization': CPU時間 / 経過時間（コア数倍まで）,
+                'latency_ms': 到着から完了まで, 'service_ms': 実行開始から完了まで,
+                'queue_ms': 到着から実行開始まで（各パーセンタイル）,
+                'db_writes': DB書き込みのスパンの時間と停滞件数,
+                'phases': スパン名ごとの実行時間・CPU時間,
+                'subagent_pool': サブエージェント実行プールの飽和状況,
+                'mcp_enrichment': 保存後のMCP補強の状況
+            }
+        """
+        succeeded = sum(1 for s in samples if s["success"])
+        execution_ids = [s["execution_id"] for s in samples if s["execution_id"]]
+        spans = engine.trace_store.get_spans_for(execution_ids)
+
+        return {
+            "requests": len(samples),
+            "succeeded": succeeded,
+            "failed": len(samples) - succeeded,
+            "concurrency": self.concurrency,
+            "arrival_rate": self.arrival_rate,
+            "mcp_latency_seconds": self.mcp_latency,
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_per_second": round(succeeded / elapsed, 3) if elapsed else 0.0,
+            "process_cpu_seconds": round(cpu_seconds, 3),
+            "cpu_utilization": round(cpu_seconds / elapsed, 3) if elapsed else 0.0,
+            "latency_ms": percentile_summary([s["latency_ms"] for s in samples]),
+            "service_ms": percentile_summary([s["service_ms"] for s in samples]),
+            "queue_ms": percentile_summary([s["queue_ms"] for s in samples]),
+            "db_writes": self._db_write_report(spans),
+            "phases": self._phase_report(spans),
+            "subagent_pool": engine.runtime.stats(),
+            "mcp_enrichment": engine.enrichment.stats(),
+        }
+
+    def _db_write_report(self, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """DB書き込み（db.* のスパン）の時間と停滞件数"""
+        writes = [s for s in spans if s["name"].startswith("db.")]
+        by_name: Dict[str, List[float]] = {}
+        for span in writes:
+            by_name.setdefault(span["name"], []).append(span["duration_ms"])
+
+        def summarize(durations: List[float]) -> Dict[str, Any]:
+            summary = percentile_summary(durations)
+            return {
+                "count": len(durations),
+                "total_ms": round(sum(durations), 3),
+                "p95_ms": summary["p95"],
+                "max_ms": summary["max"],
+                "stalls": sum(1 for d in durations if d >= self.stall_threshold_ms),
+            }
+
+        return {
+            **summarize([s["duration_ms"] for s in writes]),
+            "stall_threshold_ms": self.stall_threshold_ms,
+            "by_name": {name: summarize(d) for name, d in sorted(by_name.items())},
+        }
+
+    @staticmethod
+    def _phase_report(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        スパン名ごとの実行時間・CPU時間
+
+        CPU時間はスパンを開始したスレッドの分のみ（サブエージェントの処理自体の
+        CPU時間は agent.process、subagent.* はプールの空き待ちを含む待ち時間）。
+        """
+        phases: Dict[str, Dict[str, List[float]]] = {}
+        for span in spans:
+            phase = phases.setdefault(span["name"], {"wall": [], "cpu": []})
+            phase["wall"].append(span["duration_ms"])
+            if span.get("cpu_ms") is not None:
+                phase["cpu"].append(span["cpu_ms"])
+
+        report = {}
+        for name, values in sorted(phases.items()):
+            wall = percentile_summary(values["wall"])
+            cpu = values["cpu"]
+            report[name] = {
+                "count": len(values["wall"]),
+                "wall_ms_p50": wall["p50"],
+                "wall_ms_p95": wall["p95"],
+                "wall_ms_total": round(sum(values["wall"]), 3),
+                "cpu_ms_total": round(sum(cpu), 3),
+                "cpu_ms_mean": round(sum(cpu) / len(cpu), 3) if cpu else None,
+            }
+        return report
@@ -24,6 +24,7 @@ class DuplicateCheckHook(BaseHook):
                 'title': str,
                 'content': str,
                 'existing_knowledge': list,
+                'near_duplicates': list (近似重複インデックスの候補、任意),
                 'qa_result': dict (QAサブエージェントの結果)
             }
 
@@ -33,6 +34,9 @@ class DuplicateCheckHook(BaseHook):
         # QAサブエージェントの重複検知結果を利用
         qa_result = context.get("qa_result", {})
         duplicates = qa_result.get("duplicates", {})
+        if not duplicates and context.get("near_duplicates"):
+            # QA結果がない場合は近似重複インデックスの候補で判定
+            duplicates = self._from_near_duplicates(context["near_duplicates"])
 
         similar_knowledge = duplicates.get("similar_knowledge", [])
         high_similarity_count = duplicates.get("high_similarity_count", 0)
@@ -76,6 +80,28 @@ class DuplicateCheckHook(BaseHook):
                 details={"threshold": self.similarity_threshold},
             )
 
+    def _from_near_duplicates(
+        self, near_duplicates: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """近似重複インデックスの候補をQA結果と同じ形式に変換"""
+        similar_knowledge = [
+            {
+                "knowledge_id": item.get("id"),
+                "title": item.get("title", ""),
+                "overall_similarity": item.get("near_duplicate_score", 0.0),
+                "near_duplicate_score": item.get("near_duplicate_score", 0.0),
+            }
+            for item in near_duplicates
+        ]
+        similar_knowledge.sort(key=lambda x: x["overall_similarity"], reverse=True)
+        return {
+            "similar_knowledge": similar_knowledge[:5],
+            "high_similarity_count": sum(
+                1 for s in similar_knowledge if s["overall_similarity"] >= 0.8
+            ),
+            "total_similar_count": len(similar_knowledge),
+        }
+
     def set_threshold(self, threshold: float):
         """類似度閾値を設定"""
         if 0.0 <= threshold <= 1.0:
@@ -88,7 +88,7 @@ class PostTaskHook(BaseHook):
 
         # サブエージェントからの問題
         for subagent_name, result in subagent_results.items():
-            if result.get("status") in ["failed", "warning"]:
+            if result.get("status") in ["failed", "warning", "timeout"]:
                 issues.append(
                     {
                         "source": f"SubAgent: {subagent_name}",
@@ -5,6 +5,8 @@ Pre-Task Hook
 
 from typing import Any, Dict, List
 
+from src.utils.fingerprint import compute_fingerprint
+
 from .base import BaseHook, HookResponse, HookResult
 
 
@@ -41,12 +43,16 @@ class PreTaskHook(BaseHook):
         # サブエージェントの割り当て推奨
         recommended_subagents = self._recommend_subagents(context)
 
+        # 再投稿検知用のフィンガープリント（完全一致ハッシュ + SimHash）
+        fingerprint = compute_fingerprint(context["title"], context["content"])
+
         return HookResponse(
             result=HookResult.PASS,
             message="タスク前チェック完了",
             details={
                 "recommended_subagents": recommended_subagents,
                 "validation": validation_result,
+                "fingerprint": fingerprint,
             },
         )
 
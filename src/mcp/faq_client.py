@@ -0,0 +1,352 @@
+"""
+FAQ Client for Self-Service FAQ
+FAQ検索・管理クライアント
+"""
+
+import json
+import logging
+import math
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.text_tokenizer import normalize_text
+
+from .sqlite_client import SQLiteClient
+
+logger = logging.getLogger(__name__)
+
+
+class FAQClient(SQLiteClient):
+    """
+    FAQ管理クライアント
+
+    faq_fts（FTS5 trigram）による bm25 の関連度に、フィードバックの
+    役立ち率を掛け合わせてランキングする。trigram で検索できない
+    3文字未満の語は LIKE で絞り込む。
+
+    質問・回答は入力どおりの列と、normalize_text で正規化した列
+    （question_norm / answer_norm、書き込み時に設定）の両方を検索し、
+    各語は入力どおりの表記か正規化した表記のどちらかで一致すればよい。
+    """
+
+    FAQ_SCHEMA_PATH = Path(__file__).resolve().parents[2] / "db" / "faq_schema.sql"
+
+    # ページング設定
+    DEFAULT_PER_PAGE = 20
+    MAX_PER_PAGE = 100
+
+    # bm25 の列の重み（question, answer。正規化した列にも同じ重みを使う）
+    BM25_WEIGHTS = (2.0, 1.0)
+    # スコア = 関連度 × (HELPFULNESS_BASE + 平滑化した役立ち率)
+    HELPFULNESS_BASE = 0.5
+    # trigram トークナイザで検索できる最小文字数
+    FTS_MIN_TERM_LENGTH = 3
+
+    LIST_COLUMNS = """
+        f.id, f.question, f.answer, f.category, f.tags,
+        f.view_count, f.helpful_count, f.not_helpful_count,
+        f.created_at, f.updated_at
+    """
+    # ラプラス平滑化した役立ち率（評価なしは0.5）
+    HELPFULNESS_SQL = (
+        "((f.helpful_count + 1.0) / (f.helpful_count + f.not_helpful_count + 2.0))"
+    )
+
+    def __init__(self, db_path: str = "db/knowledge.db"):
+        super().__init__(db_path)
+        self.fts_available = False
+        self._ensure_faq_schema()
+
+    def _ensure_faq_schema(self):
+        """FAQスキーマの適用（FTSインデックスの新規作成時は既存データを取り込む）"""
+        if not self.FAQ_SCHEMA_PATH.exists():
+            return
+
+        with open(self.FAQ_SCHEMA_PATH, "r", encoding="utf-8") as f:
+            schema = f.read()
+
+        with self.get_connection() as conn:
+            self._migrate_normalized_columns(conn)
+            had_fts = self._has_table(conn, "faq_fts")
+            try:
+                conn.executescript(schema)
+            except sqlite3.OperationalError as e:
+                # trigram 非対応の古いSQLiteではLIKE検索のみで動作する
+                logger.warning(f"FAQ全文検索インデックスを作成できません: {e}")
+
+            self.fts_available = self._has_table(conn, "faq_fts")
+            if self.fts_available and not had_fts:
+                conn.execute("INSERT INTO faq_fts(faq_fts) VALUES('rebuild')")
+
+    def _migrate_normalized_columns(self, conn: sqlite3.Connection) -> None:
+        """
+        既存DBに正規化した列を追加して補完（作成済みのDB向け）
+
+        正規化した列を索引しない旧FTSインデックスは削除し、スキーマの適用時に
+        作り直して既存データを取り込む。
+        """
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(faq_entries)")]
+        if not columns or "question_norm" in columns:
+            return
+        conn.execute("ALTER TABLE faq_entries ADD COLUMN question_norm TEXT")
+        conn.execute("ALTER TABLE faq_entries ADD COLUMN answer_norm TEXT")
+        rows = conn.execute("SELECT id, question, answer FROM faq_entries").fetchall()
+        conn.executemany(
+            "UPDATE faq_entries SET question_norm = ?, answer_norm = ? WHERE id = ?",
+            [
+                (normalize_text(row["question"]), normalize_text(row["answer"]), row["id"])
+                for row in rows
+            ],
+        )
+        conn.executescript(
+            """
+            DROP TRIGGER IF EXISTS faq_fts_insert;
+            DROP TRIGGER IF EXISTS faq_fts_delete;
+            DROP TRIGGER IF EXISTS faq_fts_update;
+            DROP TABLE IF EXISTS faq_fts;
+            """
+        )
+
+    def _has_table(self, conn: sqlite3.Connection, table_name: str) -> bool:
+        cursor = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (table_name,)
+        )
+        return cursor.fetchone() is not None
+
+    # ========== ページング ==========
+
+    def _normalize_paging(self, page: int, per_page: int) -> Tuple[int, int, int]:
+        """ページ番号・件数を補正し、(page, per_page, offset) を返す"""
+        page = max(1, int(page or 1))
+        per_page = min(max(1, int(per_page or self.DEFAULT_PER_PAGE)), self.MAX_PER_PAGE)
+        return page, per_page, (page - 1) * per_page
+
+    def _page_response(
+        self, results: List[Dict[str, Any]], total: int, page: int, per_page: int
+    ) -> Dict[str, Any]:
+        return {
+            "results": results,
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "pages": max(1, math.ceil(total / per_page)),
+        }
+
+    # ========== 一覧・検索 ==========
+
+    def get_categories(self) -> List[str]:
+        """カテゴリ一覧を取得"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT DISTINCT category
+                FROM faq_entries
+                WHERE status = 'active' AND category IS NOT NULL
+                ORDER BY category
+            """)
+            return [row[0] for row in cursor.fetchall()]
+
+    def list_faqs(
+        self,
+        category: Optional[str] = None,
+        page: int = 1,
+        per_page: int = DEFAULT_PER_PAGE,
+    ) -> Dict[str, Any]:
+        """
+        FAQ一覧を取得（役立った数の多い順）
+
+        Returns:
+            {'results': list, 'total': int, 'page': int, 'per_page': int, 'pages': int}
+        """
+        page, per_page, offset = self._normalize_paging(page, per_page)
+        where_sql = "f.status = 'active'"
+        params: List[Any] = []
+        if category:
+            where_sql += " AND f.category = ?"
+            params.append(category)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT COUNT(*) FROM faq_entries f WHERE {where_sql}",  # nosec B608
+                params,
+            )
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                f"""
+                SELECT {self.LIST_COLUMNS}
+                FROM faq_entries f
+                WHERE {where_sql}
+                ORDER BY f.helpful_count DESC, f.created_at DESC, f.id DESC
+                LIMIT ? OFFSET ?
+                """,  # nosec B608 - WHERE句はプレースホルダのみで構築
+                params + [per_page, offset],
+            )
+            results = [dict(row) for row in cursor.fetchall()]
+
+        return self._page_response(results, total, page, per_page)
+
+    def search_faqs(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        page: int = 1,
+        per_page: int = DEFAULT_PER_PAGE,
+    ) -> Dict[str, Any]:
+        """
+        FAQをランキング検索
+
+        3文字以上の語は faq_fts で検索して bm25 × 役立ち率でランキングし、
+        3文字未満の語は LIKE で絞り込む（全語 AND）。各語は入力どおりの表記と
+        全角・半角・長音の揺れを吸収した表記の両方で照合する。
+
+        Args:
+            query: 検索クエリ（空白区切りで複数語）
+            category: カテゴリでフィルタ
+            page: ページ番号（1始まり）
+            per_page: 1ページあたりの件数
+
+        Returns:
+            list_faqs と同じ形式（各結果に score を付与）
+        """
+        page, per_page, offset = self._normalize_paging(page, per_page)
+        # (入力どおりの語, 正規化した語)
+        terms = [(t, normalize_text(t)) for t in (query or "").split()]
+        terms = [(raw, norm) for raw, norm in terms if norm]
+        if not terms:
+            return self._page_response([], 0, page, per_page)
+
+        fts_terms = (
+            [
+                (raw, norm)
+                for raw, norm in terms
+                if min(len(raw), len(norm)) >= self.FTS_MIN_TERM_LENGTH
+            ]
+            if self.fts_available
+            else []
+        )
+        like_terms = [t for t in terms if t not in fts_terms]
+
+        clauses = ["f.status = 'active'"]
+        params: List[Any] = []
+        for raw, norm in like_terms:
+            clauses.append(
+                "(f.question LIKE ? OR f.answer LIKE ? "
+                "OR f.question_norm LIKE ? OR f.answer_norm LIKE ?)"
+            )
+            params.extend([f"%{raw}%", f"%{raw}%", f"%{norm}%", f"%{norm}%"])
+        if category:
+            clauses.append("f.category = ?")
+            params.append(category)
+
+        if fts_terms:
+            match = " AND ".join(
+                '({{question answer}} : "{}" OR {{question_norm answer_norm}} : "{}")'.format(
+                    raw.replace('"', '""'), norm.replace('"', '""')
+                )
+                for raw, norm in fts_terms
+            )
+            from_sql = "faq_fts JOIN faq_entries f ON f.id = faq_fts.rowid"
+            clauses.insert(0, "faq_fts MATCH ?")
+            params.insert(0, match)
+            weights = ", ".join(str(w) for w in self.BM25_WEIGHTS * 2)
+            score_sql = (
+                f"-bm25(faq_fts, {weights}) "
+                f"* ({self.HELPFULNESS_BASE} + {self.HELPFULNESS_SQL})"
+            )
+        else:
+            from_sql = "faq_entries f"
+            score_sql = self.HELPFULNESS_SQL
+
+        where_sql = " AND ".join(clauses)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {from_sql} WHERE {where_sql}",  # nosec B608
+                params,
+            )
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                f"""
+                SELECT {self.LIST_COLUMNS}, {score_sql} AS score
+                FROM {from_sql}
+                WHERE {where_sql}
+                ORDER BY score DESC, f.helpful_count DESC, f.created_at DESC
+                LIMIT ? OFFSET ?
+                """,  # nosec B608 - WHERE句はプレースホルダのみで構築
+                params + [per_page, offset],
+            )
+            results = []
+            for row in cursor.fetchall():
+                item = dict(row)
+                item["score"] = round(item["score"], 4)
+                results.append(item)
+
+        return self._page_response(results, total, page, per_page)
+
+    # ========== 作成・フィードバック ==========
+
+    def create_faq(
+        self,
+        question: str,
+        answer: str,
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        knowledge_id: Optional[int] = None,
+        created_by: Optional[str] = None,
+    ) -> int:
+        """FAQを作成（FTSインデックスはトリガーで同期）"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO faq_entries (
+                    question, answer, category, tags, knowledge_id, created_by,
+                    question_norm, answer_norm
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    question,
+                    answer,
+                    category,
+                    json.dumps(tags or [], ensure_ascii=False),
+                    knowledge_id,
+                    created_by,
+                    normalize_text(question),
+                    normalize_text(answer),
+                ),
+            )
+            conn.commit()
+            return cursor.lastrowid
+
+    def record_feedback(
+        self,
+        faq_id: int,
+        is_helpful: bool,
+        comment: str = "",
+        user_id: Optional[str] = None,
+    ) -> None:
+        """フィードバックを記録し、評価カウントと閲覧数を更新"""
+        count_column = "helpful_count" if is_helpful else "not_helpful_count"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO faq_feedback (faq_id, is_helpful, comment, user_id)
+                VALUES (?, ?, ?, ?)
+                """,
+                (faq_id, is_helpful, comment, user_id),
+            )
+            cursor.execute(
+                f"""
+                UPDATE faq_entries
+                SET {count_column} = {count_column} + 1,
+                    view_count = view_count + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,  # nosec B608 - カラム名は固定値から選択
+                (faq_id,),
+            )
+            conn.commit()
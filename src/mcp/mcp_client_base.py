@@ -5,6 +5,9 @@ MCPサーバーとsubprocess経由でJSON-RPC通信を行うベースクラス
 MCP (Model Context Protocol) サーバーは stdio上のJSON-RPCプロトコルで通信します。
 このモジュールは、Pythonアプリケーションから各MCPサーバーへの
 接続・リクエスト送信・レスポンス受信を抽象化します。
+
+呼び出し元の期限（src.utils.deadline.deadline_scope）が設定されている場合、
+リクエストの待ち時間は期限の残り時間以内に制限し、キャンセルされたら待つのをやめます。
 """
 
 import json
@@ -14,6 +17,8 @@ import threading
 import time
 from typing import Any, Dict, List, Optional
 
+from src.utils.deadline import current_deadline
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +29,9 @@ class MCPClientBase:
     送受信します。サーバープロセスのライフサイクル管理も担当します。
     """
 
+    # レスポンス待ちの間に期限のキャンセルを確認する間隔 (秒)
+    POLL_INTERVAL_SECONDS = 0.2
+
     def __init__(
         self,
         server_command: str,
@@ -182,6 +190,13 @@ class MCPClientBase:
             return result["tools"]
         return []
 
+    def _request_timeout(self) -> float:
+        """リクエストの待ち時間 (timeout を呼び出し元の期限の残り時間以内に制限)"""
+        deadline = current_deadline()
+        if deadline is None:
+            return self.timeout
+        return deadline.cap(self.timeout)
+
     def _send_request(self, method: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """JSON-RPCリクエストを送信してレスポンスを受信
 
@@ -192,7 +207,17 @@ class MCPClientBase:
         Returns:
             result フィールドの値、またはNone
         """
-        with self._lock:
+        # 期限がある場合は、他のリクエストの応答待ちで期限を超えないようロックの待ち時間も制限する
+        deadline = current_deadline()
+        acquired = (
+            self._lock.acquire()
+            if deadline is None
+            else self._lock.acquire(timeout=self._request_timeout())
+        )
+        if not acquired:
+            logger.warning(f"MCP request skipped (client busy): {method}")
+            return None
+        try:
             if not self._process or not self._process.stdin or not self._process.stdout:
                 return None
 
@@ -212,7 +237,7 @@ class MCPClientBase:
                 self._process.stdin.flush()
 
                 # Read response with timeout
-                response = self._read_response()
+                response = self._read_response(self._request_id)
                 if response is None:
                     return None
 
@@ -226,6 +251,8 @@ class MCPClientBase:
                 logger.error(f"MCP communication error: {e}")
                 self._connected = False
                 return None
+        finally:
+            self._lock.release()
 
     def _send_notification(self, method: str, params: Dict[str, Any]):
         """JSON-RPC通知を送信 (レスポンスを待たない)"""
@@ -247,10 +274,15 @@ class MCPClientBase:
             except (BrokenPipeError, OSError):
                 pass
 
-    def _read_response(self) -> Optional[Dict[str, Any]]:
+    def _read_response(self, request_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """JSON-RPCレスポンスを読み取る (Content-Length header対応)
 
         select() を使ったノンブロッキングI/Oでタイムアウトを実現します。
+        待ち時間は呼び出し元の期限の残り時間以内に制限し、期限のキャンセルも確認します。
+
+        Args:
+            request_id: 待っているリクエストのID (指定した場合、IDが異なるメッセージ
+                        (タイムアウトしたリクエストの遅れた応答・通知) は読み捨てる)
         """
         import select
 
@@ -258,17 +290,24 @@ class MCPClientBase:
             return None
 
         try:
+            deadline = current_deadline()
+            timeout = self._request_timeout()
             start_time = time.time()
             content_length = None
             fd = self._process.stdout.fileno()
 
-            while time.time() - start_time < self.timeout:
-                remaining = self.timeout - (time.time() - start_time)
+            while time.time() - start_time < timeout:
+                remaining = timeout - (time.time() - start_time)
                 if remaining <= 0:
                     break
+                if deadline is not None and deadline.expired:
+                    logger.warning("MCP response wait cancelled (deadline)")
+                    return None
 
                 # select() でデータが来るまで待機（タイムアウト付き）
-                ready, _, _ = select.select([fd], [], [], min(remaining, 1.0))
+                ready, _, _ = select.select(
+                    [fd], [], [], min(remaining, self.POLL_INTERVAL_SECONDS)
+                )
                 if not ready:
                     continue
 
@@ -283,9 +322,13 @@ class MCPClientBase:
                 elif line_str == "" and content_length is not None:
                     # ヘッダー終了、ボディを読む
                     body = self._process.stdout.read(content_length)
-                    if body:
-                        return json.loads(body.decode("utf-8"))
-                    return None
+                    if not body:
+                        return None
+                    message = json.loads(body.decode("utf-8"))
+                    if request_id is not None and message.get("id") != request_id:
+                        content_length = None
+                        continue
+                    return message
 
             logger.warning("MCP response timeout")
             return None
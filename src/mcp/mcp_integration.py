@@ -15,6 +15,8 @@ import logging
 import os
 from typing import Any, Dict, List, Optional
 
+from src.utils.deadline import Deadline, deadline_scope
+
 from .context7_client import Context7Client
 from .claude_mem_client import ClaudeMemClient
 from .github_client import GitHubClient
@@ -177,7 +179,11 @@ class MCPIntegration:
         return self.claude_mem.search_memories(query, limit=limit)
 
     def enrich_knowledge_with_mcps(
-        self, knowledge_content: str, detected_technologies: List[str], itsm_type: str
+        self,
+        knowledge_content: str,
+        detected_technologies: List[str],
+        itsm_type: str,
+        deadline: Optional[Deadline] = None,
     ) -> Dict[str, Any]:
         """
         全てのMCPを使用してナレッジを補強
@@ -186,30 +192,28 @@ class MCPIntegration:
             knowledge_content: ナレッジ内容
             detected_technologies: 検出された技術
             itsm_type: ITSMタイプ
+            deadline: 期限（MCP呼び出しの前後とMCPクライアントの応答待ちで確認し、
+                      期限切れ・キャンセル済みなら残りの呼び出しを行わずに取得済みの分を返す）
 
         Returns:
-            補強情報
+            補強情報（打ち切った場合は timed_out: True を含む）
         """
         enrichments: Dict[str, Any] = {}
 
         # Context7で技術ドキュメント補強
-        if detected_technologies:
-            tech_docs = {}
-            for tech in detected_technologies[:3]:
-                docs = self.context7.query_documentation(tech, f"{tech} best practices")
-                if docs:
-                    tech_docs[tech] = docs
-            if tech_docs:
-                enrichments["technical_documentation"] = tech_docs
+        tech_docs = self.fetch_technical_documentation(detected_technologies, deadline)
+        if tech_docs:
+            enrichments["technical_documentation"] = tech_docs
 
         # Claude-Memで過去の記憶を補強
-        keywords = self._extract_keywords(knowledge_content)
-        memories = []
-        for keyword in keywords[:2]:
-            mems = self.claude_mem.search_memories(keyword)
-            memories.extend(mems)
+        memories = self.fetch_related_memories(
+            self.memory_keywords(knowledge_content), deadline
+        )
         if memories:
-            enrichments["related_memories"] = memories[:5]
+            enrichments["related_memories"] = memories
+
+        if deadline is not None and deadline.expired:
+            enrichments["timed_out"] = True
 
         # GitHub情報（オプション）
         if self._github:
@@ -217,6 +221,58 @@ class MCPIntegration:
 
         return enrichments
 
+    def fetch_technical_documentation(
+        self, technologies: List[str], deadline: Optional[Deadline] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Context7で技術ドキュメントを取得（先頭3技術まで）
+
+        Args:
+            technologies: 技術名
+            deadline: 期限（MCPクライアントの応答待ちも期限内に制限し、期限切れ・
+                      キャンセル済みなら打ち切った呼び出しの結果と残りの技術は使わない）
+
+        Returns:
+            技術名 -> ドキュメント
+        """
+        tech_docs = {}
+        with deadline_scope(deadline):
+            for tech in technologies[:3]:
+                if deadline is not None and deadline.expired:
+                    break
+                docs = self.context7.query_documentation(tech, f"{tech} best practices")
+                if deadline is not None and deadline.expired:
+                    break
+                if docs:
+                    tech_docs[tech] = docs
+        return tech_docs
+
+    def memory_keywords(self, content: str) -> List[str]:
+        """過去の記憶の検索に使うキーワード（先頭2件）"""
+        return self._extract_keywords(content)[:2]
+
+    def fetch_related_memories(
+        self, keywords: List[str], deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Claude-Memで過去の記憶を検索（最大5件）
+
+        Args:
+            keywords: 検索キーワード
+            deadline: 期限（MCPクライアントの応答待ちも期限内に制限し、期限切れ・
+                      キャンセル済みなら打ち切った呼び出しの結果と残りのキーワードは使わない）
+        """
+        memories: List[Dict[str, Any]] = []
+        with deadline_scope(deadline):
+            for keyword in keywords:
+                if deadline is not None and deadline.expired:
+                    break
+                found = self.claude_mem.search_memories(keyword)
+                if deadline is not None and deadline.expired:
+                    break
+                memories.extend(found)
+        return memories[:5]
+
     # =========================================
     # ステータス
     # =========================================
@@ -3,11 +3,18 @@ SQLite MCP Client for Knowledge Management
 ナレッジ管理用SQLiteクライアント
 """
 
+import html
 import json
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.utils.text_tokenizer import normalize_text
 
 
 class SQLiteClient:
@@ -17,8 +24,102 @@ class SQLiteClient:
     ALLOWED_UPDATE_COLUMNS = {
         'title', 'content', 'itsm_type', 'summary_technical', 'summary_non_technical',
         'insights', 'tags', 'related_ids', 'markdown_path', 'status', 'updated_at',
-        'updated_by', 'quality_score', 'priority', 'assignee', 'notes', 'resolved_at'
+        'updated_by', 'quality_score', 'priority', 'assignee', 'notes', 'resolved_at',
+        'search_text'
+    }
+
+    # ファセット付き検索結果のキャッシュ設定
+    SEARCH_CACHE_TTL = 30  # 秒
+    SEARCH_CACHE_MAX_SIZE = 128
+
+    # created_at ファセットのバケット（経過日数の上限、累積カウント）
+    CREATED_AT_BUCKETS = [("7d", 7), ("30d", 30), ("90d", 90), ("365d", 365)]
+
+    # スニペット設定（snippets=True の場合、これらのカラムは読み込まない）
+    SNIPPET_EXCLUDED_COLUMNS = {
+        "content", "summary_technical", "summary_non_technical", "insights", "search_text"
     }
+    SNIPPET_LENGTH = 120  # 文字数（LIKE一致・先頭抜粋）
+    SNIPPET_CONTEXT_BEFORE = 40  # 一致位置より前に含める文字数
+    SNIPPET_FTS_TOKENS = 24  # FTS5 snippet() のトークン数
+    _MARK_OPEN = "\x02"
+    _MARK_CLOSE = "\x03"
+
+    # 一括取得時のIN句あたりのID数（SQLiteのバインド変数上限対策）
+    BATCH_CHUNK_SIZE = 500
+
+    # subagent_logs.status に 'timeout' を追加する移行（CHECK制約は変更できないため再作成）
+    SUBAGENT_LOGS_COLUMNS = (
+        "id, workflow_execution_id, subagent_name, role, input_data, output_data, "
+        "execution_time_ms, status, message, created_at"
+    )
+    # search_text（検索用の正規化テキスト）を補完する単位（件）
+    SEARCH_TEXT_BACKFILL_CHUNK = 500
+
+    SUBAGENT_LOGS_TIMEOUT_MIGRATION = f"""
+        BEGIN;
+        ALTER TABLE subagent_logs RENAME TO subagent_logs_before_timeout;
+        CREATE TABLE subagent_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            workflow_execution_id INTEGER NOT NULL,
+            subagent_name TEXT NOT NULL,
+            role TEXT NOT NULL,
+            input_data TEXT,
+            output_data TEXT,
+            execution_time_ms INTEGER,
+            status TEXT CHECK(status IN ('success', 'failed', 'warning', 'timeout')),
+            message TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (workflow_execution_id) REFERENCES workflow_executions(id) ON DELETE CASCADE
+        );
+        INSERT INTO subagent_logs ({SUBAGENT_LOGS_COLUMNS})
+            SELECT {SUBAGENT_LOGS_COLUMNS} FROM subagent_logs_before_timeout;
+        DROP TABLE subagent_logs_before_timeout;
+        CREATE INDEX IF NOT EXISTS idx_subagent_workflow ON subagent_logs(workflow_execution_id);
+        COMMIT;
+    """
+
+    # FTS5同期トリガーを 'delete' コマンドに置き換える移行（DELETE FROM では
+    # 更新後の行から索引を削除しようとして、タイトル・本文・要約の更新で索引が壊れる。
+    # updated_at の自動更新でも再実行されないよう、索引対象の列の更新に限る）
+    FTS_TRIGGERS_MIGRATION = """
+        BEGIN;
+        DROP TRIGGER IF EXISTS knowledge_fts_delete;
+        DROP TRIGGER IF EXISTS knowledge_fts_update;
+        CREATE TRIGGER knowledge_fts_delete AFTER DELETE ON knowledge_entries BEGIN
+            INSERT INTO knowledge_fts(knowledge_fts, rowid, title, summary_technical, summary_non_technical, content)
+            VALUES ('delete', old.id, old.title, old.summary_technical, old.summary_non_technical, old.content);
+        END;
+        CREATE TRIGGER knowledge_fts_update
+            AFTER UPDATE OF title, summary_technical, summary_non_technical, content
+            ON knowledge_entries BEGIN
+            INSERT INTO knowledge_fts(knowledge_fts, rowid, title, summary_technical, summary_non_technical, content)
+            VALUES ('delete', old.id, old.title, old.summary_technical, old.summary_non_technical, old.content);
+            INSERT INTO knowledge_fts(rowid, title, summary_technical, summary_non_technical, content)
+            VALUES (new.id, new.title, new.summary_technical, new.summary_non_technical, new.content);
+        END;
+        INSERT INTO knowledge_fts(knowledge_fts) VALUES('rebuild');
+        COMMIT;
+    """
+
+    # duplicate_checks の (ナレッジID, 重複候補ID) に一意索引を追加する移行
+    # （既存の重複行は、レビュー済みの行・最初に記録した行を残して削除する）
+    DUPLICATE_PAIR_INDEX_MIGRATION = """
+        BEGIN;
+        DELETE FROM duplicate_checks WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY knowledge_id, potential_duplicate_id
+                    ORDER BY status = 'pending', id
+                ) AS rn
+                FROM duplicate_checks
+            )
+            WHERE rn = 1
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_duplicate_pair
+            ON duplicate_checks(knowledge_id, potential_duplicate_id);
+        COMMIT;
+    """
 
     def __init__(self, db_path: str = "db/knowledge.db"):
         """
@@ -26,7 +127,14 @@ class SQLiteClient:
             db_path: データベースファイルパス
         """
         self.db_path = db_path
+        self._search_cache: Dict[Tuple, Tuple[float, Dict[str, Any]]] = {}
+        self._search_cache_lock = threading.Lock()
+        self._list_columns: Optional[List[str]] = None
         self._ensure_db_exists()
+        self._migrate_subagent_log_status()
+        self._migrate_fts_triggers()
+        self._migrate_search_text()
+        self._migrate_duplicate_pair_index()
 
     def _validate_update_columns(self, column_names: List[str]) -> List[str]:
         """更新カラム名を検証（SQL injection対策）"""
@@ -48,6 +156,75 @@ class SQLiteClient:
             with self.get_connection() as conn:
                 conn.executescript(schema)
 
+    def _migrate_subagent_log_status(self):
+        """既存DBの subagent_logs にタイムアウトの状態を許可（作成済みのDB向け）"""
+        if not Path(self.db_path).exists():
+            return
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'subagent_logs'"
+            ).fetchone()
+            if row is None or "'timeout'" in row["sql"]:
+                return
+            conn.executescript(self.SUBAGENT_LOGS_TIMEOUT_MIGRATION)
+
+    def _migrate_fts_triggers(self):
+        """既存DBのFTS5同期トリガーを置き換え、索引を再構築（作成済みのDB向け）"""
+        if not Path(self.db_path).exists():
+            return
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'knowledge_fts_update'"
+            ).fetchone()
+            if row is None or "DELETE FROM knowledge_fts" not in row["sql"]:
+                return
+            conn.executescript(self.FTS_TRIGGERS_MIGRATION)
+
+    def _migrate_search_text(self):
+        """既存DBに search_text 列を追加し、既存のナレッジ分を補完（作成済みのDB向け）"""
+        if not Path(self.db_path).exists():
+            return
+        with self.get_connection() as conn:
+            columns = [
+                row[1] for row in conn.execute("PRAGMA table_info(knowledge_entries)")
+            ]
+            if not columns or "search_text" in columns:
+                return
+            conn.execute("ALTER TABLE knowledge_entries ADD COLUMN search_text TEXT")
+            cursor = conn.execute("SELECT id, title, content FROM knowledge_entries")
+            while True:
+                rows = cursor.fetchmany(self.SEARCH_TEXT_BACKFILL_CHUNK)
+                if not rows:
+                    break
+                conn.executemany(
+                    "UPDATE knowledge_entries SET search_text = ? WHERE id = ?",
+                    [
+                        (self._search_text(row["title"], row["content"]), row["id"])
+                        for row in rows
+                    ],
+                )
+            conn.commit()
+
+    def _migrate_duplicate_pair_index(self):
+        """既存DBの duplicate_checks に組み合わせの一意索引を追加（作成済みのDB向け）"""
+        if not Path(self.db_path).exists():
+            return
+        with self.get_connection() as conn:
+            has_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'duplicate_checks'"
+            ).fetchone()
+            has_index = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_duplicate_pair'"
+            ).fetchone()
+            if has_table is None or has_index is not None:
+                return
+            conn.executescript(self.DUPLICATE_PAIR_INDEX_MIGRATION)
+
+    @staticmethod
+    def _search_text(title: Optional[str], content: Optional[str]) -> str:
+        """検索用の正規化テキスト（タイトル＋本文、クエリと同じ normalize_text を適用）"""
+        return normalize_text(f"{title or ''}\n{content or ''}")
+
     def get_connection(self) -> sqlite3.Connection:
         """データベース接続を取得（WALモード最適化）"""
         conn = sqlite3.connect(self.db_path, check_same_thread=False)
@@ -83,14 +260,14 @@ class SQLiteClient:
         Returns:
             作成されたナレッジのID
         """
-        with self.get_connection() as conn:
+        with self._knowledge_write() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
                 INSERT INTO knowledge_entries (
                     title, itsm_type, content, summary_technical, summary_non_technical,
-                    insights, tags, markdown_path, created_by
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    insights, tags, markdown_path, created_by, search_text
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
                 (
                     title,
@@ -102,10 +279,49 @@ class SQLiteClient:
                     json.dumps(tags or [], ensure_ascii=False),
                     markdown_path,
                     created_by,
+                    self._search_text(title, content),
                 ),
             )
-            conn.commit()
-            return int(cursor.lastrowid or 0)
+        return int(cursor.lastrowid or 0)
+
+    def create_knowledge_batch(self, entries: List[Dict[str, Any]]) -> List[int]:
+        """
+        ナレッジエントリを一括作成（1トランザクション）
+
+        Args:
+            entries: create_knowledge() の引数の辞書のリスト
+
+        Returns:
+            作成されたナレッジのID（entries の順）
+        """
+        if not entries:
+            return []
+        ids = []
+        with self._knowledge_write() as conn:
+            cursor = conn.cursor()
+            for entry in entries:
+                cursor.execute(
+                    """
+                    INSERT INTO knowledge_entries (
+                        title, itsm_type, content, summary_technical, summary_non_technical,
+                        insights, tags, markdown_path, created_by, search_text
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (
+                        entry["title"],
+                        entry["itsm_type"],
+                        entry["content"],
+                        entry.get("summary_technical"),
+                        entry.get("summary_non_technical"),
+                        json.dumps(entry.get("insights") or [], ensure_ascii=False),
+                        json.dumps(entry.get("tags") or [], ensure_ascii=False),
+                        entry.get("markdown_path"),
+                        entry.get("created_by"),
+                        self._search_text(entry["title"], entry["content"]),
+                    ),
+                )
+                ids.append(int(cursor.lastrowid or 0))
+        return ids
 
     def get_related_knowledge(
         self, knowledge_id: int, relationship_type: Optional[str] = None
@@ -147,6 +363,137 @@ class SQLiteClient:
             conn.commit()
             return cursor.lastrowid
 
+    def create_workflow_executions(self, workflow_type: str, count: int) -> List[int]:
+        """ワークフロー実行を一括記録（1トランザクション）"""
+        ids = []
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for _ in range(count):
+                cursor.execute(
+                    """
+                    INSERT INTO workflow_executions (workflow_type, status)
+                    VALUES (?, 'running')
+                """,
+                    (workflow_type,),
+                )
+                ids.append(cursor.lastrowid)
+            conn.commit()
+        return ids
+
+    def record_workflow_batch(
+        self,
+        execution_updates: List[Dict[str, Any]],
+        subagent_logs: Optional[List[Dict[str, Any]]] = None,
+        hook_logs: Optional[List[Dict[str, Any]]] = None,
+        markdown_paths: Optional[List[Tuple[int, str]]] = None,
+        duplicate_checks: Optional[List[Tuple[int, int, float]]] = None,
+        deviation_checks: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        一括処理の結果をまとめて記録（1トランザクション）
+
+        Args:
+            execution_updates: update_workflow_execution() の引数の辞書のリスト
+            subagent_logs: log_subagent_execution() の引数の辞書のリスト
+            hook_logs: log_hook_execution() の引数の辞書のリスト
+            markdown_paths: [(ナレッジID, Markdownファイルパス)]
+            duplicate_checks: [(ナレッジID, 重複候補ID, 類似度)]（semantic）
+            deviation_checks: record_deviation_check() の引数の辞書のリスト
+        """
+        with self._knowledge_write() as conn:
+            conn.executemany(
+                """
+                INSERT INTO subagent_logs (
+                    workflow_execution_id, subagent_name, role,
+                    input_data, output_data, execution_time_ms, status, message
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (
+                        log["workflow_execution_id"],
+                        log["subagent_name"],
+                        log["role"],
+                        json.dumps(log.get("input_data") or {}, ensure_ascii=False),
+                        json.dumps(log.get("output_data") or {}, ensure_ascii=False),
+                        log.get("execution_time_ms"),
+                        log.get("status", "success"),
+                        log.get("message"),
+                    )
+                    for log in subagent_logs or []
+                ],
+            )
+            conn.executemany(
+                """
+                INSERT INTO hook_logs (
+                    workflow_execution_id, hook_name, hook_type, result, message, details
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (
+                        log["workflow_execution_id"],
+                        log["hook_name"],
+                        log["hook_type"],
+                        log["result"],
+                        log.get("message"),
+                        json.dumps(log.get("details") or {}, ensure_ascii=False),
+                    )
+                    for log in hook_logs or []
+                ],
+            )
+            conn.executemany(
+                "UPDATE knowledge_entries SET markdown_path = ? WHERE id = ?",
+                [(path, knowledge_id) for knowledge_id, path in markdown_paths or []],
+            )
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO duplicate_checks (
+                    knowledge_id, potential_duplicate_id, similarity_score, check_type, status
+                ) VALUES (?, ?, ?, 'semantic', 'pending')
+            """,
+                duplicate_checks or [],
+            )
+            conn.executemany(
+                """
+                INSERT INTO deviation_checks (
+                    knowledge_id, deviation_type, severity, itsm_principle, description, recommendation, status
+                ) VALUES (?, ?, ?, ?, ?, ?, 'pending')
+            """,
+                [
+                    (
+                        check["knowledge_id"],
+                        check["deviation_type"],
+                        check["severity"],
+                        check.get("itsm_principle"),
+                        check["description"],
+                        check.get("recommendation"),
+                    )
+                    for check in deviation_checks or []
+                ],
+            )
+            conn.executemany(
+                """
+                UPDATE workflow_executions
+                SET status = ?,
+                    subagents_used = ?,
+                    hooks_triggered = ?,
+                    execution_time_ms = ?,
+                    error_message = ?,
+                    completed_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """,
+                [
+                    (
+                        update["status"],
+                        json.dumps(update.get("subagents_used") or [], ensure_ascii=False),
+                        json.dumps(update.get("hooks_triggered") or [], ensure_ascii=False),
+                        update.get("execution_time_ms"),
+                        update.get("error_message"),
+                        update["execution_id"],
+                    )
+                    for update in execution_updates
+                ],
+            )
+
     def update_workflow_execution(
         self,
         execution_id: int,
@@ -279,6 +626,43 @@ class SQLiteClient:
             conn.commit()
             return cursor.lastrowid
 
+    def get_top_search_queries(
+        self, limit: int = 50, days: int = 30
+    ) -> List[Dict[str, Any]]:
+        """
+        直近の頻出検索クエリを取得
+
+        Args:
+            limit: 取得件数
+            days: 集計対象の日数
+
+        Returns:
+            [{'search_query', 'search_type', 'hits'}]（頻度順）
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT search_query, search_type, COUNT(*) AS hits,
+                       MAX(created_at) AS last_searched_at
+                FROM search_history
+                WHERE created_at > datetime('now', '-' || ? || ' days')
+                  AND TRIM(search_query) != ''
+                GROUP BY search_query, search_type
+                ORDER BY hits DESC, last_searched_at DESC
+                LIMIT ?
+            """,
+                (days, limit),
+            )
+            return [
+                {
+                    "search_query": row["search_query"],
+                    "search_type": row["search_type"],
+                    "hits": row["hits"],
+                }
+                for row in cursor.fetchall()
+            ]
+
     def create_conversation_session(
         self, session_id: str, user_id: Optional[str] = None
     ) -> str:
@@ -421,19 +805,61 @@ class SQLiteClient:
         similarity_score: float,
         check_type: str = "semantic",
     ) -> int:
-        """重複検知結果を記録"""
+        """重複検知結果を記録（同じ組み合わせが記録済みの場合は既存のIDを返す）"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                INSERT INTO duplicate_checks (
+                INSERT OR IGNORE INTO duplicate_checks (
                     knowledge_id, potential_duplicate_id, similarity_score, check_type, status
                 ) VALUES (?, ?, ?, ?, 'pending')
             """,
                 (knowledge_id, potential_duplicate_id, similarity_score, check_type),
             )
             conn.commit()
-            return cursor.lastrowid
+            if cursor.rowcount:
+                return cursor.lastrowid
+            row = conn.execute(
+                """
+                SELECT id FROM duplicate_checks
+                WHERE knowledge_id = ? AND potential_duplicate_id = ?
+                """,
+                (knowledge_id, potential_duplicate_id),
+            ).fetchone()
+            return row["id"]
+
+    def record_duplicate_checks(
+        self,
+        checks: List[Tuple[int, int, float]],
+        check_type: str = "content",
+    ) -> int:
+        """
+        重複検知結果を一括記録（同じ組み合わせが記録済みの場合は一意索引でスキップ）
+
+        Args:
+            checks: [(ナレッジID, 重複候補ID, 類似度)]
+            check_type: 検知方法（title/content/semantic）
+
+        Returns:
+            新たに記録した件数
+        """
+        if not checks:
+            return 0
+        with self.get_connection() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO duplicate_checks (
+                    knowledge_id, potential_duplicate_id, similarity_score, check_type, status
+                ) VALUES (?, ?, ?, ?, 'pending')
+                """,
+                [
+                    (knowledge_id, duplicate_id, min(max(score, 0.0), 1.0), check_type)
+                    for knowledge_id, duplicate_id, score in checks
+                ],
+            )
+            conn.commit()
+            return conn.total_changes - before
 
     def record_deviation_check(
         self,
@@ -470,6 +896,8 @@ class SQLiteClient:
     def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
         """sqlite3.RowをDictに変換（JSON文字列をパース）"""
         data = dict(row)
+        # 検索用の正規化テキストは返さない
+        data.pop("search_text", None)
         json_fields = {
             "insights",
             "tags",
@@ -535,7 +963,10 @@ class SQLiteClient:
         tags: Optional[List[str]] = None,
         limit: int = 20,
         offset: int = 0,
-    ) -> List[Dict[str, Any]]:
+        include_facets: bool = False,
+        snippets: bool = False,
+        content_terms: Optional[List[str]] = None,
+    ) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
         """
         ナレッジを検索
 
@@ -545,37 +976,362 @@ class SQLiteClient:
             tags: タグでフィルタ
             limit: 取得件数
             offset: オフセット
+            include_facets: Trueの場合、ファセット集計を含む辞書を返す
+            snippets: Trueの場合、本文・要約の代わりに一致箇所の抜粋を返す
+                （snippet / snippet_html / title_html を付与）
+            content_terms: snippets=True の場合に本文全体に含まれるかを判定する語
+                （含まれる語を content_matches に付与、大文字・小文字は区別しない）
 
         Returns:
-            マッチしたナレッジのリスト
+            マッチしたナレッジのリスト。include_facets=True の場合は
+            {'results': list, 'facets': dict, 'total': int}
         """
+        where_sql, params = self._build_search_filters(query, itsm_type, tags)
+
+        if include_facets:
+            cache_key = (
+                query or "",
+                itsm_type or "",
+                tuple(tags or []),
+                limit,
+                offset,
+                snippets,
+                tuple(content_terms or []),
+            )
+            cached = self._get_cached_search(cache_key)
+            if cached is not None:
+                return cached
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            sql = """
-                SELECT * FROM knowledge_entries
-                WHERE (status = 'active' OR status IS NULL)
-            """
-            params = []
+            if snippets:
+                results = self._search_with_snippets(
+                    cursor, query, where_sql, params, limit, offset, content_terms
+                )
+            else:
+                sql = f"""
+                    SELECT * FROM knowledge_entries
+                    WHERE {where_sql}
+                    ORDER BY created_at DESC LIMIT ? OFFSET ?
+                """  # nosec B608 - WHERE句はプレースホルダのみで構築
+                cursor.execute(sql, params + [limit, offset])
+                results = [self._row_to_dict(row) for row in cursor.fetchall()]
+
+            if not include_facets:
+                return results
+
+            facet_where_sql, facet_params = self._build_search_filters(
+                query, itsm_type, tags, active_only=False
+            )
+            facets, total = self._compute_facets(cursor, facet_where_sql, facet_params)
+
+        response = {"results": results, "facets": facets, "total": total}
+        self._set_cached_search(cache_key, response)
+        return response
+
+    def _get_list_columns(self, cursor: sqlite3.Cursor) -> List[str]:
+        """一覧表示用のカラム（本文・要約などの大きなカラムを除外）"""
+        if self._list_columns is None:
+            cursor.execute("PRAGMA table_info(knowledge_entries)")
+            self._list_columns = [
+                row[1]
+                for row in cursor.fetchall()
+                if row[1] not in self.SNIPPET_EXCLUDED_COLUMNS
+            ]
+        return self._list_columns
+
+    def _search_with_snippets(
+        self,
+        cursor: sqlite3.Cursor,
+        query: Optional[str],
+        where_sql: str,
+        params: List[Any],
+        limit: int,
+        offset: int,
+        content_terms: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        一致箇所の抜粋付きで検索（本文はDBの外に持ち出さない）
 
-            if query:
-                sql += " AND (title LIKE ? OR content LIKE ?)"
-                params.extend([f"%{query}%", f"%{query}%"])
+        抜粋はSQL内で切り出す。FTS5インデックスでも一致する行は
+        snippet()/highlight() の結果で上書きする。一致箇所は入力どおりの語、
+        全角・半角と長音の揺れを吸収した語の順に探す。
+        content_terms は抜粋ではなく本文全体に対してSQL内で判定する。
+        """
+        display_query = normalize_text(query, lowercase=False) if query else query
+        columns = ", ".join(self._get_list_columns(cursor))
+        content_terms = list(content_terms or [])
+        term_columns = "".join(
+            f",\n                   instr(lower(COALESCE(content, '')), lower(?)) > 0 AS content_term_{i}"
+            for i in range(len(content_terms))
+        )
+        sql = f"""
+            SELECT {columns},
+                   match_pos,
+                   CASE WHEN match_pos > 0
+                        THEN substr(content, max(1, match_pos - ?), ?)
+                        ELSE substr(COALESCE(NULLIF(summary_non_technical, ''), content, ''), 1, ?)
+                   END AS snippet_raw,
+                   CASE WHEN match_pos > 0
+                        THEN length(content)
+                        ELSE length(COALESCE(NULLIF(summary_non_technical, ''), content, ''))
+                   END AS snippet_source_length{term_columns}
+            FROM (
+                SELECT *, COALESCE(
+                           NULLIF(instr(lower(COALESCE(content, '')), lower(?)), 0),
+                           instr(lower(COALESCE(content, '')), lower(?))
+                       ) AS match_pos
+                FROM knowledge_entries
+                WHERE {where_sql}
+                ORDER BY created_at DESC LIMIT ? OFFSET ?
+            )
+            ORDER BY created_at DESC
+        """  # nosec B608 - カラム名はPRAGMA由来、WHERE句はプレースホルダのみ
+        cursor.execute(
+            sql,
+            [self.SNIPPET_CONTEXT_BEFORE, self.SNIPPET_LENGTH, self.SNIPPET_LENGTH]
+            + content_terms
+            + [query or None, display_query or None]
+            + params
+            + [limit, offset],
+        )
+
+        terms = [query, display_query] if query else []
+        results = []
+        for row in cursor.fetchall():
+            data = self._row_to_dict(row)
+            match_pos = data.pop("match_pos") or 0
+            source_length = data.pop("snippet_source_length") or 0
+            raw = data.pop("snippet_raw") or ""
+            if content_terms:
+                data["content_matches"] = [
+                    term
+                    for i, term in enumerate(content_terms)
+                    if data.pop(f"content_term_{i}")
+                ]
+
+            start = max(1, match_pos - self.SNIPPET_CONTEXT_BEFORE) if match_pos else 1
+            prefix = "…" if start > 1 else ""
+            suffix = "…" if start - 1 + len(raw) < source_length else ""
+
+            data["snippet"] = prefix + raw + suffix
+            data["snippet_html"] = (
+                prefix + self._highlight_terms(raw, terms) + suffix
+            )
+            data["title_html"] = self._highlight_terms(data.get("title") or "", terms)
+            results.append(data)
 
-            if itsm_type:
-                sql += " AND itsm_type = ?"
-                params.append(itsm_type)
+        if query and results:
+            self._apply_fts_snippets(cursor, display_query, results)
 
-            if tags:
-                for tag in tags:
-                    sql += " AND tags LIKE ?"
-                    params.append(f"%{tag}%")
+        return results
 
-            sql += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
+    def _apply_fts_snippets(
+        self, cursor: sqlite3.Cursor, query: str, results: List[Dict[str, Any]]
+    ) -> None:
+        """FTS5 snippet()/highlight() で抜粋とタイトルのハイライトを上書き"""
+        match_expr = self._build_fts_match(query)
+        if not match_expr:
+            return
 
-            cursor.execute(sql, params)
-            return [self._row_to_dict(row) for row in cursor.fetchall()]
+        by_id = {r["id"]: r for r in results}
+        placeholders = ", ".join("?" for _ in by_id)
+        try:
+            cursor.execute(
+                f"""
+                SELECT rowid,
+                       highlight(knowledge_fts, 0, ?, ?) AS title_hl,
+                       snippet(knowledge_fts, 3, ?, ?, '…', ?) AS content_snip
+                FROM knowledge_fts
+                WHERE knowledge_fts MATCH ? AND rowid IN ({placeholders})
+            """,  # nosec B608 - プレースホルダのみ
+                [
+                    self._MARK_OPEN,
+                    self._MARK_CLOSE,
+                    self._MARK_OPEN,
+                    self._MARK_CLOSE,
+                    self.SNIPPET_FTS_TOKENS,
+                    match_expr,
+                ]
+                + list(by_id),
+            )
+            fts_rows = cursor.fetchall()
+        except sqlite3.Error:
+            # FTSテーブル未作成・クエリ構文エラー時はSQL抜粋のまま
+            return
+
+        for rowid, title_hl, content_snip in fts_rows:
+            item = by_id.get(rowid)
+            if item is None:
+                continue
+            if title_hl and self._MARK_OPEN in title_hl:
+                item["title_html"] = self._render_marked(title_hl)
+            if content_snip and self._MARK_OPEN in content_snip:
+                item["snippet"] = content_snip.replace(self._MARK_OPEN, "").replace(
+                    self._MARK_CLOSE, ""
+                )
+                item["snippet_html"] = self._render_marked(content_snip)
+
+    def _build_fts_match(self, query: str) -> str:
+        """検索クエリをFTS5 MATCH式（各語をフレーズとしてAND結合）に変換"""
+        terms = [t for t in query.split() if t]
+        return " ".join('"{}"'.format(t.replace('"', '""')) for t in terms)
+
+    def _render_marked(self, text: str) -> str:
+        """マーカー付きテキストをHTMLエスケープし <mark> に変換"""
+        return (
+            html.escape(text)
+            .replace(self._MARK_OPEN, "<mark>")
+            .replace(self._MARK_CLOSE, "</mark>")
+        )
+
+    def _highlight_terms(self, text: str, terms: List[str]) -> str:
+        """テキストをHTMLエスケープし、検索語を <mark> で囲む"""
+        escaped = html.escape(text)
+        terms = sorted({html.escape(t) for t in terms if t}, key=len, reverse=True)
+        if not terms:
+            return escaped
+        pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+        return pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", escaped)
+
+    def _build_search_filters(
+        self,
+        query: Optional[str],
+        itsm_type: Optional[str],
+        tags: Optional[List[str]],
+        active_only: bool = True,
+    ) -> Tuple[str, List[Any]]:
+        """検索条件のWHERE句とパラメータを構築（active_only=False はステータスで絞らない）"""
+        clauses = ["(status = 'active' OR status IS NULL)"] if active_only else ["1 = 1"]
+        params: List[Any] = []
+
+        if query:
+            # 入力どおりの一致に加え、全角・半角・大文字小文字・長音の揺れを
+            # 吸収した一致（クエリと search_text の両方を normalize_text で正規化）。
+            # 語末の長音を除いたクエリは「サーバ」「サーバー」の両方に部分一致する
+            clauses.append("(title LIKE ? OR content LIKE ? OR search_text LIKE ?)")
+            params.extend([f"%{query}%", f"%{query}%", f"%{normalize_text(query)}%"])
+
+        if itsm_type:
+            clauses.append("itsm_type = ?")
+            params.append(itsm_type)
+
+        if tags:
+            for tag in tags:
+                clauses.append("tags LIKE ?")
+                params.append(f"%{tag}%")
+
+        return " AND ".join(clauses), params
+
+    def _compute_facets(
+        self, cursor: sqlite3.Cursor, where_sql: str, params: List[Any]
+    ) -> Tuple[Dict[str, Dict[str, int]], int]:
+        """
+        マッチした行集合を1回だけ走査してファセットを集計
+
+        itsm_type / status / tags / created_at（経過日数バケット）の件数を
+        同時に数える。本文は読み込まない。where_sql はステータスで絞らない
+        条件を渡し、status はすべてのステータスを、それ以外のファセットと
+        総件数は検索結果と同じ有効なナレッジ（active）のみを数える。
+
+        Returns:
+            (ファセット辞書, 総件数)
+        """
+        cursor.execute(
+            f"""
+            SELECT itsm_type, status, tags,
+                   julianday('now') - julianday(created_at) AS age_days
+            FROM knowledge_entries
+            WHERE {where_sql}
+        """,  # nosec B608 - WHERE句はプレースホルダのみで構築
+            params,
+        )
+
+        by_itsm_type: Dict[str, int] = {}
+        by_status: Dict[str, int] = {}
+        by_tag: Dict[str, int] = {}
+        by_created_at: Dict[str, int] = {key: 0 for key, _ in self.CREATED_AT_BUCKETS}
+        by_created_at["older"] = 0
+        total = 0
+
+        for itsm_type, status, tags_json, age_days in cursor:
+            status = status or "active"
+            by_status[status] = by_status.get(status, 0) + 1
+            if status != "active":
+                continue
+            total += 1
+            by_itsm_type[itsm_type] = by_itsm_type.get(itsm_type, 0) + 1
+
+            if tags_json:
+                try:
+                    row_tags = json.loads(tags_json)
+                except (json.JSONDecodeError, TypeError):
+                    row_tags = []
+                if isinstance(row_tags, list):
+                    for tag in set(row_tags):
+                        if tag:
+                            by_tag[tag] = by_tag.get(tag, 0) + 1
+
+            if age_days is None:
+                continue
+            in_bucket = False
+            for key, max_days in self.CREATED_AT_BUCKETS:
+                if age_days <= max_days:
+                    by_created_at[key] += 1
+                    in_bucket = True
+            if not in_bucket:
+                by_created_at["older"] += 1
+
+        def _sorted(counts: Dict[str, int]) -> Dict[str, int]:
+            return dict(sorted(counts.items(), key=lambda x: (-x[1], x[0])))
+
+        facets = {
+            "itsm_type": _sorted(by_itsm_type),
+            "status": _sorted(by_status),
+            "tags": _sorted(by_tag),
+            "created_at": by_created_at,
+        }
+        return facets, total
+
+    def _get_cached_search(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """ファセット付き検索結果をキャッシュから取得"""
+        with self._search_cache_lock:
+            entry = self._search_cache.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.time() > expires_at:
+                del self._search_cache[key]
+                return None
+        return {**value, "results": list(value["results"])}
+
+    def _set_cached_search(self, key: Tuple, value: Dict[str, Any]) -> None:
+        """ファセット付き検索結果をキャッシュに保存"""
+        with self._search_cache_lock:
+            if len(self._search_cache) >= self.SEARCH_CACHE_MAX_SIZE:
+                # 最も早く期限切れになるエントリを削除
+                oldest = min(self._search_cache, key=lambda k: self._search_cache[k][0])
+                del self._search_cache[oldest]
+            self._search_cache[key] = (time.time() + self.SEARCH_CACHE_TTL, value)
+
+    def _invalidate_search_cache(self) -> None:
+        """検索結果キャッシュを破棄（書き込み時）"""
+        with self._search_cache_lock:
+            self._search_cache.clear()
+
+    @contextmanager
+    def _knowledge_write(self) -> Iterator[sqlite3.Connection]:
+        """
+        ナレッジを書き込む接続（コミット後に検索結果キャッシュを破棄）
+
+        knowledge_entries への書き込みはすべてこれを通し、
+        ファセット・検索結果のキャッシュが古いまま残らないようにする。
+        """
+        with self.get_connection() as conn:
+            yield conn
+            conn.commit()
+        self._invalidate_search_cache()
 
     def get_knowledge_by_id(self, knowledge_id: int) -> Optional[Dict[str, Any]]:
         """IDでナレッジを取得"""
@@ -591,6 +1347,81 @@ class SQLiteClient:
         """IDでナレッジを取得（エイリアス）"""
         return self.get_knowledge_by_id(knowledge_id)
 
+    def get_knowledge_batch(self, knowledge_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        複数IDのナレッジを一括取得
+
+        Args:
+            knowledge_ids: ナレッジIDリスト
+
+        Returns:
+            ナレッジリスト（指定順、存在しないIDは含まない）
+        """
+        ids = list(dict.fromkeys(int(i) for i in knowledge_ids))
+        if not ids:
+            return []
+
+        found: Dict[int, Dict[str, Any]] = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            # SQLiteのバインド変数上限を超えないよう分割して取得
+            for start in range(0, len(ids), self.BATCH_CHUNK_SIZE):
+                chunk = ids[start : start + self.BATCH_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(
+                    f"SELECT * FROM knowledge_entries WHERE id IN ({placeholders})",  # nosec B608
+                    chunk,
+                )
+                for row in cursor.fetchall():
+                    found[row["id"]] = self._row_to_dict(row)
+
+        return [found[i] for i in ids if i in found]
+
+    def iter_knowledge(
+        self,
+        itsm_type: Optional[str] = None,
+        status: Optional[str] = None,
+        since_id: int = 0,
+        batch_size: int = 500,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        ナレッジを1件ずつ返すイテレータ（全件エクスポート用）
+
+        単一のカーソルから fetchmany() で読み進めるため、件数に関わらず
+        メモリ使用量は batch_size 件分に収まる。
+
+        Args:
+            itsm_type: ITSMタイプフィルター
+            status: ステータスフィルター（未指定時は全ステータス）
+            since_id: このIDより大きいナレッジのみ返す（再開用）
+            batch_size: 1回の fetchmany() で読む件数
+
+        Yields:
+            ナレッジ（ID昇順）
+        """
+        sql = "SELECT * FROM knowledge_entries WHERE id > ?"
+        params: List[Any] = [since_id]
+        if itsm_type:
+            sql += " AND itsm_type = ?"
+            params.append(itsm_type)
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        sql += " ORDER BY id"
+
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_to_dict(row)
+        finally:
+            conn.close()
+
     def get_all_knowledge(self, limit: int = 100) -> List[Dict[str, Any]]:
         """全ナレッジを取得"""
         return self.search_knowledge(limit=limit)
@@ -613,6 +1444,8 @@ class SQLiteClient:
             "title",
             "content",
             "itsm_type",
+            "summary_technical",
+            "summary_non_technical",
             "markdown_path",
             "status",
             "tags",
@@ -625,21 +1458,76 @@ class SQLiteClient:
 
         # 自動的にupdated_atを更新
         if "updated_at" not in update_fields:
-            from datetime import datetime
-
             update_fields["updated_at"] = datetime.now().isoformat()
 
-        # セキュリティ: カラム名を検証
-        column_names = list(update_fields.keys())
-        self._validate_update_columns(column_names)
-
-        # セキュリティ: 検証済みカラム名を使用（SQL injection対策）
-        set_clause = ", ".join(["{} = ?".format(k) for k in column_names])
-        values = list(update_fields.values()) + [knowledge_id]
-
-        with self.get_connection() as conn:
+        with self._knowledge_write() as conn:
             cursor = conn.cursor()
+            # タイトル・本文を更新する場合は検索用の正規化テキストも更新
+            if "title" in update_fields or "content" in update_fields:
+                row = cursor.execute(
+                    "SELECT title, content FROM knowledge_entries WHERE id = ?",
+                    (knowledge_id,),
+                ).fetchone()
+                if row is not None:
+                    update_fields["search_text"] = self._search_text(
+                        update_fields.get("title", row["title"]),
+                        update_fields.get("content", row["content"]),
+                    )
+
+            # セキュリティ: カラム名を検証
+            column_names = list(update_fields.keys())
+            self._validate_update_columns(column_names)
+
+            # セキュリティ: 検証済みカラム名を使用（SQL injection対策）
+            set_clause = ", ".join(["{} = ?".format(k) for k in column_names])
+            values = list(update_fields.values()) + [knowledge_id]
             query = "UPDATE knowledge_entries SET {} WHERE id = ?".format(set_clause)  # nosec B608 - ホワイトリスト検証済みカラム名
             cursor.execute(query, values)
-            conn.commit()
-            return cursor.rowcount > 0
+        return cursor.rowcount > 0
+
+    def delete_knowledge(self, knowledge_id: int) -> bool:
+        """
+        ナレッジを論理削除（statusを'archived'に更新、検索結果から除外される）
+
+        Returns:
+            ナレッジが存在した場合 True
+        """
+        with self._knowledge_write() as conn:
+            cursor = conn.execute(
+                "UPDATE knowledge_entries SET status = 'archived', updated_at = ? WHERE id = ?",
+                (datetime.now().isoformat(), knowledge_id),
+            )
+        return cursor.rowcount > 0
+
+    def append_knowledge_insights(self, knowledge_id: int, insights: List[str]) -> bool:
+        """
+        ナレッジの知見を追記（保存後に取得した補強情報用、既にある知見は追加しない）
+
+        Args:
+            knowledge_id: ナレッジID
+            insights: 追記する知見
+
+        Returns:
+            ナレッジが存在した場合 True
+        """
+        with self._knowledge_write() as conn:
+            # 読み込みから書き込みまでの間に他の更新が入らないよう書き込みロックを取る
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT insights FROM knowledge_entries WHERE id = ?", (knowledge_id,)
+            ).fetchone()
+            if row is None:
+                conn.rollback()
+                return False
+            current = json.loads(row["insights"]) if row["insights"] else []
+            added = [insight for insight in insights if insight not in current]
+            if added:
+                conn.execute(
+                    "UPDATE knowledge_entries SET insights = ?, updated_at = ? WHERE id = ?",
+                    (
+                        json.dumps(current + added, ensure_ascii=False),
+                        datetime.now().isoformat(),
+                        knowledge_id,
+                    ),
+                )
+        return True
@@ -5,12 +5,18 @@ Architect SubAgent
 
 from typing import Any, Dict
 
+from src.utils.text_tokenizer import text_similarity
+
 from .base import BaseSubAgent, SubAgentResult
 
 
 class ArchitectSubAgent(BaseSubAgent):
     """アーキテクト・サブエージェント"""
 
+    # 結果のキャッシュキーに使う入力
+    CACHE_INPUT_FIELDS = ("title", "content", "itsm_type", "existing_knowledge")
+    CACHE_VERSION = "1"
+
     def __init__(self):
         super().__init__(name="architect", role="design_coherence", priority="high")
 
@@ -91,8 +97,9 @@ class ArchitectSubAgent(BaseSubAgent):
     ) -> Dict[str, Any]:
         """タイトルと内容の整合性をチェック"""
         # 簡易的な実装: タイトルの主要キーワードが内容に含まれているか
-        title_words = set(title.lower().split())
-        content_lower = content.lower()
+        analysis = self.get_analysis(title, content)
+        title_words = set(analysis.title_lower.split())
+        content_lower = analysis.content_lower
 
         # 一般的なストップワードを除外
         stop_words = {
@@ -168,7 +175,7 @@ class ArchitectSubAgent(BaseSubAgent):
                 "message": f'ITSMタイプ "{itsm_type}" は有効です',
             }
 
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
         matched = any(keyword in content_lower for keyword in keywords)
 
         return {
@@ -192,13 +199,13 @@ class ArchitectSubAgent(BaseSubAgent):
         """既存ナレッジとの整合性をチェック"""
         # 既存ナレッジとの矛盾や重複をチェック
         # 簡易実装: 類似度が高すぎる場合は警告
-        similar_count = len(
-            [
-                k
-                for k in existing_knowledge
-                if self._calculate_similarity(content, k.get("content", "")) > 0.8
-            ]
-        )
+        # （類似度は解析コンテキストでメモ化され、QAと共有される）
+        analysis = self.get_analysis(content=content)
+        similar_count = 0
+        for k in existing_knowledge:
+            self.check_deadline("coherence")
+            if analysis.content_similarity(k.get("content", "")) > 0.8:
+                similar_count += 1
 
         passed = similar_count == 0
 
@@ -222,7 +229,7 @@ class ArchitectSubAgent(BaseSubAgent):
             "影響範囲が明確": ["影響", "範囲", "スコープ", "対象"],
         }
 
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
         checks = []
 
         for principle, keywords in principles.items():
@@ -242,17 +249,8 @@ class ArchitectSubAgent(BaseSubAgent):
         }
 
     def _calculate_similarity(self, text1: str, text2: str) -> float:
-        """2つのテキストの類似度を計算（簡易版）"""
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-
-        if not words1 or not words2:
-            return 0.0
-
-        intersection = words1 & words2
-        union = words1 | words2
-
-        return len(intersection) / len(union) if union else 0.0
+        """2つのテキストの類似度を計算（文字n-gramのJaccard係数）"""
+        return text_similarity(text1, text2)
 
     def _generate_recommendations(self, warnings: list) -> list:
         """警告に基づいた推奨事項を生成"""
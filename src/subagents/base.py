@@ -3,10 +3,15 @@ SubAgent Base Class
 サブエージェント基底クラス
 """
 
+import threading
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+from src.utils import tracing
+from src.utils.deadline import DeadlineExceeded, current_deadline
+from src.utils.document_analysis import DocumentAnalysis
 
 
 class SubAgentResult:
@@ -14,7 +19,7 @@ class SubAgentResult:
 
     def __init__(
         self,
-        status: str,  # 'success', 'failed', 'warning'
+        status: str,  # 'success', 'failed', 'warning', 'timeout'
         data: Dict[str, Any],
         message: Optional[str] = None,
         execution_time_ms: Optional[int] = None,
@@ -37,6 +42,15 @@ class SubAgentResult:
 class BaseSubAgent(ABC):
     """サブエージェント基底クラス"""
 
+    # 結果のキャッシュ（WorkflowEngine が参照する入力のハッシュで結果を再利用する）
+    # CACHE_INPUT_FIELDS: process() が参照する入力フィールド（None はキャッシュしない）
+    # CACHE_VERSION: 処理内容を変更したら更新する（以前の結果を使わないため）
+    CACHE_INPUT_FIELDS: Optional[Tuple[str, ...]] = None
+    CACHE_VERSION = "1"
+    # キャッシュキーに含める既存ナレッジ・依存先の結果のフィールド
+    CACHE_KNOWLEDGE_FIELDS = ("id", "title", "content")
+    CACHE_DEPENDENCY_FIELDS = ("status", "data")
+
     def __init__(self, name: str, role: str, priority: str = "medium"):
         """
         Args:
@@ -47,6 +61,8 @@ class BaseSubAgent(ABC):
         self.name = name
         self.role = role
         self.priority = priority
+        # 実行中の文書解析コンテキスト（同じインスタンスが複数スレッドで使われるためスレッド単位）
+        self._context = threading.local()
 
     @abstractmethod
     def process(self, input_data: Dict[str, Any]) -> SubAgentResult:
@@ -65,6 +81,9 @@ class BaseSubAgent(ABC):
         """
         実行ラッパー（実行時間計測付き）
 
+        実行中の期限（deadline_scope()）が切れた場合は、開始前・check_deadline() の
+        区切りで処理を打ち切り、timeout の結果を返す。
+
         Args:
             input_data: 入力データ
 
@@ -74,10 +93,29 @@ class BaseSubAgent(ABC):
         start_time = time.time()
 
         try:
-            result = self.process(input_data)
+            self.check_deadline("start")
+            # ワークフローで共有する解析結果があれば使い、なければここで生成する
+            analysis = input_data.get("analysis")
+            if not isinstance(analysis, DocumentAnalysis):
+                analysis = DocumentAnalysis(
+                    input_data.get("title", ""), input_data.get("content", "")
+                )
+            self._context.analysis = analysis
+
+            # ワークフローのトレース中であれば処理区間を記録（トレース外では何もしない）
+            with tracing.span("agent.process", agent=self.name) as span:
+                result = self.process(input_data)
+                span.set_attribute("result", result.status)
             execution_time_ms = int((time.time() - start_time) * 1000)
             result.execution_time_ms = execution_time_ms
             return result
+        except DeadlineExceeded as e:
+            return SubAgentResult(
+                status="timeout",
+                data={},
+                message=str(e),
+                execution_time_ms=int((time.time() - start_time) * 1000),
+            )
         except Exception as e:
             execution_time_ms = int((time.time() - start_time) * 1000)
             return SubAgentResult(
@@ -86,6 +124,74 @@ class BaseSubAgent(ABC):
                 message=f"エラーが発生しました: {str(e)}",
                 execution_time_ms=execution_time_ms,
             )
+        finally:
+            self._context.analysis = None
+
+    def check_deadline(self, stage: str) -> None:
+        """
+        実行中の期限を確認（長い処理の区切りで呼び出す）
+
+        Raises:
+            DeadlineExceeded: 期限切れ・キャンセル済みの場合（execute() が timeout の結果にする）
+        """
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check(f"{self.name}.{stage}")
+
+    def get_analysis(
+        self, title: Optional[str] = None, content: Optional[str] = None
+    ) -> DocumentAnalysis:
+        """
+        文書解析コンテキストを取得
+
+        実行中の解析結果が指定したタイトル・内容のものであれば共有し、
+        そうでなければ（個別メソッドの直接呼び出し等）新たに生成する。
+
+        Args:
+            title: タイトル（Noneは照合しない）
+            content: 内容（Noneは照合しない）
+
+        Returns:
+            文書解析コンテキスト
+        """
+        analysis = getattr(self._context, "analysis", None)
+        if analysis is not None and analysis.matches(title, content):
+            return analysis
+        return DocumentAnalysis(title or "", content or "")
+
+    def cache_inputs(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュキーの元になる入力
+
+        CACHE_INPUT_FIELDS の値のうち、既存ナレッジ・依存先の結果は
+        処理が参照するフィールドだけに絞る（実行時間などの差でキーが変わらないように）。
+
+        Args:
+            input_data: 入力データ
+
+        Returns:
+            参照する入力（キャッシュしないサブエージェントの場合は None）
+        """
+        if self.CACHE_INPUT_FIELDS is None:
+            return None
+
+        inputs: Dict[str, Any] = {}
+        for field in self.CACHE_INPUT_FIELDS:
+            if field not in input_data:
+                continue
+            value = input_data[field]
+            if field == "existing_knowledge":
+                value = [
+                    {k: entry.get(k) for k in self.CACHE_KNOWLEDGE_FIELDS if k in entry}
+                    for entry in value or []
+                ]
+            elif field == "dependency_results":
+                value = {
+                    name: {k: result.get(k) for k in self.CACHE_DEPENDENCY_FIELDS}
+                    for name, result in (value or {}).items()
+                }
+            inputs[field] = value
+        return inputs
 
     def validate_input(self, input_data: Dict[str, Any], required_keys: list) -> bool:
         """
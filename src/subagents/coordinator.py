@@ -5,16 +5,26 @@ Coordinator SubAgent
 
 from typing import Any, Dict, List
 
+from src.utils.keyword_matcher import register_keywords
+
 from .base import BaseSubAgent, SubAgentResult
 
 
 class CoordinatorSubAgent(BaseSubAgent):
     """コーディネーター・サブエージェント"""
 
+    # 結果のキャッシュキーに使う入力
+    CACHE_INPUT_FIELDS = ("title", "content", "itsm_type")
+    CACHE_VERSION = "1"
+
     def __init__(self):
         super().__init__(
             name="coordinator", role="coordination_review", priority="medium"
         )
+        register_keywords(
+            "coordinator",
+            [kw for kws in self._required_context_checks().values() for kw in kws],
+        )
 
     def process(self, input_data: Dict[str, Any]) -> SubAgentResult:
         """
@@ -70,9 +80,12 @@ class CoordinatorSubAgent(BaseSubAgent):
     def _find_missing_items(
         self, content: str, required_context: Dict[str, List[str]]
     ) -> List[str]:
+        # 他のエージェントと同様に大文字小文字を区別せず判定する
+        # （小文字化した本文の走査結果は他のエージェントと共有される）
+        hits = self.get_analysis(content=content).content_hits
         missing_items = []
         for key, keywords in required_context.items():
-            if not any(keyword in content for keyword in keywords):
+            if not hits.any(keyword.lower() for keyword in keywords):
                 missing_items.append(key)
         return missing_items
 
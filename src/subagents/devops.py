@@ -6,14 +6,61 @@ DevOps SubAgent
 import re
 from typing import Any, Dict, List
 
+from src.utils.keyword_matcher import register_keywords
+
 from .base import BaseSubAgent, SubAgentResult
 
+# 実行コマンドの記載（$ や # に続くコマンド）
+_COMMAND_PATTERN = re.compile(r"\$\s+\w+|#\s+\w+")
+
 
 class DevOpsSubAgent(BaseSubAgent):
     """DevOps・サブエージェント"""
 
+    # 結果のキャッシュキーに使う入力
+    CACHE_INPUT_FIELDS = ("content", "itsm_type")
+    CACHE_VERSION = "1"
+
+    # リスクパターン定義
+    RISK_PATTERNS: List[Dict[str, Any]] = [
+        {
+            "keywords": ["削除", "delete", "drop", "rm -rf", "truncate"],
+            "risk": "データ削除リスク",
+            "severity": "high",
+            "mitigation": "バックアップ取得後に実施してください",
+        },
+        {
+            "keywords": ["本番", "production", "prod"],
+            "risk": "本番環境への影響",
+            "severity": "high",
+            "mitigation": "事前に十分なテストと承認プロセスを経てください",
+        },
+        {
+            "keywords": ["停止", "stop", "shutdown", "ダウン"],
+            "risk": "サービス停止リスク",
+            "severity": "medium",
+            "mitigation": "停止時間の最小化と関係者への事前通知を行ってください",
+        },
+        {
+            "keywords": ["権限", "permission", "chmod 777", "sudo"],
+            "risk": "セキュリティリスク",
+            "severity": "medium",
+            "mitigation": "最小権限の原則に従ってください",
+        },
+        {
+            "keywords": ["パスワード", "password", "認証情報", "credential"],
+            "risk": "認証情報の取り扱い",
+            "severity": "high",
+            "mitigation": "認証情報を平文で保存・送信しないでください",
+        },
+    ]
+
     def __init__(self):
         super().__init__(name="devops", role="technical_analysis", priority="medium")
+        register_keywords(
+            "devops",
+            [kw for pattern in self.RISK_PATTERNS for kw in pattern["keywords"]],
+        )
 
     def process(self, input_data: Dict[str, Any]) -> SubAgentResult:
         """
@@ -67,7 +114,7 @@ class DevOpsSubAgent(BaseSubAgent):
     def _extract_technical_elements(self, content: str) -> List[Dict[str, str]]:
         """技術要素を抽出"""
         elements = []
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
 
         # 技術カテゴリ定義
         tech_categories = {
@@ -120,7 +167,8 @@ class DevOpsSubAgent(BaseSubAgent):
         """自動化可能性を評価"""
         score = 0.0
         reasons = []
-        content_lower = content.lower()
+        analysis = self.get_analysis(content=content)
+        content_lower = analysis.content_lower
 
         # 繰り返し作業の検出
         repetitive_keywords = [
@@ -144,7 +192,11 @@ class DevOpsSubAgent(BaseSubAgent):
             reasons.append("手順が明確に定義されている")
 
         # コマンドが含まれる
-        if re.search(r"```|`[^`]+`|\$\s+\w+|#\s+\w+", content):
+        if (
+            "```" in content
+            or analysis.inline_code
+            or _COMMAND_PATTERN.search(content)
+        ):
             score += 0.3
             reasons.append("実行コマンドが記載されている")
 
@@ -190,44 +242,10 @@ class DevOpsSubAgent(BaseSubAgent):
     def _analyze_technical_risks(self, content: str) -> List[Dict[str, str]]:
         """技術的リスクを分析"""
         risks = []
-        content_lower = content.lower()
-
-        # リスクパターン定義
-        risk_patterns = [
-            {
-                "keywords": ["削除", "delete", "drop", "rm -rf", "truncate"],
-                "risk": "データ削除リスク",
-                "severity": "high",
-                "mitigation": "バックアップ取得後に実施してください",
-            },
-            {
-                "keywords": ["本番", "production", "prod"],
-                "risk": "本番環境への影響",
-                "severity": "high",
-                "mitigation": "事前に十分なテストと承認プロセスを経てください",
-            },
-            {
-                "keywords": ["停止", "stop", "shutdown", "ダウン"],
-                "risk": "サービス停止リスク",
-                "severity": "medium",
-                "mitigation": "停止時間の最小化と関係者への事前通知を行ってください",
-            },
-            {
-                "keywords": ["権限", "permission", "chmod 777", "sudo"],
-                "risk": "セキュリティリスク",
-                "severity": "medium",
-                "mitigation": "最小権限の原則に従ってください",
-            },
-            {
-                "keywords": ["パスワード", "password", "認証情報", "credential"],
-                "risk": "認証情報の取り扱い",
-                "severity": "high",
-                "mitigation": "認証情報を平文で保存・送信しないでください",
-            },
-        ]
+        hits = self.get_analysis(content=content).content_hits
 
-        for pattern in risk_patterns:
-            if any(keyword in content_lower for keyword in pattern["keywords"]):
+        for pattern in self.RISK_PATTERNS:
+            if hits.any(pattern["keywords"]):
                 risks.append(
                     {
                         "risk": pattern["risk"],
@@ -241,21 +259,19 @@ class DevOpsSubAgent(BaseSubAgent):
     def _extract_commands(self, content: str) -> List[Dict[str, str]]:
         """コマンドやスクリプトを抽出"""
         commands = []
+        analysis = self.get_analysis(content=content)
 
         # コードブロック（```で囲まれた部分）を抽出
-        code_blocks = re.findall(r"```(?:\w+)?\n?(.*?)```", content, re.DOTALL)
-        for block in code_blocks:
+        for block in analysis.code_blocks:
             commands.append({"type": "code_block", "content": block.strip()})
 
         # インラインコマンド（`で囲まれた部分）を抽出
-        inline_commands = re.findall(r"`([^`]+)`", content)
-        for cmd in inline_commands:
+        for cmd in analysis.inline_code:
             if len(cmd) > 5:  # 短すぎるものは除外
                 commands.append({"type": "inline_command", "content": cmd})
 
         # シェルコマンドパターン（$ や # で始まる行）
-        shell_commands = re.findall(r"[$#]\s+(.+)", content)
-        for cmd in shell_commands:
+        for cmd in analysis.shell_commands:
             commands.append({"type": "shell_command", "content": cmd.strip()})
 
         return commands
@@ -265,7 +281,7 @@ class DevOpsSubAgent(BaseSubAgent):
     ) -> List[str]:
         """改善提案を生成"""
         improvements = []
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
 
         # 自動化提案
         if automation_potential["score"] >= 0.4:
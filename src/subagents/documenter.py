@@ -12,6 +12,17 @@ from .base import BaseSubAgent, SubAgentResult
 class DocumenterSubAgent(BaseSubAgent):
     """ドキュメンター・サブエージェント"""
 
+    # 結果のキャッシュキーに使う入力
+    CACHE_INPUT_FIELDS = (
+        "title",
+        "content",
+        "itsm_type",
+        "tags",
+        "metadata",
+        "dependency_results",
+    )
+    CACHE_VERSION = "1"
+
     def __init__(self):
         super().__init__(name="documenter", role="formatting", priority="medium")
 
@@ -25,7 +36,8 @@ class DocumenterSubAgent(BaseSubAgent):
                 'content': str,
                 'itsm_type': str,
                 'tags': list (オプション),
-                'metadata': dict (オプション)
+                'metadata': dict (オプション),
+                'dependency_results': dict (オプション、依存先SubAgentの結果)
             }
 
         Returns:
@@ -39,8 +51,13 @@ class DocumenterSubAgent(BaseSubAgent):
         title = input_data.get("title", "")
         content = input_data.get("content", "")
         itsm_type = input_data.get("itsm_type", "Other")
-        tags = input_data.get("tags", [])
-        metadata = input_data.get("metadata", {})
+        # タグ・メタデータの指定がなければKnowledgeCuratorの結果を使う
+        curator_result = input_data.get("dependency_results", {}).get(
+            "knowledge_curator", {}
+        )
+        curator_data = curator_result.get("data", {})
+        tags = input_data.get("tags", curator_data.get("tags", []))
+        metadata = input_data.get("metadata", curator_data.get("metadata", {}))
 
         # 1. 技術者向け要約
         summary_technical = self._generate_technical_summary(title, content, itsm_type)
@@ -115,7 +132,7 @@ class DocumenterSubAgent(BaseSubAgent):
         self, title: str, content: str, itsm_type: str
     ) -> str:
         """非技術者向け要約を生成"""
-        content_lower = content.lower()
+        content_lower = self.get_analysis(title, content).content_lower
 
         # 影響範囲
         impact = "システムの一部"
@@ -153,7 +170,8 @@ class DocumenterSubAgent(BaseSubAgent):
     def _generate_3line_summary(self, title: str, content: str) -> List[str]:
         """3行要約を生成"""
         lines = []
-        content_lower = content.lower()
+        analysis = self.get_analysis(title, content)
+        content_lower = analysis.content_lower
 
         # 1行目: 何が起きたか / 何をするか
         first_sentence = (
@@ -172,7 +190,7 @@ class DocumenterSubAgent(BaseSubAgent):
             lines.append(response_text.strip())
         else:
             # 2文目を使用
-            sentences = [s.strip() for s in content.split("。") if s.strip()]
+            sentences = analysis.sentences
             if len(sentences) > 1:
                 lines.append(sentences[1][:100])
             else:
@@ -202,7 +220,7 @@ class DocumenterSubAgent(BaseSubAgent):
 
     def _extract_technical_keywords(self, content: str) -> List[str]:
         """技術キーワードを抽出"""
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
         keywords = []
 
         tech_terms = [
@@ -237,7 +255,7 @@ class DocumenterSubAgent(BaseSubAgent):
     def _extract_incident_summary(self, content: str) -> List[str]:
         """インシデント要約を抽出"""
         points = []
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
 
         # 発生時刻
         if any(word in content_lower for word in ["発生", "検知", "時刻"]):
@@ -256,7 +274,7 @@ class DocumenterSubAgent(BaseSubAgent):
     def _extract_problem_summary(self, content: str) -> List[str]:
         """問題管理要約を抽出"""
         points = []
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
 
         if "根本原因" in content_lower or "root cause" in content_lower:
             points.append("根本原因分析済み")
@@ -272,7 +290,7 @@ class DocumenterSubAgent(BaseSubAgent):
     def _extract_change_summary(self, content: str) -> List[str]:
         """変更管理要約を抽出"""
         points = []
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
 
         if any(word in content_lower for word in ["変更内容", "対象", "範囲"]):
             points.append("変更内容明記あり")
@@ -288,7 +306,7 @@ class DocumenterSubAgent(BaseSubAgent):
     def _extract_release_summary(self, content: str) -> List[str]:
         """リリース管理要約を抽出"""
         points = []
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
 
         if "リリース" in content_lower or "release" in content_lower:
             points.append("リリース内容記載あり")
@@ -301,8 +319,7 @@ class DocumenterSubAgent(BaseSubAgent):
     def _extract_generic_summary(self, content: str) -> List[str]:
         """汎用要約を抽出"""
         # 最初の3つの文を抽出
-        sentences = [s.strip() for s in content.split("。") if s.strip()]
-        return sentences[:3]
+        return self.get_analysis(content=content).sentences[:3]
 
     def _format_as_markdown(
         self,
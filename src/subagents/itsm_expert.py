@@ -11,6 +11,10 @@ from .base import BaseSubAgent, SubAgentResult
 class ITSMExpertSubAgent(BaseSubAgent):
     """ITSM専門家・サブエージェント"""
 
+    # 結果のキャッシュキーに使う入力
+    CACHE_INPUT_FIELDS = ("content", "itsm_type")
+    CACHE_VERSION = "1"
+
     def __init__(self):
         super().__init__(name="itsm_expert", role="compliance", priority="high")
         # ITSM原則定義
@@ -175,7 +179,7 @@ class ITSMExpertSubAgent(BaseSubAgent):
     ) -> List[Dict[str, Any]]:
         """ITSM原則に基づいたチェック"""
         principles = self.itsm_principles.get(itsm_type, [])
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
         results = []
 
         for principle_def in principles:
@@ -196,7 +200,7 @@ class ITSMExpertSubAgent(BaseSubAgent):
     def _detect_deviations(self, content: str, itsm_type: str) -> List[Dict[str, Any]]:
         """ITSM原則からの逸脱を検知"""
         deviations = []
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
 
         # 共通的な逸脱パターン
         common_deviations = [
@@ -246,7 +250,7 @@ class ITSMExpertSubAgent(BaseSubAgent):
 
     def _evaluate_best_practices(self, content: str, itsm_type: str) -> Dict[str, Any]:
         """ベストプラクティスへの準拠評価"""
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
         best_practices = []
 
         # 共通ベストプラクティス
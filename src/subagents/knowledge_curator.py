@@ -4,7 +4,10 @@ Knowledge Curator SubAgent
 """
 
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+
+from src.utils.keyword_matcher import register_keywords
+from src.utils.text_tokenizer import fold_long_vowels, is_hiragana_word
 
 from .base import BaseSubAgent, SubAgentResult
 
@@ -12,8 +15,104 @@ from .base import BaseSubAgent, SubAgentResult
 class KnowledgeCuratorSubAgent(BaseSubAgent):
     """ナレッジキュレーター・サブエージェント"""
 
+    # 結果のキャッシュキーに使う入力
+    CACHE_INPUT_FIELDS = ("title", "content", "itsm_type")
+    CACHE_VERSION = "1"
+
+    # 技術タグ
+    TECH_TAGS: Dict[str, List[str]] = {
+        "ネットワーク": [
+            "network",
+            "ネットワーク",
+            "lan",
+            "wan",
+            "vpn",
+            "dns",
+            "dhcp",
+        ],
+        "データベース": [
+            "database",
+            "db",
+            "データベース",
+            "sql",
+            "mysql",
+            "postgresql",
+            "oracle",
+        ],
+        "サーバー": ["server", "サーバー", "サーバ", "apache", "nginx", "iis"],
+        "セキュリティ": [
+            "security",
+            "セキュリティ",
+            "脆弱性",
+            "firewall",
+            "ファイアウォール",
+        ],
+        "バックアップ": ["backup", "バックアップ", "restore", "リストア", "復元"],
+        "パフォーマンス": [
+            "performance",
+            "パフォーマンス",
+            "性能",
+            "遅延",
+            "レスポンス",
+        ],
+        "アクセス権限": [
+            "permission",
+            "権限",
+            "access",
+            "アクセス",
+            "authentication",
+            "認証",
+        ],
+        "ストレージ": ["storage", "ストレージ", "disk", "ディスク", "容量"],
+        "メモリ": ["memory", "メモリ", "ram", "swap"],
+        "CPU": ["cpu", "プロセッサ", "processor"],
+        "OS": ["os", "linux", "windows", "unix", "centos", "ubuntu"],
+        "アプリケーション": ["application", "アプリケーション", "app", "アプリ"],
+        "クラウド": ["cloud", "クラウド", "aws", "azure", "gcp"],
+        "仮想化": [
+            "virtual",
+            "仮想",
+            "vm",
+            "vmware",
+            "hyper-v",
+            "docker",
+            "kubernetes",
+        ],
+        "ログ": ["log", "ログ", "logging", "syslog"],
+    }
+
+    # ITSMタイプ固有のタグ
+    ITSM_TYPE_TAGS: Dict[str, List[Tuple[str, List[str]]]] = {
+        "Incident": [
+            ("緊急対応", ["緊急", "重大", "クリティカル", "critical"]),
+            ("障害対応", ["障害", "エラー", "error", "failure"]),
+        ],
+        "Problem": [
+            ("根本原因分析", ["根本原因", "root cause", "再発"]),
+            ("再発防止", ["対策", "防止", "改善"]),
+        ],
+        "Change": [
+            ("計画停止", ["計画", "定期", "scheduled"]),
+            ("定期メンテナンス", ["メンテナンス", "maintenance"]),
+        ],
+        "Release": [
+            ("リリース", ["デプロイ", "deploy", "リリース", "release"]),
+            ("ロールバック", ["ロールバック", "rollback", "巻き戻し"]),
+        ],
+    }
+
     def __init__(self):
         super().__init__(name="knowledge_curator", role="organization", priority="high")
+        register_keywords(
+            "knowledge_curator",
+            [kw for keywords in self.TECH_TAGS.values() for kw in keywords]
+            + [
+                kw
+                for rules in self.ITSM_TYPE_TAGS.values()
+                for _, keywords in rules
+                for kw in keywords
+            ],
+        )
 
     def process(self, input_data: Dict[str, Any]) -> SubAgentResult:
         """
@@ -68,109 +167,24 @@ class KnowledgeCuratorSubAgent(BaseSubAgent):
     def _extract_tags(self, title: str, content: str, itsm_type: str) -> List[str]:
         """タグを抽出"""
         tags = []
-        text = (title + " " + content).lower()
+        hits = self.get_analysis(title, content).text_hits
 
         # 技術タグ
-        tech_tags = {
-            "ネットワーク": [
-                "network",
-                "ネットワーク",
-                "lan",
-                "wan",
-                "vpn",
-                "dns",
-                "dhcp",
-            ],
-            "データベース": [
-                "database",
-                "db",
-                "データベース",
-                "sql",
-                "mysql",
-                "postgresql",
-                "oracle",
-            ],
-            "サーバー": ["server", "サーバー", "サーバ", "apache", "nginx", "iis"],
-            "セキュリティ": [
-                "security",
-                "セキュリティ",
-                "脆弱性",
-                "firewall",
-                "ファイアウォール",
-            ],
-            "バックアップ": ["backup", "バックアップ", "restore", "リストア", "復元"],
-            "パフォーマンス": [
-                "performance",
-                "パフォーマンス",
-                "性能",
-                "遅延",
-                "レスポンス",
-            ],
-            "アクセス権限": [
-                "permission",
-                "権限",
-                "access",
-                "アクセス",
-                "authentication",
-                "認証",
-            ],
-            "ストレージ": ["storage", "ストレージ", "disk", "ディスク", "容量"],
-            "メモリ": ["memory", "メモリ", "ram", "swap"],
-            "CPU": ["cpu", "プロセッサ", "processor"],
-            "OS": ["os", "linux", "windows", "unix", "centos", "ubuntu"],
-            "アプリケーション": ["application", "アプリケーション", "app", "アプリ"],
-            "クラウド": ["cloud", "クラウド", "aws", "azure", "gcp"],
-            "仮想化": [
-                "virtual",
-                "仮想",
-                "vm",
-                "vmware",
-                "hyper-v",
-                "docker",
-                "kubernetes",
-            ],
-            "ログ": ["log", "ログ", "logging", "syslog"],
-        }
-
-        for tag, keywords in tech_tags.items():
-            if any(keyword in text for keyword in keywords):
+        for tag, keywords in self.TECH_TAGS.items():
+            if hits.any(keywords):
                 tags.append(tag)
 
         # ITSMタイプ固有のタグ
-        if itsm_type == "Incident":
-            if any(
-                word in text for word in ["緊急", "重大", "クリティカル", "critical"]
-            ):
-                tags.append("緊急対応")
-            if any(word in text for word in ["障害", "エラー", "error", "failure"]):
-                tags.append("障害対応")
+        for tag, keywords in self.ITSM_TYPE_TAGS.get(itsm_type, []):
+            if hits.any(keywords):
+                tags.append(tag)
 
-        elif itsm_type == "Problem":
-            if any(word in text for word in ["根本原因", "root cause", "再発"]):
-                tags.append("根本原因分析")
-            if any(word in text for word in ["対策", "防止", "改善"]):
-                tags.append("再発防止")
-
-        elif itsm_type == "Change":
-            if any(word in text for word in ["計画", "定期", "scheduled"]):
-                tags.append("計画停止")
-            if any(word in text for word in ["メンテナンス", "maintenance"]):
-                tags.append("定期メンテナンス")
-
-        elif itsm_type == "Release":
-            if any(
-                word in text for word in ["デプロイ", "deploy", "リリース", "release"]
-            ):
-                tags.append("リリース")
-            if any(word in text for word in ["ロールバック", "rollback", "巻き戻し"]):
-                tags.append("ロールバック")
-
-        return list(set(tags))  # 重複を除去
+        return list(dict.fromkeys(tags))  # 重複を除去（プロセス間で順序が変わらないよう出現順を保つ）
 
     def _classify_categories(self, content: str) -> List[str]:
         """カテゴリ分類"""
         categories = []
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
 
         category_patterns = {
             "インフラ": ["インフラ", "infrastructure", "サーバー", "ネットワーク"],
@@ -190,9 +204,11 @@ class KnowledgeCuratorSubAgent(BaseSubAgent):
 
     def _extract_keywords(self, content: str) -> List[str]:
         """キーワード抽出（頻出単語）"""
-        # 簡易的な実装: 3文字以上の単語で頻出するもの
-        words = re.findall(r"[\w]+", content.lower())
+        # 文字種境界で分割した単語のうち、英数字は3文字以上・日本語は2文字以上で
+        # 頻出するもの（長音の揺れは同じ語として数え、最初の表記を返す）
+        words = self.get_analysis(content=content).content_tokens.words
         word_freq = {}
+        surfaces = {}
 
         # ストップワード（除外する一般的な単語）
         stop_words = {
@@ -227,12 +243,16 @@ class KnowledgeCuratorSubAgent(BaseSubAgent):
         }
 
         for word in words:
-            if len(word) >= 3 and word not in stop_words:
-                word_freq[word] = word_freq.get(word, 0) + 1
+            min_length = 3 if word.isascii() else 2
+            if len(word) < min_length or word in stop_words or is_hiragana_word(word):
+                continue
+            key = fold_long_vowels(word)
+            surfaces.setdefault(key, word)
+            word_freq[key] = word_freq.get(key, 0) + 1
 
         # 頻度順にソートして上位10件
         sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, freq in sorted_words[:10]]
+        return [surfaces[key] for key, freq in sorted_words[:10]]
 
     def _evaluate_importance(
         self, title: str, content: str, itsm_type: str
@@ -240,7 +260,7 @@ class KnowledgeCuratorSubAgent(BaseSubAgent):
         """重要度評価"""
         score = 0.5  # 基準スコア
 
-        text = (title + " " + content).lower()
+        text = self.get_analysis(title, content).text_lower
 
         # 緊急度による加点
         urgent_keywords = [
@@ -286,14 +306,15 @@ class KnowledgeCuratorSubAgent(BaseSubAgent):
         self, title: str, content: str, tags: List[str], categories: List[str]
     ) -> Dict[str, Any]:
         """メタデータ生成"""
+        analysis = self.get_analysis(title, content)
         return {
             "title_length": len(title),
             "content_length": len(content),
             "word_count": len(content.split()),
             "tag_count": len(tags),
             "category_count": len(categories),
-            "has_code_block": "```" in content or "code" in content.lower(),
-            "has_url": "http" in content.lower(),
+            "has_code_block": "```" in content or "code" in analysis.content_lower,
+            "has_url": "http" in analysis.content_lower,
             "has_list": "-" in content
             or "*" in content
             or re.search(r"\d+\.", content) is not None,
@@ -5,12 +5,20 @@ QA SubAgent
 
 from typing import Any, Dict, List
 
+from src.utils.text_tokenizer import text_similarity
+
 from .base import BaseSubAgent, SubAgentResult
 
 
 class QASubAgent(BaseSubAgent):
     """品質保証・サブエージェント"""
 
+    # 結果のキャッシュキーに使う入力
+    CACHE_INPUT_FIELDS = ("title", "content", "existing_knowledge")
+    CACHE_VERSION = "1"
+    # 結果に近似重複スコアをそのまま含めるため、キーにも含める
+    CACHE_KNOWLEDGE_FIELDS = BaseSubAgent.CACHE_KNOWLEDGE_FIELDS + ("near_duplicate_score",)
+
     def __init__(self):
         super().__init__(name="qa", role="quality_validation", priority="high")
 
@@ -74,6 +82,7 @@ class QASubAgent(BaseSubAgent):
     def _check_completeness(self, title: str, content: str) -> Dict[str, Any]:
         """内容の完全性をチェック"""
         checks = []
+        content_lower = self.get_analysis(title, content).content_lower
 
         # 1. タイトルの適切性
         title_check = {
@@ -116,7 +125,7 @@ class QASubAgent(BaseSubAgent):
 
         # 4. 具体性
         has_specifics = any(
-            word in content.lower()
+            word in content_lower
             for word in [
                 "時刻",
                 "日時",
@@ -140,7 +149,7 @@ class QASubAgent(BaseSubAgent):
 
         # 5. 対応結果の記載
         has_result = any(
-            word in content.lower()
+            word in content_lower
             for word in ["解決", "対応", "復旧", "完了", "実施", "確認"]
         )
         result_check = {
@@ -169,32 +178,39 @@ class QASubAgent(BaseSubAgent):
     ) -> Dict[str, Any]:
         """重複を検知"""
         similarities = []
+        # 既存ナレッジとの類似度は解析コンテキストでメモ化（Architectと共有）
+        analysis = self.get_analysis(title, content)
 
         for knowledge in existing_knowledge:
+            # 候補が多い場合に期限を超えて比較し続けない
+            self.check_deadline("duplicates")
             existing_title = knowledge.get("title", "")
             existing_content = knowledge.get("content", "")
 
             # タイトルの類似度
-            title_similarity = self._calculate_text_similarity(title, existing_title)
+            title_similarity = analysis.title_similarity(existing_title)
 
             # 内容の類似度
-            content_similarity = self._calculate_text_similarity(
-                content, existing_content
-            )
+            content_similarity = analysis.content_similarity(existing_content)
 
             # 総合類似度（タイトルを重視）
             overall_similarity = (title_similarity * 0.6) + (content_similarity * 0.4)
+            # 内容がほぼ同一のものはタイトルが異なっても重複とみなす
+            if content_similarity >= 0.8:
+                overall_similarity = max(overall_similarity, content_similarity)
 
             if overall_similarity > 0.5:  # 50%以上の類似度で記録
-                similarities.append(
-                    {
-                        "knowledge_id": knowledge.get("id"),
-                        "title": existing_title,
-                        "title_similarity": round(title_similarity, 2),
-                        "content_similarity": round(content_similarity, 2),
-                        "overall_similarity": round(overall_similarity, 2),
-                    }
-                )
+                item = {
+                    "knowledge_id": knowledge.get("id"),
+                    "title": existing_title,
+                    "title_similarity": round(title_similarity, 2),
+                    "content_similarity": round(content_similarity, 2),
+                    "overall_similarity": round(overall_similarity, 2),
+                }
+                # 近似重複インデックス経由の候補は推定Jaccard係数も記録
+                if "near_duplicate_score" in knowledge:
+                    item["near_duplicate_score"] = knowledge["near_duplicate_score"]
+                similarities.append(item)
 
         # 類似度順にソート
         similarities.sort(key=lambda x: x["overall_similarity"], reverse=True)
@@ -211,22 +227,8 @@ class QASubAgent(BaseSubAgent):
         }
 
     def _calculate_text_similarity(self, text1: str, text2: str) -> float:
-        """2つのテキストの類似度を計算（Jaccard係数）"""
-        if not text1 or not text2:
-            return 0.0
-
-        # 単語セットを作成
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-
-        # Jaccard係数 = 積集合 / 和集合
-        intersection = words1 & words2
-        union = words1 | words2
-
-        if not union:
-            return 0.0
-
-        return len(intersection) / len(union)
+        """2つのテキストの類似度を計算（文字n-gramのJaccard係数）"""
+        return text_similarity(text1, text2)
 
     def _calculate_quality_score(
         self, title: str, content: str, completeness: Dict[str, Any]
@@ -299,7 +301,7 @@ class QASubAgent(BaseSubAgent):
         score = 0.5  # 基準値
 
         # 改行が適切に入っているか
-        lines = content.split("\n")
+        lines = self.get_analysis(content=content).lines
         if len(lines) > 3:
             score += 0.2
 
@@ -317,7 +319,7 @@ class QASubAgent(BaseSubAgent):
     def _evaluate_usefulness(self, content: str) -> float:
         """有用性を評価"""
         score = 0.5  # 基準値
-        content_lower = content.lower()
+        content_lower = self.get_analysis(content=content).content_lower
 
         # 具体的な手順やコマンドがあるか
         if any(marker in content for marker in ["```", "`", "$", "#"]):
@@ -0,0 +1,48 @@
+"""
+Utilities Module
+共通ユーティリティモジュール
+"""
+
+from .document_analysis import DocumentAnalysis
+from .fingerprint import compute_fingerprint, hamming_distance
+from .keyword_matcher import (
+    KeywordAutomaton,
+    KeywordHits,
+    KeywordRegistry,
+    get_keyword_registry,
+    match_keywords,
+    match_keywords_joined,
+    register_keywords,
+)
+from .minhash import LSHIndex, MinHasher
+from .text_tokenizer import (
+    TextTokenizer,
+    TextTokens,
+    fold_long_vowels,
+    get_text_tokenizer,
+    normalize_text,
+    text_similarity,
+    tokenize,
+)
+
+__all__ = [
+    "DocumentAnalysis",
+    "compute_fingerprint",
+    "hamming_distance",
+    "KeywordAutomaton",
+    "KeywordHits",
+    "KeywordRegistry",
+    "get_keyword_registry",
+    "match_keywords",
+    "match_keywords_joined",
+    "register_keywords",
+    "LSHIndex",
+    "MinHasher",
+    "TextTokenizer",
+    "TextTokens",
+    "fold_long_vowels",
+    "get_text_tokenizer",
+    "normalize_text",
+    "text_similarity",
+    "tokenize",
+]
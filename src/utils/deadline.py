@@ -0,0 +1,125 @@
+"""
+Deadline
+処理全体の期限と協調的キャンセル
+
+ワークフローの開始時に期限を作成し、サブエージェント・MCP呼び出しへ渡す。
+各処理は remaining() / cap() で自分の待ち時間を期限内に収め、
+長い処理は区切りごとに expired を確認して打ち切る（スレッドは強制終了できないため）。
+
+サブエージェントには deadline_scope() で実行中の期限を設定し、処理の中からは
+current_deadline() で参照する（トレースのスパンと同じく contextvars で管理する）。
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """期限切れ"""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        super().__init__(f"処理の期限を超えました（{stage}）")
+
+
+class Deadline:
+    """処理の期限（単調時計基準）"""
+
+    def __init__(
+        self, seconds: Optional[float], parent: Optional["Deadline"] = None
+    ):
+        """
+        Args:
+            seconds: 期限までの秒数（Noneの場合は無期限）
+            parent: 親の期限（親より後にはならず、親のキャンセルも引き継ぐ）
+        """
+        self.seconds = seconds
+        self.parent = parent
+        self._expires_at = None if seconds is None else time.monotonic() + seconds
+        if parent is not None and parent._expires_at is not None:
+            if self._expires_at is None or parent._expires_at < self._expires_at:
+                self._expires_at = parent._expires_at
+        self._cancelled = threading.Event()
+
+    def child(self, seconds: Optional[float]) -> "Deadline":
+        """この期限内に収まる子の期限（個別の処理の待ち時間用）"""
+        return Deadline(seconds, parent=self)
+
+    def remaining(self) -> Optional[float]:
+        """残り秒数（無期限の場合は None、キャンセル済み・期限切れは 0）"""
+        if self.cancelled:
+            return 0.0
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def cap(self, timeout: Optional[float]) -> Optional[float]:
+        """待ち時間を残り時間以内に制限（どちらも無制限なら None）"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def cancel(self) -> None:
+        """キャンセル（この期限を参照している処理に打ち切りを伝える）"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """キャンセル済みか（親のキャンセルを含む）"""
+        return self._cancelled.is_set() or (
+            self.parent is not None and self.parent.cancelled
+        )
+
+    @property
+    def expired(self) -> bool:
+        """期限切れ・キャンセル済みか"""
+        return self.remaining() == 0.0
+
+    def check(self, stage: str) -> None:
+        """
+        期限切れなら例外
+
+        Raises:
+            DeadlineExceeded: 期限切れ・キャンセル済みの場合
+        """
+        if self.expired:
+            raise DeadlineExceeded(stage)
+
+    def __repr__(self) -> str:
+        remaining = self.remaining()
+        return (
+            "<Deadline unlimited>"
+            if remaining is None
+            else f"<Deadline remaining={remaining:.3f}s>"
+        )
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """
+    実行中の処理の期限を設定（None の場合は期限なし）
+
+    Yields:
+        設定した期限
+    """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """実行中の処理の期限（deadline_scope() の外では None）"""
+    return _current_deadline.get()
@@ -0,0 +1,146 @@
+"""
+Document Analysis
+ワークフロー単位で共有する文書解析コンテキスト
+
+7つのサブエージェントは同じタイトル・内容に対して、小文字化・正規表現による
+走査・トークン化・既存ナレッジとの類似度計算をそれぞれ行っていた。
+DocumentAnalysis は WorkflowEngine.process_knowledge で1回だけ生成され、
+各特徴量を初回アクセス時に計算してメモ化する。サブエージェント数が増えても
+1ワークフローあたりの前処理は1回で済む。
+"""
+
+import re
+import threading
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+from .keyword_matcher import KeywordHits, match_keywords, match_keywords_joined
+from .text_tokenizer import TextTokens, text_similarity, tokenize
+
+_CODE_BLOCK_PATTERN = re.compile(r"```(?:\w+)?\n?(.*?)```", re.DOTALL)
+_INLINE_CODE_PATTERN = re.compile(r"`([^`]+)`")
+_SHELL_COMMAND_PATTERN = re.compile(r"[$#]\s+(.+)")
+
+
+class DocumentAnalysis:
+    """
+    1文書分の解析結果（遅延計算・メモ化）
+
+    各プロパティは初回アクセス時に計算される。複数スレッドから同時に
+    アクセスされた場合は同じ値が重複して計算されることがあるが、結果は変わらない。
+    """
+
+    def __init__(self, title: str, content: str):
+        """
+        Args:
+            title: タイトル
+            content: 内容
+        """
+        self.title = title or ""
+        self.content = content or ""
+        self._similarities: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def matches(self, title: Optional[str] = None, content: Optional[str] = None) -> bool:
+        """指定したタイトル・内容（Noneは照合しない）の解析結果か"""
+        if title is not None and title != self.title:
+            return False
+        if content is not None and content != self.content:
+            return False
+        return True
+
+    # ========== 正規化テキスト ==========
+
+    @cached_property
+    def title_lower(self) -> str:
+        """小文字化したタイトル"""
+        return self.title.lower()
+
+    @cached_property
+    def content_lower(self) -> str:
+        """小文字化した内容"""
+        return self.content.lower()
+
+    @cached_property
+    def text_lower(self) -> str:
+        """小文字化したタイトルと内容（空白区切りで結合）"""
+        return self.title_lower + " " + self.content_lower
+
+    # ========== トークン ==========
+
+    @cached_property
+    def title_tokens(self) -> TextTokens:
+        """タイトルのトークン化結果"""
+        return tokenize(self.title)
+
+    @cached_property
+    def content_tokens(self) -> TextTokens:
+        """内容のトークン化結果"""
+        return tokenize(self.content)
+
+    # ========== 構造 ==========
+
+    @cached_property
+    def lines(self) -> List[str]:
+        """内容の行"""
+        return self.content.split("\n")
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        """内容の文（「。」区切り、空文は除外）"""
+        return [s.strip() for s in self.content.split("。") if s.strip()]
+
+    @cached_property
+    def code_blocks(self) -> List[str]:
+        """コードブロック（```で囲まれた部分）の中身"""
+        return _CODE_BLOCK_PATTERN.findall(self.content)
+
+    @cached_property
+    def inline_code(self) -> List[str]:
+        """インラインコード（`で囲まれた部分）"""
+        return _INLINE_CODE_PATTERN.findall(self.content)
+
+    @cached_property
+    def shell_commands(self) -> List[str]:
+        """シェルコマンド（$ や # に続く部分）"""
+        return _SHELL_COMMAND_PATTERN.findall(self.content)
+
+    # ========== キーワード ==========
+
+    @cached_property
+    def content_hits(self) -> KeywordHits:
+        """小文字化した内容のキーワードヒット集合"""
+        return match_keywords(self.content_lower)
+
+    @cached_property
+    def text_hits(self) -> KeywordHits:
+        """小文字化したタイトルと内容のキーワードヒット集合"""
+        return match_keywords_joined([self.title_lower, self.content_lower])
+
+    # ========== 既存ナレッジとの類似度 ==========
+
+    def title_similarity(self, other_title: str) -> float:
+        """タイトルと他のテキストの類似度（メモ化）"""
+        return self._similarity("title", self.title, other_title)
+
+    def content_similarity(self, other_content: str) -> float:
+        """内容と他のテキストの類似度（メモ化）"""
+        return self._similarity("content", self.content, other_content)
+
+    def _similarity(self, field: str, text: str, other: str) -> float:
+        """文字n-gramのJaccard係数（フィールド・相手テキスト単位でメモ化）"""
+        key = (field, other)
+        with self._lock:
+            cached = self._similarities.get(key)
+        if cached is not None:
+            return cached
+        similarity = text_similarity(text, other)
+        with self._lock:
+            self._similarities[key] = similarity
+        return similarity
+
+    def __repr__(self) -> str:
+        return (
+            f"<DocumentAnalysis title='{self.title[:20]}' "
+            f"content_length={len(self.content)}>"
+        )
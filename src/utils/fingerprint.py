@@ -0,0 +1,89 @@
+"""
+Text Fingerprint
+再投稿検知用のテキストフィンガープリント（完全一致ハッシュ + SimHash）
+
+- content_hash: 正規化済みのタイトル・内容のSHA-256（完全一致の判定用）
+- simhash: 64bit SimHash（空白・表記揺れ・数文字の修正程度の差は数ビットの差に収まる）
+
+SimHashは8bit×8ブロックに分割して保存する。ハミング距離7以下の2値は
+鳩の巣原理により少なくとも1ブロックが一致するため、ブロックの索引で候補を引ける。
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, Tuple
+
+from .minhash import shingle_hash
+from .text_tokenizer import tokenize
+
+SIMHASH_BITS = 64
+SIMHASH_BLOCKS = 8
+SIMHASH_BLOCK_BITS = SIMHASH_BITS // SIMHASH_BLOCKS
+# ほぼ同一とみなすハミング距離の上限（SIMHASH_BLOCKS - 1 以下であること）
+# 短文では1文字の修正でも数ビット変わるため、やや広めに取る
+DEFAULT_MAX_HAMMING_DISTANCE = 6
+
+_MASK64 = (1 << SIMHASH_BITS) - 1
+_BLOCK_MASK = (1 << SIMHASH_BLOCK_BITS) - 1
+
+
+def simhash(features: Iterable[str]) -> int:
+    """
+    特徴量（シングル）集合の64bit SimHashを計算
+
+    Returns:
+        符号なし64bit整数（特徴量がない場合は0）
+    """
+    hashes = [shingle_hash(feature) for feature in features]
+    if not hashes:
+        return 0
+    threshold = len(hashes) / 2
+    # ハッシュを2進文字列にして列ごとに1の数を数える（ビット単位のループより速い）
+    columns = zip(*(format(h, "064b") for h in hashes))
+    value = 0
+    for bit, column in enumerate(reversed(list(columns))):
+        # 過半数の特徴量でビットが立っていれば1
+        if column.count("1") > threshold:
+            value |= 1 << bit
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """2つの64bit値のハミング距離"""
+    return bin((a ^ b) & _MASK64).count("1")
+
+
+def simhash_blocks(value: int) -> Tuple[int, ...]:
+    """SimHashをブロックに分割（下位ブロックから）"""
+    return tuple(
+        (value >> (i * SIMHASH_BLOCK_BITS)) & _BLOCK_MASK for i in range(SIMHASH_BLOCKS)
+    )
+
+
+def to_signed64(value: int) -> int:
+    """符号なし64bit値をSQLiteのINTEGER（符号付き64bit）に変換"""
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def from_signed64(value: int) -> int:
+    """SQLiteのINTEGERから符号なし64bit値に戻す"""
+    return value & _MASK64
+
+
+def content_hash(title: str, content: str) -> str:
+    """正規化済みのタイトル・内容のSHA-256"""
+    normalized = tokenize(title or "").normalized + "\n" + tokenize(content or "").normalized
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def compute_fingerprint(title: str, content: str) -> Dict[str, Any]:
+    """
+    タイトル・内容のフィンガープリントを計算
+
+    Returns:
+        {'content_hash': str, 'simhash': int（符号なし64bit）}
+    """
+    shingles = tokenize(title or "").shingles | tokenize(content or "").shingles
+    return {
+        "content_hash": content_hash(title, content),
+        "simhash": simhash(shingles),
+    }
@@ -0,0 +1,289 @@
+"""
+Keyword Matcher
+共有キーワードマッチャー（Aho-Corasick法）
+
+各コンポーネントのキーワード表を1つのオートマトンにまとめてコンパイルし、
+1文書あたり1回の走査で全キーワードのヒット集合を求める。
+同じテキストに対する走査結果はキャッシュされ、コンポーネント間で共有される。
+"""
+
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+# 走査結果キャッシュの最大件数（テキスト単位）
+MATCH_CACHE_MAX_SIZE = 128
+# セグメント単位の走査結果キャッシュの最大件数（超えたらクリア）
+SEGMENT_CACHE_MAX_SIZE = 65536
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasickオートマトン（失敗遷移を展開済みのDFA）
+
+    テキストを英数字以外の文字で区切ったセグメント単位で走査し、
+    セグメントごとの結果をメモ化する（同じ単語・語句の再走査を省く）。
+    空白や記号を含むキーワード（"root cause" 等）は部分文字列検索で判定する。
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Args:
+            keywords: 検出対象のキーワード（空文字列は無視）
+        """
+        self.keywords: FrozenSet[str] = frozenset(k for k in keywords if k)
+        self.max_length = max((len(k) for k in self.keywords), default=0)
+
+        word_chars = {ch for k in self.keywords for ch in k if ch.isalnum()}
+        self._direct_keywords = [
+            k for k in self.keywords if any(ch not in word_chars for ch in k)
+        ]
+        automaton_keywords = [
+            k for k in self.keywords if all(ch in word_chars for ch in k)
+        ]
+        self._segment_pattern = (
+            re.compile(
+                "[" + "".join(re.escape(ch) for ch in sorted(word_chars)) + "]+"
+            )
+            if word_chars
+            else None
+        )
+        self._segment_cache: Dict[str, FrozenSet[str]] = {}
+        self._transitions: List[Dict[str, int]] = [{}]
+        self._outputs: List[Optional[FrozenSet[str]]] = [None]
+        self._build(automaton_keywords)
+
+    def _build(self, keywords: Iterable[str]) -> None:
+        """トライ木を構築し、失敗遷移を展開してDFA化"""
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[set] = [set()]
+
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    outputs.append(set())
+                    nxt = len(goto) - 1
+                    goto[state][ch] = nxt
+                state = nxt
+            outputs[state].add(keyword)
+
+        # 幅優先で失敗遷移を求め、遷移表に展開する
+        fail = [0] * len(goto)
+        transitions = [dict(g) for g in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[fail[state]]
+            for ch, nxt in transitions[fail[state]].items():
+                transitions[state].setdefault(ch, nxt)
+            for ch, nxt in goto[state].items():
+                fail[nxt] = transitions[fail[state]].get(ch, 0)
+                queue.append(nxt)
+
+        self._transitions = transitions
+        self._outputs = [frozenset(o) if o else None for o in outputs]
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """テキスト中に出現するキーワードの集合を返す（1回の走査）"""
+        if not self.keywords or not text:
+            return frozenset()
+
+        hits: set = set()
+        if self._segment_pattern is not None:
+            cache = self._segment_cache
+            for segment in self._segment_pattern.findall(text):
+                found = cache.get(segment)
+                if found is None:
+                    found = self._scan_segment(segment)
+                    if len(cache) >= SEGMENT_CACHE_MAX_SIZE:
+                        cache.clear()
+                    cache[segment] = found
+                if found:
+                    hits |= found
+
+        for keyword in self._direct_keywords:
+            if keyword in text:
+                hits.add(keyword)
+
+        return frozenset(hits)
+
+    def clear_cache(self) -> None:
+        """セグメント単位の走査結果キャッシュをクリア"""
+        self._segment_cache.clear()
+
+    def _scan_segment(self, segment: str) -> FrozenSet[str]:
+        """1セグメントをオートマトンで走査"""
+        transitions = self._transitions
+        outputs = self._outputs
+        state = 0
+        hits: set = set()
+        for ch in segment:
+            state = transitions[state].get(ch, 0)
+            found = outputs[state]
+            if found:
+                hits |= found
+        return frozenset(hits)
+
+
+class KeywordHits:
+    """1テキストに対するキーワードのヒット集合"""
+
+    def __init__(self, text: str, found: FrozenSet[str], vocabulary: FrozenSet[str]):
+        self.text = text
+        self.found = found
+        self._vocabulary = vocabulary
+
+    def __contains__(self, keyword: str) -> bool:
+        if keyword in self._vocabulary:
+            return keyword in self.found
+        # 未登録のキーワードは従来通り部分文字列検索
+        return keyword in self.text
+
+    def any(self, keywords: Iterable[str]) -> bool:
+        """いずれかのキーワードが出現するか"""
+        return any(keyword in self for keyword in keywords)
+
+    def count(self, keywords: Iterable[str]) -> int:
+        """出現したキーワードの数（リスト内の出現キーワード数）"""
+        return sum(1 for keyword in keywords if keyword in self)
+
+
+class KeywordRegistry:
+    """
+    キーワード表のレジストリ
+
+    登録された全キーワードから共有オートマトンを遅延コンパイルし、
+    テキストごとの走査結果をLRUキャッシュする。
+    """
+
+    def __init__(self, cache_size: int = MATCH_CACHE_MAX_SIZE):
+        self._tables: Dict[str, FrozenSet[str]] = {}
+        self._automaton: Optional[KeywordAutomaton] = None
+        self._cache: "OrderedDict[str, FrozenSet[str]]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def register(self, owner: str, keywords: Iterable[str]) -> None:
+        """
+        キーワード表を登録（同じ内容の再登録では再コンパイルしない）
+
+        Args:
+            owner: 登録元の名前（例: "itsm_classifier"）
+            keywords: キーワード
+        """
+        table = frozenset(k for k in keywords if k)
+        with self._lock:
+            if self._tables.get(owner) == table:
+                return
+            self._tables[owner] = table
+            self._automaton = None
+            self._cache.clear()
+
+    def _get_automaton(self) -> KeywordAutomaton:
+        """共有オートマトンを取得（ロック内で呼ぶこと）"""
+        if self._automaton is None:
+            vocabulary = set()
+            for table in self._tables.values():
+                vocabulary |= table
+            self._automaton = KeywordAutomaton(vocabulary)
+        return self._automaton
+
+    def match(self, text: str) -> KeywordHits:
+        """テキスト中のキーワードヒット集合を取得（キャッシュ付き）"""
+        with self._lock:
+            automaton = self._get_automaton()
+            found = self._cache.get(text)
+            if found is not None:
+                self._cache.move_to_end(text)
+                return KeywordHits(text, found, automaton.keywords)
+
+        found = automaton.find(text)
+        self._store(automaton, text, found)
+        return KeywordHits(text, found, automaton.keywords)
+
+    def match_joined(self, parts: Sequence[str], sep: str = " ") -> KeywordHits:
+        """
+        sep.join(parts) のヒット集合を、各パートの走査結果から求める
+
+        各パートの結果はキャッシュされるため、同じ本文を個別に走査する
+        コンポーネントとも結果を共有できる。区切りを跨ぐ出現は、区切り周辺の
+        最大キーワード長分だけを追加で走査して検出する。
+        """
+        text = sep.join(parts)
+        with self._lock:
+            automaton = self._get_automaton()
+            found = self._cache.get(text)
+            if found is not None:
+                self._cache.move_to_end(text)
+                return KeywordHits(text, found, automaton.keywords)
+
+        hits = set()
+        for part in parts:
+            hits |= self.match(part).found
+
+        margin = max(0, automaton.max_length - 1)
+        position = 0
+        for part in parts[:-1]:
+            position += len(part)
+            window = text[max(0, position - margin) : position + len(sep) + margin]
+            hits |= automaton.find(window)
+            position += len(sep)
+
+        found = frozenset(hits)
+        self._store(automaton, text, found)
+        return KeywordHits(text, found, automaton.keywords)
+
+    def _store(self, automaton: KeywordAutomaton, text: str, found: FrozenSet[str]):
+        """走査結果をキャッシュ（走査中に再コンパイルされた場合は保存しない）"""
+        with self._lock:
+            if self._automaton is not automaton:
+                return
+            self._cache[text] = found
+            self._cache.move_to_end(text)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self, include_segments: bool = True) -> None:
+        """
+        走査結果キャッシュをクリア
+
+        Args:
+            include_segments: セグメント単位のキャッシュもクリアするか
+        """
+        with self._lock:
+            self._cache.clear()
+            if include_segments and self._automaton is not None:
+                self._automaton.clear_cache()
+
+
+# シングルトンインスタンス
+_registry: Optional[KeywordRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_keyword_registry() -> KeywordRegistry:
+    """共有キーワードレジストリを取得（シングルトン）"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = KeywordRegistry()
+        return _registry
+
+
+def register_keywords(owner: str, keywords: Iterable[str]) -> None:
+    """共有オートマトンにキーワード表を登録"""
+    get_keyword_registry().register(owner, keywords)
+
+
+def match_keywords(text: str) -> KeywordHits:
+    """共有オートマトンでテキストを走査"""
+    return get_keyword_registry().match(text)
+
+
+def match_keywords_joined(parts: Sequence[str], sep: str = " ") -> KeywordHits:
+    """共有オートマトンで sep.join(parts) を走査（パート単位の結果を再利用）"""
+    return get_keyword_registry().match_joined(parts, sep)
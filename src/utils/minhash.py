@@ -0,0 +1,237 @@
+"""
+MinHash / LSH
+MinHash署名とLSHバンドインデックス（近似重複検知用）
+
+シングル集合からMinHash署名を求め、署名をバンドに分割したLSHインデックスで
+Jaccard係数の高い候補を全件走査せずに取得する。
+
+署名は One Permutation Hashing（各シングルを1回だけハッシュしてビンに振り分け、
+ビンごとの最小値を取る）と回転による空ビンの補完で計算する。
+k回の置換を使う通常のMinHashと同等の推定精度で、計算量はシングル数に線形。
+"""
+
+import hashlib
+import threading
+from array import array
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+# 署名長（ビン数）
+DEFAULT_NUM_PERM = 128
+# LSHのバンド数（署名長 = バンド数 × 行数）
+# b=32, r=4 の場合、候補になる確率が50%となるJaccard係数は約0.42
+DEFAULT_BANDS = 32
+
+# ビン内の値は64bitハッシュの上位48bit、補完時の借用距離はその上の16bitに載せる
+# （署名の各要素が64bitに収まり、そのままDBに保存できる）
+_VALUE_SHIFT = 16
+_MAX_NUM_PERM = 1 << _VALUE_SHIFT
+_EMPTY = (1 << 64) - 1
+# 署名1要素のバイト数（array('Q')）
+_ITEM_BYTES = 8
+
+
+@lru_cache(maxsize=1 << 16)
+def shingle_hash(shingle: str) -> int:
+    """シングルの64bitハッシュ（プロセス間で安定、頻出シングルはキャッシュ）"""
+    return int.from_bytes(
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class MinHasher:
+    """MinHash署名の計算"""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM):
+        """
+        Args:
+            num_perm: 署名長（ビン数）
+        """
+        if not 0 < num_perm < _MAX_NUM_PERM:
+            raise ValueError(f"num_perm は 1〜{_MAX_NUM_PERM - 1} で指定してください")
+        self.num_perm = num_perm
+
+    def signature(self, shingles: Iterable[str]) -> Tuple[int, ...]:
+        """
+        シングル集合のMinHash署名を計算
+
+        Returns:
+            長さ num_perm の署名（空集合の場合はすべて最大値）
+        """
+        k = self.num_perm
+        bins = [_EMPTY] * k
+        for shingle in shingles:
+            h = shingle_hash(shingle)
+            index = h % k
+            value = h >> _VALUE_SHIFT
+            if value < bins[index]:
+                bins[index] = value
+
+        if all(v == _EMPTY for v in bins):
+            return tuple(bins)
+
+        # 空ビンは右隣の空でないビンの値を借用（距離ごとにオフセット）
+        signature = list(bins)
+        for i in range(k):
+            if bins[i] != _EMPTY:
+                continue
+            distance = 1
+            while bins[(i + distance) % k] == _EMPTY:
+                distance += 1
+            signature[i] = bins[(i + distance) % k] | (distance << 48)
+        return tuple(signature)
+
+    @staticmethod
+    def jaccard(sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+        """署名からJaccard係数を推定（空集合同士は0）"""
+        if not sig1 or len(sig1) != len(sig2) or sig1[0] == _EMPTY:
+            return 0.0
+        return sum(1 for a, b in zip(sig1, sig2) if a == b) / len(sig1)
+
+    @staticmethod
+    def jaccard_bytes(sig1: bytes, sig2: bytes) -> float:
+        """保存形式（バイト列）の署名同士の推定Jaccard係数"""
+        a = memoryview(sig1).cast("Q")
+        b = memoryview(sig2).cast("Q")
+        if not len(a) or len(a) != len(b) or a[0] == _EMPTY:
+            return 0.0
+        return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+    @staticmethod
+    def to_bytes(signature: Tuple[int, ...]) -> bytes:
+        """署名をDB保存用のバイト列に変換"""
+        return array("Q", signature).tobytes()
+
+    @staticmethod
+    def from_bytes(data: bytes) -> Tuple[int, ...]:
+        """DB保存形式から署名を復元"""
+        values = array("Q")
+        values.frombytes(data)
+        return tuple(values)
+
+
+class LSHIndex:
+    """
+    LSHバンドインデックス（インメモリ）
+
+    署名を bands 個のバンドに分割し、いずれかのバンドが一致する
+    エントリを候補として返す。追加・削除は署名1件分の更新で済む。
+
+    大規模コーパスでも常駐できるよう、署名は保存形式と同じバイト列
+    （array('Q')、128要素で1KB）で保持し、バンドのキーはバンドのバイト列の
+    ハッシュ値（int）とする。ハッシュの衝突は推定Jaccard係数の計算で除外される。
+    バケットは要素が1件の間はキーをそのまま持ち、2件目で集合にする。
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm は bands で割り切れる必要があります")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[int, Union[int, Set[int]]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[int, bytes] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._signatures
+
+    def _encode(self, signature: Union[bytes, Sequence[int]]) -> bytes:
+        """署名を保持形式（バイト列）に揃える"""
+        if isinstance(signature, (bytes, bytearray, memoryview)):
+            data = bytes(signature)
+        else:
+            data = MinHasher.to_bytes(signature)
+        if len(data) != self.num_perm * _ITEM_BYTES:
+            raise ValueError(f"署名長が {self.num_perm} ではありません")
+        return data
+
+    def _band_keys(self, data: bytes) -> List[int]:
+        width = self.rows * _ITEM_BYTES
+        return [hash(data[b * width : (b + 1) * width]) for b in range(self.bands)]
+
+    def add(self, key: int, signature: Union[bytes, Sequence[int]]) -> None:
+        """署名を追加（既存キーは置き換え、保存形式のバイト列も受け付ける）"""
+        data = self._encode(signature)
+        with self._lock:
+            if key in self._signatures:
+                self._remove_locked(key)
+            self._signatures[key] = data
+            for buckets, band_key in zip(self._buckets, self._band_keys(data)):
+                bucket = buckets.get(band_key)
+                if bucket is None:
+                    buckets[band_key] = key
+                elif isinstance(bucket, set):
+                    bucket.add(key)
+                elif bucket != key:
+                    buckets[band_key] = {bucket, key}
+
+    def remove(self, key: int) -> None:
+        """署名を削除"""
+        with self._lock:
+            self._remove_locked(key)
+
+    def _remove_locked(self, key: int) -> None:
+        data = self._signatures.pop(key, None)
+        if data is None:
+            return
+        for buckets, band_key in zip(self._buckets, self._band_keys(data)):
+            bucket = buckets.get(band_key)
+            if bucket is None:
+                continue
+            if not isinstance(bucket, set):
+                if bucket == key:
+                    del buckets[band_key]
+                continue
+            bucket.discard(key)
+            if len(bucket) == 1:
+                buckets[band_key] = next(iter(bucket))
+
+    def get_signature(self, key: int) -> Optional[Tuple[int, ...]]:
+        data = self._signatures.get(key)
+        return MinHasher.from_bytes(data) if data is not None else None
+
+    def keys(self) -> FrozenSet[int]:
+        with self._lock:
+            return frozenset(self._signatures)
+
+    def query(
+        self,
+        signature: Union[bytes, Sequence[int]],
+        threshold: float = 0.0,
+        exclude: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        候補を検索
+
+        Args:
+            signature: 検索対象の署名
+            threshold: 推定Jaccard係数の下限
+            exclude: 除外するキー（自分自身など）
+
+        Returns:
+            [(キー, 推定Jaccard係数)]（係数の降順）
+        """
+        data = self._encode(signature)
+        with self._lock:
+            candidates: Set[int] = set()
+            for buckets, band_key in zip(self._buckets, self._band_keys(data)):
+                bucket = buckets.get(band_key)
+                if bucket is None:
+                    continue
+                if isinstance(bucket, set):
+                    candidates |= bucket
+                else:
+                    candidates.add(bucket)
+            candidates.discard(exclude)
+            scored = [
+                (key, MinHasher.jaccard_bytes(data, self._signatures[key]))
+                for key in candidates
+            ]
+
+        scored = [(key, score) for key, score in scored if score >= threshold]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored
@@ -0,0 +1,215 @@
+"""
+Text Tokenizer
+日本語テキストの正規化・n-gramトークナイザ
+
+空白区切りの単語分割では日本語の1文が1トークンになり、類似度がほぼ0になる。
+本モジュールでは以下を1か所で行い、結果をテキストのハッシュ単位でLRUキャッシュする。
+
+- NFKC正規化（全角英数・半角カナの統一）と小文字化
+- 長音記号の揺れの吸収（サーバー/サーバ → サーバ）
+- 文字種境界による単語分割（キーワード抽出用）
+- 文字bigram/trigramのシングル（類似度計算用。英数字は単語単位）
+
+同じ文書を複数のサブエージェントが処理しても、トークン化は1回で済む。
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from functools import cached_property
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+# トークン化結果キャッシュの最大件数（テキスト単位）
+TOKEN_CACHE_MAX_SIZE = 256
+# シングルの文字n-gramサイズ
+DEFAULT_NGRAM_SIZES: Tuple[int, ...] = (2, 3)
+
+_KATAKANA = "ァ-ヺ"
+_KANJI = "一-鿿㐀-䶿々〆"
+_HIRAGANA = "ぁ-ゖ"
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+# カタカナ直後のハイフン・ダッシュ類は長音記号の誤入力として扱う
+_LONG_VOWEL_LOOKALIKE_PATTERN = re.compile(f"(?<=[{_KATAKANA}])[-‐‑‒–—―−]")
+# 語末の長音記号（サーバー → サーバ）。語中の長音（データ）は残す
+_TRAILING_LONG_VOWEL_PATTERN = re.compile(f"(?<=[{_KATAKANA}])ー+(?![{_KATAKANA}ー])")
+# シングル用: 英数字の単語と、それ以外の文字の連続
+_SHINGLE_SEGMENT_PATTERN = re.compile(r"[a-z0-9_]+|[^\W_a-z0-9]+")
+# 単語分割用: 英数字・カタカナ・漢字・ひらがな・その他の文字種ごとの連続
+_WORD_PATTERN = re.compile(
+    f"[a-z0-9_]+|[{_KATAKANA}ー]+|[{_KANJI}]+|[{_HIRAGANA}]+"
+    f"|[^\\W_a-z0-9{_KATAKANA}ー{_KANJI}{_HIRAGANA}]+"
+)
+_HIRAGANA_WORD_PATTERN = re.compile(f"[{_HIRAGANA}]+")
+
+
+def fold_long_vowels(text: str) -> str:
+    """長音記号の揺れを吸収（語末の長音を除去）"""
+    text = _LONG_VOWEL_LOOKALIKE_PATTERN.sub("ー", text)
+    return _TRAILING_LONG_VOWEL_PATTERN.sub("", text)
+
+
+def normalize_text(text: str, fold_long_vowel: bool = True, lowercase: bool = True) -> str:
+    """
+    テキストを正規化
+
+    Args:
+        text: 対象テキスト
+        fold_long_vowel: 語末の長音記号を除去するか
+        lowercase: 小文字化するか
+
+    Returns:
+        NFKC正規化・空白の連続を1つにまとめたテキスト
+    """
+    if not text:
+        return ""
+    normalized = unicodedata.normalize("NFKC", text)
+    if lowercase:
+        normalized = normalized.lower()
+    normalized = _WHITESPACE_PATTERN.sub(" ", normalized).strip()
+    if fold_long_vowel:
+        normalized = fold_long_vowels(normalized)
+    return normalized
+
+
+def char_ngrams(segment: str, sizes: Sequence[int] = DEFAULT_NGRAM_SIZES) -> List[str]:
+    """
+    文字n-gramを生成
+
+    最小サイズより短いセグメントはそのまま1トークンとする。
+    """
+    if len(segment) < min(sizes):
+        return [segment] if segment else []
+    grams = []
+    for n in sizes:
+        grams.extend(segment[i : i + n] for i in range(len(segment) - n + 1))
+    return grams
+
+
+class TextTokens:
+    """
+    1テキスト分のトークン化結果
+
+    各表現は初回アクセス時に計算され、以降は再利用される。
+    """
+
+    def __init__(self, text: str, ngram_sizes: Sequence[int] = DEFAULT_NGRAM_SIZES):
+        self.text = text
+        self.ngram_sizes = tuple(ngram_sizes)
+
+    @cached_property
+    def normalized(self) -> str:
+        """NFKC正規化・小文字化したテキスト（長音はそのまま）"""
+        return normalize_text(self.text, fold_long_vowel=False)
+
+    @cached_property
+    def folded(self) -> str:
+        """正規化に加えて長音の揺れを吸収したテキスト（照合用）"""
+        return fold_long_vowels(self.normalized)
+
+    @cached_property
+    def words(self) -> List[str]:
+        """文字種境界で分割した単語（表記は normalized のまま）"""
+        return _WORD_PATTERN.findall(self.normalized)
+
+    @cached_property
+    def shingles(self) -> FrozenSet[str]:
+        """類似度計算用のシングル（英数字は単語、それ以外は文字n-gram）"""
+        tokens = set()
+        for segment in _SHINGLE_SEGMENT_PATTERN.findall(self.folded):
+            if segment.isascii():
+                tokens.add(segment)
+            else:
+                tokens.update(char_ngrams(segment, self.ngram_sizes))
+        return frozenset(tokens)
+
+
+class TextTokenizer:
+    """
+    キャッシュ付きトークナイザ
+
+    トークン化結果をテキストのハッシュ単位でLRUキャッシュする。
+    """
+
+    def __init__(
+        self,
+        cache_size: int = TOKEN_CACHE_MAX_SIZE,
+        ngram_sizes: Sequence[int] = DEFAULT_NGRAM_SIZES,
+    ):
+        self.ngram_sizes = tuple(ngram_sizes)
+        self._cache: "OrderedDict[bytes, TextTokens]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _text_key(text: str) -> bytes:
+        """キャッシュキー（テキストのハッシュ）"""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def tokenize(self, text: str) -> TextTokens:
+        """テキストのトークン化結果を取得（キャッシュ付き）"""
+        text = text or ""
+        key = self._text_key(text)
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return tokens
+            self.misses += 1
+            tokens = TextTokens(text, self.ngram_sizes)
+            self._cache[key] = tokens
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            return tokens
+
+    def similarity(self, text1: str, text2: str) -> float:
+        """2つのテキストのシングル集合のJaccard係数"""
+        if not text1 or not text2:
+            return 0.0
+        shingles1 = self.tokenize(text1).shingles
+        shingles2 = self.tokenize(text2).shingles
+        union = len(shingles1 | shingles2)
+        if not union:
+            return 0.0
+        return len(shingles1 & shingles2) / union
+
+    def clear_cache(self) -> None:
+        """キャッシュをクリア"""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def is_hiragana_word(word: str) -> bool:
+    """ひらがなのみの単語か（助詞・送り仮名の判定用）"""
+    return bool(_HIRAGANA_WORD_PATTERN.fullmatch(word))
+
+
+# シングルトンインスタンス
+_tokenizer: Optional[TextTokenizer] = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_text_tokenizer() -> TextTokenizer:
+    """共有トークナイザを取得（シングルトン）"""
+    global _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            _tokenizer = TextTokenizer()
+        return _tokenizer
+
+
+def tokenize(text: str) -> TextTokens:
+    """共有トークナイザでテキストをトークン化"""
+    return get_text_tokenizer().tokenize(text)
+
+
+def text_similarity(text1: str, text2: str) -> float:
+    """共有トークナイザで2つのテキストの類似度（Jaccard係数）を計算"""
+    return get_text_tokenizer().similarity(text1, text2)
@@ -0,0 +1,305 @@
+"""
+Tracing
+ワークフローの処理区間（スパン）の計測
+
+ワークフローの開始時に start_trace() でトレースを開始し、各処理は span() で
+区間を計測する。現在のスパンは contextvars で管理するため、コルーチン・
+（コンテキストを引き継いだ）ワーカースレッドでも親子関係が保たれる。
+トレース外で span() を呼び出した場合は何も記録しない。
+
+記録したスパンは、トレース終了時（終了後に終わったスパンはその都度）に
+sink へ渡す。保存形式は to_dict()、Chrome のトレース形式は to_chrome_trace()。
+"""
+
+import contextvars
+import functools
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SpanSink = Callable[[List[Dict[str, Any]]], None]
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "workflow_span", default=None
+)
+
+
+class Span:
+    """処理区間"""
+
+    def __init__(
+        self,
+        trace: "Trace",
+        name: str,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.thread_name = threading.current_thread().name
+        self._thread_id = threading.get_ident()
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+        self.duration_ms: Optional[float] = None
+        # 開始したスレッドのCPU時間（別のスレッドで終了した場合は None）
+        self.cpu_ms: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def set_status(self, status: str) -> None:
+        """状態（'ok' | 'error' | 'timeout' など）"""
+        self.status = status
+
+    def finish(self) -> None:
+        """終了（2回目以降は無視）"""
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        if threading.get_ident() == self._thread_id:
+            self.cpu_ms = round((time.thread_time() - self._cpu_started) * 1000, 3)
+        self.trace._on_finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "cpu_ms": self.cpu_ms,
+            "status": self.status,
+            "thread_name": self.thread_name,
+            "attributes": self.attributes,
+        }
+
+    def __repr__(self) -> str:
+        return f"<Span {self.name} duration_ms={self.duration_ms}>"
+
+
+class _NoopSpan:
+    """トレース外で使うスパン（何も記録しない）"""
+
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def set_status(self, status: str) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """1回のワークフロー実行のスパンの集まり"""
+
+    def __init__(
+        self,
+        name: str,
+        sink: Optional[SpanSink] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            name: ルートスパン名
+            sink: 終了したスパンの保存先（トレース終了時にまとめて、
+                  終了後に終わったスパンはその都度渡す）
+            attributes: ルートスパンの属性
+        """
+        self.trace_id = uuid.uuid4().hex
+        self.sink = sink
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.root = Span(self, name, attributes=attributes)
+
+    def _on_finish(self, span: Span) -> None:
+        with self._lock:
+            if self._closed:
+                flush = [span]
+            else:
+                self._spans.append(span)
+                flush = None
+                if span is self.root:
+                    self._closed = True
+                    flush = list(self._spans)
+        if flush and self.sink is not None:
+            try:
+                self.sink([s.to_dict() for s in flush])
+            except Exception as e:
+                print(f"⚠️  トレースの保存でエラー: {e}")
+
+    @property
+    def spans(self) -> List[Dict[str, Any]]:
+        """終了したスパン（開始順）"""
+        with self._lock:
+            spans = list(self._spans)
+        return [s.to_dict() for s in sorted(spans, key=lambda s: s.start_time)]
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+# ========== スパンの開始 ==========
+
+
+@contextmanager
+def _activate(span: Span) -> Iterator[Span]:
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        if span.status == "ok":
+            span.set_status("error")
+        span.set_attribute("error", str(e) or type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.finish()
+
+
+@contextmanager
+def start_trace(
+    name: str, sink: Optional[SpanSink] = None, **attributes: Any
+) -> Iterator[Span]:
+    """
+    トレースを開始し、ルートスパンを現在のスパンにする
+
+    Args:
+        name: ルートスパン名
+        sink: 終了したスパンの保存先
+        **attributes: ルートスパンの属性
+    """
+    trace = Trace(name, sink, attributes)
+    with _activate(trace.root) as root:
+        yield root
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    現在のスパンの子スパンを計測（トレース外では何も記録しない）
+
+    Args:
+        name: スパン名
+        **attributes: 属性
+
+    Yields:
+        Span（トレース外では何もしないスパン）
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    with _activate(Span(parent.trace, name, parent.span_id, attributes)) as child:
+        yield child
+
+
+def current_span() -> Optional[Span]:
+    """現在のスパン（トレース外では None）"""
+    return _current_span.get()
+
+
+def bind(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    現在のコンテキスト（スパン）で実行する関数を作成
+
+    ThreadPoolExecutor はコンテキストを引き継がないため、
+    別スレッドで実行する処理のスパンを現在のスパンの子にする場合に使う。
+    """
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+# ========== 出力形式 ==========
+
+
+def waterfall(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    ウォーターフォール表示用に整形
+
+    Returns:
+        開始順のスパン（offset_ms: 最初のスパンの開始からの経過、depth: 階層の深さ を追加）
+    """
+    if not spans:
+        return []
+    ordered = sorted(spans, key=lambda s: s["start_time"])
+    origin = ordered[0]["start_time"]
+    parents = {s["span_id"]: s.get("parent_id") for s in ordered}
+
+    def depth(span_id: Optional[str]) -> int:
+        level = 0
+        seen = set()
+        while parents.get(span_id) and span_id not in seen:
+            seen.add(span_id)
+            span_id = parents[span_id]
+            level += 1
+        return level
+
+    return [
+        {
+            **s,
+            "offset_ms": round((s["start_time"] - origin) * 1000, 3),
+            "depth": depth(s["span_id"]),
+        }
+        for s in ordered
+    ]
+
+
+def to_chrome_trace(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Chrome のトレース形式（chrome://tracing・Perfetto で表示できるJSON）に変換
+
+    スレッドごとに行を分け、スパンは完了イベント（ph: 'X'）として出力する。
+    """
+    thread_ids: Dict[str, int] = {}
+    events: List[Dict[str, Any]] = []
+    for s in sorted(spans, key=lambda s: s["start_time"]):
+        thread_name = s.get("thread_name") or "main"
+        if thread_name not in thread_ids:
+            thread_ids[thread_name] = len(thread_ids) + 1
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 1,
+                    "tid": thread_ids[thread_name],
+                    "args": {"name": thread_name},
+                }
+            )
+        event = {
+            "name": s["name"],
+            "cat": "workflow",
+            "ph": "X",
+            "ts": round(s["start_time"] * 1_000_000),
+            "dur": round((s.get("duration_ms") or 0) * 1000),
+            "pid": 1,
+            "tid": thread_ids[thread_name],
+            "args": {
+                **(s.get("attributes") or {}),
+                "status": s.get("status"),
+                "span_id": s["span_id"],
+                "parent_id": s.get("parent_id"),
+            },
+        }
+        if s.get("cpu_ms") is not None:
+            # スレッドのCPU時間
+            event["tdur"] = round(s["cpu_ms"] * 1000)
+        events.append(event)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
@@ -11,13 +11,25 @@ import logging
 import os
 import re
 import sys
+import threading
 import urllib.parse
 import urllib.request
+import zlib
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict
 
-from flask import Flask, jsonify, redirect, render_template, request, session, url_for
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_with_context,
+    url_for,
+)
 from flask_socketio import SocketIO, emit, join_room
 
 # プロジェクトルートをパスに追加
@@ -32,9 +44,18 @@ ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 env_config = load_environment(ENVIRONMENT)
 
 from src.core.itsm_classifier import ITSMClassifier
+from src.core.job_queue import (
+    JobQueue,
+    make_backfill_job_handler,
+    make_knowledge_job_handler,
+)
+from src.core.load_shedder import LoadShedder
 from src.core.workflow import WorkflowEngine
+from src.core.workflow_replay import WorkflowRecorder
+from src.mcp.faq_client import FAQClient
 from src.mcp.feedback_client import FeedbackClient
 from src.mcp.sqlite_client import SQLiteClient
+from src.workflows.cache_warmer import CacheWarmer
 from src.workflows.intelligent_search import IntelligentSearchAssistant
 from src.workflows.interactive_knowledge_creation import (
     InteractiveKnowledgeCreationWorkflow,
@@ -248,15 +269,126 @@ db_client = SQLiteClient(str(env_config.get("database_path", "db/knowledge.db"))
 feedback_client = FeedbackClient(
     str(env_config.get("database_path", "db/knowledge.db"))
 )
-workflow_engine = WorkflowEngine()
+faq_client = FAQClient(str(env_config.get("database_path", "db/knowledge.db")))
+workflow_engine = WorkflowEngine(
+    max_workers=env_config.get("workflow_max_workers", 8),
+    backend=env_config.get("workflow_backend", "thread"),
+    workflow_timeout=env_config.get("workflow_timeout", 300),
+    subagent_timeout=env_config.get("subagent_timeout", 60),
+    result_cache_size=env_config.get("subagent_cache_size", 256),
+    result_cache_persistent=env_config.get("subagent_cache_persistent", False),
+    mcp_source_timeout=env_config.get("mcp_source_timeout", 10),
+    mcp_recent_ttl=env_config.get("mcp_recent_ttl", 600),
+    trace_workflows=env_config.get("workflow_tracing", True),
+    # 再生ベンチマーク用に入力を記録（scripts/replay_workflows.py）
+    input_recorder=(
+        WorkflowRecorder(env_config["workflow_record_path"])
+        if env_config.get("workflow_record_path")
+        else None
+    ),
+    # 過負荷時は優先度の低いサブエージェント・MCP補強を後回しにする（補完はジョブで行う）
+    load_shedder=(
+        LoadShedder(
+            queue_depth=env_config.get("load_shedding_queue_depth", 16),
+            backlog_depth=env_config.get("load_shedding_backlog_depth", 20),
+            backlog_source=lambda: job_queue.stats()["depth"],
+            latency_slo_ms=env_config.get("load_shedding_latency_slo_ms", 30000),
+            cooldown_seconds=env_config.get("load_shedding_cooldown", 30),
+        )
+        if env_config.get("load_shedding_enabled", False)
+        else None
+    ),
+)
 itsm_classifier = ITSMClassifier()
 intelligent_search = IntelligentSearchAssistant()
 workflow_studio_engine = WorkflowStudioEngine()
+cache_warmer = CacheWarmer(
+    db_client,
+    search_assistant=intelligent_search,
+    feedback_client=feedback_client,
+    time_budget_seconds=env_config.get("cache_warmup_budget", 30),
+    interval_seconds=env_config.get("cache_warmup_interval", 1800),
+    top_queries=env_config.get("cache_warmup_top_queries", 50),
+    top_entries=env_config.get("cache_warmup_top_entries", 100),
+    ai_queries=env_config.get("cache_warmup_ai_queries", 0),
+)
+
+# デプロイ直後のコールドキャッシュ対策（起動時 + 定期実行、バックグラウンド）
+if env_config.get("cache_warmup_enabled", True) and not env_config.is_test():
+    cache_warmer.start()
 
 # セッション管理（簡易版）
 chat_sessions = {}
 
 
+# ========== バックグラウンドジョブ ==========
+
+
+def _complete_chat_session(payload: Dict[str, Any], result: Dict[str, Any]):
+    """対話から投入したナレッジ生成ジョブの完了後処理"""
+    session_id = payload.get("session_id")
+    if not session_id:
+        return
+    db_client.complete_conversation_session(
+        session_id, result.get("knowledge_id") if result.get("success") else None
+    )
+    chat_sessions.pop(session_id, None)
+
+
+def _run_studio_workflow_job(payload, job, report_progress):
+    """Workflow Studioのワークフロー実行ジョブ"""
+    report_progress("running", workflow=payload.get("workflow"))
+    return workflow_studio_engine.run_workflow(
+        payload.get("workflow"), payload.get("inputs", {}), user_id=payload.get("user_id")
+    )
+
+
+def _emit_job_progress(event: Dict[str, Any]):
+    """ジョブの進捗を購読中のクライアントへ通知"""
+    socketio.emit("job_progress", event, to=f"job:{event['job_id']}")
+
+
+job_queue = JobQueue(
+    db_client,
+    workers=env_config.get("job_queue_workers", 2),
+    max_attempts=env_config.get("job_max_attempts", 3),
+)
+job_queue.register(
+    "knowledge_create",
+    make_knowledge_job_handler(workflow_engine, on_complete=_complete_chat_session),
+)
+job_queue.register("workflow_studio_run", _run_studio_workflow_job)
+job_queue.register(
+    WorkflowEngine.BACKFILL_JOB_TYPE, make_backfill_job_handler(workflow_engine)
+)
+workflow_engine.backfill_queue = job_queue
+job_queue.add_listener(_emit_job_progress)
+if not env_config.is_test():
+    job_queue.start()
+
+
+def _enqueue_job(job_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """ジョブを投入（Idempotency-Key ヘッダーで同じリクエストの再送を判別）"""
+    return job_queue.enqueue(
+        job_type, payload, idempotency_key=request.headers.get("Idempotency-Key")
+    )
+
+
+def _job_accepted_response(job: Dict[str, Any]):
+    """ジョブ受付のレスポンス（HTTP 202）"""
+    return (
+        jsonify(
+            {
+                "success": True,
+                "job_id": job["id"],
+                "status": job["status"],
+                "status_url": url_for("api_job_status", job_id=job["id"]),
+            }
+        ),
+        202,
+    )
+
+
 def _get_chat_workflow(
     session_id: str, user_id: str
 ) -> InteractiveKnowledgeCreationWorkflow:
@@ -297,7 +429,7 @@ def index():
     stats = db_client.get_statistics()
 
     # 最近のナレッジを10件取得
-    recent_knowledge = db_client.search_knowledge(limit=10)
+    recent_knowledge = db_client.search_knowledge(limit=10, snippets=True)
 
     # AI作成を優先表示
     ai_created = [k for k in recent_knowledge if k.get('source_type') == 'ai_chat']
@@ -310,44 +442,41 @@ def index():
 @app.route("/knowledge/search", methods=["GET", "POST"])
 def search_knowledge():
     """ナレッジ検索"""
-    # GETパラメータからも検索条件を受け取る（統計カードクリック時）
-    if request.method == "GET" and request.args.get("itsm_type"):
-        itsm_type = request.args.get("itsm_type")
-        results = db_client.search_knowledge(itsm_type=itsm_type, limit=50)
-        return render_template(
-            "search_results.html", query="", results=results, itsm_type_filter=itsm_type
-        )
-
-    if request.method == "POST":
-        query = request.form.get("query", "")
-        itsm_type = request.form.get("itsm_type", "")
-        tags = (
-            request.form.get("tags", "").split(",")
-            if request.form.get("tags")
-            else None
-        )
-
-        results = db_client.search_knowledge(
+    # GETパラメータからも検索条件を受け取る（統計カードクリック・ファセット選択時）
+    form = request.form if request.method == "POST" else request.args
+    if request.method == "POST" or any(
+        form.get(key) for key in ("query", "itsm_type", "tags")
+    ):
+        query = form.get("query", "")
+        itsm_type = form.get("itsm_type", "")
+        tags = form.get("tags", "").split(",") if form.get("tags") else None
+
+        search_result = db_client.search_knowledge(
             query=query if query else None,
             itsm_type=itsm_type if itsm_type else None,
             tags=tags,
             limit=50,
+            include_facets=True,
+            snippets=True,
         )
 
         return render_template(
             "search_results.html",
             query=query,
-            results=results,
+            results=search_result["results"],
+            facets=search_result["facets"],
+            total=search_result["total"],
             itsm_type_filter=itsm_type,
+            tags_filter=form.get("tags", ""),
         )
 
     # パラメータなしの場合: ナレッジ一覧とFAQ一覧を表示
     # ナレッジ一覧（Incident, Problem, Change, Release）
-    knowledge_list = db_client.search_knowledge(limit=50)
+    knowledge_list = db_client.search_knowledge(limit=50, snippets=True)
     knowledge_list = [k for k in knowledge_list if k.get("itsm_type") != "Request"]
 
     # FAQ一覧（Request = FAQ）
-    faq_list = db_client.search_knowledge(itsm_type="Request", limit=50)
+    faq_list = db_client.search_knowledge(itsm_type="Request", limit=50, snippets=True)
 
     return render_template(
         "knowledge_list.html", knowledge_list=knowledge_list, faq_list=faq_list
@@ -394,29 +523,30 @@ def create_knowledge():
         content = request.form.get("content", "")
         itsm_type = request.form.get("itsm_type", "")
         created_by = request.form.get("created_by", "webui_user")
+        force_reprocess = request.form.get("force_reprocess") in ("1", "on", "true")
 
         # ITSMタイプが指定されていない場合は自動分類
         if not itsm_type or itsm_type == "auto":
             classification = itsm_classifier.classify(title, content)
             itsm_type = classification["itsm_type"]
 
-        # ワークフロー実行
-        result = workflow_engine.process_knowledge(
-            title=title, content=content, itsm_type=itsm_type, created_by=created_by
-        )
+        if not title or not content:
+            return render_template("create.html", error="タイトルと内容は必須です")
 
-        if result["success"]:
-            # 成功メッセージ付きでリダイレクト
-            return redirect(
-                url_for(
-                    "view_knowledge",
-                    knowledge_id=result["knowledge_id"],
-                    success=1,
-                    message="ナレッジを作成しました",
-                )
-            )
-        else:
-            return render_template("create.html", error=result.get("error"))
+        # ワークフローはバックグラウンドジョブで実行し、進捗は画面で表示する
+        job = _enqueue_job(
+            "knowledge_create",
+            {
+                "title": title,
+                "content": content,
+                "itsm_type": itsm_type,
+                "created_by": created_by,
+                "force_reprocess": force_reprocess,
+            },
+        )
+        if request.accept_mimetypes.best == "application/json":
+            return _job_accepted_response(job)
+        return render_template("create.html", job_id=job["id"])
 
     return render_template("create.html")
 
@@ -477,7 +607,34 @@ def api_health():
         "path": str(log_path),
     }
 
-    # 4. 全体ステータス判定
+    # 4. サブエージェント実行プールの飽和状況
+    try:
+        pool_stats = workflow_engine.runtime.stats()
+        health_status["checks"]["subagent_pool"] = {
+            "status": "healthy" if pool_stats["loop_running"] else "unhealthy",
+            **pool_stats,
+        }
+    except Exception as e:
+        health_status["checks"]["subagent_pool"] = {
+            "status": "unhealthy",
+            "message": str(e),
+        }
+
+    # 5. バックグラウンドジョブキュー
+    try:
+        queue_stats = job_queue.stats()
+        health_status["checks"]["job_queue"] = {
+            "status": (
+                "healthy"
+                if queue_stats["workers_alive"] or env_config.is_test()
+                else "unhealthy"
+            ),
+            **queue_stats,
+        }
+    except Exception as e:
+        health_status["checks"]["job_queue"] = {"status": "unhealthy", "message": str(e)}
+
+    # 6. 全体ステータス判定
     for check in health_status["checks"].values():
         if check.get("status") == "unhealthy":
             health_status["status"] = "critical"
@@ -518,13 +675,106 @@ def api_get_knowledge():
     # 検索
     query = request.args.get("query")
     itsm_type = request.args.get("itsm_type")
+    tags = request.args.get("tags", "").split(",") if request.args.get("tags") else None
     limit = request.args.get("limit", 20, type=int)
-
-    results = db_client.search_knowledge(query=query, itsm_type=itsm_type, limit=limit)
+    offset = request.args.get("offset", 0, type=int)
+    include_facets = request.args.get("facets", "").lower() in ("1", "true", "yes")
+    snippets = request.args.get("snippets", "").lower() in ("1", "true", "yes")
+
+    # facets=1 の場合は {'results', 'facets', 'total'} を返す
+    # snippets=1 の場合は本文の代わりに一致箇所の抜粋を返す
+    results = db_client.search_knowledge(
+        query=query,
+        itsm_type=itsm_type,
+        tags=tags,
+        limit=limit,
+        offset=offset,
+        include_facets=include_facets,
+        snippets=snippets,
+    )
 
     return jsonify(results)
 
 
+# 一括取得APIで1リクエストに指定できるIDの上限
+KNOWLEDGE_BATCH_MAX_IDS = 1000
+
+
+@app.route("/api/knowledge/export", methods=["GET"])
+def api_export_knowledge():
+    """
+    ナレッジ全件エクスポートAPI（NDJSONストリーミング）
+
+    1行1ナレッジのNDJSONを単一カーソルから逐次返すため、件数に関わらず
+    メモリ使用量は一定。gzip=1 指定時はストリームのままgzip圧縮した
+    .ndjson.gz ファイルとして返す（転送時の圧縮ではないため Content-Encoding は付けない）。
+    中断した場合は最後に受信したIDを since_id に指定して再開できる。
+    """
+    itsm_type = request.args.get("itsm_type")
+    status = request.args.get("status")
+    since_id = request.args.get("since_id", 0, type=int)
+    use_gzip = request.args.get("gzip", "").lower() in ("1", "true", "yes")
+
+    def generate_lines():
+        for knowledge in db_client.iter_knowledge(
+            itsm_type=itsm_type, status=status, since_id=since_id
+        ):
+            line = json.dumps(knowledge, ensure_ascii=False, default=str) + "\n"
+            yield line.encode("utf-8")
+
+    def generate_gzip():
+        # wbits=31: gzipヘッダ付きでストリーム圧縮
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in generate_lines():
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    headers = {
+        "Content-Disposition": "attachment; filename=knowledge_export.ndjson"
+        + (".gz" if use_gzip else ""),
+        "X-Accel-Buffering": "no",
+    }
+
+    logger.info(
+        f"ナレッジエクスポート開始: itsm_type={itsm_type}, status={status}, "
+        f"since_id={since_id}, gzip={use_gzip}"
+    )
+    return Response(
+        stream_with_context(generate_gzip() if use_gzip else generate_lines()),
+        mimetype="application/gzip" if use_gzip else "application/x-ndjson",
+        headers=headers,
+    )
+
+
+@app.route("/api/knowledge/batch", methods=["GET"])
+def api_get_knowledge_batch():
+    """ナレッジ一括取得API（?ids=1,2,3）"""
+    raw_ids = [i.strip() for i in request.args.get("ids", "").split(",") if i.strip()]
+    if not raw_ids:
+        return jsonify({"error": "idsを指定してください"}), 400
+
+    try:
+        knowledge_ids = [int(i) for i in raw_ids]
+    except ValueError:
+        return jsonify({"error": "idsは整数のカンマ区切りで指定してください"}), 400
+
+    if len(knowledge_ids) > KNOWLEDGE_BATCH_MAX_IDS:
+        return (
+            jsonify(
+                {"error": f"idsは最大{KNOWLEDGE_BATCH_MAX_IDS}件まで指定できます"}
+            ),
+            400,
+        )
+
+    results = db_client.get_knowledge_batch(knowledge_ids)
+    found_ids = {k["id"] for k in results}
+    missing = [i for i in dict.fromkeys(knowledge_ids) if i not in found_ids]
+
+    return jsonify({"results": results, "missing": missing})
+
+
 @app.route("/api/statistics", methods=["GET"])
 def api_statistics():
     """統計情報API"""
@@ -640,11 +890,8 @@ def api_delete_knowledge(knowledge_id):
         if not knowledge:
             return jsonify({"error": "ナレッジが見つかりません"}), 404
 
-        # 削除実行（論理削除: statusを'deleted'に更新）
-        db_client.execute_query(
-            "UPDATE knowledge SET status = 'deleted', updated_at = ? WHERE id = ?",
-            (datetime.now().isoformat(), knowledge_id),
-        )
+        # 削除実行（論理削除: statusを'archived'に更新）
+        db_client.delete_knowledge(knowledge_id)
 
         logger.info(
             f"ナレッジ削除: ID={knowledge_id}, タイトル={knowledge.get('title', 'Unknown')}"
@@ -706,23 +953,63 @@ def chat_save():
     content = data.get("content")
     itsm_type = data.get("itsm_type")
     session_id = data.get("session_id")
-    conversation_history = data.get("conversation_history", [])
 
-    # ワークフロー実行
-    result = workflow_engine.process_knowledge(
-        title=title, content=content, itsm_type=itsm_type, created_by="ai_chat"
-    )
+    if not title or not content:
+        return jsonify({"success": False, "error": "タイトルと内容は必須です"}), 400
 
-    if session_id:
-        db_client.complete_conversation_session(
-            session_id, result.get("knowledge_id") if result.get("success") else None
+    # ワークフローはバックグラウンドジョブで実行（完了時にセッションを完了にする）
+    job = _enqueue_job(
+        "knowledge_create",
+        {
+            "title": title,
+            "content": content,
+            "itsm_type": itsm_type,
+            "created_by": "ai_chat",
+            "force_reprocess": bool(data.get("force_reprocess", False)),
+            "session_id": session_id,
+        },
+    )
+    return _job_accepted_response(job)
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def api_job_status(job_id):
+    """バックグラウンドジョブの状態"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "ジョブが見つかりません"}), 404
+
+    response = {
+        key: job[key]
+        for key in (
+            "id",
+            "job_type",
+            "status",
+            "attempts",
+            "max_attempts",
+            "progress",
+            "error",
+            "wait_ms",
         )
+    }
+    if job["status"] in (JobQueue.COMPLETED, JobQueue.FAILED):
+        response["result"] = job["result"]
+        knowledge_id = job["result"].get("knowledge_id")
+        if job["job_type"] == "knowledge_create" and knowledge_id:
+            response["redirect_url"] = url_for(
+                "view_knowledge", knowledge_id=knowledge_id, success=1
+            )
+    return jsonify(response)
 
-    # セッションをクリーンアップ
-    if session_id in chat_sessions:
-        del chat_sessions[session_id]
 
-    return jsonify(result)
+@app.route("/api/jobs/stats", methods=["GET"])
+def api_job_stats():
+    """ジョブキューの滞留件数・待ち時間（保存後のMCP補強・縮退の状況を含む）"""
+    stats = job_queue.stats()
+    stats["mcp_enrichment"] = workflow_engine.enrichment.stats()
+    if workflow_engine.load_shedder is not None:
+        stats["load_shedding"] = workflow_engine.load_shedder.stats()
+    return jsonify(stats)
 
 
 def _run_async_orchestrator(orchestrator, question, context=None):
@@ -872,6 +1159,30 @@ def handle_join_chat(data):
     emit("chat_joined", {"session_id": session_id})
 
 
+@socketio.on("join_job")
+def handle_join_job(data):
+    """バックグラウンドジョブの進捗を購読"""
+    job_id = (data or {}).get("job_id")
+    job = job_queue.get(job_id) if job_id else None
+    if not job:
+        emit("job_error", {"error": "ジョブが見つかりません"})
+        return
+
+    join_room(f"job:{job_id}")
+    # 購読前に進んだ分を取りこぼさないよう、現在の状態を返す
+    emit(
+        "job_progress",
+        {
+            "job_id": job_id,
+            "job_type": job["job_type"],
+            "status": job["status"],
+            "phase": job["progress"].get("phase", job["status"]),
+            "attempt": job["attempts"],
+            "details": job["progress"],
+        },
+    )
+
+
 @socketio.on("chat_message")
 def handle_socket_chat_message(data):
     """WebSocket経由のチャット処理"""
@@ -940,6 +1251,25 @@ def api_intelligent_search():
     return jsonify(result)
 
 
+@app.route("/api/cache/warmup", methods=["GET", "POST"])
+def api_cache_warmup():
+    """キャッシュウォームアップの状況取得（GET）・即時実行（POST）"""
+    if request.method == "POST":
+        threading.Thread(
+            target=cache_warmer.warm, name="cache-warmer-manual", daemon=True
+        ).start()
+        return jsonify({"success": True, "message": "ウォームアップを開始しました"}), 202
+
+    return jsonify(
+        {
+            "scheduled": cache_warmer.is_running(),
+            "interval_seconds": cache_warmer.interval_seconds,
+            "budget_seconds": cache_warmer.time_budget_seconds,
+            "last_report": cache_warmer.last_report,
+        }
+    )
+
+
 # ========== ワークフロー監視 ==========
 
 
@@ -969,10 +1299,37 @@ def api_workflow_detail(execution_id):
             "execution": execution,
             "subagent_logs": db_client.get_subagent_logs(execution_id),
             "hook_logs": db_client.get_hook_logs(execution_id),
+            "spans": _workflow_spans(execution_id),
         }
     )
 
 
+def _workflow_spans(execution_id):
+    """ウォーターフォール表示用のスパン（トレースを記録していない場合は空）"""
+    if workflow_engine.trace_store is None:
+        return []
+    try:
+        return workflow_engine.trace_store.waterfall(execution_id)
+    except Exception as e:
+        logger.warning(f"トレースの取得でエラー (execution_id={execution_id}): {e}")
+        return []
+
+
+@app.route("/api/workflows/<int:execution_id>/trace", methods=["GET"])
+def api_workflow_trace(execution_id):
+    """ワークフロー実行のトレース（Chrome のトレース形式、chrome://tracing・Perfettoで表示）"""
+    if workflow_engine.trace_store is None:
+        return jsonify({"error": "tracing disabled"}), 404
+    trace = workflow_engine.trace_store.chrome_trace(execution_id)
+    if not trace["traceEvents"]:
+        return jsonify({"error": "not found"}), 404
+    response = jsonify(trace)
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename=workflow-{execution_id}-trace.json"
+    )
+    return response
+
+
 @app.route("/api/workflows/run", methods=["POST"])
 def api_run_workflow():
     """Workflow Studioのワークフローを実行"""
@@ -983,10 +1340,11 @@ def api_run_workflow():
     if not workflow_name:
         return jsonify({"error": "workflowが必要です"}), 400
 
-    result = workflow_studio_engine.run_workflow(
-        workflow_name, inputs, user_id=request.remote_addr
+    job = _enqueue_job(
+        "workflow_studio_run",
+        {"workflow": workflow_name, "inputs": inputs, "user_id": request.remote_addr},
     )
-    return jsonify(result)
+    return _job_accepted_response(job)
 
 
 # ========== Server Fault ==========
@@ -1330,46 +1688,23 @@ def faq_list():
     """FAQ一覧ページ"""
     search_query = request.args.get("q", "")
     selected_category = request.args.get("category", "")
+    page = request.args.get("page", default=1, type=int)
 
-    # FAQデータを取得
-    with db_client.get_connection() as conn:
-        cursor = conn.cursor()
-
-        # カテゴリ一覧を取得
-        cursor.execute("""
-            SELECT DISTINCT category
-            FROM faq_entries
-            WHERE status = 'active' AND category IS NOT NULL
-            ORDER BY category
-        """)
-        categories = [row[0] for row in cursor.fetchall()]
-
-        # FAQを検索
-        query = """
-            SELECT id, question, answer, category, tags,
-                   view_count, helpful_count, not_helpful_count,
-                   created_at, updated_at
-            FROM faq_entries
-            WHERE status = 'active'
-        """
-        params = []
-
-        if search_query:
-            query += " AND (question LIKE ? OR answer LIKE ?)"
-            params.extend([f"%{search_query}%", f"%{search_query}%"])
-
-        if selected_category:
-            query += " AND category = ?"
-            params.append(selected_category)
-
-        query += " ORDER BY helpful_count DESC, created_at DESC"
-
-        cursor.execute(query, params)
-        faqs = [dict(row) for row in cursor.fetchall()]
+    # FAQデータを取得（検索時は関連度 × 役立ち率の順）
+    categories = faq_client.get_categories()
+    if search_query:
+        pagination = faq_client.search_faqs(
+            search_query, category=selected_category or None, page=page
+        )
+    else:
+        pagination = faq_client.list_faqs(
+            category=selected_category or None, page=page
+        )
 
     return render_template(
         "faq.html",
-        faqs=faqs,
+        faqs=pagination["results"],
+        pagination=pagination,
         categories=categories,
         search_query=search_query,
         selected_category=selected_category
@@ -1386,29 +1721,24 @@ def faq_manage():
 def search_faq():
     """FAQ検索API"""
     if request.method == "POST":
-        data = request.get_json() or {}
-        query = data.get("q", "")
+        params = request.get_json(silent=True) or {}
     else:
-        query = request.args.get("q", "")
+        params = request.args
+    query = params.get("q", "")
+    category = params.get("category") or None
+    try:
+        page = int(params.get("page", 1))
+        per_page = int(params.get("per_page", 10))
+    except (TypeError, ValueError):
+        return jsonify({"error": "page と per_page は整数で指定してください"}), 400
 
     if not query:
-        return jsonify({"results": [], "count": 0})
-
-    # FAQ検索
-    with db_client.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, question, answer, category, tags,
-                   view_count, helpful_count
-            FROM faq_entries
-            WHERE status = 'active'
-              AND (question LIKE ? OR answer LIKE ?)
-            ORDER BY helpful_count DESC
-            LIMIT 10
-        """, (f"%{query}%", f"%{query}%"))
-        results = [dict(row) for row in cursor.fetchall()]
+        return jsonify({"results": [], "count": 0, "total": 0, "page": 1, "pages": 1})
 
-    return jsonify({"results": results, "count": len(results)})
+    # FAQ検索（FTS5 bm25 × 役立ち率でランキング）
+    result = faq_client.search_faqs(query, category=category, page=page, per_page=per_page)
+    result["count"] = len(result["results"])
+    return jsonify(result)
 
 
 @app.route("/api/faq/<int:faq_id>/feedback", methods=["POST"])
@@ -1420,39 +1750,8 @@ def faq_feedback(faq_id):
     user_id = data.get("user_id", "webui_user")
 
     try:
-        with db_client.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # フィードバックを記録
-            cursor.execute("""
-                INSERT INTO faq_feedback (faq_id, is_helpful, comment, user_id)
-                VALUES (?, ?, ?, ?)
-            """, (faq_id, is_helpful, comment, user_id))
-
-            # FAQのカウントを更新
-            if is_helpful:
-                cursor.execute("""
-                    UPDATE faq_entries
-                    SET helpful_count = helpful_count + 1,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """, (faq_id,))
-            else:
-                cursor.execute("""
-                    UPDATE faq_entries
-                    SET not_helpful_count = not_helpful_count + 1,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """, (faq_id,))
-
-            # 閲覧数も更新
-            cursor.execute("""
-                UPDATE faq_entries
-                SET view_count = view_count + 1
-                WHERE id = ?
-            """, (faq_id,))
-
-            conn.commit()
+        # フィードバックを記録し、評価カウント・閲覧数を更新
+        faq_client.record_feedback(faq_id, bool(is_helpful), comment, user_id)
 
         return jsonify({"success": True, "message": "フィードバックを記録しました"})
 
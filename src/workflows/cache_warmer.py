@@ -0,0 +1,264 @@
+"""
+Cache Warmer
+キャッシュウォームアップ
+
+デプロイ直後は各種キャッシュが空のため、最初の利用者の検索が遅くなる。
+search_history の頻出クエリと knowledge_usage_stats の閲覧上位ナレッジをもとに、
+以下を時間予算内で事前に実行する。
+
+1. 閲覧上位ナレッジの読み込み（DBのホットページをページキャッシュへ）
+2. インテリジェント検索の情報収集（Context7 のドキュメントキャッシュへ）
+3. 上位クエリのAI回答生成（オーケストレーターの ResponseCache へ、既定は無効）
+
+キーワード検索・ファセットの結果キャッシュは SQLiteClient.SEARCH_CACHE_TTL（30秒）で
+失効し、定期実行の間隔まで保たないため対象にしない。
+AI回答生成は API 呼び出しの費用がかかるため、ai_queries を指定した場合のみ行う。
+
+起動時にバックグラウンドで1回実行し、以降は一定間隔で再実行する。
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.mcp.sqlite_client import SQLiteClient
+
+logger = logging.getLogger(__name__)
+
+# 既定設定
+DEFAULT_TIME_BUDGET_SECONDS = 30.0
+DEFAULT_INTERVAL_SECONDS = 1800
+DEFAULT_TOP_QUERIES = 50
+DEFAULT_TOP_ENTRIES = 100
+DEFAULT_AI_QUERIES = 0  # AI回答まで生成するクエリ数（API呼び出しを伴うため既定は無効）
+DEFAULT_HISTORY_DAYS = 30
+
+
+class CacheWarmer:
+    """キャッシュウォームアップジョブ"""
+
+    def __init__(
+        self,
+        db_client: SQLiteClient,
+        search_assistant: Optional[Any] = None,
+        feedback_client: Optional[Any] = None,
+        time_budget_seconds: float = DEFAULT_TIME_BUDGET_SECONDS,
+        interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+        top_queries: int = DEFAULT_TOP_QUERIES,
+        top_entries: int = DEFAULT_TOP_ENTRIES,
+        ai_queries: int = DEFAULT_AI_QUERIES,
+        history_days: int = DEFAULT_HISTORY_DAYS,
+    ):
+        """
+        Args:
+            db_client: SQLiteクライアント（検索履歴の取得用）
+            search_assistant: IntelligentSearchAssistant（Context7・AIキャッシュ用）
+            feedback_client: FeedbackClient（閲覧上位ナレッジの取得用）
+            time_budget_seconds: 1回の実行の時間予算（秒）
+            interval_seconds: 定期実行の間隔（秒）
+            top_queries: ウォームアップする頻出クエリ数
+            top_entries: 読み込む閲覧上位ナレッジ数
+            ai_queries: AI回答まで生成するクエリ数（既定の0で無効）
+            history_days: 集計対象の日数
+        """
+        self.db_client = db_client
+        self.search_assistant = search_assistant
+        self.feedback_client = feedback_client
+        self.time_budget_seconds = time_budget_seconds
+        self.interval_seconds = interval_seconds
+        self.top_queries = top_queries
+        self.top_entries = top_entries
+        self.ai_queries = ai_queries
+        self.history_days = history_days
+
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._run_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ========== 実行 ==========
+
+    def warm(self, time_budget_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        ウォームアップを1回実行
+
+        時間予算は各処理の合間に確認し、超過した時点で残りを打ち切る。
+        実行中に再度呼ばれた場合は何もせず skipped を返す。
+
+        Args:
+            time_budget_seconds: 時間予算（秒、未指定時は既定値）
+
+        Returns:
+            実行レポート
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return {"skipped": True, "reason": "already_running"}
+
+        try:
+            budget = (
+                self.time_budget_seconds
+                if time_budget_seconds is None
+                else time_budget_seconds
+            )
+            started = time.monotonic()
+            deadline = started + budget
+            report: Dict[str, Any] = {
+                "started_at": datetime.now().isoformat(),
+                "budget_seconds": budget,
+                "budget_exhausted": False,
+                "entries_touched": 0,
+                "intelligent_queries": 0,
+                "ai_answers": 0,
+                "errors": [],
+            }
+
+            queries = self._load_top_queries(report)
+            steps = (
+                self._warm_hot_entries,
+                self._warm_intelligent_searches,
+                self._warm_ai_answers,
+            )
+            for step in steps:
+                if time.monotonic() >= deadline:
+                    report["budget_exhausted"] = True
+                    break
+                step(queries, deadline, report)
+
+            report["elapsed_ms"] = int((time.monotonic() - started) * 1000)
+            report["cache_status"] = self._cache_status()
+            self.last_report = report
+            logger.info(
+                "キャッシュウォームアップ完了: "
+                f"ナレッジ{report['entries_touched']}件, "
+                f"インテリジェント検索{report['intelligent_queries']}件, "
+                f"AI回答{report['ai_answers']}件 ({report['elapsed_ms']}ms)"
+            )
+            return report
+        finally:
+            self._run_lock.release()
+
+    def _load_top_queries(self, report: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """頻出クエリを取得"""
+        try:
+            queries = self.db_client.get_top_search_queries(
+                limit=self.top_queries, days=self.history_days
+            )
+        except Exception as e:
+            logger.warning(f"検索履歴の取得に失敗: {e}")
+            report["errors"].append({"step": "top_queries", "error": str(e)})
+            return []
+        report["top_queries"] = len(queries)
+        return queries
+
+    def _warm_hot_entries(
+        self, queries: List[Dict[str, Any]], deadline: float, report: Dict[str, Any]
+    ) -> None:
+        """閲覧上位ナレッジを読み込み、DBのホットページを温める"""
+        if not self.feedback_client or self.top_entries <= 0:
+            return
+        try:
+            popular = self.feedback_client.get_popular_knowledge(
+                limit=self.top_entries, days=self.history_days
+            )
+        except Exception as e:
+            logger.warning(f"閲覧上位ナレッジの取得に失敗: {e}")
+            report["errors"].append({"step": "hot_entries", "error": str(e)})
+            return
+        report["entries_touched"] = len(popular)
+
+    def _warm_intelligent_searches(
+        self, queries: List[Dict[str, Any]], deadline: float, report: Dict[str, Any]
+    ) -> None:
+        """自然言語クエリの情報収集を実行し、Context7 ドキュメントキャッシュを温める"""
+        if not self.search_assistant:
+            return
+        for item in self._natural_language_queries(queries):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                report["budget_exhausted"] = True
+                return
+            try:
+                self.search_assistant.prefetch(
+                    item["search_query"], deadline_seconds=remaining
+                )
+                report["intelligent_queries"] += 1
+            except Exception as e:
+                report["errors"].append({"step": "intelligent_search", "error": str(e)})
+
+    def _warm_ai_answers(
+        self, queries: List[Dict[str, Any]], deadline: float, report: Dict[str, Any]
+    ) -> None:
+        """上位クエリで検索全体を実行し、AI応答キャッシュを温める"""
+        if not self.search_assistant or self.ai_queries <= 0:
+            return
+        if not getattr(self.search_assistant, "_orchestrator", None):
+            return
+        for item in self._natural_language_queries(queries)[: self.ai_queries]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                report["budget_exhausted"] = True
+                return
+            try:
+                self.search_assistant.search(
+                    item["search_query"], deadline_seconds=remaining
+                )
+                report["ai_answers"] += 1
+            except Exception as e:
+                report["errors"].append({"step": "ai_answer", "error": str(e)})
+
+    @staticmethod
+    def _natural_language_queries(
+        queries: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        return [q for q in queries if q.get("search_type") == "natural_language"]
+
+    def _cache_status(self) -> Dict[str, Any]:
+        """ウォームアップ後のキャッシュ状況"""
+        status: Dict[str, Any] = {}
+        context7 = getattr(self.search_assistant, "context7", None)
+        if context7 is not None:
+            status["context7_cached_docs"] = context7.get_status()["cached_queries"]
+        if getattr(self.search_assistant, "_orchestrator", None):
+            from src.ai.orchestrator import get_cache_stats
+
+            status["response_cache"] = get_cache_stats()
+        return status
+
+    # ========== バックグラウンド実行 ==========
+
+    def start(self) -> bool:
+        """
+        バックグラウンドスレッドで起動時実行 + 定期実行を開始
+
+        Returns:
+            新たに開始した場合 True（実行中の場合 False）
+        """
+        if self._thread and self._thread.is_alive():
+            return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="cache-warmer", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """定期実行を停止"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.warm()
+            except Exception as e:
+                logger.error(f"キャッシュウォームアップエラー: {e}")
+            if self.interval_seconds <= 0:
+                return
+            self._stop_event.wait(self.interval_seconds)
@@ -11,8 +11,12 @@ import json
 import logging
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
@@ -20,21 +24,118 @@ sys.path.insert(0, str(project_root))
 from src.mcp.claude_mem_client import ClaudeMemClient
 from src.mcp.context7_client import Context7Client
 from src.mcp.sqlite_client import SQLiteClient
+from src.utils.deadline import Deadline
+from src.utils.keyword_matcher import match_keywords, register_keywords
 
 logger = logging.getLogger(__name__)
 
+# 検索全体（意図理解〜回答生成）の締め切り（秒）
+SEARCH_DEADLINE_SECONDS = float(os.getenv("INTELLIGENT_SEARCH_DEADLINE", "3.0"))
+# 締め切りを過ぎても結果を待つソース（ローカルDB、回答の本体のため）
+LOCAL_SOURCES = ("knowledge",)
+# 情報収集（DB / Context7 / Claude-Mem）を並列実行するスレッド数
+RETRIEVAL_MAX_WORKERS = int(os.getenv("INTELLIGENT_SEARCH_WORKERS", "8"))
+
+# 技術要素の抽出キーワード
+TECH_KEYWORDS: Dict[str, List[str]] = {
+    "database": [
+        "データベース",
+        "db",
+        "mysql",
+        "postgresql",
+        "sql",
+        "oracle",
+        "sqlite",
+    ],
+    "web": ["web", "ウェブ", "apache", "nginx", "http", "https", "html", "css"],
+    "network": ["ネットワーク", "network", "lan", "vpn", "wifi", "dns", "dhcp"],
+    "server": ["サーバー", "server", "サーバ", "linux", "windows", "ubuntu"],
+    "security": [
+        "セキュリティ",
+        "security",
+        "認証",
+        "auth",
+        "ssl",
+        "tls",
+        "暗号",
+    ],
+    "cloud": [
+        "クラウド",
+        "cloud",
+        "aws",
+        "azure",
+        "gcp",
+        "docker",
+        "kubernetes",
+    ],
+    "application": [
+        "アプリ",
+        "application",
+        "ソフトウェア",
+        "software",
+        "システム",
+    ],
+}
+
+# 問題の種類の分類キーワード（先に一致したものを採用）
+PROBLEM_TYPE_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ("performance", ["遅い", "slow", "パフォーマンス", "重い", "タイムアウト"]),
+    ("error", ["エラー", "error", "障害", "ダウン", "停止", "クラッシュ"]),
+    ("configuration", ["設定", "config", "変更", "セットアップ", "インストール"]),
+    ("security", ["セキュリティ", "脆弱性", "攻撃", "不正", "マルウェア"]),
+    ("investigation", ["なぜ", "理由", "原因", "どうして"]),
+]
+
+# パフォーマンス関連とみなす本文中の語（抜粋ではなく本文全体をDB側で判定する）
+PERFORMANCE_CONTENT_TERM = "performance"
+
+register_keywords(
+    "intelligent_search",
+    [kw for keywords in TECH_KEYWORDS.values() for kw in keywords]
+    + [kw for _, keywords in PROBLEM_TYPE_KEYWORDS for kw in keywords],
+)
+
+_retrieval_executor: Optional[ThreadPoolExecutor] = None
+_retrieval_executor_lock = threading.Lock()
+
+
+def get_retrieval_executor() -> ThreadPoolExecutor:
+    """情報収集用の共有スレッドプールを取得（シングルトン）"""
+    global _retrieval_executor
+    with _retrieval_executor_lock:
+        if _retrieval_executor is None:
+            _retrieval_executor = ThreadPoolExecutor(
+                max_workers=RETRIEVAL_MAX_WORKERS,
+                thread_name_prefix="intelligent-search",
+            )
+        return _retrieval_executor
+
 
 class IntelligentSearchAssistant:
     """インテリジェント検索アシスタント（AI駆動版）"""
 
-    def __init__(self):
-        self.db_client = SQLiteClient()
-        self.context7 = Context7Client()
-        self.claude_mem = ClaudeMemClient()
+    def __init__(
+        self,
+        db_client: Optional[SQLiteClient] = None,
+        context7: Optional[Context7Client] = None,
+        claude_mem: Optional[ClaudeMemClient] = None,
+        use_ai: bool = True,
+    ):
+        """
+        Args:
+            db_client: SQLiteクライアント（未指定時は既定DB）
+            context7: Context7クライアント
+            claude_mem: Claude-Memクライアント
+            use_ai: AIオーケストレーターを使用するか（ベンチマーク等では False）
+        """
+        self.db_client = db_client or SQLiteClient()
+        self.context7 = context7 or Context7Client()
+        self.claude_mem = claude_mem or ClaudeMemClient()
 
         # AI Orchestrator
         self._orchestrator = None
-        self._init_orchestrator()
+        if use_ai:
+            self._init_orchestrator()
 
     def _init_orchestrator(self):
         """AIオーケストレーターを初期化"""
@@ -46,36 +147,58 @@ class IntelligentSearchAssistant:
         except Exception as e:
             logger.warning(f"AIオーケストレーター初期化失敗: {e}")
 
-    def search(self, query: str) -> Dict[str, Any]:
+    def search(
+        self, query: str, deadline_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         自然言語クエリで検索
 
+        DB検索・Context7・Claude-Mem は締め切り付きで並列に実行し、
+        締め切りまでに応答しなかった外部ソースは dropped_sources に記録して除外する。
+        ローカルDBの検索は締め切りを過ぎても結果を待つ。AIによる回答生成も
+        同じ締め切りで打ち切り、間に合わない場合はナレッジからの回答に切り替える。
+
         Args:
             query: 自然言語の質問（例: 「データベースが遅い時はどうすればいい？」）
+            deadline_seconds: 意図理解〜回答生成の締め切り（秒、未指定時は既定値）
 
         Returns:
             総合的な回答とナレッジ（根拠分離）
         """
+        started = time.perf_counter()
+        deadline = Deadline(
+            SEARCH_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+        )
+        timings: Dict[str, int] = {}
+
         # Step 1: 意図理解（AI駆動）
+        stage_start = time.perf_counter()
         intent = (
             self._understand_intent_with_ai(query)
             if self._orchestrator
             else self._understand_intent(query)
         )
+        timings["intent"] = int((time.perf_counter() - stage_start) * 1000)
 
-        # Step 2: 関連ナレッジ検索
-        knowledge_results = self._search_knowledge(query, intent)
-
-        # Step 3: MCP連携で補強
-        enrichments = self._enrich_with_mcp(query, intent)
+        # Step 2-3: 関連ナレッジ検索 + MCP連携で補強（並列・締め切り付き）
+        retrieval = self._retrieve_parallel(query, intent, deadline)
+        knowledge_results = self._rank_knowledge(retrieval["knowledge"], intent)
+        enrichments = retrieval["enrichments"]
+        timings.update(retrieval["timings"])
 
-        # Step 4: AI統合回答生成（根拠分離）
+        # Step 4: AI統合回答生成（根拠分離、同じ締め切りで打ち切る）
+        stage_start = time.perf_counter()
+        dropped_sources = list(retrieval["dropped_sources"])
         if self._orchestrator:
             answer = self._generate_answer_with_ai(
-                query, knowledge_results, enrichments
+                query, knowledge_results, enrichments, deadline
             )
+            if answer.get("timed_out"):
+                dropped_sources.append({"source": "ai_answer", "reason": "timeout"})
         else:
             answer = self._generate_answer(query, knowledge_results, enrichments)
+        timings["answer"] = int((time.perf_counter() - stage_start) * 1000)
+        timings["total"] = int((time.perf_counter() - started) * 1000)
 
         return {
             "query": query,
@@ -88,8 +211,123 @@ class IntelligentSearchAssistant:
             "enrichments": enrichments,
             "suggestions": self._generate_suggestions(intent),
             "ai_used": answer.get("ai_used", []),
+            "timings": timings,
+            "dropped_sources": dropped_sources,
+            "partial": bool(dropped_sources),
+        }
+
+    def prefetch(
+        self, query: str, deadline_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        回答生成を行わず、意図理解と情報収集のみ実行（キャッシュウォームアップ用）
+
+        Context7 のドキュメントキャッシュやDBのページキャッシュが温まる。
+
+        Returns:
+            _retrieve_parallel の結果
+        """
+        deadline = Deadline(
+            SEARCH_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+        )
+        intent = self._understand_intent(query)
+        return self._retrieve_parallel(query, intent, deadline)
+
+    def _retrieve_parallel(
+        self, query: str, intent: Dict[str, Any], deadline: Deadline
+    ) -> Dict[str, Any]:
+        """
+        DB検索・Context7・Claude-Mem を並列実行（締め切り付き）
+
+        締め切りで打ち切るのは外部ソースのみで、ローカルDB（LOCAL_SOURCES）は
+        締め切りを過ぎても結果を待つ。
+
+        Args:
+            query: 検索クエリ
+            intent: 意図理解の結果
+            deadline: 締め切り
+
+        Returns:
+            knowledge, enrichments, timings（ステージ別ミリ秒）, dropped_sources
+        """
+        stages: Dict[str, Callable[[], Any]] = {
+            "knowledge": partial(
+                self.db_client.search_knowledge,
+                query=query,
+                limit=10,
+                snippets=True,
+                content_terms=self._content_terms(intent),
+            ),
+        }
+        technologies = intent.get("technologies", [])[:2]
+        for tech in technologies:
+            stages[f"context7:{tech}"] = partial(
+                self.context7.query_documentation, tech, query
+            )
+        stages["claude_mem"] = partial(self.claude_mem.search_memories, query, limit=3)
+
+        executor = get_retrieval_executor()
+        submitted = time.perf_counter()
+        futures = {
+            executor.submit(self._run_timed_stage, fn): name
+            for name, fn in stages.items()
+        }
+        done, not_done = wait(futures, timeout=deadline.remaining())
+        for future in list(not_done):
+            if futures[future] in LOCAL_SOURCES:
+                wait([future])
+                not_done.discard(future)
+                done.add(future)
+
+        results: Dict[str, Any] = {}
+        timings: Dict[str, int] = {}
+        dropped_sources: List[Dict[str, Any]] = []
+
+        for future in done:
+            name = futures[future]
+            try:
+                results[name], timings[name] = future.result()
+            except Exception as e:
+                logger.warning(f"情報収集エラー（{name}）: {e}")
+                timings[name] = int((time.perf_counter() - submitted) * 1000)
+                dropped_sources.append({"source": name, "reason": "error"})
+
+        for future in not_done:
+            # 実行中のスレッドは止められないため、結果を待たずに破棄する
+            future.cancel()
+            name = futures[future]
+            timings[name] = int((time.perf_counter() - submitted) * 1000)
+            dropped_sources.append({"source": name, "reason": "timeout"})
+
+        if dropped_sources:
+            logger.info(
+                "締め切り超過・エラーのため除外したソース: "
+                + ", ".join(d["source"] for d in dropped_sources)
+            )
+
+        enrichments: Dict[str, Any] = {}
+        if technologies:
+            enrichments["technical_docs"] = {
+                tech: results[f"context7:{tech}"]
+                for tech in technologies
+                if results.get(f"context7:{tech}")
+            }
+        enrichments["memories"] = results.get("claude_mem") or []
+
+        return {
+            "knowledge": results.get("knowledge") or [],
+            "enrichments": enrichments,
+            "timings": timings,
+            "dropped_sources": sorted(dropped_sources, key=lambda d: d["source"]),
         }
 
+    @staticmethod
+    def _run_timed_stage(fn: Callable[[], Any]) -> Tuple[Any, int]:
+        """ステージを実行し (結果, 所要ミリ秒) を返す"""
+        stage_start = time.perf_counter()
+        result = fn()
+        return result, int((time.perf_counter() - stage_start) * 1000)
+
     def _understand_intent_with_ai(self, query: str) -> Dict[str, Any]:
         """AIを使って意図を理解"""
         try:
@@ -124,96 +362,47 @@ class IntelligentSearchAssistant:
 
     def _extract_technologies(self, query: str) -> List[str]:
         """技術要素を抽出"""
-        query_lower = query.lower()
-        technologies = []
-        tech_keywords = {
-            "database": [
-                "データベース",
-                "db",
-                "mysql",
-                "postgresql",
-                "sql",
-                "oracle",
-                "sqlite",
-            ],
-            "web": ["web", "ウェブ", "apache", "nginx", "http", "https", "html", "css"],
-            "network": ["ネットワーク", "network", "lan", "vpn", "wifi", "dns", "dhcp"],
-            "server": ["サーバー", "server", "サーバ", "linux", "windows", "ubuntu"],
-            "security": [
-                "セキュリティ",
-                "security",
-                "認証",
-                "auth",
-                "ssl",
-                "tls",
-                "暗号",
-            ],
-            "cloud": [
-                "クラウド",
-                "cloud",
-                "aws",
-                "azure",
-                "gcp",
-                "docker",
-                "kubernetes",
-            ],
-            "application": [
-                "アプリ",
-                "application",
-                "ソフトウェア",
-                "software",
-                "システム",
-            ],
-        }
-
-        for tech, keywords in tech_keywords.items():
-            if any(kw in query_lower for kw in keywords):
-                technologies.append(tech)
-
-        return technologies
+        hits = match_keywords(query.lower())
+        return [
+            tech for tech, keywords in TECH_KEYWORDS.items() if hits.any(keywords)
+        ]
 
     def _classify_problem_type(self, query: str) -> str:
         """問題の種類を分類"""
-        query_lower = query.lower()
-
-        if any(
-            word in query_lower
-            for word in ["遅い", "slow", "パフォーマンス", "重い", "タイムアウト"]
-        ):
-            return "performance"
-        elif any(
-            word in query_lower
-            for word in ["エラー", "error", "障害", "ダウン", "停止", "クラッシュ"]
-        ):
-            return "error"
-        elif any(
-            word in query_lower
-            for word in ["設定", "config", "変更", "セットアップ", "インストール"]
-        ):
-            return "configuration"
-        elif any(
-            word in query_lower
-            for word in ["セキュリティ", "脆弱性", "攻撃", "不正", "マルウェア"]
-        ):
-            return "security"
-        elif any(word in query_lower for word in ["なぜ", "理由", "原因", "どうして"]):
-            return "investigation"
-        else:
-            return "general"
+        hits = match_keywords(query.lower())
+        for problem_type, keywords in PROBLEM_TYPE_KEYWORDS:
+            if hits.any(keywords):
+                return problem_type
+        return "general"
 
     def _generate_answer_with_ai(
-        self, query: str, knowledge: List[Dict[str, Any]], enrichments: Dict[str, Any]
+        self,
+        query: str,
+        knowledge: List[Dict[str, Any]],
+        enrichments: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
     ) -> Dict[str, Any]:
-        """AIを使って根拠分離された回答を生成"""
+        """
+        AIを使って根拠分離された回答を生成
+
+        deadline を過ぎた場合は生成を打ち切り、ナレッジからの回答を返す
+        （timed_out=True）。
+        """
+        timed_out = False
         try:
+            if deadline is not None and deadline.expired:
+                raise asyncio.TimeoutError()
             # オーケストレーターで処理
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
                 result = loop.run_until_complete(
-                    self._orchestrator.process(
-                        query,
-                        context={"knowledge": knowledge, "enrichments": enrichments},
+                    asyncio.wait_for(
+                        self._orchestrator.process(
+                            query,
+                            context={"knowledge": knowledge, "enrichments": enrichments},
+                        ),
+                        timeout=deadline.remaining() if deadline is not None else None,
                     )
                 )
             finally:
@@ -230,19 +419,24 @@ class IntelligentSearchAssistant:
                     enrichments.get("technical_docs") or enrichments.get("memories")
                 ),
             }
+        except asyncio.TimeoutError:
+            logger.warning("AI回答生成が締め切りを超えたため、ナレッジから回答します")
+            timed_out = True
         except Exception as e:
             logger.error(f"AI回答生成エラー: {e}")
-            # フォールバック
-            fallback = self._generate_answer(query, knowledge, enrichments)
-            return {
-                "text": fallback["text"],
-                "evidence": [],
-                "sources": [],
-                "confidence": 0.5,
-                "ai_used": ["fallback"],
-                "knowledge_count": fallback["knowledge_count"],
-                "has_enrichments": fallback["has_enrichments"],
-            }
+
+        # フォールバック
+        fallback = self._generate_answer(query, knowledge, enrichments)
+        return {
+            "text": fallback["text"],
+            "evidence": [],
+            "sources": [],
+            "confidence": 0.5,
+            "ai_used": ["fallback"],
+            "knowledge_count": fallback["knowledge_count"],
+            "has_enrichments": fallback["has_enrichments"],
+            "timed_out": timed_out,
+        }
 
     def _understand_intent(self, query: str) -> Dict[str, Any]:
         """クエリの意図を理解"""
@@ -291,21 +485,28 @@ class IntelligentSearchAssistant:
             "problem_type": problem_type,
         }
 
-    def _search_knowledge(
-        self, query: str, intent: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
-        """ナレッジを検索"""
-        # 基本検索
-        results = self.db_client.search_knowledge(query=query, limit=10)
+    @staticmethod
+    def _content_terms(intent: Dict[str, Any]) -> List[str]:
+        """本文全体に含まれるかをDB側で判定する語（_rank_knowledge で使う）"""
+        if intent["problem_type"] == "performance":
+            return [PERFORMANCE_CONTENT_TERM]
+        return []
 
-        # 意図に基づいてフィルタ・ソート
+    def _rank_knowledge(
+        self, results: List[Dict[str, Any]], intent: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """意図に基づいて検索結果をフィルタ・ソート"""
         if intent["problem_type"] == "performance":
-            # パフォーマンス関連を優先
+            # パフォーマンス関連を優先（抜粋付きの結果は本文全体の判定結果を使う）
             results = [
                 r
                 for r in results
                 if "パフォーマンス" in r.get("tags", [])
-                or "performance" in r.get("content", "").lower()
+                or (
+                    PERFORMANCE_CONTENT_TERM in r["content_matches"]
+                    if "content_matches" in r
+                    else PERFORMANCE_CONTENT_TERM in (r.get("content") or "").lower()
+                )
             ][:5]
 
         elif intent["problem_type"] == "error":
@@ -316,25 +517,6 @@ class IntelligentSearchAssistant:
 
         return results
 
-    def _enrich_with_mcp(self, query: str, intent: Dict[str, Any]) -> Dict[str, Any]:
-        """MCPで情報補強"""
-        enrichments = {}
-
-        # Context7: 技術ドキュメント
-        if intent["technologies"]:
-            tech_docs = {}
-            for tech in intent["technologies"][:2]:
-                docs = self.context7.query_documentation(tech, query)
-                if docs:
-                    tech_docs[tech] = docs
-            enrichments["technical_docs"] = tech_docs
-
-        # Claude-Mem: 過去の記憶
-        memories = self.claude_mem.search_memories(query, limit=3)
-        enrichments["memories"] = memories
-
-        return enrichments
-
     def _generate_answer(
         self, query: str, knowledge: List[Dict[str, Any]], enrichments: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -345,9 +527,12 @@ class IntelligentSearchAssistant:
         if knowledge:
             answer_parts.append("### 📚 関連するナレッジ")
             for k in knowledge[:3]:
-                summary = k.get("summary_non_technical") or k.get("title")
+                summary = (
+                    k.get("snippet")
+                    or (k.get("summary_non_technical") or k.get("title"))[:100]
+                )
                 answer_parts.append(
-                    f"- [{k['title']}](/knowledge/{k['id']}): {summary[:100]}"
+                    f"- [{k['title']}](/knowledge/{k['id']}): {summary}"
                 )
 
         # 技術ドキュメント
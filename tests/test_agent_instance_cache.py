@@ -0,0 +1,149 @@
+"""
+エージェントインスタンスのキャッシュ 単体テスト
+SubAgentExecutor のインスタンスの使い回し・事前生成・スレッドセーフ性をテスト
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.agents.executor import SubAgentExecutor
+from src.agents.loader import AgentLoader, SubAgentConfig
+
+INPUT_DATA = {
+    "title": "Webサーバー障害対応",
+    "content": "本番環境のnginxがダウンした。原因はディスク容量不足。ログを削除して復旧した。",
+    "itsm_type": "Incident",
+}
+
+
+class CountingAgent:
+    """生成回数を数えるエージェント（生成に時間がかかる）"""
+
+    created = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        time.sleep(0.05)
+        with CountingAgent.lock:
+            CountingAgent.created += 1
+
+    def execute(self, input_data):
+        return {"status": "success", "instance": id(self)}
+
+
+class FailingAgent:
+    """生成に失敗するエージェント"""
+
+    def __init__(self):
+        raise RuntimeError("初期化失敗")
+
+
+class StubLoader(AgentLoader):
+    """任意のエージェント設定を返すローダー"""
+
+    def __init__(self, agents):
+        super().__init__()
+        self._stub_agents = agents
+
+    def load(self) -> bool:
+        self._agents = dict(self._stub_agents)
+        return True
+
+
+def agent_config(name: str, cls: type, enabled: bool = True) -> SubAgentConfig:
+    return SubAgentConfig(
+        name=name,
+        description="テスト用",
+        capabilities=[],
+        prompts={},
+        enabled=enabled,
+        class_name=f"{__name__}.{cls.__name__}",
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_counter():
+    CountingAgent.created = 0
+
+
+class TestAgentInstanceCache:
+    """インスタンスのキャッシュのテスト"""
+
+    def test_warm_up_at_construction(self):
+        """生成時に有効なエージェントをすべて事前生成すること"""
+        executor = SubAgentExecutor()
+        try:
+            enabled = [
+                a.class_name
+                for a in executor.loader.get_all_agents().values()
+                if a.enabled and a.class_name
+            ]
+            assert sorted(executor.cached_agents) == sorted(enabled)
+        finally:
+            executor.shutdown()
+
+    def test_reuses_instance_across_calls(self):
+        """実行のたびに生成せず、同じインスタンスを使い回すこと"""
+        loader = StubLoader({"counting": agent_config("counting", CountingAgent)})
+        executor = SubAgentExecutor(loader=loader, warm=False)
+        try:
+            assert executor.cached_agents == []
+            first = executor.execute("counting", INPUT_DATA)
+            second = executor.execute("counting", INPUT_DATA)
+
+            assert first.success and second.success
+            assert first.output["instance"] == second.output["instance"]
+            assert CountingAgent.created == 1
+        finally:
+            executor.shutdown()
+
+    def test_concurrent_first_calls_create_one_instance(self):
+        """初回の実行が同時に行われてもインスタンスは1つだけ生成すること"""
+        loader = StubLoader({"counting": agent_config("counting", CountingAgent)})
+        executor = SubAgentExecutor(loader=loader, warm=False)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(
+                    pool.map(lambda _: executor.execute("counting", INPUT_DATA), range(8))
+                )
+
+            assert CountingAgent.created == 1
+            assert len({r.output["instance"] for r in results}) == 1
+        finally:
+            executor.shutdown()
+
+    def test_load_failure_is_not_cached(self):
+        """生成に失敗したエージェントはキャッシュせず、事前生成の失敗も記録すること"""
+        loader = StubLoader(
+            {
+                "failing": agent_config("failing", FailingAgent),
+                "disabled": agent_config("disabled", CountingAgent, enabled=False),
+            }
+        )
+        executor = SubAgentExecutor(loader=loader, warm=False)
+        try:
+            summary = executor.warm_up()
+            assert summary["loaded"] == []
+            assert "初期化失敗" in summary["failed"][f"{__name__}.FailingAgent"]
+            assert CountingAgent.created == 0
+
+            result = executor.execute("failing", INPUT_DATA)
+            assert result.output["status"] == "error"
+            assert executor.cached_agents == []
+        finally:
+            executor.shutdown()
+
+    def test_clear_instance_cache(self):
+        """キャッシュを破棄すると次の実行で生成し直すこと"""
+        loader = StubLoader({"counting": agent_config("counting", CountingAgent)})
+        executor = SubAgentExecutor(loader=loader)
+        try:
+            assert CountingAgent.created == 1
+            executor.clear_instance_cache()
+            executor.execute("counting", INPUT_DATA)
+            assert CountingAgent.created == 2
+        finally:
+            executor.shutdown()
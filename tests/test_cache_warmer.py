@@ -0,0 +1,113 @@
+"""
+CacheWarmer 単体テスト
+src/workflows/cache_warmer.py のテスト
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.mcp.claude_mem_client import ClaudeMemClient
+from src.mcp.context7_client import Context7Client
+from src.workflows.cache_warmer import CacheWarmer
+from src.workflows.intelligent_search import IntelligentSearchAssistant
+
+
+@pytest.fixture
+def search_history_client(test_sqlite_client, sample_knowledge_data):
+    """検索履歴付きのSQLiteClient"""
+    test_sqlite_client.create_knowledge(**sample_knowledge_data)
+    for _ in range(3):
+        test_sqlite_client.log_search_history("テスト", search_type="keyword")
+    for _ in range(2):
+        test_sqlite_client.log_search_history("サーバーが遅い", search_type="natural_language")
+    test_sqlite_client.log_search_history("VPN", search_type="natural_language")
+    return test_sqlite_client
+
+
+@pytest.fixture
+def assistant(search_history_client):
+    """AIなしのインテリジェント検索（MCPはスタブモード）"""
+    return IntelligentSearchAssistant(
+        db_client=search_history_client,
+        context7=Context7Client(auto_enable=False),
+        claude_mem=ClaudeMemClient(auto_enable=False),
+        use_ai=False,
+    )
+
+
+class TestTopSearchQueries:
+    """頻出クエリ取得のテスト"""
+
+    def test_top_queries_ordered_by_frequency(self, search_history_client):
+        """頻度順に集計されること"""
+        queries = search_history_client.get_top_search_queries(limit=2)
+        assert [q["search_query"] for q in queries] == ["テスト", "サーバーが遅い"]
+        assert queries[0]["hits"] == 3
+
+
+class TestCacheWarmer:
+    """ウォームアップ実行のテスト"""
+
+    def test_warm_prefetches_top_queries(self, search_history_client, assistant):
+        """頻出する自然言語クエリで情報収集が実行されること"""
+        warmer = CacheWarmer(search_history_client, search_assistant=assistant)
+        report = warmer.warm()
+
+        assert report["top_queries"] == 3
+        assert report["intelligent_queries"] == 2
+        assert report["ai_answers"] == 0  # AI無効
+        assert report["budget_exhausted"] is False
+        assert warmer.last_report is report
+
+    def test_ai_answers_opt_in(self, search_history_client):
+        """既定ではAI回答を生成しないこと（API費用がかかるため）"""
+        assistant = MagicMock()
+        assistant._orchestrator = object()
+        warmer = CacheWarmer(search_history_client, search_assistant=assistant)
+        warmer._cache_status = lambda: {}
+
+        report = warmer.warm()
+
+        assert report["ai_answers"] == 0
+        assistant.search.assert_not_called()
+
+    def test_ai_answers_limited(self, search_history_client):
+        """AI回答生成は上位 ai_queries 件に限定されること"""
+        assistant = MagicMock()
+        assistant._orchestrator = object()
+        warmer = CacheWarmer(
+            search_history_client, search_assistant=assistant, ai_queries=1
+        )
+        warmer._cache_status = lambda: {}
+
+        report = warmer.warm()
+
+        assert report["ai_answers"] == 1
+        assert assistant.search.call_args[0][0] == "サーバーが遅い"
+
+    def test_budget_stops_warmup(self, search_history_client, assistant):
+        """時間予算を超えたら打ち切ること"""
+        warmer = CacheWarmer(search_history_client, search_assistant=assistant)
+        report = warmer.warm(time_budget_seconds=0)
+
+        assert report["budget_exhausted"] is True
+        assert report["intelligent_queries"] == 0
+
+    def test_concurrent_run_skipped(self, search_history_client):
+        """実行中の再実行はスキップされること"""
+        warmer = CacheWarmer(search_history_client)
+        warmer._run_lock.acquire()
+        try:
+            assert warmer.warm()["skipped"] is True
+        finally:
+            warmer._run_lock.release()
+
+    def test_background_start_and_stop(self, search_history_client):
+        """バックグラウンド実行が開始・停止できること"""
+        warmer = CacheWarmer(search_history_client, interval_seconds=60)
+        assert warmer.start() is True
+        assert warmer.start() is False
+        warmer.stop(timeout=5)
+        assert warmer.is_running() is False
+        assert warmer.last_report is not None
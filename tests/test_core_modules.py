@@ -541,27 +541,17 @@ class TestWorkflowEngineAggregate:
         assert any("影響範囲" in i for i in result["insights"])
         assert "CI/CDの改善" in result["insights"]
 
-    def test_aggregate_includes_mcp_enrichments(self, mocked_engine, sample_subagent_results):
-        """MCP補強情報が含まれること"""
+    def test_aggregate_does_not_call_mcp(self, mocked_engine, sample_subagent_results):
+        """集約時にはMCPを呼び出さないこと（MCP補強は保存後に行う）"""
         from src.core.workflow import mcp_integration
-        mcp_integration.enrich_knowledge_with_mcps.return_value = {
-            "related_memories": [{"title": "past incident"}],
-            "technical_documentation": {"python": [{"title": "docs"}]},
-        }
-        result = mocked_engine._aggregate_knowledge(
-            "Test", "Content", "Incident", sample_subagent_results
-        )
-        assert result["mcp_enrichments"] != {}
-
-    def test_aggregate_handles_mcp_error(self, mocked_engine, sample_subagent_results):
-        """MCP補強エラー時にもinsightsが返ること"""
-        from src.core.workflow import mcp_integration
-        mcp_integration.enrich_knowledge_with_mcps.side_effect = RuntimeError("MCP Error")
         result = mocked_engine._aggregate_knowledge(
             "Test", "Content", "Incident", sample_subagent_results
         )
         assert "title" in result
-        assert result["mcp_enrichments"] == {}
+        assert "mcp_enrichments" not in result
+        mcp_integration.enrich_knowledge_with_mcps.assert_not_called()
+        mcp_integration.fetch_technical_documentation.assert_not_called()
+        mcp_integration.fetch_related_memories.assert_not_called()
 
     def test_aggregate_with_empty_subagent_results(self, mocked_engine):
         """空のサブエージェント結果でも動作すること"""
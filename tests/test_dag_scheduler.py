@@ -0,0 +1,135 @@
+"""
+サブエージェントDAGスケジューラ 単体テスト
+src/core/dag_scheduler.py, AgentLoader の depends_on, WorkflowEngine の依存実行をテスト
+"""
+
+import asyncio
+
+import pytest
+
+from src.agents.loader import AgentLoader
+from src.core.dag_scheduler import DependencyCycleError, SubAgentDAG
+from src.core.workflow import WorkflowEngine
+
+TITLE = "Webサーバー障害対応"
+CONTENT = "本番環境のnginxがダウンした。原因はディスク容量不足。ログを削除して復旧した。"
+
+
+class TestSubAgentDAG:
+    """依存グラフのテスト"""
+
+    def test_topological_order_keeps_declaration_order(self):
+        """依存を満たしつつ、実行可能なノードは宣言順で並ぶこと"""
+        dag = SubAgentDAG({"doc": ["b"], "a": [], "b": ["a"], "c": []})
+        assert dag.order == ["a", "b", "doc", "c"]
+        assert dag.roots == ["a", "c"]
+
+    def test_cycle_is_detected(self):
+        """循環があればエラーになり、循環経路が示されること"""
+        with pytest.raises(DependencyCycleError) as exc_info:
+            SubAgentDAG({"a": ["c"], "b": ["a"], "c": ["b"], "d": []})
+        assert exc_info.value.cycle[0] == exc_info.value.cycle[-1]
+        assert set(exc_info.value.cycle) == {"a", "b", "c"}
+
+    def test_unknown_dependency(self):
+        """未定義のノードへの依存はエラー"""
+        with pytest.raises(ValueError):
+            SubAgentDAG({"a": ["missing"]})
+
+    def test_critical_path(self):
+        """所要時間が最長の依存の連鎖を返すこと"""
+        dag = SubAgentDAG({"a": [], "b": [], "c": ["a", "b"], "d": []})
+        critical = dag.critical_path({"a": 10, "b": 30, "c": 5, "d": 20})
+        assert critical == {"path": ["b", "c"], "duration_ms": 35}
+
+    def test_run_starts_node_when_dependencies_finish(self):
+        """依存先が完了したノードは、無関係な遅いノードを待たずに開始すること"""
+        dag = SubAgentDAG({"slow": [], "fast": [], "after_fast": ["fast"]})
+        delays = {"slow": 0.2, "fast": 0.01, "after_fast": 0.01}
+
+        async def runner(name, dependency_results):
+            await asyncio.sleep(delays[name])
+            if name == "fast":
+                raise RuntimeError("fast failed")
+            return {"name": name, "deps": dependency_results}
+
+        report = asyncio.run(dag.run(runner))
+
+        timings = report["timings"]
+        assert timings["after_fast"]["start_ms"] < timings["slow"]["end_ms"]
+        # 失敗した依存先の結果（例外）も後続に渡される
+        assert isinstance(report["results"]["fast"], RuntimeError)
+        assert isinstance(report["results"]["after_fast"]["deps"]["fast"], RuntimeError)
+        assert report["critical_path"] == ["slow"]
+
+
+class TestDependencyConfig:
+    """depends_on 設定のテスト"""
+
+    def test_loader_reads_depends_on(self, tmp_path):
+        """depends_on が読み込まれること（未指定は空）"""
+        config_path = tmp_path / "subagents.yaml"
+        config_path.write_text(
+            "subagents:\n"
+            "  a:\n"
+            "    name: A\n"
+            "  b:\n"
+            "    name: B\n"
+            "    depends_on:\n"
+            "      - a\n",
+            encoding="utf-8",
+        )
+        assert AgentLoader(config_path).get_dependencies() == {"a": [], "b": ["a"]}
+
+    def test_repository_config(self):
+        """同梱の設定ではDocumenterがKnowledgeCuratorに依存すること"""
+        dependencies = AgentLoader().get_dependencies()
+        assert dependencies["documenter"] == ["knowledge_curator"]
+        SubAgentDAG(dependencies)  # 循環がないこと
+
+
+class TestWorkflowEngineDAG:
+    """WorkflowEngineの依存実行のテスト"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = WorkflowEngine(db_path=str(tmp_path / "dag.db"), max_workers=4)
+        yield engine
+        engine.shutdown()
+
+    def test_cycle_in_engine_dependencies(self, tmp_path):
+        """循環する依存関係ではエンジンを生成できないこと"""
+        with pytest.raises(DependencyCycleError):
+            WorkflowEngine(
+                db_path=str(tmp_path / "cycle.db"),
+                dependencies={"qa": ["coordinator"], "coordinator": ["qa"]},
+            )
+
+    def test_parallel_run_reports_schedule_and_passes_tags(self, engine):
+        """スケジュールが記録され、Documenterにキュレーターのタグが渡ること"""
+        schedule = {}
+        results = engine._execute_subagents_parallel(
+            {"title": TITLE, "content": CONTENT, "itsm_type": "Incident"},
+            execution_id=1,
+            schedule=schedule,
+        )
+
+        assert list(results) == list(engine.subagents)
+        assert set(schedule["timings"]) == set(engine.subagents)
+        timings = schedule["timings"]
+        assert timings["documenter"]["start_ms"] >= timings["knowledge_curator"]["end_ms"]
+        assert schedule["critical_path"][-1] in engine.subagents
+
+        tags = results["knowledge_curator"]["data"]["tags"]
+        assert tags
+        assert all(tag in results["documenter"]["data"]["markdown"] for tag in tags)
+
+    def test_sequential_fallback_follows_dependencies(self, engine):
+        """順次実行でも依存先の結果が渡されること"""
+        results = engine._execute_subagents_sequential(
+            {"title": TITLE, "content": CONTENT, "itsm_type": "Incident"}, 1
+        )
+
+        assert list(results) == list(engine.subagents)
+        tags = results["knowledge_curator"]["data"]["tags"]
+        assert all(tag in results["documenter"]["data"]["markdown"] for tag in tags)
@@ -0,0 +1,166 @@
+"""
+コーパス重複検出バッチ テスト
+scripts/dedup_corpus.py のクラスタリング・一括記録・再開をテスト
+"""
+
+import json
+import random
+
+import pytest
+
+from scripts.dedup_corpus import (
+    UnionFind,
+    cluster_signatures,
+    compute_chunk,
+    default_checkpoint_path,
+    run_dedup,
+)
+from src.utils.minhash import MinHasher
+
+
+@pytest.fixture
+def corpus_client(test_sqlite_client):
+    """近似重複（2組）を含むコーパス"""
+    rng = random.Random(0)
+    vocab = [f"語彙{i:03d}" for i in range(400)]
+    originals = []
+    for i in range(30):
+        content = "。".join(rng.choice(vocab) for _ in range(40))
+        originals.append(
+            test_sqlite_client.create_knowledge(
+                title=f"インシデント{i}", content=content, itsm_type="Incident"
+            )
+        )
+
+    duplicates = {}
+    for original_id in originals[:2]:
+        original = test_sqlite_client.get_knowledge(original_id)
+        duplicates[
+            test_sqlite_client.create_knowledge(
+                title=original["title"] + "（再登録）",
+                content=original["content"] + "。追記",
+                itsm_type="Incident",
+            )
+        ] = original_id
+    test_sqlite_client.expected_pairs = duplicates
+    return test_sqlite_client
+
+
+def _duplicate_rows(client):
+    with client.get_connection() as conn:
+        return conn.execute(
+            """
+            SELECT knowledge_id, potential_duplicate_id, check_type, status
+            FROM duplicate_checks ORDER BY knowledge_id
+            """
+        ).fetchall()
+
+
+class TestClustering:
+    """クラスタリングのテスト"""
+
+    def test_union_find_groups_by_smallest_id(self):
+        """推移的に結合され、代表が最小IDになること"""
+        uf = UnionFind()
+        uf.union(5, 3)
+        uf.union(3, 9)
+        uf.union(1, 2)
+        assert uf.groups() == [[1, 2], [3, 5, 9]]
+
+    def test_cluster_signatures_records_direct_pairs(self):
+        """閾値以上の組のみクラスタ化され、組は新→旧で返ること"""
+        rows = [
+            (1, "A", "サーバーのディスク容量が不足したため不要ログを削除した。"),
+            (2, "B", "サーバーのディスク容量が不足したため不要ログを削除した。"),
+            (3, "C", "VPN接続が切断される問題について証明書を更新した。"),
+        ]
+        signatures = {
+            knowledge_id: MinHasher.to_bytes(signature)
+            for knowledge_id, signature, _ in compute_chunk(rows)
+        }
+        clusters, stats = cluster_signatures(signatures, threshold=0.8)
+
+        assert [c["members"] for c in clusters] == [[1, 2]]
+        (newer, older, score), = clusters[0]["pairs"]
+        assert (newer, older) == (2, 1)
+        assert score >= 0.8
+        assert stats["matched_pairs"] == 1
+
+    def test_cluster_signatures_compares_all_bucket_members(self):
+        """代表（最小ID）と似ていないバケット内の組も比較されること"""
+        shared = [1, 2, 3, 4]
+        # B と C は先頭バンドのみ完全一致、以降の各バンドは4行中3行が一致（推定 0.76）
+        b_rest = [100 + i for i in range(124)]
+        c_rest = [v if i % 4 else v + 10_000 for i, v in enumerate(b_rest)]
+        a_rest = [20_000 + i for i in range(124)]
+        signatures = {
+            1: MinHasher.to_bytes(shared + a_rest),
+            2: MinHasher.to_bytes(shared + b_rest),
+            3: MinHasher.to_bytes(shared + c_rest),
+        }
+        clusters, stats = cluster_signatures(signatures, threshold=0.7)
+
+        assert [c["members"] for c in clusters] == [[2, 3]]
+        assert [pair[:2] for pair in clusters[0]["pairs"]] == [(3, 2)]
+        assert stats["candidate_pairs"] == 3
+
+
+class TestRunDedup:
+    """バッチ実行のテスト"""
+
+    def test_writes_pending_duplicate_checks(self, corpus_client, tmp_path):
+        """近似重複が pending の duplicate_checks として記録されること"""
+        report = run_dedup(corpus_client.db_path, workers=1, chunk_size=8)
+
+        rows = _duplicate_rows(corpus_client)
+        assert {r["knowledge_id"]: r["potential_duplicate_id"] for r in rows} == (
+            corpus_client.expected_pairs
+        )
+        assert {(r["check_type"], r["status"]) for r in rows} == {("content", "pending")}
+        assert report["signatures"]["computed"] == 32
+        assert report["clustering"]["clusters"] == 2
+
+    def test_rerun_is_incremental(self, corpus_client):
+        """再実行では計算済みの署名・記録済みの組を再処理しないこと"""
+        run_dedup(corpus_client.db_path, workers=1)
+        report = run_dedup(corpus_client.db_path, workers=1)
+
+        assert report["signatures"]["computed"] == 0
+        assert report["writing"]["rows_written"] == 0
+        assert len(_duplicate_rows(corpus_client)) == 2
+
+    def test_resume_from_checkpoint(self, corpus_client):
+        """中断したチェックポイントの続きから再開すること"""
+        checkpoint_path = default_checkpoint_path(corpus_client.db_path)
+        with open(checkpoint_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "phase": "signatures",
+                    "last_id": 30,
+                    "signatures_computed": 30,
+                    "clusters_written": 0,
+                    "rows_written": 0,
+                    "threshold": 0.8,
+                    "num_perm": MinHasher().num_perm,
+                },
+                f,
+            )
+
+        report = run_dedup(corpus_client.db_path, workers=1)
+
+        assert report["resumed_from"] == "signatures"
+        assert report["signatures"]["computed"] == 2
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            assert json.load(f)["phase"] == "done"
+
+    def test_process_pool_matches_inline(self, corpus_client):
+        """プロセスプールでも同じ結果になること"""
+        report = run_dedup(corpus_client.db_path, workers=2, chunk_size=5)
+        assert report["signatures"]["computed"] == 32
+        assert len(_duplicate_rows(corpus_client)) == 2
+
+    def test_dry_run_writes_nothing(self, corpus_client):
+        """ドライランでは duplicate_checks に書き込まないこと"""
+        report = run_dedup(corpus_client.db_path, workers=1, dry_run=True)
+        assert report["clustering"]["clusters"] == 2
+        assert _duplicate_rows(corpus_client) == []
@@ -0,0 +1,95 @@
+"""
+文書解析コンテキスト 単体テスト
+src/utils/document_analysis.py とサブエージェントでの共有をテスト
+"""
+
+from unittest.mock import patch
+
+from src.subagents import ArchitectSubAgent, DevOpsSubAgent, QASubAgent
+from src.utils.document_analysis import DocumentAnalysis
+
+TITLE = "Webサーバー障害対応"
+CONTENT = """
+本番環境のWebサーバーがダウンした。原因はディスク容量不足。
+```
+df -h
+```
+`systemctl restart nginx` で復旧した。
+$ tail -f /var/log/nginx/error.log
+""".strip()
+
+
+class TestDocumentAnalysis:
+    """DocumentAnalysisのテスト"""
+
+    def test_features_are_memoized(self):
+        """特徴量が初回アクセス時に計算され、再利用されること"""
+        analysis = DocumentAnalysis(TITLE, CONTENT)
+
+        assert analysis.content_lower is analysis.content_lower
+        assert analysis.text_lower == (TITLE + " " + CONTENT).lower()
+        assert analysis.code_blocks == ["df -h\n"]
+        assert analysis.shell_commands == ["tail -f /var/log/nginx/error.log"]
+        assert analysis.sentences[0] == "本番環境のWebサーバーがダウンした"
+        assert DocumentAnalysis("", "`systemctl restart nginx` で復旧").inline_code == [
+            "systemctl restart nginx"
+        ]
+
+    def test_similarity_is_memoized_per_text(self):
+        """同じ相手テキストとの類似度は1回だけ計算されること"""
+        analysis = DocumentAnalysis(TITLE, CONTENT)
+        with patch(
+            "src.utils.document_analysis.text_similarity", return_value=0.5
+        ) as similarity:
+            assert analysis.content_similarity("既存の内容") == 0.5
+            assert analysis.content_similarity("既存の内容") == 0.5
+            assert analysis.title_similarity("既存の内容") == 0.5
+        assert similarity.call_count == 2
+
+    def test_matches(self):
+        """タイトル・内容の照合（Noneは照合しない）"""
+        analysis = DocumentAnalysis(TITLE, CONTENT)
+        assert analysis.matches(TITLE, CONTENT)
+        assert analysis.matches(content=CONTENT)
+        assert not analysis.matches(content="別の内容")
+
+
+class TestSharedAnalysis:
+    """サブエージェント間での共有のテスト"""
+
+    def test_agents_share_pairwise_similarities(self):
+        """ArchitectとQAが既存ナレッジとの類似度を共有すること"""
+        analysis = DocumentAnalysis(TITLE, CONTENT)
+        input_data = {
+            "title": TITLE,
+            "content": CONTENT,
+            "itsm_type": "Incident",
+            "existing_knowledge": [{"id": 1, "title": "別件", "content": "VPN接続不可"}],
+            "analysis": analysis,
+        }
+        with patch(
+            "src.utils.document_analysis.text_similarity", return_value=0.1
+        ) as similarity:
+            ArchitectSubAgent().execute(input_data)
+            QASubAgent().execute(input_data)
+
+        # 内容の類似度はArchitectで計算済みのため、QAはタイトル分のみ
+        assert similarity.call_count == 2
+
+    def test_direct_call_with_other_text_builds_new_analysis(self):
+        """実行中の解析結果と異なる内容では新たに解析すること"""
+        agent = DevOpsSubAgent()
+        agent._context.analysis = DocumentAnalysis(TITLE, CONTENT)
+
+        assert agent.get_analysis(content=CONTENT) is agent._context.analysis
+        commands = agent._extract_commands("$ ls -la")
+        assert commands == [{"type": "shell_command", "content": "ls -la"}]
+
+    def test_execute_without_shared_analysis(self):
+        """解析結果が渡されない場合も従来どおり処理し、後始末されること"""
+        agent = DevOpsSubAgent()
+        result = agent.execute({"title": TITLE, "content": CONTENT})
+
+        assert result.status == "success"
+        assert len(result.data["commands"]) == 3
+        assert agent._context.analysis is None
@@ -0,0 +1,183 @@
+"""
+FAQClient 単体テスト
+src/mcp/faq_client.py のテスト
+"""
+
+import pytest
+
+from src.mcp.faq_client import FAQClient
+
+
+@pytest.fixture
+def faq_client(tmp_path):
+    """テスト用FAQClient（一時ファイルDB）"""
+    return FAQClient(db_path=str(tmp_path / "test_faq.db"))
+
+
+@pytest.fixture
+def sample_faqs(faq_client):
+    """サンプルFAQを投入"""
+    ids = {
+        "vpn": faq_client.create_faq(
+            "VPNに接続できません",
+            "VPNクライアントを再起動し、証明書の有効期限を確認してください。",
+            category="ネットワーク",
+        ),
+        "vpn_server": faq_client.create_faq(
+            "VPNの接続先サーバーはどこですか",
+            "接続先は社内ポータルのVPN設定ページに記載しています。",
+            category="ネットワーク",
+        ),
+        "password": faq_client.create_faq(
+            "パスワードを忘れました",
+            "パスワードリセット画面から再設定できます。",
+            category="アカウント",
+        ),
+        "printer": faq_client.create_faq(
+            "プリンターで印刷できません",
+            "プリントサーバーのキューを確認してください。",
+            category="ハードウェア",
+        ),
+    }
+    return ids
+
+
+class TestFAQSchema:
+    """スキーマ・FTS同期のテスト"""
+
+    def test_fts_index_created(self, faq_client):
+        """FTSインデックスが作成されること"""
+        assert faq_client.fts_available is True
+
+    def test_fts_synced_on_update_and_delete(self, faq_client, sample_faqs):
+        """更新・削除がFTSインデックスに反映されること"""
+        with faq_client.get_connection() as conn:
+            conn.execute(
+                "UPDATE faq_entries SET question = ? WHERE id = ?",
+                ("メールを送信できません", sample_faqs["printer"]),
+            )
+            conn.execute("DELETE FROM faq_entries WHERE id = ?", (sample_faqs["password"],))
+            conn.commit()
+
+        assert faq_client.search_faqs("メールを送信")["total"] == 1
+        assert faq_client.search_faqs("パスワード")["total"] == 0
+
+    def test_existing_rows_indexed_on_first_open(self, tmp_path):
+        """FTS導入前から存在するFAQもインデックスされること"""
+        db_path = str(tmp_path / "legacy.db")
+        client = FAQClient(db_path=db_path)
+        client.create_faq("ディスク容量が不足しています", "不要ファイルを削除してください。")
+        with client.get_connection() as conn:
+            conn.execute("DROP TABLE faq_fts")
+            conn.commit()
+
+        reopened = FAQClient(db_path=db_path)
+        assert reopened.search_faqs("ディスク容量")["total"] == 1
+
+    def test_normalized_columns_migrated(self, tmp_path):
+        """正規化した列がない既存DBに列を追加して補完し、索引を作り直すこと"""
+        db_path = str(tmp_path / "legacy.db")
+        client = FAQClient(db_path=db_path)
+        client.create_faq("ＶＰＮ接続不可", "証明書を更新してください。")
+        with client.get_connection() as conn:
+            conn.executescript(
+                """
+                DROP TRIGGER faq_fts_insert;
+                DROP TRIGGER faq_fts_delete;
+                DROP TRIGGER faq_fts_update;
+                DROP TABLE faq_fts;
+                ALTER TABLE faq_entries DROP COLUMN question_norm;
+                ALTER TABLE faq_entries DROP COLUMN answer_norm;
+                """
+            )
+
+        reopened = FAQClient(db_path=db_path)
+        assert reopened.search_faqs("vpn接続")["total"] == 1
+        assert reopened.search_faqs("ＶＰＮ接続")["total"] == 1
+
+
+class TestFAQSearch:
+    """ランキング検索のテスト"""
+
+    def test_search_matches_japanese_substring(self, faq_client, sample_faqs):
+        """日本語の部分一致で検索できること"""
+        result = faq_client.search_faqs("証明書")
+        assert [r["id"] for r in result["results"]] == [sample_faqs["vpn"]]
+
+    def test_search_normalizes_query(self, faq_client, sample_faqs):
+        """全角英字・長音の揺れを吸収して検索できること"""
+        assert faq_client.search_faqs("ＶＰＮ")["total"] == 2
+        result = faq_client.search_faqs("サーバ")
+        assert {r["id"] for r in result["results"]} == {
+            sample_faqs["vpn_server"],
+            sample_faqs["printer"],
+        }
+
+    def test_search_normalizes_stored_text(self, faq_client):
+        """全角・半角で登録されたFAQも、同じ表記と正規化した表記の両方で検索できること"""
+        vpn = faq_client.create_faq("ＶＰＮ接続不可", "再接続してください。")
+        server = faq_client.create_faq("ｻｰﾊﾞ の ＶＰＮ", "管理者に連絡してください。")
+
+        assert {r["id"] for r in faq_client.search_faqs("ＶＰＮ接続不可")["results"]} == {vpn}
+        assert {r["id"] for r in faq_client.search_faqs("vpn接続不可")["results"]} == {vpn}
+        assert {r["id"] for r in faq_client.search_faqs("ｻｰﾊﾞ")["results"]} == {server}
+        assert {r["id"] for r in faq_client.search_faqs("サーバー")["results"]} == {server}
+        assert {r["id"] for r in faq_client.search_faqs("vpn")["results"]} == {vpn, server}
+
+    def test_short_terms_use_like(self, faq_client, sample_faqs):
+        """3文字未満の語もLIKEで絞り込まれること"""
+        result = faq_client.search_faqs("VPN 設定")
+        assert [r["id"] for r in result["results"]] == [sample_faqs["vpn_server"]]
+
+    def test_helpfulness_boosts_ranking(self, faq_client, sample_faqs):
+        """役立ち評価の多いFAQが上位になること"""
+        for _ in range(5):
+            faq_client.record_feedback(sample_faqs["vpn_server"], True)
+        faq_client.record_feedback(sample_faqs["vpn"], False)
+
+        result = faq_client.search_faqs("VPN")
+        assert result["results"][0]["id"] == sample_faqs["vpn_server"]
+        assert result["results"][0]["helpful_count"] == 5
+
+    def test_search_pagination(self, faq_client, sample_faqs):
+        """検索結果がページングされること"""
+        first = faq_client.search_faqs("VPN", page=1, per_page=1)
+        second = faq_client.search_faqs("VPN", page=2, per_page=1)
+        assert first["total"] == 2
+        assert first["pages"] == 2
+        assert first["results"][0]["id"] != second["results"][0]["id"]
+
+    def test_empty_query(self, faq_client, sample_faqs):
+        """空クエリは空の結果を返すこと"""
+        assert faq_client.search_faqs("  ")["results"] == []
+
+
+class TestFAQList:
+    """一覧・フィードバックのテスト"""
+
+    def test_list_paginated_and_filtered(self, faq_client, sample_faqs):
+        """一覧がページング・カテゴリで絞り込まれること"""
+        page = faq_client.list_faqs(page=2, per_page=3)
+        assert page["total"] == 4
+        assert page["pages"] == 2
+        assert len(page["results"]) == 1
+
+        network = faq_client.list_faqs(category="ネットワーク")
+        assert network["total"] == 2
+        assert faq_client.get_categories() == ["アカウント", "ネットワーク", "ハードウェア"]
+
+    def test_per_page_is_clamped(self, faq_client, sample_faqs):
+        """per_page は上限で制限されること"""
+        page = faq_client.list_faqs(per_page=10000)
+        assert page["per_page"] == FAQClient.MAX_PER_PAGE
+
+    def test_record_feedback_updates_counts(self, faq_client, sample_faqs):
+        """フィードバックで評価カウントと閲覧数が更新されること"""
+        faq_client.record_feedback(sample_faqs["password"], True, "助かりました", "user1")
+        faq_client.record_feedback(sample_faqs["password"], False)
+
+        top = faq_client.list_faqs()["results"][0]
+        assert top["id"] == sample_faqs["password"]
+        assert top["helpful_count"] == 1
+        assert top["not_helpful_count"] == 1
+        assert top["view_count"] == 2
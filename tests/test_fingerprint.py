@@ -0,0 +1,140 @@
+"""
+再投稿検知（フィンガープリント）単体テスト
+src/utils/fingerprint.py, NearDuplicateIndex.find_resubmission,
+WorkflowEngine の再投稿ショートサーキットのテスト
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.core.duplicate_index import NearDuplicateIndex
+from src.core.workflow import WorkflowEngine
+from src.hooks import PreTaskHook
+from src.utils.fingerprint import (
+    compute_fingerprint,
+    from_signed64,
+    hamming_distance,
+    simhash_blocks,
+    to_signed64,
+)
+
+TITLE = "Webサーバー障害対応手順"
+CONTENT = """
+本番環境のWebサーバーがダウンした際の対応手順です。
+1. サーバーの状態確認（systemctl status nginx）
+2. エラーログの確認（/var/log/nginx/error.log）
+3. サービスの再起動
+4. 動作確認とヘルスチェック
+緊急時は管理者に連絡してください。
+""".strip()
+
+
+class TestFingerprint:
+    """フィンガープリント計算のテスト"""
+
+    def test_content_hash_ignores_formatting(self):
+        """空白・全角半角・大文字小文字の違いは完全一致とみなすこと"""
+        original = compute_fingerprint(TITLE, CONTENT)
+        reformatted = compute_fingerprint(
+            "ＷＥＢサーバー障害対応手順 ", CONTENT.replace("\n", "\n\n  ")
+        )
+        assert original["content_hash"] == reformatted["content_hash"]
+        assert original["simhash"] == reformatted["simhash"]
+
+    def test_simhash_distance_small_for_edit_large_for_unrelated(self):
+        """軽微な修正は近く、無関係な文書は遠いこと"""
+        original = compute_fingerprint(TITLE, CONTENT)["simhash"]
+        edited = compute_fingerprint(TITLE, CONTENT.replace("緊急時は", "緊急時には"))["simhash"]
+        unrelated = compute_fingerprint(
+            "VPN接続トラブル", "VPNクライアントの証明書が期限切れの場合は再発行を申請してください。"
+        )["simhash"]
+
+        assert hamming_distance(original, edited) <= 6
+        assert hamming_distance(original, unrelated) > 12
+
+    def test_signed_round_trip_and_blocks(self):
+        """符号付き64bitとの相互変換・ブロック分割が可逆であること"""
+        value = (1 << 63) | 0xABCD
+        assert from_signed64(to_signed64(value)) == value
+        assert -(1 << 63) <= to_signed64(value) < (1 << 63)
+        blocks = simhash_blocks(value)
+        assert sum(b << (8 * i) for i, b in enumerate(blocks)) == value
+
+    def test_pre_task_hook_returns_fingerprint(self):
+        """PreTaskHookがフィンガープリントを返すこと"""
+        response = PreTaskHook().execute(
+            {"title": TITLE, "content": CONTENT, "itsm_type": "Incident"}
+        )
+        assert response.details["fingerprint"] == compute_fingerprint(TITLE, CONTENT)
+
+
+class TestFindResubmission:
+    """再投稿検索のテスト"""
+
+    @pytest.fixture
+    def index(self, test_sqlite_client):
+        knowledge_id = test_sqlite_client.create_knowledge(
+            title=TITLE, content=CONTENT, itsm_type="Incident"
+        )
+        index = NearDuplicateIndex(test_sqlite_client)
+        index.load()
+        index.knowledge_id = knowledge_id
+        return index
+
+    def test_exact_match(self, index):
+        """同一内容の再投稿を検出すること（既存データは load() で補完）"""
+        match = index.find_resubmission(TITLE, CONTENT + "\n")
+        assert match["knowledge_id"] == index.knowledge_id
+        assert match["match_type"] == "exact"
+
+    def test_near_exact_match(self, index):
+        """ほぼ同一内容の再投稿を検出すること"""
+        match = index.find_resubmission(TITLE, CONTENT.replace("緊急時は", "緊急時には"))
+        assert match["knowledge_id"] == index.knowledge_id
+        assert match["match_type"] == "near_exact"
+        assert match["similarity"] >= index.RESUBMISSION_MIN_SIMILARITY
+
+    def test_unrelated_and_archived_not_matched(self, index, test_sqlite_client):
+        """無関係な内容・アーカイブ済みナレッジは対象外であること"""
+        assert index.find_resubmission("VPN接続トラブル", "証明書の期限切れを確認する。") is None
+
+        test_sqlite_client.update_knowledge(index.knowledge_id, status="archived")
+        assert index.find_resubmission(TITLE, CONTENT) is None
+
+
+class TestWorkflowShortCircuit:
+    """ワークフローの再投稿ショートサーキットのテスト"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = WorkflowEngine(db_path=str(tmp_path / "workflow.db"))
+        knowledge_id = engine.db_client.create_knowledge(
+            title=TITLE, content=CONTENT, itsm_type="Incident"
+        )
+        engine.duplicate_index.add(knowledge_id, TITLE, CONTENT)
+        engine.existing_id = knowledge_id
+        engine._execute_subagents_parallel = MagicMock(
+            side_effect=RuntimeError("reprocessed")
+        )
+        return engine
+
+    def test_resubmission_returns_existing_id(self, engine):
+        """再投稿はサブエージェントを実行せず既存IDを返すこと"""
+        result = engine.process_knowledge(TITLE, CONTENT, itsm_type="Incident")
+
+        assert result["success"] is True
+        assert result["knowledge_id"] == engine.existing_id
+        assert result["duplicate_of"] == engine.existing_id
+        assert result["match_type"] == "exact"
+        engine._execute_subagents_parallel.assert_not_called()
+
+    def test_force_reprocess_runs_workflow(self, engine):
+        """force_reprocess=True の場合は通常どおり処理すること"""
+        result = engine.process_knowledge(
+            TITLE, CONTENT, itsm_type="Incident", force_reprocess=True
+        )
+
+        assert result["success"] is False
+        assert result["error"] == "reprocessed"
+        engine._execute_subagents_parallel.assert_called_once()
@@ -6,6 +6,8 @@ src/workflows/intelligent_search.py のモックテスト
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
 
+from src.utils.deadline import Deadline
+
 
 @pytest.fixture
 def mock_search_dependencies():
@@ -162,7 +164,11 @@ class TestClassifyProblemType:
 
 
 class TestSearchKnowledge:
-    """_search_knowledge メソッドテスト"""
+    """ナレッジ検索（_retrieve_parallel + _rank_knowledge）テスト"""
+
+    def _search_knowledge(self, assistant, query, intent):
+        retrieval = assistant._retrieve_parallel(query, intent, Deadline(5))
+        return assistant._rank_knowledge(retrieval["knowledge"], intent)
 
     def test_search_knowledge_returns_results(self, assistant):
         """ナレッジ検索結果が返ること"""
@@ -170,8 +176,11 @@ class TestSearchKnowledge:
             {"id": 1, "title": "テスト", "tags": [], "itsm_type": "Incident"}
         ]
         intent = {"problem_type": "unknown", "technologies": []}
-        result = assistant._search_knowledge("テスト", intent)
+        result = self._search_knowledge(assistant, "テスト", intent)
         assert isinstance(result, list)
+        assistant.db_client.search_knowledge.assert_called_once_with(
+            query="テスト", limit=10, snippets=True, content_terms=[]
+        )
 
     def test_search_knowledge_performance_filter(self, assistant):
         """performance問題時にパフォーマンス関連でフィルタされること"""
@@ -180,10 +189,20 @@ class TestSearchKnowledge:
             {"id": 2, "title": "その他", "tags": [], "content": "無関係", "itsm_type": "Change"},
         ]
         intent = {"problem_type": "performance", "technologies": []}
-        result = assistant._search_knowledge("DBが遅い", intent)
+        result = self._search_knowledge(assistant, "DBが遅い", intent)
         # パフォーマンス関連のみが返されること
         assert all("パフォーマンス" in r.get("tags", []) or "performance" in r.get("content", "").lower() for r in result)
 
+    def test_performance_filter_uses_full_content_matches(self, assistant):
+        """抜粋付きの結果は抜粋ではなく本文全体の判定結果でフィルタされること"""
+        results = [
+            {"id": 1, "title": "DB遅延", "tags": [], "snippet": "応答が遅い…", "content_matches": ["performance"]},
+            {"id": 2, "title": "その他", "tags": [], "snippet": "performance と無関係な抜粋", "content_matches": []},
+        ]
+        intent = {"problem_type": "performance", "technologies": []}
+        assert [r["id"] for r in assistant._rank_knowledge(results, intent)] == [1]
+        assert assistant._content_terms(intent) == ["performance"]
+
 
 class TestSearch:
     """search メソッドテスト（統合）"""
@@ -211,6 +230,100 @@ class TestSearch:
         assert result["query"] == "テスト"
 
 
+class TestSearchDeadline:
+    """search の並列実行・締め切りテスト"""
+
+    def test_search_reports_stage_timings(self, assistant):
+        """ステージ別の所要時間が返ること"""
+        assistant.db_client.search_knowledge.return_value = []
+        assistant.context7.query_documentation.return_value = []
+        assistant.claude_mem.search_memories.return_value = []
+
+        result = assistant.search("データベースとネットワークが遅い")
+        timings = result["timings"]
+        for stage in ["intent", "knowledge", "context7:database",
+                      "context7:network", "claude_mem", "answer", "total"]:
+            assert stage in timings
+        assert result["dropped_sources"] == []
+        assert result["partial"] is False
+
+    def test_slow_source_is_dropped_at_deadline(self, assistant):
+        """締め切りを超えたソースは除外され、結果全体は待たされないこと"""
+        import time
+
+        def slow_memories(*args, **kwargs):
+            time.sleep(1.0)
+            return [{"title": "遅い記憶", "content": "..."}]
+
+        assistant.db_client.search_knowledge.return_value = [
+            {"id": 1, "title": "DB障害", "tags": [], "itsm_type": "Incident"}
+        ]
+        assistant.context7.query_documentation.return_value = []
+        assistant.claude_mem.search_memories.side_effect = slow_memories
+
+        started = time.perf_counter()
+        result = assistant.search("テスト", deadline_seconds=0.2)
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.9
+        assert result["partial"] is True
+        assert result["dropped_sources"] == [
+            {"source": "claude_mem", "reason": "timeout"}
+        ]
+        assert result["enrichments"]["memories"] == []
+        assert len(result["knowledge"]) == 1
+
+    def test_slow_local_source_is_awaited(self, assistant):
+        """ローカルDBの検索は締め切りを過ぎても結果を待つこと"""
+        import time
+
+        def slow_search(*args, **kwargs):
+            time.sleep(0.4)
+            return [{"id": 1, "title": "DB障害", "tags": [], "itsm_type": "Incident"}]
+
+        assistant.db_client.search_knowledge.side_effect = slow_search
+        assistant.context7.query_documentation.return_value = []
+        assistant.claude_mem.search_memories.return_value = []
+
+        result = assistant.search("テスト", deadline_seconds=0.1)
+        assert len(result["knowledge"]) == 1
+        assert result["dropped_sources"] == []
+
+    def test_ai_answer_is_cut_off_at_deadline(self, assistant):
+        """AIによる回答生成も締め切りで打ち切り、ナレッジからの回答に切り替えること"""
+        import asyncio
+        import time
+
+        async def slow_process(*args, **kwargs):
+            await asyncio.sleep(2.0)
+
+        assistant._orchestrator = MagicMock()
+        assistant._orchestrator.classify_query.return_value.value = "faq"
+        assistant._orchestrator.process = slow_process
+        assistant.db_client.search_knowledge.return_value = []
+        assistant.context7.query_documentation.return_value = []
+        assistant.claude_mem.search_memories.return_value = []
+
+        started = time.perf_counter()
+        result = assistant.search("テスト", deadline_seconds=0.2)
+        assert time.perf_counter() - started < 1.5
+        assert result["ai_used"] == ["fallback"]
+        assert result["partial"] is True
+        assert {"source": "ai_answer", "reason": "timeout"} in result["dropped_sources"]
+
+    def test_failing_source_is_dropped(self, assistant):
+        """例外を出したソースは error として除外されること"""
+        assistant.db_client.search_knowledge.return_value = []
+        assistant.context7.query_documentation.side_effect = RuntimeError("down")
+        assistant.claude_mem.search_memories.return_value = []
+
+        result = assistant.search("DBが遅い")
+        assert {"source": "context7:database", "reason": "error"} in result[
+            "dropped_sources"
+        ]
+        assert result["enrichments"]["technical_docs"] == {}
+
+
 class TestGenerateSuggestions:
     """_generate_suggestions メソッドテスト"""
 
@@ -287,7 +400,11 @@ class TestUnderstandIntentWithAI:
 
 
 class TestEnrichWithMCP:
-    """_enrich_with_mcp メソッドテスト"""
+    """MCP補強（_retrieve_parallel の enrichments）テスト"""
+
+    def _enrich_with_mcp(self, assistant, query, intent):
+        assistant.db_client.search_knowledge.return_value = []
+        return assistant._retrieve_parallel(query, intent, Deadline(5))["enrichments"]
 
     def test_enrich_with_technologies(self, assistant):
         """技術要素がある場合 Context7 が呼ばれること"""
@@ -297,7 +414,7 @@ class TestEnrichWithMCP:
         assistant.claude_mem.search_memories.return_value = []
 
         intent = {"technologies": ["database"], "problem_type": "performance"}
-        result = assistant._enrich_with_mcp("DBが遅い", intent)
+        result = self._enrich_with_mcp(assistant, "DBが遅い", intent)
 
         assert "technical_docs" in result
         assert "database" in result["technical_docs"]
@@ -308,7 +425,7 @@ class TestEnrichWithMCP:
         assistant.claude_mem.search_memories.return_value = []
 
         intent = {"technologies": [], "problem_type": "general"}
-        result = assistant._enrich_with_mcp("テスト", intent)
+        result = self._enrich_with_mcp(assistant, "テスト", intent)
 
         assert result.get("technical_docs") is None or result.get("technical_docs") == {}
         assistant.context7.query_documentation.assert_not_called()
@@ -321,7 +438,7 @@ class TestEnrichWithMCP:
         ]
 
         intent = {"technologies": [], "problem_type": "error"}
-        result = assistant._enrich_with_mcp("エラー発生", intent)
+        result = self._enrich_with_mcp(assistant, "エラー発生", intent)
 
         assert "memories" in result
         assert len(result["memories"]) == 1
@@ -333,7 +450,7 @@ class TestEnrichWithMCP:
         assistant.claude_mem.search_memories.return_value = []
 
         intent = {"technologies": ["database", "web", "network"], "problem_type": "error"}
-        assistant._enrich_with_mcp("テスト", intent)
+        self._enrich_with_mcp(assistant, "テスト", intent)
 
         assert assistant.context7.query_documentation.call_count == 2
 
@@ -0,0 +1,236 @@
+"""
+バックグラウンドジョブキュー 単体テスト
+src/core/job_queue.py をテスト
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from src.core.job_queue import JobQueue, make_knowledge_job_handler
+from src.core.workflow import WorkflowEngine
+from src.mcp.sqlite_client import SQLiteClient
+
+WEB = {
+    "title": "Webサーバー障害対応",
+    "content": "本番環境のnginxがダウンした。原因はディスク容量不足。ログを削除して復旧した。",
+    "itsm_type": "Incident",
+}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(
+        SQLiteClient(str(tmp_path / "jobs.db")),
+        workers=1,
+        retry_delay_seconds=0,
+        lease_seconds=60,
+        poll_interval_seconds=0.05,
+    )
+    yield queue
+    queue.stop()
+
+
+def wait_for(queue, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (JobQueue.COMPLETED, JobQueue.FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class TestJobQueue:
+    """JobQueueのテスト"""
+
+    def test_enqueue_is_idempotent(self, queue):
+        """同じ idempotency_key の投入は既存のジョブを返すこと"""
+        queue.register("echo", lambda payload, job, report: payload)
+
+        first = queue.enqueue("echo", {"n": 1}, idempotency_key="req-1")
+        second = queue.enqueue("echo", {"n": 2}, idempotency_key="req-1")
+
+        assert first["id"] == second["id"]
+        assert second["payload"] == {"n": 1}
+        assert queue.stats()["depth"] == 1
+
+    def test_unknown_job_type(self, queue):
+        """未登録のジョブ種別は投入できないこと"""
+        with pytest.raises(ValueError):
+            queue.enqueue("unknown", {})
+
+    def test_runs_job_and_reports_progress(self, queue):
+        """ワーカーが実行し、進捗を保存・通知すること"""
+        events = []
+
+        def handler(payload, job, report_progress):
+            report_progress("halfway", value=payload["n"])
+            return {"success": True, "doubled": payload["n"] * 2}
+
+        queue.register("double", handler)
+        queue.add_listener(events.append)
+        queue.start()
+        job = wait_for(queue, queue.enqueue("double", {"n": 21})["id"])
+
+        assert job["status"] == "completed"
+        assert job["result"]["doubled"] == 42
+        assert job["progress"] == {"phase": "halfway", "value": 21}
+        assert job["wait_ms"] is not None
+        assert [e["phase"] for e in events] == ["started", "halfway", "completed"]
+
+    def test_retries_exceptions(self, queue):
+        """例外で終わったジョブは再試行され、最大試行回数で失敗になること"""
+        calls = []
+
+        def flaky(payload, job, report_progress):
+            calls.append(job["attempts"])
+            if len(calls) < 2:
+                raise RuntimeError("一時的なエラー")
+            return {"success": True}
+
+        def broken(payload, job, report_progress):
+            raise RuntimeError("常に失敗")
+
+        queue.register("flaky", flaky)
+        queue.register("broken", broken)
+        flaky_id = queue.enqueue("flaky", {})["id"]
+        broken_id = queue.enqueue("broken", {}, max_attempts=2)["id"]
+        while queue.run_next():
+            pass
+
+        assert calls == [1, 2]
+        assert queue.get(flaky_id)["status"] == "completed"
+        failed = queue.get(broken_id)
+        assert (failed["status"], failed["attempts"]) == ("failed", 2)
+        assert failed["error"] == "常に失敗"
+
+    def test_unsuccessful_result_is_not_retried(self, queue):
+        """処理が失敗を返した場合は再試行せずに失敗とすること"""
+        queue.register("invalid", lambda p, j, r: {"success": False, "error": "入力不正"})
+        job_id = queue.enqueue("invalid", {})["id"]
+        queue.run_next()
+
+        job = queue.get(job_id)
+        assert (job["status"], job["attempts"], job["error"]) == ("failed", 1, "入力不正")
+        assert queue.run_next() is False
+
+    def test_recovers_stale_running_jobs(self, queue):
+        """生存確認が途絶えた実行中ジョブ（再起動前のもの）を再投入すること"""
+        queue.register("echo", lambda payload, job, report: {"success": True})
+        job_id = queue.enqueue("echo", {})["id"]
+        assert queue._claim()["id"] == job_id
+
+        # ワーカーが停止したまま lease_seconds が経過した状態にする
+        conn = sqlite3.connect(queue.db_client.db_path)
+        conn.execute("UPDATE jobs SET heartbeat_at = ?", (time.time() - 120,))
+        conn.commit()
+        conn.close()
+
+        assert queue.recover_stale_jobs() == 1
+        queue.run_next()
+        job = queue.get(job_id)
+        assert (job["status"], job["attempts"]) == ("completed", 2)
+
+    def test_heartbeat_keeps_long_job_alive(self, tmp_path):
+        """進捗の報告がない長い処理の間も生存確認を更新し、再投入されないこと"""
+        queue = JobQueue(
+            SQLiteClient(str(tmp_path / "jobs.db")),
+            retry_delay_seconds=0,
+            lease_seconds=0.3,
+            heartbeat_interval_seconds=0.05,
+        )
+        recovered = []
+
+        def slow(payload, job, report_progress):
+            time.sleep(0.5)
+            recovered.append(queue.recover_stale_jobs())
+            return {"success": True}
+
+        queue.register("slow", slow)
+        job_id = queue.enqueue("slow", {})["id"]
+        queue.run_next()
+
+        job = queue.get(job_id)
+        assert recovered == [0]
+        assert (job["status"], job["attempts"]) == ("completed", 1)
+
+    def test_stale_attempt_does_not_overwrite_result(self, queue):
+        """再投入後に古い試行が終わっても、結果・状態を上書きしないこと"""
+        queue.register("echo", lambda payload, job, report: {"success": True})
+        job_id = queue.enqueue("echo", {})["id"]
+        stale = queue._claim()
+
+        conn = sqlite3.connect(queue.db_client.db_path)
+        conn.execute("UPDATE jobs SET heartbeat_at = ?", (time.time() - 120,))
+        conn.commit()
+        conn.close()
+        assert queue.recover_stale_jobs() == 1
+        current = queue._claim()
+
+        queue._finish(stale, JobQueue.COMPLETED, result={"attempt": 1})
+        job = queue.get(job_id)
+        assert (job["status"], job["attempts"], job["result"]) == ("running", 2, {})
+        assert queue._heartbeat(stale) is False
+
+        queue._finish(current, JobQueue.COMPLETED, result={"attempt": 2})
+        assert queue.get(job_id)["result"] == {"attempt": 2}
+
+    def test_stats(self, queue):
+        """滞留件数・状態別件数・待ち時間を返すこと"""
+        queue.register("echo", lambda payload, job, report: {"success": True})
+        for n in range(3):
+            queue.enqueue("echo", {"n": n})
+        queue.run_next()
+
+        stats = queue.stats()
+        assert (stats["depth"], stats["completed"], stats["running"]) == (2, 1, 0)
+        assert stats["oldest_wait_ms"] >= 0
+        assert stats["max_wait_ms"] >= stats["avg_wait_ms"] >= 0
+
+
+class TestKnowledgeJobHandler:
+    """make_knowledge_job_handlerのテスト"""
+
+    @pytest.fixture
+    def engine(self, tmp_path, monkeypatch):
+        engine = WorkflowEngine(db_path=str(tmp_path / "knowledge.db"), max_workers=2)
+        # Markdownの出力先を一時ディレクトリにする
+        monkeypatch.chdir(tmp_path)
+        yield engine
+        engine.shutdown()
+
+    def test_creates_knowledge_with_progress(self, engine):
+        """ワークフローの各フェーズを進捗として保存し、完了後処理を呼ぶこと"""
+        completed = []
+        queue = JobQueue(engine.db_client, workers=1)
+        queue.register(
+            "knowledge_create",
+            make_knowledge_job_handler(
+                engine, on_complete=lambda payload, result: completed.append(result)
+            ),
+        )
+        events = []
+        queue.add_listener(events.append)
+
+        job_id = queue.enqueue("knowledge_create", WEB)["id"]
+        queue.run_next()
+
+        job = queue.get(job_id)
+        assert job["status"] == "completed"
+        assert job["progress"]["knowledge_id"] == job["result"]["knowledge_id"]
+        assert engine.db_client.get_knowledge(job["result"]["knowledge_id"])
+        assert completed[0]["knowledge_id"] == job["result"]["knowledge_id"]
+        phases = [e["phase"] for e in events]
+        assert phases.index("subagents") < phases.index("saved") < phases.index("completed")
+
+    def test_retry_after_save_does_not_duplicate(self, engine):
+        """保存済みの試行を再試行しても、ナレッジを二重に作成しないこと"""
+        handler = make_knowledge_job_handler(engine)
+        job = {"id": "j", "progress": {"phase": "saved", "knowledge_id": 7}}
+
+        result = handler(WEB, job, lambda phase, **details: None)
+
+        assert result == {"success": True, "knowledge_id": 7, "recovered": True}
+        assert engine.db_client.get_recent_workflow_executions(10) == []
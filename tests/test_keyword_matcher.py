@@ -0,0 +1,101 @@
+"""
+KeywordMatcher 単体テスト
+src/utils/keyword_matcher.py のテスト
+"""
+
+from src.utils.keyword_matcher import (
+    KeywordAutomaton,
+    KeywordRegistry,
+    get_keyword_registry,
+    match_keywords,
+)
+
+
+class TestKeywordAutomaton:
+    """KeywordAutomaton のテスト"""
+
+    def test_find_overlapping_keywords(self):
+        """重なり合うキーワードもすべて検出されること"""
+        automaton = KeywordAutomaton(["サーバ", "サーバー", "data", "database", "base"])
+        hits = automaton.find("databaseサーバーの障害")
+        assert hits == {"サーバ", "サーバー", "data", "database", "base"}
+
+    def test_find_keywords_with_separators(self):
+        """空白や記号を含むキーワードも検出されること"""
+        automaton = KeywordAutomaton(["root cause", "rm -rf", "hyper-v", "cause"])
+        hits = automaton.find("the root cause was rm -rf on hyper-v")
+        assert hits == {"root cause", "rm -rf", "hyper-v", "cause"}
+
+    def test_find_matches_substring_semantics(self):
+        """従来の部分文字列検索と同じ結果になること"""
+        keywords = ["ab", "bc", "abc", "c", "エラー", "ラー", "x y"]
+        texts = ["", "abc", "xabcx", "エラー発生", "x yz", "a b c", "ccc"]
+        automaton = KeywordAutomaton(keywords)
+        for text in texts:
+            expected = {k for k in keywords if k in text}
+            assert automaton.find(text) == expected, text
+
+    def test_empty_keywords(self):
+        """キーワードなしの場合は空集合を返すこと"""
+        assert KeywordAutomaton([]).find("text") == frozenset()
+
+
+class TestKeywordRegistry:
+    """KeywordRegistry のテスト"""
+
+    def test_match_uses_all_registered_tables(self):
+        """登録された全キーワード表で走査されること"""
+        registry = KeywordRegistry()
+        registry.register("a", ["障害", "error"])
+        registry.register("b", ["復旧"])
+        hits = registry.match("error発生、復旧済み")
+        assert hits.found == {"error", "復旧"}
+        assert hits.any(["障害", "復旧"])
+        assert hits.count(["障害", "error", "復旧"]) == 2
+
+    def test_unregistered_keywords_fall_back_to_substring(self):
+        """未登録のキーワードは部分文字列検索で判定されること"""
+        registry = KeywordRegistry()
+        registry.register("a", ["障害"])
+        hits = registry.match("test sample")
+        assert "test" in hits
+        assert hits.count(["test", "sample", "none"]) == 2
+
+    def test_match_joined_detects_keywords_across_separator(self):
+        """区切りを跨ぐキーワードも検出されること"""
+        registry = KeywordRegistry()
+        registry.register("a", ["root cause", "title", "body"])
+        hits = registry.match_joined(["title root", "cause body"])
+        assert hits.text == "title root cause body"
+        assert hits.found == {"root cause", "title", "body"}
+
+    def test_match_is_cached_per_text(self):
+        """同じテキストの走査結果はキャッシュされること"""
+        registry = KeywordRegistry()
+        registry.register("a", ["障害"])
+        first = registry.match("障害発生")
+        second = registry.match("障害発生")
+        assert first.found is second.found
+
+    def test_register_new_table_recompiles(self):
+        """新しい表の登録後は新しいキーワードも検出されること"""
+        registry = KeywordRegistry()
+        registry.register("a", ["障害"])
+        assert registry.match("障害と復旧").found == {"障害"}
+        registry.register("b", ["復旧"])
+        assert registry.match("障害と復旧").found == {"障害", "復旧"}
+
+
+class TestSharedRegistry:
+    """共有レジストリのテスト"""
+
+    def test_components_register_their_tables(self):
+        """各コンポーネントのキーワードが共有オートマトンに含まれること"""
+        from src.core.itsm_classifier import ITSMClassifier
+        from src.subagents.devops import DevOpsSubAgent
+
+        ITSMClassifier()
+        DevOpsSubAgent()
+        hits = match_keywords("本番サーバーで障害が発生しrm -rfを実行")
+        assert {"本番", "障害", "rm -rf"} <= hits.found
+        assert get_keyword_registry() is get_keyword_registry()
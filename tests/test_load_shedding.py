@@ -0,0 +1,184 @@
+"""
+過負荷時の縮退 単体テスト
+src/core/load_shedder.py と WorkflowEngine の縮退モード・補完ジョブをテスト
+"""
+
+from pathlib import Path
+
+import pytest
+
+from src.core.job_queue import JobQueue, make_backfill_job_handler
+from src.core.load_shedder import LoadShedder
+from src.core.workflow import WorkflowEngine
+
+TITLE = "Webサーバー障害対応"
+CONTENT = "本番環境のnginxがダウンした。原因はディスク容量不足。ログを削除して復旧した。"
+
+
+def overloaded_shedder(latency_ms: float, slo_ms: float = 100) -> LoadShedder:
+    """直近のレイテンシが latency_ms の LoadShedder"""
+    shedder = LoadShedder(queue_depth=None, latency_slo_ms=slo_ms, cooldown_seconds=60)
+    for _ in range(LoadShedder.LATENCY_MIN_SAMPLES):
+        shedder.record_latency(latency_ms)
+    return shedder
+
+
+class TestLoadShedder:
+    """LoadShedderのテスト"""
+
+    def test_queue_depth_levels(self):
+        """待ち件数が閾値以上で degraded、閾値の severe_factor 倍以上で critical とすること"""
+        shedder = LoadShedder(queue_depth=10, cooldown_seconds=0)
+
+        assert shedder.evaluate({"queued": 3})["mode"] == LoadShedder.NORMAL
+        degraded = shedder.evaluate({"queued": 10})
+        assert degraded["mode"] == LoadShedder.DEGRADED
+        assert degraded["shed_priorities"] == ["low"]
+        assert degraded["defer_enrichment"] is True
+        assert "サブエージェントの待ち" in degraded["reasons"][0]
+        critical = shedder.evaluate({"queued": 20})
+        assert critical["shed_priorities"] == ["low", "medium"]
+
+    def test_abandoned_work_counts_as_load(self):
+        """タイムアウト後もワーカーを占有している処理を待ちとして数えること"""
+        shedder = LoadShedder(queue_depth=4, cooldown_seconds=0)
+
+        assert shedder.evaluate({"queued": 1, "abandoned": 3})["mode"] == LoadShedder.DEGRADED
+
+    def test_latency_slo(self):
+        """件数が揃うまではレイテンシで判定せず、p95 が目標を超えたら縮退すること"""
+        shedder = LoadShedder(queue_depth=None, latency_slo_ms=100, cooldown_seconds=0)
+        shedder.record_latency(150)
+        assert shedder.evaluate()["mode"] == LoadShedder.NORMAL
+
+        for _ in range(LoadShedder.LATENCY_MIN_SAMPLES):
+            shedder.record_latency(150)
+        assert shedder.evaluate()["mode"] == LoadShedder.DEGRADED
+
+    def test_cooldown_keeps_level(self):
+        """過負荷を検知してから cooldown_seconds の間は縮退レベルを下げないこと"""
+        shedder = LoadShedder(queue_depth=10, cooldown_seconds=60)
+        assert shedder.evaluate({"queued": 25})["mode"] == LoadShedder.CRITICAL
+        assert shedder.evaluate({"queued": 0})["mode"] == LoadShedder.CRITICAL
+
+        shedder.cooldown_seconds = 0
+        assert shedder.evaluate({"queued": 0})["mode"] == LoadShedder.NORMAL
+        assert shedder.stats()["decisions"] == {"normal": 1, "degraded": 0, "critical": 2}
+
+    def test_backlog_source_is_cached(self):
+        """ジョブの滞留件数は BACKLOG_REFRESH_SECONDS の間は取得し直さないこと"""
+        calls = []
+
+        def backlog():
+            calls.append(1)
+            return 50
+
+        shedder = LoadShedder(queue_depth=None, backlog_depth=20, backlog_source=backlog)
+        assert shedder.evaluate()["mode"] == LoadShedder.CRITICAL
+        shedder.evaluate()
+        assert len(calls) == 1
+
+    def test_invalid_arguments(self):
+        """不正な severe_factor は拒否すること"""
+        with pytest.raises(ValueError):
+            LoadShedder(severe_factor=0.5)
+
+
+class TestEngineLoadShedding:
+    """WorkflowEngine の縮退モードのテスト"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = WorkflowEngine(
+            db_path=str(tmp_path / "shed.db"),
+            max_workers=4,
+            markdown_dir=str(tmp_path / "knowledge"),
+        )
+        queue = JobQueue(engine.db_client, workers=1, retry_delay_seconds=0)
+        queue.register(WorkflowEngine.BACKFILL_JOB_TYPE, make_backfill_job_handler(engine))
+        engine.backfill_queue = queue
+        yield engine
+        engine.shutdown()
+
+    def test_priorities_from_config(self, engine):
+        """優先度は subagents.yaml の priority を使うこと"""
+        assert engine.subagent_priorities["documenter"] == "low"
+        assert engine.subagent_priorities["devops"] == "medium"
+        assert engine.subagent_priorities["itsm_expert"] == "critical"
+
+    def test_normal_load_runs_everything(self, engine):
+        """過負荷でなければすべて実行し、縮退しないこと"""
+        engine.load_shedder = LoadShedder()
+        result = engine.process_knowledge(TITLE, CONTENT, "Incident")
+
+        assert result["success"] is True
+        assert result["degraded"] is False and result["load_shedding"] is None
+        assert result["mcp_enrichment_scheduled"] is True
+        assert engine.backfill_queue.stats()["depth"] == 0
+
+    def test_degraded_defers_low_priority_and_enrichment(self, engine):
+        """degraded では優先度 low のサブエージェントとMCP補強を後回しにすること"""
+        engine.load_shedder = overloaded_shedder(latency_ms=150)
+        result = engine.process_knowledge(TITLE, CONTENT, "Incident")
+
+        assert result["success"] is True and result["degraded"] is True
+        shedding = result["load_shedding"]
+        assert shedding["mode"] == LoadShedder.DEGRADED
+        assert shedding["deferred_subagents"] == ["documenter"]
+        assert shedding["enrichment_deferred"] is True
+        assert result["mcp_enrichment_scheduled"] is False
+        assert result["subagent_results"]["documenter"]["status"] == "deferred"
+        assert result["subagent_results"]["devops"]["status"] == "success"
+        assert result["timed_out_subagents"] == []
+
+        job = engine.backfill_queue.get(shedding["backfill_job_id"])
+        assert job["payload"]["subagents"] == ["documenter"]
+        logs = engine.db_client.get_subagent_logs(result["execution_id"])
+        assert "documenter" not in {log["subagent_name"] for log in logs}
+
+    def test_critical_keeps_dependencies(self, engine):
+        """critical では medium も後回しにするが、実行するサブエージェントの依存先は実行すること"""
+        engine.subagent_priorities["knowledge_curator"] = "medium"
+        engine.load_shedder = overloaded_shedder(latency_ms=1000)
+        # documenter は後回しだが、architect が knowledge_curator に依存する場合は実行する
+        engine.subagent_dag.dependencies["architect"] = ["knowledge_curator"]
+
+        plan = engine._plan_load_shedding()
+
+        assert plan["mode"] == LoadShedder.CRITICAL
+        assert set(plan["deferred_subagents"]) == {"documenter", "devops", "coordinator"}
+
+    def test_backfill_job_completes_knowledge(self, engine):
+        """補完ジョブは後回しにしたサブエージェントを実行し、要約・Markdownを更新すること"""
+        engine.load_shedder = overloaded_shedder(latency_ms=150)
+        result = engine.process_knowledge(TITLE, CONTENT, "Incident")
+        knowledge_id = result["knowledge_id"]
+        assert engine.db_client.get_knowledge(knowledge_id)["summary_technical"] == ""
+
+        # 過負荷が続いている間は延期する
+        queue = engine.backfill_queue
+        assert queue.run_next() is True
+        job = queue.get(result["load_shedding"]["backfill_job_id"])
+        assert job["status"] == JobQueue.QUEUED and "延期" in job["error"]
+
+        engine.load_shedder = LoadShedder()
+        assert queue.run_next() is True
+        job = queue.get(job["id"])
+        assert job["status"] == JobQueue.COMPLETED
+        assert job["result"]["backfilled_subagents"] == ["documenter"]
+        assert job["result"]["mcp_enrichment_scheduled"] is True
+        assert engine.enrichment.wait(5)
+
+        knowledge = engine.db_client.get_knowledge(knowledge_id)
+        assert knowledge["summary_technical"]
+        assert Path(knowledge["markdown_path"]).read_text(encoding="utf-8")
+        logs = engine.db_client.get_subagent_logs(result["execution_id"])
+        assert [log["subagent_name"] for log in logs].count("documenter") == 1
+        spans = engine.trace_store.get_spans(result["execution_id"])
+        assert "subagent_backfill" in {s["name"] for s in spans}
+
+    def test_no_backfill_queue_does_not_shed(self, engine):
+        """補完ジョブを投入できない場合は縮退しないこと"""
+        engine.backfill_queue = None
+        engine.load_shedder = overloaded_shedder(latency_ms=1000)
+        assert engine._plan_load_shedding() is None
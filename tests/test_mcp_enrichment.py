@@ -0,0 +1,166 @@
+"""
+保存後のMCP補強 単体テスト
+src/core/mcp_enrichment.py と WorkflowEngine のMCP補強の予約をテスト
+"""
+
+import time
+
+import pytest
+
+from src.core.mcp_enrichment import MCPEnrichmentStage
+from src.core.workflow import WorkflowEngine
+from src.mcp.sqlite_client import SQLiteClient
+
+CONTENT = "Webサーバーのnginxで障害が発生。接続エラーを設定変更で対策した。"
+MEMORY_INSIGHT = "📚 過去の関連記憶: 1件見つかりました"
+DOCS_INSIGHT = "📖 技術ドキュメント: 1個の技術について参照可能"
+
+
+class FakeIntegration:
+    """MCPIntegration の代わり（呼び出し回数・遅延を制御する）"""
+
+    def __init__(self, docs_delay=0.0, memories_delay=0.0):
+        self.docs_delay = docs_delay
+        self.memories_delay = memories_delay
+        self.calls = {"docs": 0, "memories": 0}
+        self.deadlines = []
+
+    def memory_keywords(self, content):
+        return ["障害"] if "障害" in content else []
+
+    def fetch_technical_documentation(self, technologies, deadline=None):
+        self.calls["docs"] += 1
+        self.deadlines.append(deadline)
+        time.sleep(self.docs_delay)
+        return {tech: [{"title": f"{tech} docs"}] for tech in technologies}
+
+    def fetch_related_memories(self, keywords, deadline=None):
+        self.calls["memories"] += 1
+        time.sleep(self.memories_delay)
+        return [{"title": "past incident"}]
+
+
+@pytest.fixture
+def db_client(tmp_path):
+    return SQLiteClient(str(tmp_path / "enrichment.db"))
+
+
+def create_knowledge(db_client):
+    return db_client.create_knowledge(
+        title="Webサーバー障害対応",
+        itsm_type="Incident",
+        content=CONTENT,
+        insights=["既存の知見"],
+        tags=["nginx"],
+    )
+
+
+class TestMCPEnrichmentStage:
+    """MCPEnrichmentStageのテスト"""
+
+    def test_appends_insights(self, db_client):
+        """補強結果を知見に追記し、同じ知見は重複して追記しないこと"""
+        stage = MCPEnrichmentStage(db_client, FakeIntegration())
+        knowledge_id = create_knowledge(db_client)
+
+        result = stage.enrich(knowledge_id, CONTENT, ["nginx", "incident"])
+        stage.enrich(knowledge_id, CONTENT, ["nginx", "incident"])
+
+        assert set(result["enrichments"]) == {"technical_documentation", "related_memories"}
+        assert db_client.get_knowledge(knowledge_id)["insights"] == [
+            "既存の知見",
+            MEMORY_INSIGHT,
+            DOCS_INSIGHT,
+        ]
+        stage.shutdown()
+
+    def test_slow_source_times_out_independently(self, db_client):
+        """遅い情報源はタイムアウトとし、他の情報源の結果は追記すること"""
+        integration = FakeIntegration(docs_delay=1.0)
+        stage = MCPEnrichmentStage(db_client, integration, source_timeout=0.2)
+        knowledge_id = create_knowledge(db_client)
+
+        started = time.perf_counter()
+        result = stage.enrich(knowledge_id, CONTENT, ["nginx"])
+
+        assert time.perf_counter() - started < 0.8
+        assert result["timed_out_sources"] == ["technical_documentation"]
+        assert result["insights"] == [MEMORY_INSIGHT]
+        # 実行中の呼び出しには打ち切りを伝える
+        assert integration.deadlines[0].cancelled
+        assert stage.stats()["source_timeouts"] == 1
+        stage.shutdown(wait=False)
+
+    def test_recent_results_are_reused(self, db_client):
+        """同じ技術・キーワードを最近補強した場合はMCPを呼び出さないこと"""
+        integration = FakeIntegration()
+        stage = MCPEnrichmentStage(db_client, integration)
+        first = create_knowledge(db_client)
+        second = create_knowledge(db_client)
+
+        stage.enrich(first, CONTENT, ["nginx"])
+        result = stage.enrich(second, CONTENT, ["NGINX"])
+
+        assert integration.calls == {"docs": 1, "memories": 1}
+        assert sorted(result["reused_sources"]) == ["related_memories", "technical_documentation"]
+        assert DOCS_INSIGHT in db_client.get_knowledge(second)["insights"]
+        stage.shutdown()
+
+    def test_reuse_can_be_disabled(self, db_client):
+        """recent_ttl=0 では毎回MCPを呼び出すこと"""
+        integration = FakeIntegration()
+        stage = MCPEnrichmentStage(db_client, integration, recent_ttl=0)
+        knowledge_id = create_knowledge(db_client)
+
+        stage.enrich(knowledge_id, CONTENT, ["nginx"])
+        stage.enrich(knowledge_id, CONTENT, ["nginx"])
+
+        assert integration.calls == {"docs": 2, "memories": 2}
+        stage.shutdown()
+
+    def test_schedule_runs_in_background(self, db_client):
+        """予約した補強はバックグラウンドで実行し、終了後は予約を受け付けないこと"""
+        stage = MCPEnrichmentStage(db_client, FakeIntegration(memories_delay=0.2))
+        knowledge_id = create_knowledge(db_client)
+
+        started = time.perf_counter()
+        future = stage.schedule(knowledge_id, CONTENT, [])
+        assert time.perf_counter() - started < 0.1
+
+        assert stage.wait(5) is True
+        assert future.result()["insights"] == [MEMORY_INSIGHT]
+        stats = stage.stats()
+        assert (stats["scheduled"], stats["completed"], stats["pending"]) == (1, 1, 0)
+
+        stage.shutdown()
+        assert stage.schedule(knowledge_id, CONTENT, []) is None
+
+
+class TestEngineEnrichment:
+    """WorkflowEngine のMCP補強の予約のテスト"""
+
+    @pytest.fixture
+    def engine(self, tmp_path, monkeypatch):
+        engine = WorkflowEngine(db_path=str(tmp_path / "engine.db"), max_workers=4)
+        # Markdownの出力先を一時ディレクトリにする
+        monkeypatch.chdir(tmp_path)
+        yield engine
+        engine.shutdown()
+
+    def test_save_does_not_wait_for_mcp(self, engine):
+        """MCPの応答を待たずにナレッジを保存し、後から知見に追記すること"""
+        engine._enrichment = MCPEnrichmentStage(
+            engine.db_client, FakeIntegration(docs_delay=1.0, memories_delay=1.0)
+        )
+
+        started = time.perf_counter()
+        result = engine.process_knowledge("Webサーバー障害対応", CONTENT, "Incident")
+
+        assert time.perf_counter() - started < 1.0
+        assert result["success"] is True
+        assert result["mcp_enrichment_scheduled"] is True
+        assert MEMORY_INSIGHT not in result["aggregated_knowledge"]["insights"]
+
+        assert engine.enrichment.wait(5) is True
+        knowledge = engine.db_client.get_knowledge(result["knowledge_id"])
+        assert MEMORY_INSIGHT in knowledge["insights"]
@@ -0,0 +1,205 @@
+"""
+MinHash/LSH 近似重複検知 単体テスト
+src/utils/minhash.py, src/core/duplicate_index.py のテスト
+"""
+
+import random
+
+import pytest
+
+from src.core.duplicate_index import NearDuplicateIndex
+from src.hooks import DuplicateCheckHook, HookResult
+from src.subagents.qa import QASubAgent
+from src.utils.minhash import LSHIndex, MinHasher
+from src.utils.text_tokenizer import tokenize
+
+BASE_CONTENT = """
+本番環境のWebサーバーがダウンした際の対応手順です。
+1. サーバーの状態確認（systemctl status nginx）
+2. エラーログの確認（/var/log/nginx/error.log）
+3. サービスの再起動
+4. 動作確認とヘルスチェック
+緊急時は管理者に連絡してください。
+""".strip()
+
+# タイトルを変え、内容の一部だけを書き換えた近似重複
+NEAR_DUPLICATE_CONTENT = BASE_CONTENT.replace("動作確認とヘルスチェック", "動作確認")
+
+
+def _signature(hasher, text):
+    return hasher.signature(tokenize(text).shingles)
+
+
+class TestMinHasher:
+    """MinHash署名のテスト"""
+
+    def test_estimate_close_to_exact_jaccard(self):
+        """推定Jaccard係数が実際の値に近いこと"""
+        rng = random.Random(0)
+        hasher = MinHasher()
+        errors = []
+        for _ in range(50):
+            base = [f"s{rng.random()}" for _ in range(200)]
+            a = set(base)
+            b = set(base[: rng.randint(50, 200)]) | {f"t{rng.random()}" for _ in range(50)}
+            exact = len(a & b) / len(a | b)
+            errors.append(abs(exact - hasher.jaccard(hasher.signature(a), hasher.signature(b))))
+        assert sum(errors) / len(errors) < 0.05
+
+    def test_signature_round_trip(self):
+        """署名がバイト列と相互変換できること"""
+        hasher = MinHasher()
+        signature = _signature(hasher, BASE_CONTENT)
+        assert len(signature) == hasher.num_perm
+        assert MinHasher.from_bytes(MinHasher.to_bytes(signature)) == signature
+
+    def test_empty_sets_are_not_similar(self):
+        """空集合同士は類似と判定しないこと"""
+        hasher = MinHasher()
+        assert hasher.jaccard(hasher.signature([]), hasher.signature([])) == 0.0
+
+
+class TestLSHIndex:
+    """LSHバンドインデックスのテスト"""
+
+    def test_query_finds_near_duplicate_only(self):
+        """近似重複だけが候補になること"""
+        hasher = MinHasher()
+        index = LSHIndex()
+        index.add(1, _signature(hasher, BASE_CONTENT))
+        index.add(2, _signature(hasher, "VPNに接続できない場合は証明書を更新してください。"))
+
+        matches = index.query(_signature(hasher, NEAR_DUPLICATE_CONTENT), threshold=0.5)
+        assert [key for key, _ in matches] == [1]
+        assert matches[0][1] > 0.7
+
+    def test_remove_and_exclude(self):
+        """削除したキー・除外キーは返さないこと"""
+        hasher = MinHasher()
+        index = LSHIndex()
+        signature = _signature(hasher, BASE_CONTENT)
+        index.add(1, signature)
+        index.add(2, signature)
+
+        assert [key for key, _ in index.query(signature, exclude=1)] == [2]
+        index.remove(2)
+        assert len(index) == 1
+        assert index.query(signature, exclude=1) == []
+
+    def test_signatures_stored_compactly(self):
+        """署名は保存形式のバイト列で保持し、バンドのキーは整数であること"""
+        hasher = MinHasher()
+        index = LSHIndex()
+        signature = _signature(hasher, BASE_CONTENT)
+        index.add(1, MinHasher.to_bytes(signature))
+        index.add(2, signature)
+
+        assert all(isinstance(data, bytes) for data in index._signatures.values())
+        assert all(isinstance(key, int) for buckets in index._buckets for key in buckets)
+        assert index.get_signature(1) == signature
+        assert [key for key, _ in index.query(MinHasher.to_bytes(signature))] == [1, 2]
+
+        index.remove(2)
+        assert all(bucket == 1 for buckets in index._buckets for bucket in buckets.values())
+
+    def test_bands_must_divide_num_perm(self):
+        """バンド数が署名長を割り切れない場合はエラー"""
+        with pytest.raises(ValueError):
+            LSHIndex(num_perm=128, bands=30)
+
+
+class TestNearDuplicateIndex:
+    """DB連携した近似重複インデックスのテスト"""
+
+    def test_backfill_and_query_with_different_title(self, test_sqlite_client):
+        """既存ナレッジの署名が補完され、タイトルが異なる近似重複が見つかること"""
+        original_id = test_sqlite_client.create_knowledge(
+            title="Webサーバー障害対応手順", content=BASE_CONTENT, itsm_type="Incident"
+        )
+        test_sqlite_client.create_knowledge(
+            title="VPN接続トラブル", content="証明書の期限切れを確認する。", itsm_type="Incident"
+        )
+
+        index = NearDuplicateIndex(test_sqlite_client)
+        assert index.load() == 2
+
+        results = index.query("nginxダウン時の復旧", NEAR_DUPLICATE_CONTENT)
+        assert [r["id"] for r in results] == [original_id]
+        assert results[0]["near_duplicate_score"] >= index.DEFAULT_THRESHOLD
+
+    def test_incremental_add_and_persistence(self, test_sqlite_client):
+        """追加した署名が即座に検索でき、再読み込み後も残ること"""
+        index = NearDuplicateIndex(test_sqlite_client)
+        index.load()
+        knowledge_id = test_sqlite_client.create_knowledge(
+            title="Webサーバー障害対応手順", content=BASE_CONTENT, itsm_type="Incident"
+        )
+        index.add(knowledge_id, "Webサーバー障害対応手順", BASE_CONTENT)
+        assert index.query("別タイトル", NEAR_DUPLICATE_CONTENT)[0]["id"] == knowledge_id
+
+        reloaded = NearDuplicateIndex(test_sqlite_client)
+        assert reloaded.load() == 1
+        assert reloaded.sync() == {"removed": 0, "added": 0}
+
+    def test_first_query_backfills_in_background(self, test_sqlite_client):
+        """初回の検索は署名を計算せず、未計算分はバックグラウンドで補完すること"""
+        original_id = test_sqlite_client.create_knowledge(
+            title="Webサーバー障害対応手順", content=BASE_CONTENT, itsm_type="Incident"
+        )
+        index = NearDuplicateIndex(test_sqlite_client)
+        index._sync_lock.acquire()
+        try:
+            # 補完が終わるまでは読み込み済みの署名（なし）で検索する
+            assert index.query("nginxダウン時の復旧", NEAR_DUPLICATE_CONTENT) == []
+            assert index.get_stats()["syncing"] is True
+        finally:
+            index._sync_lock.release()
+
+        assert index.wait_for_sync(timeout=10) is True
+        results = index.query("nginxダウン時の復旧", NEAR_DUPLICATE_CONTENT)
+        assert [r["id"] for r in results] == [original_id]
+
+    def test_update_and_delete_are_followed(self, test_sqlite_client):
+        """更新・削除した内容が同期で反映されること"""
+        knowledge_id = test_sqlite_client.create_knowledge(
+            title="Webサーバー障害対応手順", content=BASE_CONTENT, itsm_type="Incident"
+        )
+        index = NearDuplicateIndex(test_sqlite_client, sync_interval_seconds=0)
+        index.load()
+
+        test_sqlite_client.update_knowledge(knowledge_id, content="プリンターの紙詰まり対応。")
+        assert index.query("Webサーバー", BASE_CONTENT) == []
+
+        with test_sqlite_client.get_connection() as conn:
+            conn.execute("DELETE FROM knowledge_entries WHERE id = ?", (knowledge_id,))
+            conn.commit()
+        index.sync()
+        assert len(index.lsh) == 0
+
+
+class TestDuplicateDetectionWithCandidates:
+    """近似重複候補を使った重複判定のテスト"""
+
+    def test_qa_flags_same_content_with_different_title(self):
+        """内容がほぼ同一ならタイトルが異なっても高類似度と判定すること"""
+        qa = QASubAgent()
+        candidate = {"id": 7, "title": "Webサーバー障害対応手順", "content": BASE_CONTENT}
+        result = qa._detect_duplicates("nginx停止時の復旧", BASE_CONTENT, [candidate])
+        assert result["high_similarity_count"] == 1
+        assert result["similar_knowledge"][0]["knowledge_id"] == 7
+
+    def test_hook_falls_back_to_near_duplicates(self):
+        """QA結果がない場合は近似重複候補で警告すること"""
+        hook = DuplicateCheckHook()
+        response = hook.execute(
+            {
+                "title": "nginx停止時の復旧",
+                "content": BASE_CONTENT,
+                "qa_result": {},
+                "near_duplicates": [
+                    {"id": 7, "title": "Webサーバー障害対応手順", "near_duplicate_score": 0.9}
+                ],
+            }
+        )
+        assert response.result == HookResult.WARNING
+        assert response.details["similar_knowledge"][0]["knowledge_id"] == 7
@@ -0,0 +1,127 @@
+"""
+サブエージェント プロセスプール 単体テスト
+src/agents/process_pool.py と WorkflowEngine / SubAgentExecutor の process バックエンドをテスト
+"""
+
+import pytest
+
+from src.agents.executor import SubAgentExecutor
+from src.agents.process_pool import (
+    SubAgentProcessPool,
+    class_path_of,
+    minimal_payload,
+    validate_backend,
+)
+from src.core.workflow import WorkflowEngine
+from src.subagents import DevOpsSubAgent
+from src.utils.document_analysis import DocumentAnalysis
+
+TITLE = "Webサーバー障害対応"
+CONTENT = "本番環境のnginxがダウンした。原因はディスク容量不足。\n$ df -h\n`systemctl restart nginx` で復旧した。"
+DEVOPS = "src.subagents.devops.DevOpsSubAgent"
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SubAgentProcessPool([DEVOPS], max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+class TestMinimalPayload:
+    """ワーカーへ送る入力のテスト"""
+
+    def test_drops_process_local_values_and_trims_knowledge(self):
+        """解析コンテキストを除き、既存ナレッジを参照フィールドに絞ること"""
+        payload = minimal_payload(
+            {
+                "title": TITLE,
+                "content": CONTENT,
+                "analysis": DocumentAnalysis(TITLE, CONTENT),
+                "existing_knowledge": [
+                    {"id": 1, "title": "t", "content": "c", "markdown": "# 長い本文"}
+                ],
+            }
+        )
+        assert "analysis" not in payload
+        assert payload["existing_knowledge"] == [{"id": 1, "title": "t", "content": "c"}]
+
+    def test_validate_backend(self):
+        """未対応のバックエンドはエラー"""
+        assert validate_backend("process") == "process"
+        with pytest.raises(ValueError):
+            validate_backend("gpu")
+
+    def test_class_path_of(self):
+        """インスタンスからクラスパスを求めること"""
+        assert class_path_of(DevOpsSubAgent()) == DEVOPS
+
+
+class TestSubAgentProcessPool:
+    """SubAgentProcessPoolのテスト"""
+
+    def test_run_in_worker(self, pool):
+        """ワーカープロセスで実行し、to_dict() 形式の結果を返すこと"""
+        result = pool.run(DEVOPS, {"title": TITLE, "content": CONTENT}, timeout=30)
+        expected = DevOpsSubAgent().execute({"title": TITLE, "content": CONTENT})
+
+        assert result["status"] == "success"
+        assert result["data"] == expected.data
+
+    def test_submit_after_shutdown(self):
+        """シャットダウン後は投入を受け付けないこと"""
+        pool = SubAgentProcessPool([DEVOPS], max_workers=1, warm=False)
+        pool.shutdown()
+        with pytest.raises(RuntimeError):
+            pool.submit(DEVOPS, {})
+
+
+class TestProcessBackend:
+    """WorkflowEngine / SubAgentExecutor の process バックエンドのテスト"""
+
+    def test_engine_results_match_thread_backend(self, tmp_path):
+        """process バックエンドでもスレッド実行と同じ結果になること"""
+        input_data = {
+            "title": TITLE,
+            "content": CONTENT,
+            "itsm_type": "Incident",
+            "existing_knowledge": [],
+            "analysis": DocumentAnalysis(TITLE, CONTENT),
+        }
+        thread_engine = WorkflowEngine(db_path=str(tmp_path / "thread.db"), max_workers=2)
+        process_engine = WorkflowEngine(
+            db_path=str(tmp_path / "process.db"), max_workers=2, backend="process"
+        )
+        try:
+            expected = thread_engine._execute_subagents_parallel(input_data, 1)
+            results = process_engine._execute_subagents_parallel(input_data, 1)
+        finally:
+            thread_engine.shutdown()
+            process_engine.shutdown()
+
+        def comparable(results):
+            # 生成日時を含むレンダリング結果は比較しない
+            return {
+                name: {k: v for k, v in r["data"].items() if k not in ("markdown", "html")}
+                for name, r in results.items()
+            }
+
+        assert process_engine._process_pool is not None
+        assert comparable(results) == comparable(expected)
+
+    def test_engine_rejects_unknown_backend(self, tmp_path):
+        """未対応のバックエンドではエンジンを生成できないこと"""
+        with pytest.raises(ValueError):
+            WorkflowEngine(db_path=str(tmp_path / "x.db"), backend="gpu")
+
+    def test_executor_process_backend(self):
+        """SubAgentExecutorが設定のclass_nameでワーカー実行すること"""
+        executor = SubAgentExecutor(backend="process")
+        try:
+            result = executor.execute("devops", {"title": TITLE, "content": CONTENT})
+        finally:
+            executor.shutdown()
+
+        assert result.success is True
+        assert result.output["status"] == "success"
+        assert result.output["data"]["commands"]
@@ -0,0 +1,162 @@
+"""
+サブエージェント結果キャッシュ 単体テスト
+src/core/result_cache.py と WorkflowEngine の結果の再利用をテスト
+"""
+
+import pytest
+
+from src.core.result_cache import SubAgentResultCache
+from src.core.workflow import WorkflowEngine
+from src.mcp.sqlite_client import SQLiteClient
+from src.subagents import DevOpsSubAgent, DocumenterSubAgent, QASubAgent
+
+TITLE = "Webサーバー障害対応"
+CONTENT = "本番環境のnginxがダウンした。原因はディスク容量不足。ログを削除して復旧した。"
+INPUT = {"title": TITLE, "content": CONTENT, "itsm_type": "Incident"}
+SUCCESS = {"status": "success", "data": {"k": 1}, "message": None, "execution_time_ms": 5}
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = WorkflowEngine(db_path=str(tmp_path / "cache.db"), max_workers=4)
+    # Markdownの出力先を一時ディレクトリにする
+    monkeypatch.chdir(tmp_path)
+    yield engine
+    engine.shutdown()
+
+
+class TestCacheKey:
+    """キャッシュキーのテスト"""
+
+    def test_key_depends_only_on_declared_fields(self):
+        """参照しないフィールドの変更ではキーが変わらないこと"""
+        devops = DevOpsSubAgent()
+        key = SubAgentResultCache.key_for(devops, INPUT)
+
+        assert SubAgentResultCache.key_for(devops, {**INPUT, "title": "誤字修正"}) == key
+        assert SubAgentResultCache.key_for(devops, {**INPUT, "content": "別の内容"}) != key
+        # 同じ入力でもサブエージェントが違えば別のキー
+        assert SubAgentResultCache.key_for(QASubAgent(), INPUT) != key
+
+    def test_version_changes_key(self, monkeypatch):
+        """CACHE_VERSION を更新すると以前の結果を使わないこと"""
+        devops = DevOpsSubAgent()
+        key = SubAgentResultCache.key_for(devops, INPUT)
+        monkeypatch.setattr(DevOpsSubAgent, "CACHE_VERSION", "2")
+        assert SubAgentResultCache.key_for(devops, INPUT) != key
+
+    def test_cache_inputs_trims_nested_values(self):
+        """既存ナレッジ・依存先の結果は参照するフィールドだけをキーに含めること"""
+        qa_inputs = QASubAgent().cache_inputs(
+            {**INPUT, "existing_knowledge": [{"id": 1, "title": "t", "content": "c", "views": 9}]}
+        )
+        assert qa_inputs["existing_knowledge"] == [{"id": 1, "title": "t", "content": "c"}]
+
+        documenter = DocumenterSubAgent()
+        dependency = {"status": "success", "data": {"tags": ["nginx"]}}
+        fast = documenter.cache_inputs(
+            {**INPUT, "dependency_results": {"knowledge_curator": {**dependency, "execution_time_ms": 1}}}
+        )
+        slow = documenter.cache_inputs(
+            {**INPUT, "dependency_results": {"knowledge_curator": {**dependency, "execution_time_ms": 90}}}
+        )
+        assert fast == slow
+
+    def test_qa_key_includes_near_duplicate_score(self):
+        """QAは結果に含める近似重複スコアが変わればキーも変わること"""
+        qa = QASubAgent()
+        candidate = {"id": 1, "title": "t", "content": "c", "near_duplicate_score": 0.5}
+        key = SubAgentResultCache.key_for(qa, {**INPUT, "existing_knowledge": [candidate]})
+        rescored = {**INPUT, "existing_knowledge": [{**candidate, "near_duplicate_score": 0.9}]}
+        assert SubAgentResultCache.key_for(qa, rescored) != key
+
+
+class TestSubAgentResultCache:
+    """SubAgentResultCacheのテスト"""
+
+    def test_lru_bound_and_stats(self):
+        """件数上限を超えたら最も古く使われた結果を削除すること"""
+        cache = SubAgentResultCache(max_entries=2)
+        cache.put("a", "x", SUCCESS)
+        cache.put("b", "x", SUCCESS)
+        assert cache.get("a") == SUCCESS
+        cache.put("c", "x", SUCCESS)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert len(cache) == 2
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 1, 0.667)
+
+    def test_failed_results_are_not_cached(self):
+        """失敗・タイムアウトの結果は保存しないこと"""
+        cache = SubAgentResultCache()
+        assert cache.put("a", "x", {"status": "failed", "data": {}}) is False
+        assert cache.put("b", "x", {"status": "timeout", "data": {}}) is False
+        assert len(cache) == 0
+
+    def test_returned_results_are_copies(self):
+        """取得した結果を変更してもキャッシュに影響しないこと"""
+        cache = SubAgentResultCache()
+        cache.put("a", "x", SUCCESS)
+        cache.get("a")["data"]["k"] = 2
+        assert cache.get("a")["data"]["k"] == 1
+
+    def test_persistent_tier(self, tmp_path):
+        """SQLiteに保存した結果を別のインスタンスから取得できること"""
+        db_client = SQLiteClient(str(tmp_path / "persist.db"))
+        SubAgentResultCache(db_client=db_client).put("a", "devops", SUCCESS)
+
+        cache = SubAgentResultCache(db_client=db_client)
+        assert cache.get("a") == SUCCESS
+        assert cache.stats()["persistent_hits"] == 1
+        # 2回目はメモリから
+        cache.get("a")
+        assert cache.stats()["persistent_hits"] == 1
+
+
+class TestEngineResultCache:
+    """WorkflowEngine の結果の再利用のテスト"""
+
+    def test_title_fix_reuses_unaffected_subagents(self, engine):
+        """タイトルだけの修正では、タイトルを参照しないサブエージェントを再実行しないこと"""
+        first = engine.process_knowledge(**INPUT)
+        second = engine.process_knowledge(
+            title=TITLE + "（修正）",
+            content=CONTENT,
+            itsm_type="Incident",
+            force_reprocess=True,
+        )
+
+        assert first["subagent_cache"]["hits"] == 0
+        cache = second["subagent_cache"]
+        assert {"devops", "itsm_expert"} <= set(cache["cached_subagents"])
+        assert "knowledge_curator" not in cache["cached_subagents"]
+        assert second["subagent_results"]["devops"]["data"] == (
+            first["subagent_results"]["devops"]["data"]
+        )
+
+        logs = {
+            log["subagent_name"]: log
+            for log in engine.db_client.get_subagent_logs(second["execution_id"])
+        }
+        assert len(logs) == len(engine.subagents)
+        assert logs["devops"]["execution_time_ms"] == 0
+
+    def test_rerun_reports_hit_rate(self, engine):
+        """同じ入力の再実行ではヒット率を結果に含めること"""
+        engine.process_knowledge(**INPUT)
+        rerun = engine.process_knowledge(**INPUT, force_reprocess=True)
+
+        cache = rerun["subagent_cache"]
+        # 既存ナレッジ（1回目の保存分）を参照する architect・qa 以外はヒット
+        assert set(cache["cached_subagents"]) == set(engine.subagents) - {"architect", "qa"}
+        assert cache["hit_rate"] == round(5 / 7, 3)
+
+    def test_cache_can_be_disabled(self, tmp_path):
+        """result_cache_size=0 ではキャッシュしないこと"""
+        engine = WorkflowEngine(db_path=str(tmp_path / "off.db"), result_cache_size=0)
+        try:
+            assert engine.result_cache is None
+        finally:
+            engine.shutdown()
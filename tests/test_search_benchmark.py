@@ -0,0 +1,85 @@
+"""
+検索ベンチマーク テスト
+scripts/benchmark_search.py の評価指標と実行結果の構造をテスト
+"""
+
+import pytest
+
+from scripts.benchmark_search import (
+    build_corpus,
+    compare_with_baseline,
+    load_dataset,
+    ndcg_at_k,
+    percentile,
+    recall_at_k,
+    run_benchmark,
+)
+
+
+class TestSearchMetrics:
+    """評価指標のテスト"""
+
+    def test_ndcg_perfect_ranking(self):
+        """理想順の場合は1.0になること"""
+        assert ndcg_at_k([1, 2, 3], {1: 2, 2: 1}) == pytest.approx(1.0)
+
+    def test_ndcg_penalizes_lower_rank(self):
+        """主回答が下位にあるとスコアが下がること"""
+        top = ndcg_at_k([1, 9, 8], {1: 2})
+        lower = ndcg_at_k([9, 8, 1], {1: 2})
+        assert 0 < lower < top
+
+    def test_ndcg_no_hits(self):
+        """該当なしの場合は0になること"""
+        assert ndcg_at_k([], {1: 2}) == 0.0
+
+    def test_recall_at_k(self):
+        """上位k件に含まれる関連文書の割合を返すこと"""
+        assert recall_at_k([1, 5, 6], {1: 2, 2: 1}) == pytest.approx(0.5)
+        assert recall_at_k([5, 1], {1: 2}, k=1) == 0.0
+
+    def test_percentile_nearest_rank(self):
+        """最近傍順位法で計算されること"""
+        samples = [float(i) for i in range(1, 101)]
+        assert percentile(samples, 50) == 50.0
+        assert percentile(samples, 99) == 99.0
+        assert percentile([], 50) == 0.0
+
+
+class TestSearchBenchmarkRun:
+    """ベンチマーク実行のテスト"""
+
+    def test_dataset_labels_reference_documents(self):
+        """クエリの正解ラベルがすべてデータセット内の文書を指すこと"""
+        dataset = load_dataset()
+        keys = {doc["key"] for doc in dataset["documents"]}
+        for query in dataset["queries"]:
+            assert set(query["relevant"]) <= keys, query["query"]
+            assert query["lang"] in ("ja", "en")
+
+    def test_corpus_is_deterministic(self):
+        """同じシードなら同じコーパスになること"""
+        dataset = load_dataset()
+        assert build_corpus(dataset, 80, seed=1) == build_corpus(dataset, 80, seed=1)
+        assert len(build_corpus(dataset, 80, seed=1)) == 80
+
+    def test_run_benchmark_report_structure(self):
+        """結果JSONに全モードの指標が含まれ、ベースラインと比較できること"""
+        report = run_benchmark(sizes=[40], repeats=1)
+
+        assert report["meta"]["sizes"] == [40]
+        modes = report["results"]["40"]
+        assert set(modes) == {"like", "fts", "intelligent"}
+        for metrics in modes.values():
+            assert 0.0 <= metrics["ndcg_at_10"] <= 1.0
+            assert 0.0 <= metrics["recall_at_10"] <= 1.0
+            assert set(metrics["latency_ms"]) >= {"p50", "p95", "p99"}
+            assert metrics["peak_memory_kb"] >= 0
+            assert set(metrics["by_lang"]) == {"ja", "en"}
+
+        # LIKE検索は日本語の単語クエリで正解を返せること
+        assert modes["like"]["ndcg_at_10"] > 0
+
+        deltas = compare_with_baseline(report, report)
+        assert deltas
+        assert not any(d["regression"] for d in deltas)
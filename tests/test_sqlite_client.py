@@ -214,3 +214,374 @@ class TestSQLiteClientEdgeCases:
 
         results = test_sqlite_client.search_knowledge(query="", limit=3)
         assert len(results) <= 3
+
+
+class TestSQLiteClientFacets:
+    """ファセット付き検索のテスト"""
+
+    def _seed(self, client):
+        client.create_knowledge(
+            title="Webサーバー障害", itsm_type="Incident", content="Webサーバー停止",
+            tags=["サーバー", "障害対応"],
+        )
+        client.create_knowledge(
+            title="Webサーバー根本原因", itsm_type="Problem", content="Webサーバー分析",
+            tags=["サーバー"],
+        )
+        client.create_knowledge(
+            title="VPN接続申請", itsm_type="Request", content="VPNアカウント申請",
+            tags=["ネットワーク"],
+        )
+
+    def test_search_without_facets_returns_list(self, test_sqlite_client):
+        """include_facets未指定の場合は従来通りリストを返すこと"""
+        self._seed(test_sqlite_client)
+        results = test_sqlite_client.search_knowledge(query="Webサーバー")
+        assert isinstance(results, list)
+
+    def test_facets_count_matched_set(self, test_sqlite_client):
+        """ファセットがクエリにマッチした集合のみを集計すること"""
+        self._seed(test_sqlite_client)
+        response = test_sqlite_client.search_knowledge(
+            query="Webサーバー", include_facets=True
+        )
+        assert response["total"] == 2
+        assert len(response["results"]) == 2
+        assert response["facets"]["itsm_type"] == {"Incident": 1, "Problem": 1}
+        assert response["facets"]["tags"]["サーバー"] == 2
+        assert "ネットワーク" not in response["facets"]["tags"]
+        assert response["facets"]["status"] == {"active": 2}
+        assert response["facets"]["created_at"]["7d"] == 2
+        assert response["facets"]["created_at"]["older"] == 0
+
+    def test_facet_total_ignores_limit(self, test_sqlite_client):
+        """総件数とファセットがlimitに影響されないこと"""
+        self._seed(test_sqlite_client)
+        response = test_sqlite_client.search_knowledge(limit=1, include_facets=True)
+        assert len(response["results"]) == 1
+        assert response["total"] == 3
+        assert sum(response["facets"]["itsm_type"].values()) == 3
+
+    def test_facet_cache_invalidated_on_write(self, test_sqlite_client):
+        """書き込み後はキャッシュが破棄されること"""
+        self._seed(test_sqlite_client)
+        first = test_sqlite_client.search_knowledge(include_facets=True)
+        cached = test_sqlite_client.search_knowledge(include_facets=True)
+        assert cached["total"] == first["total"] == 3
+
+        test_sqlite_client.create_knowledge(
+            title="追加ナレッジ", itsm_type="Change", content="パッチ適用"
+        )
+        refreshed = test_sqlite_client.search_knowledge(include_facets=True)
+        assert refreshed["total"] == 4
+        assert refreshed["facets"]["itsm_type"]["Change"] == 1
+
+    def test_status_facet_counts_all_statuses(self, test_sqlite_client):
+        """status ファセットは削除（アーカイブ）済みも数え、総件数・他のファセットは有効なもののみ数えること"""
+        self._seed(test_sqlite_client)
+        knowledge_id = test_sqlite_client.search_knowledge(query="VPN")[0]["id"]
+        assert test_sqlite_client.delete_knowledge(knowledge_id)
+
+        response = test_sqlite_client.search_knowledge(include_facets=True)
+        assert response["facets"]["status"] == {"active": 2, "archived": 1}
+        assert response["total"] == 2
+        assert "Request" not in response["facets"]["itsm_type"]
+        assert "ネットワーク" not in response["facets"]["tags"]
+
+    def test_facet_cache_invalidated_on_every_write_path(self, test_sqlite_client):
+        """知見の追記・一括作成・削除でもキャッシュが破棄されること"""
+        self._seed(test_sqlite_client)
+        knowledge_id = test_sqlite_client.search_knowledge(query="VPN")[0]["id"]
+        test_sqlite_client.search_knowledge(query="VPN", include_facets=True)
+
+        test_sqlite_client.append_knowledge_insights(knowledge_id, ["申請は上長承認が必要"])
+        refreshed = test_sqlite_client.search_knowledge(query="VPN", include_facets=True)
+        assert "申請は上長承認が必要" in refreshed["results"][0]["insights"]
+
+        test_sqlite_client.create_knowledge_batch(
+            [{"title": "VPN切断", "itsm_type": "Incident", "content": "VPNが切断される"}]
+        )
+        assert test_sqlite_client.search_knowledge(query="VPN", include_facets=True)["total"] == 2
+
+        test_sqlite_client.delete_knowledge(knowledge_id)
+        assert test_sqlite_client.search_knowledge(query="VPN", include_facets=True)["total"] == 1
+
+
+class TestSQLiteClientSnippets:
+    """抜粋付き検索のテスト"""
+
+    def test_snippets_exclude_full_content(self, test_sqlite_client):
+        """snippets=True の場合は本文を返さず抜粋を返すこと"""
+        test_sqlite_client.create_knowledge(
+            title="Webサーバー障害",
+            itsm_type="Incident",
+            content="前置き" * 50 + "本番環境のWebサーバーがダウンしました。" + "後続" * 100,
+        )
+        results = test_sqlite_client.search_knowledge(query="ダウン", snippets=True)
+        assert len(results) == 1
+        assert "content" not in results[0]
+        assert "<mark>ダウン</mark>" in results[0]["snippet_html"]
+        assert results[0]["snippet"].startswith("…")
+        assert results[0]["snippet"].endswith("…")
+        assert len(results[0]["snippet"]) <= test_sqlite_client.SNIPPET_LENGTH + 2
+
+    def test_snippets_use_fts_highlight(self, test_sqlite_client):
+        """FTS5で一致する場合は snippet()/highlight() の結果を使うこと"""
+        test_sqlite_client.create_knowledge(
+            title="VPN connection error",
+            itsm_type="Incident",
+            content="The VPN gateway rejected connections after the certificate expired.",
+        )
+        results = test_sqlite_client.search_knowledge(query="vpn", snippets=True)
+        assert results[0]["title_html"] == "<mark>VPN</mark> connection error"
+        assert "<mark>VPN</mark> gateway" in results[0]["snippet_html"]
+
+    def test_snippets_escape_html(self, test_sqlite_client):
+        """抜粋がHTMLエスケープされること"""
+        test_sqlite_client.create_knowledge(
+            title="XSSテスト",
+            itsm_type="Incident",
+            content="<script>alert('xss')</script> を含む内容",
+        )
+        results = test_sqlite_client.search_knowledge(query="内容", snippets=True)
+        assert "<script>" not in results[0]["snippet_html"]
+        assert "&lt;script&gt;" in results[0]["snippet_html"]
+
+    def test_snippets_without_query_use_summary(self, test_sqlite_client):
+        """クエリなしの場合は要約の先頭を抜粋とすること"""
+        test_sqlite_client.create_knowledge(
+            title="要約テスト",
+            itsm_type="Incident",
+            content="本文" * 100,
+            summary_non_technical="利用者向けの要約",
+        )
+        results = test_sqlite_client.search_knowledge(snippets=True)
+        assert results[0]["snippet"] == "利用者向けの要約"
+
+    def test_content_terms_check_full_content(self, test_sqlite_client):
+        """content_terms は抜粋の外にある語も本文全体から判定すること"""
+        test_sqlite_client.create_knowledge(
+            title="DB応答遅延",
+            itsm_type="Incident",
+            content="DBの応答が遅い。" + "調査記録" * 100 + "Performance tuning で解消。",
+        )
+        results = test_sqlite_client.search_knowledge(
+            query="応答", snippets=True, content_terms=["performance", "memory"]
+        )
+        assert "performance" not in results[0]["snippet"].lower()
+        assert results[0]["content_matches"] == ["performance"]
+
+
+class TestSQLiteClientBulkRead:
+    """一括取得・全件イテレータのテスト"""
+
+    def test_get_knowledge_batch_preserves_order(self, test_sqlite_client):
+        """指定順で返し、存在しないIDは含まないこと"""
+        ids = [
+            test_sqlite_client.create_knowledge(
+                title=f"ナレッジ{i}", itsm_type="Incident", content=f"内容{i}"
+            )
+            for i in range(3)
+        ]
+        results = test_sqlite_client.get_knowledge_batch([ids[2], 9999, ids[0], ids[2]])
+        assert [r["id"] for r in results] == [ids[2], ids[0]]
+        assert isinstance(results[0]["tags"], list)
+
+    def test_get_knowledge_batch_chunks_large_id_lists(self, test_sqlite_client):
+        """バインド変数上限を超えるID数でも取得できること"""
+        knowledge_id = test_sqlite_client.create_knowledge(
+            title="ナレッジ", itsm_type="Incident", content="内容"
+        )
+        ids = list(range(100000, 102000)) + [knowledge_id]
+        results = test_sqlite_client.get_knowledge_batch(ids)
+        assert [r["id"] for r in results] == [knowledge_id]
+
+    def test_iter_knowledge_streams_all_rows(self, test_sqlite_client):
+        """batch_size を跨いで全件をID昇順で返すこと"""
+        ids = [
+            test_sqlite_client.create_knowledge(
+                title=f"ナレッジ{i}",
+                itsm_type="Change" if i % 2 else "Incident",
+                content=f"内容{i}",
+            )
+            for i in range(7)
+        ]
+        rows = list(test_sqlite_client.iter_knowledge(batch_size=3))
+        assert [r["id"] for r in rows] == ids
+
+        changes = list(test_sqlite_client.iter_knowledge(itsm_type="Change"))
+        assert all(r["itsm_type"] == "Change" for r in changes)
+        assert len(changes) == 3
+
+        resumed = list(test_sqlite_client.iter_knowledge(since_id=ids[4]))
+        assert [r["id"] for r in resumed] == ids[5:]
+
+
+class TestSQLiteClientNormalizedSearch:
+    """全角・半角・長音の揺れを吸収した検索のテスト"""
+
+    def test_matches_stored_text_as_entered(self, test_sqlite_client):
+        """全角・半角カナのまま保存されたナレッジを同じ表記で検索できること"""
+        vpn_id = test_sqlite_client.create_knowledge(
+            title="ＶＰＮ接続不可", itsm_type="Incident", content="接続できない"
+        )
+        server_id = test_sqlite_client.create_knowledge(
+            title="障害報告", itsm_type="Incident", content="ｻｰﾊﾞ の ＶＰＮ"
+        )
+
+        assert {r["id"] for r in test_sqlite_client.search_knowledge(query="ＶＰＮ")} == {
+            vpn_id, server_id
+        }
+        assert [r["id"] for r in test_sqlite_client.search_knowledge(query="ｻｰﾊﾞ")] == [
+            server_id
+        ]
+
+    def test_normalizes_both_query_and_stored_text(self, test_sqlite_client):
+        """表記の異なるクエリでも、保存されたテキスト側も正規化して一致すること"""
+        vpn_id = test_sqlite_client.create_knowledge(
+            title="ＶＰＮ接続不可", itsm_type="Incident", content="接続できない"
+        )
+        server_id = test_sqlite_client.create_knowledge(
+            title="障害報告", itsm_type="Incident", content="ｻｰﾊﾞｰ の再起動"
+        )
+
+        assert [r["id"] for r in test_sqlite_client.search_knowledge(query="vpn")] == [vpn_id]
+        for query in ("サーバー", "サーバ"):
+            results = test_sqlite_client.search_knowledge(query=query, snippets=True)
+            assert [r["id"] for r in results] == [server_id]
+        assert "search_text" not in test_sqlite_client.get_knowledge(server_id)
+
+    def test_update_refreshes_search_text(self, test_sqlite_client):
+        """タイトル・本文の更新で正規化テキストも更新されること"""
+        knowledge_id = test_sqlite_client.create_knowledge(
+            title="ﾌﾟﾘﾝﾀ障害", itsm_type="Incident", content="印刷できない"
+        )
+        test_sqlite_client.update_knowledge(knowledge_id, title="ﾙｰﾀ障害")
+
+        assert test_sqlite_client.search_knowledge(query="プリンタ") == []
+        assert [r["id"] for r in test_sqlite_client.search_knowledge(query="ルーター")] == [
+            knowledge_id
+        ]
+
+    def test_existing_rows_are_backfilled(self, tmp_path):
+        """search_text 列のない既存DBは列を追加し、既存のナレッジ分を補完すること"""
+        db_path = str(tmp_path / "legacy.db")
+        client = SQLiteClient(db_path)
+        knowledge_id = client.create_knowledge(
+            title="ＤＮＳ障害", itsm_type="Incident", content="名前解決できない"
+        )
+        with client.get_connection() as conn:
+            conn.execute("ALTER TABLE knowledge_entries DROP COLUMN search_text")
+
+        migrated = SQLiteClient(db_path)
+        assert [r["id"] for r in migrated.search_knowledge(query="dns")] == [knowledge_id]
+
+
+class TestSQLiteClientFTSSync:
+    """全文検索索引の同期のテスト"""
+
+    LEGACY_UPDATE_TRIGGER = """
+        DROP TRIGGER knowledge_fts_update;
+        CREATE TRIGGER knowledge_fts_update AFTER UPDATE ON knowledge_entries BEGIN
+            DELETE FROM knowledge_fts WHERE rowid = old.id;
+            INSERT INTO knowledge_fts(rowid, title, summary_technical, summary_non_technical, content)
+            VALUES (new.id, new.title, new.summary_technical, new.summary_non_technical, new.content);
+        END;
+    """
+
+    def test_update_keeps_index_consistent(self, test_sqlite_client):
+        """タイトル・本文を更新しても索引が壊れず、更新後の値で検索できること"""
+        knowledge_id = test_sqlite_client.create_knowledge(
+            title="旧タイトル", itsm_type="Incident", content="ディスク容量不足"
+        )
+        assert test_sqlite_client.update_knowledge(
+            knowledge_id, title="ロードバランサ障害", content="ヘルスチェック失敗"
+        )
+
+        with test_sqlite_client.get_connection() as conn:
+            # 索引と本体が一致しない場合は DatabaseError
+            conn.execute(
+                "INSERT INTO knowledge_fts(knowledge_fts, rank) VALUES('integrity-check', 1)"
+            )
+            matched = conn.execute(
+                "SELECT rowid FROM knowledge_fts WHERE knowledge_fts MATCH ?",
+                ('"ヘルスチェック失敗"',),
+            ).fetchall()
+            stale = conn.execute(
+                "SELECT rowid FROM knowledge_fts WHERE knowledge_fts MATCH ?",
+                ('"ディスク容量不足"',),
+            ).fetchall()
+        assert [row[0] for row in matched] == [knowledge_id]
+        assert stale == []
+
+    def test_legacy_triggers_are_migrated(self, tmp_path):
+        """DELETE FROM で索引を削除する既存DBのトリガーを置き換えること"""
+        db_path = str(tmp_path / "legacy.db")
+        client = SQLiteClient(db_path)
+        with client.get_connection() as conn:
+            conn.executescript(self.LEGACY_UPDATE_TRIGGER)
+
+        migrated = SQLiteClient(db_path)
+        with migrated.get_connection() as conn:
+            sql = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'knowledge_fts_update'"
+            ).fetchone()[0]
+        assert "DELETE FROM knowledge_fts" not in sql
+        assert "'delete'" in sql
+
+
+class TestSQLiteClientDuplicateChecks:
+    """重複検知結果の記録のテスト"""
+
+    def _create_pair(self, client):
+        first = client.create_knowledge(title="元のナレッジ", itsm_type="Incident", content="本文A")
+        second = client.create_knowledge(title="重複候補", itsm_type="Incident", content="本文B")
+        return first, second
+
+    def _count(self, client):
+        with client.get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM duplicate_checks").fetchone()[0]
+
+    def test_same_pair_recorded_once(self, test_sqlite_client):
+        """同じ組み合わせは一括記録・個別記録のどちらでも1件だけ記録すること"""
+        first, second = self._create_pair(test_sqlite_client)
+
+        assert test_sqlite_client.record_duplicate_checks([(second, first, 0.9)]) == 1
+        assert test_sqlite_client.record_duplicate_checks(
+            [(second, first, 0.95), (first, second, 0.9)]
+        ) == 1
+        check_id = test_sqlite_client.record_duplicate_check(second, first, 0.8)
+
+        with test_sqlite_client.get_connection() as conn:
+            existing = conn.execute(
+                "SELECT id FROM duplicate_checks WHERE knowledge_id = ? AND potential_duplicate_id = ?",
+                (second, first),
+            ).fetchone()[0]
+        assert check_id == existing
+        assert self._count(test_sqlite_client) == 2
+
+    def test_pair_index_migrated(self, tmp_path):
+        """一意索引のない既存DBは重複行を整理して索引を追加すること"""
+        db_path = str(tmp_path / "legacy.db")
+        client = SQLiteClient(db_path)
+        first, second = self._create_pair(client)
+        with client.get_connection() as conn:
+            conn.execute("DROP INDEX idx_duplicate_pair")
+            conn.executemany(
+                """
+                INSERT INTO duplicate_checks (
+                    knowledge_id, potential_duplicate_id, similarity_score, check_type, status
+                ) VALUES (?, ?, 0.9, 'semantic', ?)
+                """,
+                [(second, first, "pending"), (second, first, "confirmed"), (second, first, "pending")],
+            )
+            conn.commit()
+
+        migrated = SQLiteClient(db_path)
+        with migrated.get_connection() as conn:
+            rows = conn.execute("SELECT status FROM duplicate_checks").fetchall()
+            index = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_duplicate_pair'"
+            ).fetchone()
+        assert [row[0] for row in rows] == ["confirmed"]
+        assert index is not None and "UNIQUE" in index[0]
@@ -0,0 +1,161 @@
+"""
+サブエージェント実行ランタイム 単体テスト
+src/core/subagent_runtime.py と WorkflowEngine からの利用をテスト
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core.subagent_runtime import SubAgentRuntime
+from src.core.workflow import WorkflowEngine
+
+
+@pytest.fixture
+def runtime():
+    runtime = SubAgentRuntime(max_workers=2, name="test-runtime")
+    yield runtime
+    runtime.shutdown()
+
+
+class TestSubAgentRuntime:
+    """SubAgentRuntimeのテスト"""
+
+    def test_run_from_many_threads_without_event_loop(self, runtime):
+        """イベントループを持たない複数スレッドから同時に実行できること"""
+
+        async def work(value):
+            return await runtime.run_in_executor(lambda v: v * 2, value)
+
+        with ThreadPoolExecutor(max_workers=8) as callers:
+            results = list(callers.map(lambda v: runtime.run(work(v)), range(20)))
+
+        assert results == [v * 2 for v in range(20)]
+        stats = runtime.stats()
+        assert stats["completed"] == 20
+        assert stats["peak_active"] <= 2
+        assert stats["loop_running"] is True
+
+    def test_run_from_loop_thread_is_rejected(self, runtime):
+        """ループのスレッドから run() するとデッドロックせずエラーになること"""
+
+        async def nested():
+            inner = nested_inner()
+            with pytest.raises(RuntimeError):
+                runtime.run(inner)
+            return "ok"
+
+        async def nested_inner():
+            return None
+
+        assert runtime.run(nested()) == "ok"
+
+    def test_saturation_metrics(self, runtime):
+        """全ワーカー使用中の投入が飽和として記録されること"""
+        release = threading.Event()
+        futures = [runtime.submit(release.wait, 5) for _ in range(4)]
+
+        stats = runtime.stats()
+        assert stats["saturated_submissions"] == 2
+        assert stats["active"] + stats["queued"] == 4
+
+        release.set()
+        for future in futures:
+            future.result(5)
+        stats = runtime.stats()
+        assert stats["active"] == 0 and stats["queued"] == 0
+        assert stats["saturation"] == 0.0
+
+    def test_timed_out_work_is_not_free_capacity(self, runtime):
+        """タイムアウト後も実行中の処理は abandoned として数え、終わるまでワーカーを空けないこと"""
+        release = threading.Event()
+
+        async def wait_briefly():
+            await asyncio.wait_for(runtime.run_in_executor(release.wait, 5), 0.05)
+
+        with pytest.raises(asyncio.TimeoutError):
+            runtime.run(wait_briefly())
+        stats = runtime.stats()
+        assert stats["abandoned"] == 1
+        assert stats["active"] == 1 and stats["available"] == 1
+
+        release.set()
+        for _ in range(50):
+            if runtime.stats()["active"] == 0:
+                break
+            time.sleep(0.01)
+        stats = runtime.stats()
+        assert stats["abandoned"] == 0 and stats["available"] == 2
+
+    def test_cancelled_before_start_leaves_queue(self, runtime):
+        """開始前にタイムアウトした処理は実行せず、待ち件数にも残さないこと"""
+        release = threading.Event()
+        busy = [runtime.submit(release.wait, 5) for _ in range(2)]
+        called = []
+
+        async def wait_briefly():
+            await asyncio.wait_for(runtime.run_in_executor(called.append, 1), 0.05)
+
+        with pytest.raises(asyncio.TimeoutError):
+            runtime.run(wait_briefly())
+        release.set()
+        for future in busy:
+            future.result(5)
+
+        stats = runtime.stats()
+        assert called == []
+        assert stats["queued"] == 0 and stats["abandoned"] == 0
+        assert stats["cancelled_before_start"] == 1
+
+    def test_shutdown(self):
+        """シャットダウン後はループが止まり、実行を受け付けないこと"""
+        runtime = SubAgentRuntime(max_workers=1)
+        runtime.shutdown()
+
+        assert runtime.stats()["loop_running"] is False
+
+        async def noop():
+            return None
+
+        with pytest.raises(RuntimeError):
+            runtime.run(noop())
+        runtime.shutdown()  # 二重呼び出しでもエラーにならない
+
+    def test_invalid_max_workers(self):
+        """ワーカー数が0以下の場合はエラー"""
+        with pytest.raises(ValueError):
+            SubAgentRuntime(max_workers=0)
+
+
+class TestWorkflowEngineRuntime:
+    """WorkflowEngineの常駐プール利用のテスト"""
+
+    def test_concurrent_parallel_execution_reuses_pool(self, tmp_path):
+        """並行リクエストでもループ・ワーカーを使い回すこと"""
+        engine = WorkflowEngine(db_path=str(tmp_path / "runtime.db"), max_workers=4)
+        engine._execute_single_subagent = lambda name, data, eid: {
+            "status": "success",
+            "data": {"name": name},
+        }
+        input_data = {"title": "t", "content": "c", "itsm_type": "Other"}
+
+        try:
+            with ThreadPoolExecutor(max_workers=4) as callers:
+                results = list(
+                    callers.map(
+                        lambda i: engine._execute_subagents_parallel(input_data, i),
+                        range(8),
+                    )
+                )
+
+            assert all(set(r) == set(engine.subagents) for r in results)
+            # 生成されたワーカースレッドはプールの上限まで
+            assert 0 < len(engine.runtime._executor._threads) <= 4
+            assert engine.runtime.stats()["completed"] == 8 * len(engine.subagents)
+        finally:
+            engine.shutdown()
+
+        assert engine._runtime.closed
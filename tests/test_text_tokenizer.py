@@ -0,0 +1,82 @@
+"""
+TextTokenizer 単体テスト
+src/utils/text_tokenizer.py のテスト
+"""
+
+import pytest
+
+from src.utils.text_tokenizer import (
+    TextTokenizer,
+    char_ngrams,
+    fold_long_vowels,
+    normalize_text,
+    text_similarity,
+)
+
+
+class TestNormalizeText:
+    """正規化のテスト"""
+
+    def test_width_folding(self):
+        """全角英数・半角カナが統一されること"""
+        assert normalize_text("ＶＰＮ　エラー") == "vpn エラ"
+        assert normalize_text("ｻｰﾊﾞｰ", fold_long_vowel=False) == "サーバー"
+
+    def test_long_vowel_folding(self):
+        """語末の長音が除去され、語中の長音は残ること"""
+        assert fold_long_vowels("サーバー") == "サーバ"
+        assert fold_long_vowels("データベース") == "データベース"
+        assert fold_long_vowels("サーバ-の障害") == "サーバの障害"
+
+    def test_keep_case(self):
+        """lowercase=False の場合は大文字小文字を保持すること"""
+        assert normalize_text("VPN サーバー", lowercase=False) == "VPN サーバ"
+
+    def test_empty(self):
+        """空文字列は空文字列を返すこと"""
+        assert normalize_text("") == ""
+
+
+class TestTextTokenizer:
+    """トークナイザのテスト"""
+
+    def test_char_ngrams(self):
+        """bigram/trigramが生成され、短いセグメントはそのまま返ること"""
+        assert char_ngrams("障害発生") == ["障害", "害発", "発生", "障害発", "害発生"]
+        assert char_ngrams("a") == ["a"]
+
+    def test_words_split_by_script(self):
+        """文字種境界で単語分割されること"""
+        tokenizer = TextTokenizer()
+        words = tokenizer.tokenize("VPN接続エラーが発生した").words
+        assert words == ["vpn", "接続", "エラー", "が", "発生", "した"]
+
+    def test_japanese_similarity(self):
+        """空白のない日本語文でも類似度が計算されること"""
+        similarity = text_similarity(
+            "本番サーバーでディスク容量不足が発生した",
+            "本番サーバでディスク容量不足が発生しました",
+        )
+        assert similarity > 0.7
+        assert text_similarity("データベース接続エラー", "会議室の予約") == 0.0
+
+    def test_long_vowel_variants_are_identical(self):
+        """長音の揺れのみの違いは同一とみなされること"""
+        assert text_similarity("サーバーが停止", "サーバが停止") == pytest.approx(1.0)
+
+    def test_tokenize_is_cached(self):
+        """同じテキストのトークン化結果は再利用されること"""
+        tokenizer = TextTokenizer()
+        first = tokenizer.tokenize("障害対応の手順")
+        second = tokenizer.tokenize("障害対応の手順")
+        assert first is second
+        assert tokenizer.hits == 1
+        assert tokenizer.misses == 1
+
+    def test_cache_is_bounded(self):
+        """キャッシュ件数が上限を超えないこと"""
+        tokenizer = TextTokenizer(cache_size=2)
+        first = tokenizer.tokenize("a")
+        tokenizer.tokenize("b")
+        tokenizer.tokenize("c")
+        assert tokenizer.tokenize("a") is not first
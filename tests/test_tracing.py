@@ -0,0 +1,162 @@
+"""
+ワークフローのトレース 単体テスト
+src/utils/tracing.py・src/core/trace_store.py と WorkflowEngine のスパン記録をテスト
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core.workflow import WorkflowEngine
+from src.utils import tracing
+
+TITLE = "Webサーバー障害対応"
+CONTENT = "本番環境のnginxがダウンした。原因はディスク容量不足。ログを削除して復旧した。"
+
+
+class TestSpans:
+    """スパンのテスト"""
+
+    def test_nested_spans_and_sink(self):
+        """子スパンは親のIDを持ち、トレース終了時にまとめて保存先へ渡すこと"""
+        saved = []
+        with tracing.start_trace("root", sink=saved.append, run=1) as root:
+            with tracing.span("child", step=1) as child:
+                with tracing.span("grandchild"):
+                    pass
+            assert saved == []
+
+        spans = {s["name"]: s for s in saved[0]}
+        assert set(spans) == {"root", "child", "grandchild"}
+        assert spans["root"]["parent_id"] is None
+        assert spans["child"]["parent_id"] == root.span_id
+        assert spans["grandchild"]["parent_id"] == child.span_id
+        assert spans["child"]["attributes"] == {"step": 1}
+        assert {s["trace_id"] for s in saved[0]} == {root.trace.trace_id}
+
+    def test_span_outside_trace_is_noop(self):
+        """トレース外の span() は何も記録しないこと"""
+        with tracing.span("orphan") as span:
+            span.set_attribute("ignored", True)
+        assert span is tracing.NOOP_SPAN
+        assert tracing.current_span() is None
+
+    def test_exception_marks_error(self):
+        """例外で終わったスパンはエラーとして記録すること"""
+        saved = []
+        with pytest.raises(ValueError):
+            with tracing.start_trace("root", sink=saved.append):
+                with tracing.span("failing"):
+                    raise ValueError("boom")
+
+        spans = {s["name"]: s for s in saved[0]}
+        assert spans["failing"]["status"] == "error"
+        assert spans["failing"]["attributes"]["error"] == "boom"
+
+    def test_bind_propagates_to_threads_and_late_spans(self):
+        """bind() した関数のスパンは親の子となり、トレース終了後のスパンも保存すること"""
+        saved = []
+        release = threading.Event()
+
+        def work():
+            release.wait(5)
+            with tracing.span("background"):
+                pass
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        with tracing.start_trace("root", sink=saved.append) as root:
+            future = executor.submit(tracing.bind(work))
+        release.set()
+        future.result(5)
+        executor.shutdown()
+
+        assert len(saved) == 2
+        assert [s["name"] for s in saved[1]] == ["background"]
+        assert saved[1][0]["parent_id"] == root.span_id
+
+
+class TestFormats:
+    """出力形式のテスト"""
+
+    SPANS = [
+        {"span_id": "b", "parent_id": "a", "name": "child", "start_time": 100.010,
+         "duration_ms": 5.0, "status": "ok", "thread_name": "worker", "attributes": {"k": 1}},
+        {"span_id": "a", "parent_id": None, "name": "root", "start_time": 100.0,
+         "duration_ms": 20.0, "status": "ok", "thread_name": "main", "attributes": {}},
+    ]
+
+    def test_waterfall(self):
+        """開始順に並べ、開始からの経過と階層の深さを付けること"""
+        rows = tracing.waterfall(self.SPANS)
+        assert [r["name"] for r in rows] == ["root", "child"]
+        assert [r["depth"] for r in rows] == [0, 1]
+        assert rows[1]["offset_ms"] == pytest.approx(10.0)
+
+    def test_chrome_trace(self):
+        """スレッドごとの行と完了イベント（μs単位）に変換すること"""
+        trace = tracing.to_chrome_trace(self.SPANS)
+        events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        threads = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+
+        assert [e["name"] for e in events] == ["root", "child"]
+        assert events[1]["dur"] == 5000
+        assert events[1]["ts"] - events[0]["ts"] == pytest.approx(10000, abs=1)
+        assert events[1]["args"]["k"] == 1
+        assert {t["args"]["name"] for t in threads} == {"main", "worker"}
+
+
+class TestEngineTracing:
+    """WorkflowEngine のスパン記録のテスト"""
+
+    @pytest.fixture
+    def engine(self, tmp_path, monkeypatch):
+        engine = WorkflowEngine(db_path=str(tmp_path / "trace.db"), max_workers=4)
+        # Markdownの出力先を一時ディレクトリにする
+        monkeypatch.chdir(tmp_path)
+        yield engine
+        engine.shutdown()
+
+    def test_process_knowledge_records_phases(self, engine):
+        """各フェーズ・フック・サブエージェント・DB書き込みのスパンを記録すること"""
+        result = engine.process_knowledge(TITLE, CONTENT, "Incident")
+        assert engine.enrichment.wait(5)
+
+        spans = engine.trace_store.get_spans(result["execution_id"])
+        by_name = {s["name"]: s for s in spans}
+        for name in (
+            "process_knowledge",
+            "hook.pre_task",
+            "duplicate_search",
+            "subagents",
+            "subagent.devops",
+            "quality_check",
+            "hook.post_task",
+            "db.save_knowledge",
+            "markdown.write",
+            "mcp_enrichment",
+        ):
+            assert name in by_name, name
+
+        root = by_name["process_knowledge"]
+        assert root["attributes"]["knowledge_id"] == result["knowledge_id"]
+        assert by_name["subagents"]["parent_id"] == root["span_id"]
+        assert by_name["subagent.devops"]["parent_id"] == by_name["subagents"]["span_id"]
+        # プールのスレッドで実行したサブエージェントの処理もサブエージェントのスパンの子
+        agent_spans = [s for s in spans if s["name"] == "agent.process"]
+        assert len(agent_spans) == len(engine.subagents)
+        devops_process = next(s for s in agent_spans if s["attributes"]["agent"] == "devops")
+        assert devops_process["parent_id"] == by_name["subagent.devops"]["span_id"]
+        # 保存後のMCP補強は同じトレースに追加される
+        assert by_name["mcp_enrichment"]["trace_id"] == root["trace_id"]
+
+        chrome = engine.trace_store.chrome_trace(result["execution_id"])
+        assert len([e for e in chrome["traceEvents"] if e["ph"] == "X"]) == len(spans)
+
+    def test_tracing_can_be_disabled(self, tmp_path):
+        """trace_workflows=False ではスパンを記録しないこと"""
+        engine = WorkflowEngine(db_path=str(tmp_path / "off.db"), trace_workflows=False)
+        try:
+            assert engine.trace_store is None
+        finally:
+            engine.shutdown()
@@ -0,0 +1,138 @@
+"""
+ナレッジ一括処理 単体テスト
+WorkflowEngine.process_knowledge_batch と BatchDuplicateIndex をテスト
+"""
+
+import sqlite3
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.core.duplicate_index import BatchDuplicateIndex
+from src.core.workflow import WorkflowEngine
+
+WEB = {
+    "title": "Webサーバー障害対応",
+    "content": "本番環境のnginxがダウンした。原因はディスク容量不足。ログを削除して復旧した。",
+    "itsm_type": "Incident",
+}
+VPN = {
+    "title": "VPN接続不可",
+    "content": "リモートからVPNに接続できない。証明書の期限切れが原因。更新して解決した。",
+    "itsm_type": "Incident",
+}
+BACKUP = {
+    "title": "DBバックアップ手順",
+    "content": "毎日深夜にmysqldumpでバックアップを取得する。保存先はNAS。",
+    "itsm_type": "Change",
+}
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = WorkflowEngine(db_path=str(tmp_path / "batch.db"), max_workers=4)
+    # Markdownの出力先を一時ディレクトリにする
+    monkeypatch.chdir(tmp_path)
+    yield engine
+    engine.shutdown()
+
+
+def count_rows(engine, table):
+    conn = sqlite3.connect(engine.db_client.db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]  # nosec B608
+    finally:
+        conn.close()
+
+
+class TestProcessKnowledgeBatch:
+    """process_knowledge_batchのテスト"""
+
+    def test_batch_results(self, engine):
+        """各項目が処理され、バッチ内の重複は先の投稿のIDを返すこと"""
+        items = [WEB, VPN, dict(WEB), {"title": "", "content": ""}, BACKUP]
+        results = {
+            r["index"]: r
+            for r in engine.process_knowledge_batch(items, concurrency=2, chunk_size=3)
+        }
+
+        assert sorted(results) == [0, 1, 2, 3, 4]
+        assert results[0]["success"] and results[0]["markdown_path"]
+        assert results[2]["duplicate_of"] == results[0]["knowledge_id"]
+        assert results[2]["batch_duplicate_of"] == 0
+        assert results[2]["match_type"] == "exact"
+        assert results[3]["success"] is False
+        assert "subagent_results" in results[4]
+
+        assert count_rows(engine, "knowledge_entries") == 3
+        assert count_rows(engine, "subagent_logs") == 3 * len(engine.subagents)
+        executions = engine.db_client.get_recent_workflow_executions(10)
+        assert sorted(e["status"] for e in executions) == ["completed"] * 4 + ["failed"]
+        saved = engine.db_client.get_knowledge(results[4]["knowledge_id"])
+        assert saved["markdown_path"] == results[4]["markdown_path"]
+
+    def test_resubmission_of_existing_knowledge(self, engine):
+        """既存ナレッジと同一の投稿はサブエージェントを実行しないこと"""
+        first = list(engine.process_knowledge_batch([WEB]))
+        second = list(engine.process_knowledge_batch([dict(WEB), VPN]))
+
+        duplicate = next(r for r in second if r["index"] == 0)
+        assert duplicate["duplicate_of"] == first[0]["knowledge_id"]
+        assert "batch_duplicate_of" not in duplicate
+        assert count_rows(engine, "knowledge_entries") == 2
+
+    def test_writes_are_grouped_per_chunk(self, engine):
+        """ログ・ナレッジは1件ずつではなくチャンクごとに書き込むこと"""
+        db_client = engine.db_client
+        db_client.log_subagent_execution = MagicMock(side_effect=AssertionError)
+        db_client.log_hook_execution = MagicMock(side_effect=AssertionError)
+        db_client.create_knowledge = MagicMock(side_effect=AssertionError)
+        record_batch = MagicMock(wraps=db_client.record_workflow_batch)
+        db_client.record_workflow_batch = record_batch
+
+        results = list(
+            engine.process_knowledge_batch([WEB, VPN, BACKUP], concurrency=3, chunk_size=2)
+        )
+
+        assert all(r["success"] for r in results)
+        assert record_batch.call_count == 2
+
+    def test_results_stream_per_chunk(self, engine):
+        """入力を読み切る前に、処理済みチャンクの結果を返すこと"""
+        consumed = []
+
+        def items():
+            for item in (WEB, VPN, BACKUP):
+                consumed.append(item["title"])
+                yield item
+
+        results = engine.process_knowledge_batch(items(), chunk_size=1)
+        first = next(results)
+
+        assert first["index"] == 0
+        assert len(consumed) == 1
+        assert len(list(results)) == 2
+
+    def test_invalid_arguments(self, engine):
+        """concurrency・chunk_size が1未満の場合は呼び出し時にエラー"""
+        with pytest.raises(ValueError):
+            engine.process_knowledge_batch([WEB], concurrency=0)
+
+
+class TestBatchDuplicateIndex:
+    """BatchDuplicateIndexのテスト"""
+
+    def test_detects_duplicates_within_batch(self, engine):
+        """同一・ほぼ同一の投稿を先の位置で返し、それ以外は登録すること"""
+        batch_index = BatchDuplicateIndex(engine.duplicate_index)
+
+        assert batch_index.check(0, WEB["title"], WEB["content"])["duplicate_of"] is None
+        assert batch_index.check(1, VPN["title"], VPN["content"])["duplicate_of"] is None
+
+        exact = batch_index.check(2, WEB["title"], WEB["content"])
+        assert (exact["duplicate_of"], exact["match_type"]) == (0, "exact")
+
+        near = batch_index.check(3, WEB["title"], WEB["content"] + "。")
+        assert near["duplicate_of"] == 0
+        assert near["match_type"] in ("exact", "near_exact")
+        assert len(batch_index.lsh) == 2
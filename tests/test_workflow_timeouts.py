@@ -0,0 +1,277 @@
+"""
+ワークフローのタイムアウト 単体テスト
+src/utils/deadline.py と WorkflowEngine の期限・サブエージェント単体のタイムアウトをテスト
+"""
+
+import json
+import sqlite3
+import subprocess
+import sys
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.core.workflow import WorkflowEngine
+from src.mcp.mcp_client_base import MCPClientBase
+from src.mcp.mcp_integration import MCPIntegration
+from src.mcp.sqlite_client import SQLiteClient
+from src.subagents import QASubAgent
+from src.utils.deadline import Deadline, DeadlineExceeded, deadline_scope
+
+TITLE = "Webサーバー障害対応"
+CONTENT = "本番環境のnginxがダウンした。原因はディスク容量不足。ログを削除して復旧した。"
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = WorkflowEngine(
+        db_path=str(tmp_path / "timeouts.db"), max_workers=8, subagent_timeout=0.3
+    )
+    # Markdownの出力先を一時ディレクトリにする
+    monkeypatch.chdir(tmp_path)
+    yield engine
+    engine.shutdown()
+
+
+def hang(engine, name, seconds=1.0):
+    """サブエージェントを応答しない状態にする"""
+    agent = engine.subagents[name]
+    execute = agent.execute
+
+    def slow_execute(input_data):
+        time.sleep(seconds)
+        return execute(input_data)
+
+    agent.execute = slow_execute
+
+
+def subagent_log_statuses(engine, execution_id):
+    return {
+        log["subagent_name"]: log["status"]
+        for log in engine.db_client.get_subagent_logs(execution_id)
+    }
+
+
+class TestDeadline:
+    """Deadlineのテスト"""
+
+    def test_cap_and_child(self):
+        """待ち時間を残り時間以内に制限し、子の期限は親を超えないこと"""
+        deadline = Deadline(0.5)
+        assert deadline.cap(60) <= 0.5
+        assert deadline.cap(0.1) == 0.1
+        assert deadline.child(60).remaining() <= 0.5
+
+        unlimited = Deadline(None)
+        assert unlimited.remaining() is None
+        assert unlimited.cap(None) is None
+        assert unlimited.cap(3) == 3
+
+    def test_cancel_and_check(self):
+        """親のキャンセルは子に伝わり、子のキャンセルは親に影響しないこと"""
+        parent = Deadline(None)
+        child = parent.child(10)
+
+        child.cancel()
+        assert child.expired and not parent.expired
+
+        other = parent.child(10)
+        parent.cancel()
+        assert other.expired
+        with pytest.raises(DeadlineExceeded):
+            other.check("test")
+
+    def test_deadline_exceeded_is_timeout_error(self):
+        """DeadlineExceeded は TimeoutError として扱えること"""
+        with pytest.raises(TimeoutError):
+            Deadline(0).check("stage")
+
+
+class TestSubAgentTimeouts:
+    """サブエージェント単体のタイムアウトのテスト"""
+
+    def test_hung_subagent_returns_partial_results(self, engine):
+        """応答しないサブエージェントはタイムアウトとし、他の結果で続行すること"""
+        hang(engine, "devops")
+        execution_id = engine.db_client.create_workflow_execution("knowledge_generation")
+
+        started = time.perf_counter()
+        results = engine._execute_subagents_parallel(
+            {"title": TITLE, "content": CONTENT, "itsm_type": "Incident"}, execution_id
+        )
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.9
+        assert results["devops"]["status"] == "timeout"
+        assert results["architect"]["status"] in ("success", "warning")
+        # 依存先がタイムアウトしても後続は実行される
+        assert results["documenter"]["status"] in ("success", "warning")
+
+        # 遅れて終わった処理は記録しない
+        time.sleep(1.0)
+        statuses = subagent_log_statuses(engine, execution_id)
+        assert statuses["devops"] == "timeout"
+        assert len(engine.db_client.get_subagent_logs(execution_id)) == len(engine.subagents)
+
+    def test_process_knowledge_records_timeouts(self, engine):
+        """タイムアウトしたサブエージェントを除いてナレッジを作成すること"""
+        hang(engine, "qa")
+
+        result = engine.process_knowledge(TITLE, CONTENT, "Incident")
+
+        assert result["success"] is True
+        assert result["timed_out_subagents"] == ["qa"]
+        statuses = subagent_log_statuses(engine, result["execution_id"])
+        assert statuses["qa"] == "timeout"
+
+    def test_expired_deadline_fails_fast(self, engine):
+        """期限切れの場合はサブエージェントを実行せずに失敗とすること"""
+        result = engine.process_knowledge(TITLE, CONTENT, "Incident", timeout=0)
+
+        assert result["success"] is False
+        assert result["timed_out"] is True
+        assert engine.db_client.get_subagent_logs(result["execution_id"]) == []
+        execution = engine.db_client.get_workflow_execution(result["execution_id"])
+        assert execution["status"] == "failed"
+
+    def test_timed_out_subagent_stops_at_checkpoint(self, engine):
+        """タイムアウトしたサブエージェントは区切りで打ち切り、ワーカーを空けること"""
+        qa = engine.subagents["qa"]
+        analysis = qa.get_analysis(TITLE, CONTENT)
+        compared = []
+
+        def slow_title_similarity(title):
+            compared.append(title)
+            time.sleep(0.1)
+            return 0.0
+
+        analysis.title_similarity = slow_title_similarity
+        qa.get_analysis = lambda *args, **kwargs: analysis
+        existing = [{"id": i, "title": f"候補{i}", "content": ""} for i in range(20)]
+
+        result = engine.runtime.run(
+            engine._execute_subagent_async(
+                "qa", {"title": TITLE, "content": CONTENT, "existing_knowledge": existing}, 1
+            )
+        )
+        time.sleep(0.5)
+
+        assert result["status"] == "timeout"
+        assert len(compared) < 10
+        assert engine.runtime.stats()["abandoned"] == 0
+
+    def test_subagent_checks_current_deadline(self):
+        """期限切れの実行中の期限の下では処理せず timeout を返すこと"""
+        qa = QASubAgent()
+        qa.process = MagicMock(side_effect=AssertionError)
+
+        with deadline_scope(Deadline(0)):
+            result = qa.execute({"title": TITLE, "content": CONTENT})
+
+        assert result.status == "timeout"
+        qa.process.assert_not_called()
+
+    def test_sequential_fallback_stops_at_deadline(self, engine):
+        """順次実行は期限切れ以降のサブエージェントを実行しないこと"""
+        for agent in engine.subagents.values():
+            agent.execute = MagicMock(side_effect=AssertionError)
+
+        results = engine._execute_subagents_sequential(
+            {"title": TITLE, "content": CONTENT}, 1, Deadline(0)
+        )
+
+        assert {r["status"] for r in results.values()} == {"timeout"}
+
+
+class TestCooperativeCancellation:
+    """MCP補強の打ち切りのテスト"""
+
+    def test_enrichment_stops_when_deadline_expired(self):
+        """期限切れ後はMCPを呼び出さずに取得済みの分を返すこと"""
+        integration = MCPIntegration()
+        integration._context7 = MagicMock()
+        integration._claude_mem = MagicMock()
+
+        enrichments = integration.enrich_knowledge_with_mcps(
+            "データベース接続エラー", ["nginx"], "Incident", deadline=Deadline(0)
+        )
+
+        assert enrichments == {"timed_out": True}
+        integration._context7.query_documentation.assert_not_called()
+        integration._claude_mem.search_memories.assert_not_called()
+
+    def test_mcp_client_read_bounded_by_deadline(self):
+        """応答しないMCPサーバーの応答待ちを期限で打ち切ること"""
+        client = MCPClientBase(sys.executable, [], timeout=30.0)
+        client._process = subprocess.Popen(
+            [sys.executable, "-c", "import time; time.sleep(10)"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        try:
+            started = time.perf_counter()
+            with deadline_scope(Deadline(0.3)):
+                assert client._send_request("tools/call", {}) is None
+            assert time.perf_counter() - started < 2.0
+        finally:
+            client.disconnect()
+
+    def test_mcp_client_skips_stale_responses(self):
+        """タイムアウトしたリクエストの遅れた応答を読み捨てること"""
+        frames = "".join(
+            f"Content-Length: {len(body)}\r\n\r\n{body}"
+            for body in (
+                json.dumps({"jsonrpc": "2.0", "id": 1, "result": "stale"}),
+                json.dumps({"jsonrpc": "2.0", "id": 2, "result": "fresh"}),
+            )
+        )
+        client = MCPClientBase(sys.executable, [], timeout=5.0)
+        client._process = subprocess.Popen(
+            [sys.executable, "-c", f"import sys; sys.stdout.write({frames!r}); sys.stdout.flush()"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        try:
+            assert client._read_response(2)["result"] == "fresh"
+        finally:
+            client.disconnect()
+
+
+class TestSubAgentLogMigration:
+    """subagent_logs の移行のテスト"""
+
+    def test_existing_database_accepts_timeout_status(self, tmp_path):
+        """作成済みDBの subagent_logs を、記録を残したまま移行すること"""
+        db_path = str(tmp_path / "old.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            """
+            CREATE TABLE subagent_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                workflow_execution_id INTEGER NOT NULL,
+                subagent_name TEXT NOT NULL,
+                role TEXT NOT NULL,
+                input_data TEXT,
+                output_data TEXT,
+                execution_time_ms INTEGER,
+                status TEXT CHECK(status IN ('success', 'failed', 'warning')),
+                message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO subagent_logs (workflow_execution_id, subagent_name, role, status) "
+            "VALUES (1, 'qa', 'qa', 'success')"
+        )
+        conn.commit()
+        conn.close()
+
+        client = SQLiteClient(db_path)
+        client.log_subagent_execution(1, "devops", "devops", status="timeout")
+
+        assert [log["status"] for log in client.get_subagent_logs(1)] == [
+            "success",
+            "timeout",
+        ]